@@ -22,16 +22,19 @@ import os
 import secrets
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from configparser import NoOptionError, NoSectionError
 from os import environ, fdopen, geteuid, makedirs, path
 from shutil import move
 from tempfile import mkstemp
+from threading import Lock
 from typing import TYPE_CHECKING, Any, Optional
 from urllib.parse import urlparse
 
 import requests
 from dogpile.cache import make_region
 from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
 from requests.status_codes import codes
 
@@ -43,7 +46,7 @@ from rucio.common.extra import import_extras
 from rucio.common.utils import build_url, get_tmp_dir, my_key_generator, parse_response, setup_logger, ssh_sign
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Callable, Generator, Iterable
     from logging import Logger
 
 EXTRA_MODULES = import_extras(['requests_kerberos'])
@@ -78,6 +81,8 @@ class BaseClient:
     """Main client class for accessing Rucio resources. Handles the authentication."""
 
     AUTH_RETRIES, REQUEST_RETRIES = 2, 3
+    POOL_CONNECTIONS, POOL_MAXSIZE = 4, 16
+    BATCH_MAX_WORKERS = 8
     TOKEN_PATH_PREFIX = get_tmp_dir() + '/.rucio_'
     TOKEN_PREFIX = 'auth_token_'  # noqa: S105
     TOKEN_EXP_PREFIX = 'auth_token_exp_'  # noqa: S105
@@ -110,7 +115,11 @@ class BaseClient:
         """
 
         self.logger = logger
-        self.session = Session()
+        # connections kept alive per host, and concurrent calls of batch_call
+        self.pool_maxsize = config_get_int('client', 'pool_maxsize', False, self.POOL_MAXSIZE)
+        self.batch_max_workers = config_get_int('client', 'batch_max_workers', False, self.BATCH_MAX_WORKERS)
+        self.session = self._new_session()
+        self._token_lock = Lock()
         self.user_agent = "%s/%s" % (user_agent, version.version_string())  # e.g. "rucio-clients/0.2.13"
         sys.argv[0] = sys.argv[0].split('/')[-1]
         self.script_id = '::'.join(sys.argv[0:2])
@@ -221,6 +230,45 @@ class BaseClient:
         except ValueError:
             self.logger.debug('request_retries must be an integer. Taking default.')
 
+    def _new_session(self) -> Session:
+        """
+        Creates an HTTP session which keeps up to pool_maxsize connections alive per host.
+        """
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=self.POOL_CONNECTIONS, pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def batch_call(self, calls: "Iterable[Callable[[], Any]]", max_workers: Optional[int] = None, return_exceptions: bool = False) -> list[Any]:
+        """
+        Runs independent calls of this client concurrently, over its pool of connections.
+
+        The calls share the auth token of the client: if it expired, the first call which gets
+        an unauthorized error requests a new token and the others reuse it. Calls returning
+        an iterator should consume it, e.g. lambda: list(client.list_content(scope, name)).
+
+        :param calls: the calls, as callables without arguments.
+        :param max_workers: the number of concurrent calls, [client] batch_max_workers by default.
+        :param return_exceptions: if True, the exception raised by a call is returned as its result.
+                                  Otherwise, the exception of the first failed call is raised once all calls are done.
+        :return: the results of the calls, in the order of the calls.
+        """
+        def _run(call):
+            try:
+                return call()
+            except Exception as error:
+                if not return_exceptions:
+                    raise
+                return error
+
+        calls = list(calls)
+        max_workers = min(max_workers or self.batch_max_workers, len(calls))
+        if max_workers <= 1:
+            return [_run(call) for call in calls]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_run, calls))
+
     def _get_auth_tokens(self) -> tuple[Optional[str], str, str, str]:
         # if token file path is defined in the rucio.cfg file, use that file. Currently this prevents authenticating as another user or VO.
         auth_token_file_path = config_get('client', 'auth_token_file_path', False, None)
@@ -480,8 +528,11 @@ class BaseClient:
                 continue
 
             if result is not None and result.status_code == codes.unauthorized and not get_token:  # pylint: disable-msg=E1101
-                self.session = Session()
-                self.__get_token()
+                with self._token_lock:
+                    # a concurrent call of batch_call may already have renewed the token
+                    if hds['X-Rucio-Auth-Token'] == self.auth_token:
+                        self.session = self._new_session()
+                        self.__get_token()
                 hds['X-Rucio-Auth-Token'] = self.auth_token
             else:
                 break
@@ -17,6 +17,7 @@ from json import dumps
 from typing import TYPE_CHECKING, Any, Literal, Optional, Union
 from urllib.parse import quote_plus
 
+from requests.exceptions import ChunkedEncodingError, ConnectionError
 from requests.status_codes import codes
 
 from rucio.client.baseclient import BaseClient, choice
@@ -33,6 +34,7 @@ class DIDClient(BaseClient):
 
     DIDS_BASEURL = 'dids'
     ARCHIVES_BASEURL = 'archives'
+    LIST_PAGE_SIZE = 1000
 
     def list_dids(
             self,
@@ -397,16 +399,25 @@ class DIDClient(BaseClient):
     def list_content(
         self,
         scope: str,
-        name: str
+        name: str,
+        page_size: Optional[int] = LIST_PAGE_SIZE,
+        marker: Optional[str] = None
     ) -> "Iterator[dict[str, Any]]":
         """
         List data identifier contents.
 
+        The contents are fetched by pages of page_size children ordered by scope and name, the
+        next page being requested when the previous one has been iterated.
+
         :param scope: The scope name.
         :param name: The data identifier name.
+        :param page_size: The number of children per request, None to stream all of them in one request.
+        :param marker: The scope:name of the last child already listed, to resume a listing after it.
         """
 
         path = '/'.join([self.DIDS_BASEURL, quote_plus(scope), quote_plus(name), 'dids'])
+        if page_size:
+            return self._list_pages(path, {}, page_size, marker)
         url = build_url(choice(self.list_hosts), path=path)
         r = self._send_request(url, type_='GET')
         if r.status_code == codes.ok:
@@ -438,20 +449,30 @@ class DIDClient(BaseClient):
             self,
             scope: str,
             name: str,
-            long: Optional[bool] = None
+            long: Optional[bool] = None,
+            page_size: Optional[int] = LIST_PAGE_SIZE,
+            marker: Optional[str] = None
     ) -> "Iterator[dict[str, Any]]":
         """
         List data identifier file contents.
 
+        The files are fetched by pages of page_size files ordered by scope and name, the next
+        page being requested when the previous one has been iterated. A file attached to several
+        datasets of a container is then listed once.
+
         :param scope: The scope name.
         :param name: The data identifier name.
         :param long: A boolean to choose if GUID is returned or not.
+        :param page_size: The number of files per request, None to stream all of them in one request.
+        :param marker: The scope:name of the last file already listed, to resume a listing after it.
         """
 
         payload = {}
         path = '/'.join([self.DIDS_BASEURL, quote_plus(scope), quote_plus(name), 'files'])
         if long:
             payload['long'] = True
+        if page_size:
+            return self._list_pages(path, payload, page_size, marker)
         url = build_url(choice(self.list_hosts), path=path, params=payload)
 
         r = self._send_request(url, type_='GET')
@@ -461,6 +482,51 @@ class DIDClient(BaseClient):
             exc_cls, exc_msg = self._get_exception(headers=r.headers, status_code=r.status_code, data=r.content)
             raise exc_cls(exc_msg)
 
+    def _list_pages(
+            self,
+            path: str,
+            params: dict[str, Any],
+            page_size: int,
+            marker: Optional[str] = None
+    ) -> "Iterator[dict[str, Any]]":
+        """
+        Iterate over a listing paginated with the limit and marker parameters. The first page is
+        requested before returning, so that errors like an unknown DID are raised by the call.
+        A page is requested again, from the same marker, if it cannot be read completely.
+
+        :param path: The path of the listing.
+        :param params: The other parameters of the listing.
+        :param page_size: The number of items per request.
+        :param marker: The scope:name of the last item already listed, None to start from the first item.
+        """
+
+        def get_page(marker: Optional[str]) -> tuple[list[dict[str, Any]], Optional[str]]:
+            payload = dict(params, limit=page_size)
+            if marker:
+                payload['marker'] = marker
+            retry = 0
+            while True:
+                url = build_url(choice(self.list_hosts), path=path, params=payload)
+                r = self._send_request(url, type_='GET')
+                if r.status_code != codes.ok:
+                    exc_cls, exc_msg = self._get_exception(headers=r.headers, status_code=r.status_code, data=r.content)
+                    raise exc_cls(exc_msg)
+                try:
+                    return list(self._load_json_data(r)), r.headers.get('X-Rucio-Next-Marker')
+                except (ChunkedEncodingError, ConnectionError) as error:
+                    if retry >= self.request_retries:
+                        raise
+                    self._back_off(retry, 'page could not be read: {}'.format(error))
+                    retry += 1
+
+        def iterate(page: list[dict[str, Any]], next_marker: Optional[str]) -> "Iterator[dict[str, Any]]":
+            yield from page
+            while next_marker:
+                page, next_marker = get_page(next_marker)
+                yield from page
+
+        return iterate(*get_page(marker))
+
     def bulk_list_files(self, dids: list[dict[str, Any]]) -> "Iterator[dict[str, Any]]":
         """
         List data identifier file contents.
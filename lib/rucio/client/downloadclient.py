@@ -23,6 +23,7 @@ import shutil
 import signal
 import subprocess
 import time
+from functools import partial
 from queue import Empty, Queue, deque
 from threading import Thread
 from typing import TYPE_CHECKING, Any, Optional
@@ -1201,9 +1202,10 @@ class DownloadClient:
         # Matches each dereferenced DID back to a list of input items
         did_to_input_items = {}
 
-        # Resolve DIDs
-        for item in input_items:
-            resolved_dids = list(self._resolve_one_item_dids(item))
+        # Resolve DIDs, the items and then the sizes of the collections concurrently
+        resolved_dids_per_item = self.client.batch_call([lambda item=item: list(self._resolve_one_item_dids(item)) for item in input_items])
+        dids_without_size = []
+        for item, resolved_dids in zip(input_items, resolved_dids_per_item):
             if not resolved_dids:
                 logger(logging.WARNING, 'An item did not have any DIDs after resolving the input: %s.' % item.get('did', item))
             item['dids'] = resolved_dids
@@ -1211,9 +1213,11 @@ class DownloadClient:
                 did_to_input_items.setdefault(DID(did), []).append(item)
 
                 if 'CONTAINER' in did.get('did_type', '').upper() or ('length' in did and not did['length']):
-                    did_with_size = self.client.get_did(scope=did['scope'], name=did['name'], dynamic_depth='FILE')
-                    did['length'] = did_with_size['length']
-                    did['bytes'] = did_with_size['bytes']
+                    dids_without_size.append(did)
+        dids_with_size = self.client.batch_call([partial(self.client.get_did, scope=did['scope'], name=did['name'], dynamic_depth='FILE') for did in dids_without_size])
+        for did, did_with_size in zip(dids_without_size, dids_with_size):
+            did['length'] = did_with_size['length']
+            did['bytes'] = did_with_size['bytes']
 
         # group input items by common options to reduce the number of calls to list_replicas
         distinct_keys = ['rse', 'force_scheme', 'no_resolve_archives']
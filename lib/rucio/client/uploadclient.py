@@ -21,12 +21,13 @@ import os.path
 import random
 import socket
 import time
+from functools import partial
 from typing import TYPE_CHECKING, Any, Final, Optional, Union, cast
 
 from rucio import version
 from rucio.client.client import Client
 from rucio.common.bittorrent import bittorrent_v2_merkle_sha256
-from rucio.common.checksum import GLOBALLY_SUPPORTED_CHECKSUMS, adler32, md5
+from rucio.common.checksum import GLOBALLY_SUPPORTED_CHECKSUMS, calculate_checksums, calculate_checksums_parallel
 from rucio.common.client import detect_client_location
 from rucio.common.config import config_get, config_get_bool, config_get_int
 from rucio.common.constants import RseAttr
@@ -151,7 +152,9 @@ class UploadClient:
         rse_expression = None
         for file in files:
             rse_expression = file['rse']
-            rse = self.rse_expressions.setdefault(rse_expression, _pick_random_rse(rse_expression))
+            if rse_expression not in self.rse_expressions:
+                self.rse_expressions[rse_expression] = _pick_random_rse(rse_expression)
+            rse = self.rse_expressions[rse_expression]
 
             if not self.rses.get(rse):
                 rse_settings = self.rses.setdefault(rse, rsemgr.get_rse_info(rse, vo=self.client.vo))
@@ -174,6 +177,8 @@ class UploadClient:
 
         # clear this set again to ensure that we only try to register datasets once
         registered_dataset_dids = set()
+        rses = list(dict.fromkeys(file['rse'] for file in files))
+        rses_attributes = dict(zip(rses, self.client.batch_call([partial(self.client.list_rse_attributes, rse) for rse in rses], return_exceptions=True)))
         num_succeeded = 0
         summary = []
         for file in files:
@@ -213,11 +218,10 @@ class UploadClient:
 
             # resolving local area networks
             domain = 'wan'
-            rse_attributes = {}
-            try:
-                rse_attributes = self.client.list_rse_attributes(rse)
-            except:
+            rse_attributes = rses_attributes[rse]
+            if isinstance(rse_attributes, Exception):
                 logger(logging.WARNING, 'Attributes of the RSE: %s not available.' % rse)
+                rse_attributes = {}
             if (self.client_location and 'lan' in rse_settings['domain'] and RseAttr.SITE in rse_attributes):
                 if self.client_location['site'] == rse_attributes[RseAttr.SITE]:
                     domain = 'lan'
@@ -500,7 +504,8 @@ class UploadClient:
     def _collect_file_info(
             self,
             filepath: "PathTypeAlias",
-            item: "FileToUploadDict"
+            item: "FileToUploadDict",
+            checksums: Optional[dict[str, str]] = None
     ) -> "FileToUploadWithCollectedInfoDict":
         """
         Collects infos (e.g. size, checksums, etc.) about the file and
@@ -509,6 +514,7 @@ class UploadClient:
 
         :param filepath: path where the file is stored
         :param item: input options for the given file
+        :param checksums: already computed adler32 and md5 checksums of the file, if any
 
         :returns: a dictionary containing all collected info and the input options
         """
@@ -519,8 +525,10 @@ class UploadClient:
         new_item['basename'] = os.path.basename(filepath)
 
         new_item['bytes'] = os.stat(filepath).st_size
-        new_item['adler32'] = adler32(filepath)
-        new_item['md5'] = md5(filepath)
+        if checksums is None:
+            checksums = calculate_checksums(filepath, ['adler32', 'md5'])
+        new_item['adler32'] = checksums['adler32']
+        new_item['md5'] = checksums['md5']
         new_item['meta'] = {'guid': self._get_file_guid(new_item)}
         new_item['state'] = 'C'
         if not new_item.get('did_scope'):
@@ -544,6 +552,8 @@ class UploadClient:
         """
         logger = self.logger
         files: list["FileToUploadWithCollectedInfoDict"] = []
+        # (filepath, item) of the files found, hashed all together at the end
+        paths_to_collect: list[tuple[str, "FileToUploadDict"]] = []
         for item in items:
             path = item.get('path')
             pfn = item.get('pfn')
@@ -567,8 +577,7 @@ class UploadClient:
             if os.path.isdir(path) and not recursive:
                 dname, subdirs, fnames = next(os.walk(path))
                 for fname in fnames:
-                    file = self._collect_file_info(os.path.join(dname, fname), item)
-                    files.append(file)
+                    paths_to_collect.append((os.path.join(dname, fname), item))
                 if not len(fnames) and not len(subdirs):
                     logger(logging.WARNING, 'Skipping %s because it is empty.' % dname)
                 elif not len(fnames):
@@ -576,13 +585,17 @@ class UploadClient:
             elif os.path.isdir(path) and recursive:
                 files.extend(cast("list[FileToUploadWithCollectedInfoDict]", self._recursive(item)))
             elif os.path.isfile(path) and not recursive:
-                file = self._collect_file_info(path, item)
-                files.append(file)
+                paths_to_collect.append((path, item))
             elif os.path.isfile(path) and recursive:
                 logger(logging.WARNING, 'Skipping %s because of --recursive flag' % path)
             else:
                 logger(logging.WARNING, 'No such file or directory: %s' % path)
 
+        if paths_to_collect:
+            all_checksums = calculate_checksums_parallel([filepath for filepath, _ in paths_to_collect], ['adler32', 'md5'])
+            for (filepath, item), checksums in zip(paths_to_collect, all_checksums):
+                files.append(self._collect_file_info(filepath, item, checksums=checksums))
+
         if not len(files):
             raise InputValidationError('No valid input files given')
 
@@ -12,16 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import hashlib
-import io
-import mmap
+import os
 import zlib
-from functools import partial
-from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
 
 from rucio.common.bittorrent import merkle_sha256
 from rucio.common.exception import ChecksumCalculationError
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
     from _typeshed import FileDescriptorOrPath
 
 # GLOBALLY_SUPPORTED_CHECKSUMS = ['adler32', 'md5', 'sha256', 'crc32']
@@ -29,6 +30,12 @@ GLOBALLY_SUPPORTED_CHECKSUMS = ['adler32', 'md5']
 PREFERRED_CHECKSUM = GLOBALLY_SUPPORTED_CHECKSUMS[0]
 CHECKSUM_KEY = 'supported_checksums'
 
+# Size of the buffer the file is read into. It is reused for every block,
+# so the memory footprint is constant whatever the size of the file.
+CHECKSUM_BUFFER_SIZE = 4 * 1024 * 1024
+# zlib and hashlib release the GIL on large buffers, so threads hash files in parallel
+CHECKSUM_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
 
 def is_checksum_valid(checksum_name: str) -> bool:
     """
@@ -54,48 +61,101 @@ def set_preferred_checksum(checksum_name: str) -> None:
         PREFERRED_CHECKSUM = checksum_name
 
 
-def adler32(file: "FileDescriptorOrPath") -> str:
+class _ZlibChecksum:
     """
-    An Adler-32 checksum is obtained by calculating two 16-bit checksums A and B
-    and concatenating their bits into a 32-bit integer. A is the sum of all bytes in the
-    stream plus one, and B is the sum of the individual values of A from each step.
-
-    :param file: file name
-    :returns: Hexified string, padded to 8 values.
+    Running zlib checksum (adler32 or crc32) with a hashlib-like interface.
     """
 
+    def __init__(self, function, start: int, format_: str):
+        self._function = function
+        self._value = start
+        self._format = format_
+
+    def update(self, data) -> None:
+        self._value = self._function(data, self._value)
+
+    def hexdigest(self) -> str:
+        return self._format % (self._value & 0xFFFFFFFF)
+
+
+STREAMING_CHECKSUMS = {
     # adler starting value is _not_ 0
-    adler = 1
+    'adler32': lambda: _ZlibChecksum(zlib.adler32, 1, '%08x'),
+    'md5': hashlib.md5,
+    'sha256': hashlib.sha256,
+    'crc32': lambda: _ZlibChecksum(zlib.crc32, 0, '%X'),
+}
 
-    can_mmap = False
-    # try:
-    #    with open(file, 'r+b') as f:
-    #        can_mmap = True
-    # except:
-    #    pass
 
-    try:
-        # use mmap if possible
-        if can_mmap:
-            with open(file, 'r+b') as f:
-                m = mmap.mmap(f.fileno(), 0)
-                # partial block reads at slightly increased buffer sizes
-                for block in iter(partial(m.read, io.DEFAULT_BUFFER_SIZE * 8), b''):
-                    adler = zlib.adler32(block, adler)
-        else:
-            with open(file, 'rb') as f:
-                # partial block reads at slightly increased buffer sizes
-                for block in iter(partial(f.read, io.DEFAULT_BUFFER_SIZE * 8), b''):
-                    adler = zlib.adler32(block, adler)
+def calculate_checksums(
+        file: "FileDescriptorOrPath",
+        checksum_names: "Iterable[str]" = GLOBALLY_SUPPORTED_CHECKSUMS,
+        buffer_size: int = CHECKSUM_BUFFER_SIZE
+) -> dict[str, str]:
+    """
+    Computes several checksums of a file in a single pass over its content.
 
+    :param file: file name
+    :param checksum_names: names of the checksums to compute, among STREAMING_CHECKSUMS
+    :param buffer_size: size of the (reused) read buffer in bytes
+    :returns: dictionary {checksum_name: hexadecimal checksum}
+    :raises ChecksumCalculationError: if the file cannot be read or a checksum is not supported
+    """
+    checksum_names = list(checksum_names)
+    try:
+        digests = {name: STREAMING_CHECKSUMS[name]() for name in checksum_names}
+        updaters = [digest.update for digest in digests.values()]
+        buffer = bytearray(buffer_size)
+        view = memoryview(buffer)
+        with open(file, 'rb', buffering=0) as f:
+            while True:
+                nbytes = f.readinto(buffer)
+                if not nbytes:
+                    break
+                block = view[:nbytes]
+                for update in updaters:
+                    update(block)
     except Exception as e:
-        raise ChecksumCalculationError('adler32', str(file), e)
+        raise ChecksumCalculationError(','.join(checksum_names), str(file), e)
 
-    # backflip on 32bit -- can be removed once everything is fully migrated to 64bit
-    if adler < 0:
-        adler = adler + 2 ** 32
+    return {name: digest.hexdigest() for name, digest in digests.items()}
 
-    return str('%08x' % adler)
+
+def calculate_checksums_parallel(
+        files: "Sequence[FileDescriptorOrPath]",
+        checksum_names: "Iterable[str]" = GLOBALLY_SUPPORTED_CHECKSUMS,
+        max_workers: Optional[int] = None,
+        buffer_size: int = CHECKSUM_BUFFER_SIZE
+) -> list[dict[str, str]]:
+    """
+    Computes several checksums of many files, hashing the files concurrently.
+
+    :param files: file names
+    :param checksum_names: names of the checksums to compute, among STREAMING_CHECKSUMS
+    :param max_workers: number of hashing threads; defaults to CHECKSUM_MAX_WORKERS
+    :param buffer_size: size of the read buffer of each thread in bytes
+    :returns: list of dictionaries {checksum_name: hexadecimal checksum}, in the order of files
+    :raises ChecksumCalculationError: if a file cannot be read or a checksum is not supported
+    """
+    checksum_names = list(checksum_names)
+    max_workers = min(max_workers or CHECKSUM_MAX_WORKERS, len(files))
+    if max_workers <= 1:
+        return [calculate_checksums(file, checksum_names, buffer_size) for file in files]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda file: calculate_checksums(file, checksum_names, buffer_size), files))
+
+
+def adler32(file: "FileDescriptorOrPath") -> str:
+    """
+    An Adler-32 checksum is obtained by calculating two 16-bit checksums A and B
+    and concatenating their bits into a 32-bit integer. A is the sum of all bytes in the
+    stream plus one, and B is the sum of the individual values of A from each step.
+
+    :param file: file name
+    :returns: Hexified string, padded to 8 values.
+    """
+    return _single_checksum(file, 'adler32')
 
 
 def md5(file: "FileDescriptorOrPath") -> str:
@@ -105,14 +165,7 @@ def md5(file: "FileDescriptorOrPath") -> str:
     :param file: file name
     :returns: string of 32 hexadecimal digits
     """
-    hash_md5 = hashlib.md5()
-    try:
-        with open(file, "rb") as f:
-            list(map(hash_md5.update, iter(lambda: f.read(4096), b"")))
-    except Exception as e:
-        raise ChecksumCalculationError('md5', str(file), e)
-
-    return hash_md5.hexdigest()
+    return _single_checksum(file, 'md5')
 
 
 def sha256(file: "FileDescriptorOrPath") -> str:
@@ -120,13 +173,9 @@ def sha256(file: "FileDescriptorOrPath") -> str:
     Runs the SHA256 algorithm on the binary content of the file named file and returns the hexadecimal digest
 
     :param file: file name
-    :returns: string of 32 hexadecimal digits
+    :returns: string of 64 hexadecimal digits
     """
-    with open(file, "rb") as f:
-        bytes_ = f.read()  # read entire file as bytes
-        readable_hash = hashlib.sha256(bytes_).hexdigest()
-        print(readable_hash)
-        return readable_hash
+    return _single_checksum(file, 'sha256')
 
 
 def crc32(file: "FileDescriptorOrPath") -> str:
@@ -134,12 +183,13 @@ def crc32(file: "FileDescriptorOrPath") -> str:
     Runs the CRC32 algorithm on the binary content of the file named file and returns the hexadecimal digest
 
     :param file: file name
-    :returns: string of 32 hexadecimal digits
+    :returns: string of up to 8 hexadecimal digits
     """
-    prev = 0
-    for each_line in open(file, "rb"):
-        prev = zlib.crc32(each_line, prev)
-    return "%X" % (prev & 0xFFFFFFFF)
+    return _single_checksum(file, 'crc32')
+
+
+def _single_checksum(file: "FileDescriptorOrPath", checksum_name: str) -> str:
+    return calculate_checksums(file, [checksum_name])[checksum_name]
 
 
 CHECKSUM_ALGO_DICT = {
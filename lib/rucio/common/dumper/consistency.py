@@ -18,10 +18,12 @@ import os
 import re
 import subprocess
 import tempfile
+import time
 from typing import TYPE_CHECKING, Any, Optional, Union, cast
 
 from rucio.common import dumper
 from rucio.common.dumper import DUMPS_CACHE_DIR, data_models, error, path_parsing
+from rucio.common.dumper.merge_sort import external_sort
 
 if TYPE_CHECKING:
     from argparse import Namespace, _SubParsersAction
@@ -100,14 +102,14 @@ class Consistency(data_models.DataModel):
             return '/'.join(relative)
 
         if sort_rucio_replica_dumps:
-            prev_date_fname_sorted = gnu_sort(
+            prev_date_fname_sorted = external_sort(
                 parse_and_filter_file(prev_date_fname, parser=parser, cache_dir=cache_dir),  # type: ignore
                 delimiter=',',
                 fieldspec='1',
                 cache_dir=cache_dir,
             )
 
-            next_date_fname_sorted = gnu_sort(
+            next_date_fname_sorted = external_sort(
                 parse_and_filter_file(next_date_fname, parser=parser, cache_dir=cache_dir),  # type: ignore
                 delimiter=',',
                 fieldspec='1',
@@ -151,7 +153,7 @@ class Consistency(data_models.DataModel):
                 sd_prefix,
             )
 
-        storage_dump_fname_sorted = gnu_sort(
+        storage_dump_fname_sorted = external_sort(
             parse_and_filter_file(
                 storage_dump,
                 parser=strip_storage_dump,
@@ -162,19 +164,35 @@ class Consistency(data_models.DataModel):
             cache_dir=cache_dir,
         )
 
+        start_time = time.monotonic()
+        nb_paths = nb_lost = nb_dark = 0
         with open(prev_date_fname_sorted) as prevf:
             with open(next_date_fname_sorted) as nextf:
                 with open(storage_dump_fname_sorted) as sdump:
                     for path, where, status in compare3(prevf, sdump, nextf):
+                        nb_paths += 1
                         prevstatus, nextstatus = status
 
                         if where[0] and not where[1] and where[2]:
                             if prevstatus == 'A' and nextstatus == 'A':
+                                nb_lost += 1
                                 yield cls('LOST', path)
 
                         if not where[0] and where[1] and not where[2]:
+                            nb_dark += 1
                             yield cls('DARK', path)
 
+        elapsed = time.monotonic() - start_time
+        logger.info(
+            'Compared %d paths of %s in %.1f seconds (%.0f paths/s): %d LOST, %d DARK',
+            nb_paths,
+            ddm_endpoint,
+            elapsed,
+            nb_paths / elapsed if elapsed > 0 else 0,
+            nb_lost,
+            nb_dark,
+        )
+
 
 def _try_to_advance(
         it: 'SupportsNext[str]',
@@ -0,0 +1,243 @@
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-process external merge sort of dumps.
+
+Lines are compared byte by byte, as ``LC_ALL=C sort`` does. The input file is split
+into runs of about ``run_size`` bytes, each run is sorted by a worker process and
+spilled to a gzip compressed temporary file, then all the runs are merged into the
+sorted output. Memory usage is therefore bounded by about ``processes * run_size``.
+"""
+
+import functools
+import gzip
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional
+
+from rucio.common import config
+from rucio.common.dumper import DUMPS_CACHE_DIR, temp_file
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+DEFAULT_RUN_SIZE = 64 * 1024 * 1024  # 64MiB
+BLOCK_SIZE = 1024 * 1024  # 1MiB
+BATCH_LINES = 65536
+PROGRESS_INTERVAL = 1048576  # lines, multiple of BATCH_LINES
+
+
+class SortProgress:
+    '''
+    Progress and throughput of an external sort.
+    '''
+
+    def __init__(self, file_path: str, total_runs: int = 0):
+        self.file_path = file_path
+        self.total_runs = total_runs
+        self.sorted_runs = 0
+        self.lines_sorted = 0
+        self.lines_merged = 0
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def lines_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.lines_merged / elapsed if elapsed > 0 else 0.0
+
+
+def _field_key(delimiter: bytes, field: int, line: bytes) -> tuple[bytes, bytes]:
+    '''
+    Sort key of `sort -t <delimiter> -k <field>`: the line from the start of the
+    field to the end, then the whole line as last resort comparison.
+    '''
+    parts = line.split(delimiter, field - 1)
+    return (parts[field - 1] if len(parts) >= field else b'', line)
+
+
+def _sort_key(delimiter: Optional[str], fieldspec: Optional[str]) -> 'Optional[Callable[[bytes], tuple[bytes, bytes]]]':
+    if (delimiter is not None) ^ (fieldspec is not None):
+        raise ValueError("Either both delimiter and fieldspec is set, or neither are.")
+    if delimiter is None:
+        return None
+    try:
+        field = int(fieldspec)  # type: ignore
+    except ValueError:
+        raise ValueError('Only a single field number is supported as fieldspec, got %s' % fieldspec)
+    if field < 1:
+        raise ValueError('Invalid field number %s' % fieldspec)
+    if field == 1:
+        # The key is the whole line
+        return None
+    return functools.partial(_field_key, delimiter.encode(), field)
+
+
+def _split_runs(file_path: str, run_size: int) -> list[tuple[int, int]]:
+    '''
+    Split the file in (start, end) byte ranges of about `run_size` bytes,
+    each range ending at the end of a line.
+    '''
+    runs = []
+    start = 0
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        while start < size:
+            f.seek(min(start + run_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            runs.append((start, end))
+            start = end
+    return runs
+
+
+def _sort_run(
+        file_path: str,
+        start: int,
+        end: int,
+        key: 'Optional[Callable[[bytes], tuple[bytes, bytes]]]',
+        run_path: str
+) -> int:
+    '''
+    Sort the lines of the byte range of the file and write them to a compressed run.
+
+    :returns: The number of lines in the run.
+    '''
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    del data
+    lines.sort(key=key)
+    with gzip.open(run_path, 'wb', compresslevel=1) as run:
+        for i in range(0, len(lines), BATCH_LINES):
+            run.write(b'\n'.join(lines[i:i + BATCH_LINES]) + b'\n')
+    return len(lines)
+
+
+def _read_run(run_path: str) -> 'Iterator[bytes]':
+    '''
+    Yield the lines of a compressed run, without the line feed.
+    '''
+    remainder = b''
+    with gzip.open(run_path, 'rb') as run:
+        while True:
+            block = run.read(BLOCK_SIZE)
+            if not block:
+                break
+            lines = (remainder + block).split(b'\n')
+            remainder = lines.pop()
+            yield from lines
+
+
+def external_sort(
+        file_path: str,
+        prefix: Optional[str] = None,
+        delimiter: Optional[str] = None,
+        fieldspec: Optional[str] = None,
+        cache_dir: str = DUMPS_CACHE_DIR,
+        run_size: Optional[int] = None,
+        processes: Optional[int] = None,
+        progress: 'Optional[Callable[[SortProgress], None]]' = None
+) -> str:
+    '''
+    Sort the file with path `file_path`, the original file is unchanged, the
+    output file is saved with path <cache_dir>/<prefix>_sorted. The arguments
+    and the output are the same as for `gnu_sort`.
+
+    :param prefix: If given the output file will be named <prefix>_sorted.
+    Otherwise the prefix is the name of the input file.
+    :param delimiter: Delimiter character if the data is formatted in
+    columns (as the -t argument of the sort command).
+    :param fieldspec: Number of the column where the sort key starts (as
+    the -k argument of the sort command, only a single field is supported).
+    :param cache_dir: Working dir where the runs and the output file will be placed.
+    :param run_size: Size in bytes of the runs sorted in memory. By default
+    [auditor] sort_run_size, or 64MiB.
+    :param processes: Number of processes sorting runs. By default
+    [auditor] sort_processes, or the number of CPUs.
+    :param progress: Called with the SortProgress after each sorted run and
+    regularly during the merge.
+    '''
+    logger = logging.getLogger('dumper.merge_sort')
+    key = _sort_key(delimiter, fieldspec)
+
+    prefix = os.path.basename(file_path) if prefix is None else prefix
+    sorted_name = '_'.join((prefix, 'sorted'))
+    sorted_path = os.path.join(cache_dir, sorted_name)
+
+    if os.path.exists(sorted_path):
+        return sorted_path
+
+    if run_size is None:
+        run_size = config.config_get_int('auditor', 'sort_run_size', False, DEFAULT_RUN_SIZE, check_config_table=False)
+    if processes is None:
+        processes = config.config_get_int('auditor', 'sort_processes', False, os.cpu_count() or 1, check_config_table=False)
+    if multiprocessing.current_process().daemon:
+        # Daemonic processes are not allowed to have children
+        processes = 1
+
+    runs = _split_runs(file_path, run_size)
+    stats = SortProgress(file_path, total_runs=len(runs))
+
+    with tempfile.TemporaryDirectory(dir=cache_dir, prefix=prefix + '_runs_') as runs_dir:
+        run_paths = [os.path.join(runs_dir, 'run_%d.gz' % i) for i in range(len(runs))]
+
+        def _run_sorted(nb_lines: int) -> None:
+            stats.sorted_runs += 1
+            stats.lines_sorted += nb_lines
+            logger.debug('Sorted run %d/%d of "%s" (%d lines)', stats.sorted_runs, stats.total_runs, file_path, nb_lines)
+            if progress:
+                progress(stats)
+
+        if processes > 1 and len(runs) > 1:
+            with ProcessPoolExecutor(max_workers=min(processes, len(runs))) as executor:
+                futures = [executor.submit(_sort_run, file_path, start, end, key, run_path)
+                           for (start, end), run_path in zip(runs, run_paths)]
+                for future in futures:
+                    _run_sorted(future.result())
+        else:
+            for (start, end), run_path in zip(runs, run_paths):
+                _run_sorted(_sort_run(file_path, start, end, key, run_path))
+
+        with temp_file(cache_dir, final_name=sorted_name, binary=True) as (output, _):
+            merged = heapq.merge(*[_read_run(run_path) for run_path in run_paths], key=key)
+            while True:
+                batch = list(itertools.islice(merged, BATCH_LINES))
+                if not batch:
+                    break
+                output.write(b'\n'.join(batch) + b'\n')
+                stats.lines_merged += len(batch)
+                if progress and stats.lines_merged % PROGRESS_INTERVAL == 0:
+                    progress(stats)
+
+    stats.finished_at = time.monotonic()
+    if progress:
+        progress(stats)
+    logger.info('Sorted "%s": %d lines in %d runs, %.1f seconds (%.0f lines/s)', file_path,
+                stats.lines_merged, stats.total_runs, stats.elapsed, stats.lines_per_second)
+    return sorted_path
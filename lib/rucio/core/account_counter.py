@@ -12,15 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import datetime
-from typing import TYPE_CHECKING
+from collections import defaultdict
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import and_, delete, insert, literal, select
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, literal, or_, select, update
 
 from rucio.db.sqla import filter_thread_work, models
 from rucio.db.sqla.session import read_session, transactional_session
+from rucio.db.sqla.util import temp_table_mngr
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from sqlalchemy.orm import Session
 
     from rucio.common.types import InternalAccount, RSEAccountCounterDict
@@ -155,33 +158,108 @@ def update_account_counter(
     :param rse_id:   The rse_id to update.
     :param session:  Database session in use.
     """
+    update_account_counters(counters=[{'account': account, 'rse_id': rse_id}], session=session)
+
+
+@transactional_session
+def update_account_counters(
+    counters: "Iterable[RSEAccountCounterDict]",
+    limit: Optional[int] = None,
+    *,
+    session: "Session"
+) -> int:
+    """
+    Fold the updated_account_counters of many account and RSE pairs into their account_counters.
+
+    The ids of the consumed updated_account_counters are recorded in a temporary table. They are
+    summed per account and RSE with one query, the sums are added to the account_counters with one
+    UPDATE executed for all pairs, and the consumed rows are deleted with one DELETE.
+
+    :param counters: The account and rse_id pairs to update, as returned by get_updated_account_counters.
+    :param limit:    The maximum number of updated_account_counters to consume, all of them if None.
+    :param session:  Database session in use.
+    :returns:        The number of consumed updated_account_counters.
+    """
+    rse_ids_per_account = defaultdict(set)
+    for counter in counters:
+        rse_ids_per_account[counter['account']].add(counter['rse_id'])
+    if not rse_ids_per_account:
+        return 0
 
+    id_temp_table = temp_table_mngr(session).create_id_table()
     stmt = select(
-        models.UpdatedAccountCounter
+        models.UpdatedAccountCounter.id
+    ).where(
+        or_(*[and_(models.UpdatedAccountCounter.account == account,
+                   models.UpdatedAccountCounter.rse_id.in_(rse_ids))
+              for account, rse_ids in rse_ids_per_account.items()])
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    stmt = insert(
+        id_temp_table
+    ).from_select(
+        ['id'],
+        stmt
+    )
+    session.execute(stmt)
+
+    stmt = select(
+        models.UpdatedAccountCounter.account,
+        models.UpdatedAccountCounter.rse_id,
+        func.sum(models.UpdatedAccountCounter.files).label('files'),
+        func.sum(models.UpdatedAccountCounter.bytes).label('bytes'),
+        func.count().label('updates')
+    ).join(
+        id_temp_table,
+        id_temp_table.id == models.UpdatedAccountCounter.id
+    ).group_by(
+        models.UpdatedAccountCounter.account,
+        models.UpdatedAccountCounter.rse_id
+    )
+    sums = session.execute(stmt).all()
+    if not sums:
+        return 0
+
+    stmt = select(
+        models.AccountUsage.account,
+        models.AccountUsage.rse_id
     ).where(
-        and_(models.UpdatedAccountCounter.account == account,
-             models.UpdatedAccountCounter.rse_id == rse_id)
+        or_(*[and_(models.AccountUsage.account == account,
+                   models.AccountUsage.rse_id.in_(rse_ids))
+              for account, rse_ids in rse_ids_per_account.items()])
     )
-    updated_account_counters = session.execute(stmt).scalars().all()
+    existing_counters = set(tuple(row) for row in session.execute(stmt))
 
-    try:
-        stmt = select(
+    updates = [{'b_account': row.account, 'b_rse_id': row.rse_id, 'b_files': row.files, 'b_bytes': row.bytes}
+               for row in sums if (row.account, row.rse_id) in existing_counters]
+    if updates:
+        stmt = update(
             models.AccountUsage
         ).where(
-            and_(models.AccountUsage.account == account,
-                 models.AccountUsage.rse_id == rse_id)
+            and_(models.AccountUsage.account == bindparam('b_account'),
+                 models.AccountUsage.rse_id == bindparam('b_rse_id'))
+        ).values(
+            bytes=models.AccountUsage.bytes + bindparam('b_bytes'),
+            files=models.AccountUsage.files + bindparam('b_files')
         )
-        account_counter = session.execute(stmt).scalar_one()
-        account_counter.bytes += sum([updated_account_counter.bytes for updated_account_counter in updated_account_counters])
-        account_counter.files += sum([updated_account_counter.files for updated_account_counter in updated_account_counters])
-    except NoResultFound:
-        models.AccountUsage(rse_id=rse_id,
-                            account=account,
-                            files=sum([updated_account_counter.files for updated_account_counter in updated_account_counters]),
-                            bytes=sum([updated_account_counter.bytes for updated_account_counter in updated_account_counters])).save(session=session)
-
-    for update in updated_account_counters:
-        update.delete(flush=False, session=session)
+        # executed by the connection, as an executemany, and not as an ORM bulk update by primary key
+        session.connection().execute(stmt, updates)
+
+    inserts = [{'account': row.account, 'rse_id': row.rse_id, 'files': row.files, 'bytes': row.bytes}
+               for row in sums if (row.account, row.rse_id) not in existing_counters]
+    if inserts:
+        session.execute(insert(models.AccountUsage), inserts)
+
+    stmt = delete(
+        models.UpdatedAccountCounter
+    ).where(
+        exists(select(1).where(models.UpdatedAccountCounter.id == id_temp_table.id))
+    ).execution_options(
+        synchronize_session=False
+    )
+    session.execute(stmt)
+    return sum(row.updates for row in sums)
 
 
 @transactional_session
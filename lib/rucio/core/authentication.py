@@ -17,8 +17,11 @@ import hashlib
 import random
 import re
 import sys
+import threading
+import time
 import traceback
 from base64 import b64decode
+from collections import OrderedDict
 from typing import TYPE_CHECKING, Optional, Union, cast
 
 import paramiko
@@ -27,11 +30,12 @@ from dogpile.cache.api import NO_VALUE, NoValue
 from sqlalchemy import delete, null, or_, select
 
 from rucio.common.cache import MemcacheRegion
-from rucio.common.config import config_get_bool
+from rucio.common.config import config_get_bool, config_get_int
 from rucio.common.exception import CannotAuthenticate, RucioException
 from rucio.common.utils import chunks, date_to_str, generate_uuid
 from rucio.core.account import account_exists
-from rucio.core.oidc import validate_jwt
+from rucio.core.monitor import MetricManager
+from rucio.core.oidc import validate_jwt, verify_jwt_signature
 from rucio.db.sqla import filter_thread_work, models
 from rucio.db.sqla.constants import IdentityType
 from rucio.db.sqla.session import read_session, transactional_session
@@ -82,10 +86,22 @@ def token_key_generator(namespace, fni, **kwargs):
     return generate_key
 
 
+# In-process cache of the validated tokens, in front of TOKENREGION. It also keeps the rejected
+# tokens, for a shorter time, so that repeated requests with an invalid token do not reach the database.
+TOKEN_LOCAL_CACHE_SIZE = config_get_int('cache', 'auth_token_local_cache_size', False, 10000, check_config_table=False)
+TOKEN_LOCAL_CACHE_TTL = config_get_int('cache', 'auth_token_local_cache_ttl', False, 60, check_config_table=False)
+TOKEN_NEGATIVE_CACHE_TTL = config_get_int('cache', 'auth_token_negative_cache_ttl', False, 10, check_config_table=False)
+_LOCAL_TOKENS: "OrderedDict[str, tuple[float, Optional[TokenValidationDict]]]" = OrderedDict()
+_LOCAL_TOKENS_LOCK = threading.Lock()
+
 if config_get_bool('cache', 'use_external_cache_for_auth_tokens', default=False):
     TOKENREGION = MemcacheRegion(expiration_time=900, function_key_generator=token_key_generator)
+    INVALID_TOKENREGION = MemcacheRegion(expiration_time=TOKEN_NEGATIVE_CACHE_TTL)
 else:
     TOKENREGION = make_region(function_key_generator=token_key_generator).configure('dogpile.cache.memory', expiration_time=900)
+    INVALID_TOKENREGION = make_region().configure('dogpile.cache.null')
+
+METRICS = MetricManager(module=__name__)
 
 
 @transactional_session
@@ -566,25 +582,129 @@ def validate_auth_token(token: str, *, session: "Session") -> "TokenValidationDi
     # Be gentle with bash variables, there can be whitespace
     token = token.strip()
     cache_key = token.replace(' ', '')
-
-    # Check if token can be found in cache region
-    value: Union[NoValue, "TokenValidationDict"] = TOKENREGION.get(cache_key)
-    if value is NO_VALUE:  # no cached entry found
-        value = query_token(token, session=session)
-        if not value:
-            # identify JWT access token and validate
-            # & save it in Rucio if scope and audience are correct
-            if len(token.split(".")) == 3:
-                value = validate_jwt(token, session=session)
-            else:
-                raise CannotAuthenticate(traceback.format_exc())
-        # save token in the cache
-        TOKENREGION.set(cache_key, value)
-    lifetime = value.get('lifetime', datetime.datetime(1970, 1, 1))  # type: ignore (value is narrowed to dict, but type-checker doesn't see it)
+    digest = hashlib.sha256(cache_key.encode()).hexdigest()
+
+    # Check if token can be found in the in-process cache, then in the cache region
+    value: Union[NoValue, None, "TokenValidationDict"] = _local_token_get(digest)
+    _count_token_cache('local', value)
+    if value is NO_VALUE:
+        value = TOKENREGION.get(cache_key)
+        if value is NO_VALUE and INVALID_TOKENREGION.get(digest) is not NO_VALUE:
+            value = None
+        _count_token_cache('shared', value)
+        if value is NO_VALUE:  # no cached entry found
+            value = _validate_uncached_token(token, digest=digest, session=session)
+            # save token in the cache
+            TOKENREGION.set(cache_key, value)
+        _local_token_set(digest, value)
+    if value is None:
+        raise CannotAuthenticate(f"Token was rejected in the last {TOKEN_NEGATIVE_CACHE_TTL} seconds.")
+    lifetime = value.get('lifetime', datetime.datetime(1970, 1, 1))
     if lifetime < datetime.datetime.utcnow():  # check if expired
         TOKENREGION.delete(cache_key)
+        _reject_token(digest)
         raise CannotAuthenticate(f"Token found but expired since {date_to_str(lifetime)}.")
-    return cast("TokenValidationDict", value)
+    return value
+
+
+def _validate_uncached_token(token: str, digest: str, *, session: "Session") -> "TokenValidationDict":
+    """
+    Validate an authentication token which is not cached, with the database.
+    The signature of a JSON Web Token of a known issuer is verified first, without the database.
+    Only the tokens with an invalid signature are remembered as rejected.
+
+    :raises: CannotAuthenticate if unsuccessful
+    """
+    is_jwt = len(token.split(".")) == 3
+    if is_jwt and verify_jwt_signature(token) is False:
+        _reject_token(digest)
+        raise CannotAuthenticate("Invalid or expired JSON Web Token.")
+    value = query_token(token, session=session)
+    if not value:
+        # identify JWT access token and validate
+        # & save it in Rucio if scope and audience are correct
+        if is_jwt:
+            value = cast("TokenValidationDict", validate_jwt(token, session=session))
+        else:
+            raise CannotAuthenticate(traceback.format_exc())
+    return value
+
+
+def _local_token_get(digest: str) -> Union[NoValue, None, "TokenValidationDict"]:
+    """
+    Get a token validation from the in-process cache: None if the token was rejected,
+    NO_VALUE if it is not cached or if its entry is outdated.
+    """
+    with _LOCAL_TOKENS_LOCK:
+        entry = _LOCAL_TOKENS.get(digest)
+        if entry is None:
+            return NO_VALUE
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _LOCAL_TOKENS[digest]
+            return NO_VALUE
+        _LOCAL_TOKENS.move_to_end(digest)
+        return value
+
+
+def _local_token_set(digest: str, value: Optional["TokenValidationDict"]) -> None:
+    """
+    Save a token validation, or the rejection of a token if value is None, in the in-process cache.
+    """
+    expires_at = time.monotonic() + (TOKEN_LOCAL_CACHE_TTL if value is not None else TOKEN_NEGATIVE_CACHE_TTL)
+    with _LOCAL_TOKENS_LOCK:
+        _LOCAL_TOKENS[digest] = (expires_at, value)
+        _LOCAL_TOKENS.move_to_end(digest)
+        while len(_LOCAL_TOKENS) > TOKEN_LOCAL_CACHE_SIZE:
+            _LOCAL_TOKENS.popitem(last=False)
+
+
+def _reject_token(digest: str) -> None:
+    """
+    Save the rejection of a token in both cache levels, for TOKEN_NEGATIVE_CACHE_TTL seconds.
+    """
+    _local_token_set(digest, None)
+    INVALID_TOKENREGION.set(digest, True)
+
+
+def _count_token_cache(level: str, value: Union[NoValue, None, "TokenValidationDict"]) -> None:
+    result = 'miss' if value is NO_VALUE else 'hit' if value is not None else 'rejected'
+    METRICS.counter('token_cache.{level}.{result}').labels(level=level, result=result).inc()
+
+
+@read_session
+def prewarm_token_cache(limit: Optional[int] = None, *, session: "Session") -> int:
+    """
+    Load the valid tokens, the ones expiring last first, into the in-process cache and the cache region.
+
+    :param limit: The maximum number of tokens to load, TOKEN_LOCAL_CACHE_SIZE by default.
+    :param session: The database session in use.
+
+    :returns: The number of loaded tokens.
+    """
+    query = select(
+        models.Token.token,
+        models.Token.account,
+        models.Token.identity,
+        models.Token.expired_at.label('lifetime'),
+        models.Token.audience,
+        models.Token.oidc_scope.label('authz_scope')
+    ).where(
+        models.Token.expired_at > datetime.datetime.utcnow()
+    ).order_by(
+        models.Token.expired_at.desc()
+    ).limit(
+        TOKEN_LOCAL_CACHE_SIZE if limit is None else limit
+    )
+    values = {}
+    for row in session.execute(query):
+        value = row._asdict()
+        values[value.pop('token').replace(' ', '')] = cast("TokenValidationDict", value)
+    for cache_key, value in values.items():
+        _local_token_set(hashlib.sha256(cache_key.encode()).hexdigest(), value)
+    if values:
+        TOKENREGION.set_multi(values)
+    return len(values)
 
 
 def token_dictionary(token: models.Token) -> "TokenDict":
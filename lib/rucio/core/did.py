@@ -1412,6 +1412,57 @@ def list_content(
         __get_did(scope=scope, name=name, session=session)
 
 
+@read_session
+def list_content_page(
+    scope: "InternalScope",
+    name: str,
+    limit: int,
+    marker: Optional[tuple["InternalScope", str]] = None,
+    *,
+    session: "Session"
+) -> list[dict[str, Any]]:
+    """
+    List one page of the data identifier contents, ordered by scope and name.
+
+    Unlike list_content, no cursor stays open between two pages: the next page starts after
+    the last child of the previous one, so a listing can be resumed from any of its children.
+
+    :param scope: The scope name.
+    :param name: The data identifier name.
+    :param limit: The maximum number of children in the page.
+    :param marker: The (scope, name) of the last child of the previous page, None for the first page.
+    :param session: The database session in use.
+    :returns: List of child dictionaries.
+    """
+    stmt = select(
+        models.DataIdentifierAssociation.child_scope,
+        models.DataIdentifierAssociation.child_name,
+        models.DataIdentifierAssociation.child_type,
+        models.DataIdentifierAssociation.bytes,
+        models.DataIdentifierAssociation.adler32,
+        models.DataIdentifierAssociation.md5
+    ).with_hint(
+        models.DataIdentifierAssociation,
+        'INDEX(CONTENTS CONTENTS_PK)',
+        'oracle'
+    ).where(
+        and_(models.DataIdentifierAssociation.scope == scope,
+             models.DataIdentifierAssociation.name == name,
+             _after_marker(models.DataIdentifierAssociation.child_scope, models.DataIdentifierAssociation.child_name, marker))
+    ).order_by(
+        models.DataIdentifierAssociation.child_scope,
+        models.DataIdentifierAssociation.child_name
+    ).limit(
+        limit
+    )
+    page = [{'scope': child_scope, 'name': child_name, 'type': child_type, 'bytes': bytes_, 'adler32': adler32, 'md5': md5_}
+            for child_scope, child_name, child_type, bytes_, adler32, md5_ in session.execute(stmt)]
+    if not page:
+        # Raise exception if the did doesn't exist
+        __get_did(scope=scope, name=name, session=session)
+    return page
+
+
 @stream_session
 def list_content_history(
     scope: "InternalScope",
@@ -1791,6 +1842,131 @@ def list_files(scope: "InternalScope", name: str, long: bool = False, *, session
         raise exception.DataIdentifierNotFound(f"Data identifier '{scope}:{name}' not found")
 
 
+@read_session
+def list_files_page(
+    scope: "InternalScope",
+    name: str,
+    limit: int,
+    marker: Optional[tuple["InternalScope", str]] = None,
+    long: bool = False,
+    *,
+    session: "Session"
+) -> list[dict[str, Any]]:
+    """
+    List one page of the data identifier file contents, ordered by scope and name.
+
+    Unlike list_files, no cursor stays open between two pages: the next page starts after
+    the last file of the previous one, so a listing can be resumed from any of its files.
+    A file attached to several datasets of a container is listed once.
+
+    :param scope:      The scope name.
+    :param name:       The data identifier name.
+    :param limit:      The maximum number of files in the page.
+    :param marker:     The (scope, name) of the last file of the previous page, None for the first page.
+    :param long:       A boolean to choose if more metadata are returned or not.
+    :param session:    The database session in use.
+    :returns:          List of file dictionaries.
+    """
+    stmt = select(
+        models.DataIdentifier.scope,
+        models.DataIdentifier.name,
+        models.DataIdentifier.bytes,
+        models.DataIdentifier.adler32,
+        models.DataIdentifier.guid,
+        models.DataIdentifier.events,
+        models.DataIdentifier.lumiblocknr,
+        models.DataIdentifier.did_type
+    ).with_hint(
+        models.DataIdentifier,
+        'INDEX(DIDS DIDS_PK)',
+        'oracle'
+    ).where(
+        and_(models.DataIdentifier.scope == scope,
+             models.DataIdentifier.name == name)
+    )
+    try:
+        did = session.execute(stmt).one()
+    except NoResultFound:
+        raise exception.DataIdentifierNotFound(f"Data identifier '{scope}:{name}' not found")
+
+    if did.did_type == DIDType.FILE:
+        rows = []
+        if marker is None or (did.scope.internal, did.name) > (marker[0].internal, marker[1]):
+            rows = [(did.scope, did.name, did.bytes, did.adler32, did.guid, did.events, did.lumiblocknr)]
+    else:
+        if did.did_type == DIDType.DATASET:
+            in_datasets = and_(models.DataIdentifierAssociation.scope == scope,
+                               models.DataIdentifierAssociation.name == name)
+        else:
+            datasets = list_one_did_childs_stmt(scope, name, did_type=DIDType.DATASET).subquery()
+            in_datasets = and_(models.DataIdentifierAssociation.scope == datasets.c.scope,
+                               models.DataIdentifierAssociation.name == datasets.c.name)
+
+        if long:
+            stmt = select(
+                models.DataIdentifierAssociation.child_scope,
+                models.DataIdentifierAssociation.child_name,
+                models.DataIdentifierAssociation.bytes,
+                models.DataIdentifierAssociation.adler32,
+                models.DataIdentifierAssociation.guid,
+                models.DataIdentifierAssociation.events,
+                models.DataIdentifier.lumiblocknr
+            ).where(
+                and_(models.DataIdentifier.scope == models.DataIdentifierAssociation.child_scope,
+                     models.DataIdentifier.name == models.DataIdentifierAssociation.child_name)
+            )
+        else:
+            stmt = select(
+                models.DataIdentifierAssociation.child_scope,
+                models.DataIdentifierAssociation.child_name,
+                models.DataIdentifierAssociation.bytes,
+                models.DataIdentifierAssociation.adler32,
+                models.DataIdentifierAssociation.guid,
+                models.DataIdentifierAssociation.events,
+                bindparam("lumiblocknr", None)
+            )
+        stmt = stmt.distinct(
+        ).where(
+            and_(in_datasets,
+                 _after_marker(models.DataIdentifierAssociation.child_scope, models.DataIdentifierAssociation.child_name, marker))
+        ).order_by(
+            models.DataIdentifierAssociation.child_scope,
+            models.DataIdentifierAssociation.child_name
+        ).limit(
+            limit
+        )
+        rows = session.execute(stmt).all()
+
+    page = []
+    for child_scope, child_name, bytes_, adler32, guid, events, lumiblocknr in rows:
+        file = {'scope': child_scope, 'name': child_name, 'bytes': bytes_, 'adler32': adler32,
+                'guid': guid and guid.upper(), 'events': events}
+        if long:
+            file['lumiblocknr'] = lumiblocknr
+        page.append(file)
+    return page
+
+
+def _after_marker(
+    scope_column: "ColumnExpressionArgument[InternalScope]",
+    name_column: "ColumnExpressionArgument[str]",
+    marker: Optional[tuple["InternalScope", str]]
+) -> "ColumnExpressionArgument[bool]":
+    """
+    Returns the condition selecting the rows after the (scope, name) marker of a keyset pagination.
+    The comparison is expanded because not every database supports comparing tuples.
+
+    :param scope_column: The scope column.
+    :param name_column:  The name column.
+    :param marker:       The (scope, name) of the last row of the previous page, None for the first page.
+    """
+    if marker is None:
+        return true()
+    marker_scope, marker_name = marker
+    return or_(scope_column > marker_scope,
+               and_(scope_column == marker_scope, name_column > marker_name))
+
+
 @stream_session
 def scope_list(
     scope: "InternalScope",
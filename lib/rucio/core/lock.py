@@ -17,13 +17,14 @@ from datetime import datetime
 from typing import TYPE_CHECKING, Any, Optional, Union
 
 from sqlalchemy.exc import DatabaseError
-from sqlalchemy.sql.expression import and_, or_, select, true, update
+from sqlalchemy.sql.expression import and_, bindparam, insert, or_, select, true, update
 
 import rucio.core.did
 import rucio.core.rule
 from rucio.common.constants import RseAttr
 from rucio.common.exception import DataIdentifierNotFound
 from rucio.common.types import InternalScope, LoggerFunction
+from rucio.common.utils import chunks
 from rucio.core.lifetime_exception import define_eol
 from rucio.core.rse import get_rse_attribute, get_rse_name
 from rucio.db.sqla import filter_thread_work, models
@@ -341,52 +342,60 @@ def successful_transfer(scope: InternalScope, name: str, rse_id: str, nowait: bo
     :param session:  DB Session.
     """
 
-    stmt = select(
-        models.ReplicaLock
-    ).where(
-        and_(models.ReplicaLock.scope == scope,
-             models.ReplicaLock.name == name,
-             models.ReplicaLock.rse_id == rse_id)
-    ).with_for_update(
-        nowait=nowait
-    )
-    for lock in session.execute(stmt).scalars().all():
-        if lock.state == LockState.OK:
-            continue
-        logger(logging.DEBUG, 'Marking lock %s:%s for rule %s on rse %s as OK' % (lock.scope, lock.name, str(lock.rule_id), get_rse_name(rse_id=lock.rse_id, session=session)))
-        # Update the rule counters
-        stmt = select(
-            models.ReplicationRule
-        ).where(
-            models.ReplicationRule.id == lock.rule_id
-        ).with_for_update(
-            nowait=nowait
-        )
-        rule = session.execute(stmt).scalar_one()
-        logger(logging.DEBUG, 'Updating rule counters for rule %s [%d/%d/%d]' % (str(rule.id), rule.locks_ok_cnt, rule.locks_replicating_cnt, rule.locks_stuck_cnt))
+    successful_transfers([{'scope': scope, 'name': name, 'rse_id': rse_id}], nowait=nowait, session=session, logger=logger)
 
-        if lock.state == LockState.REPLICATING:
+
+@transactional_session
+def successful_transfers(replicas: "Iterable[dict[str, Any]]", nowait: bool, *, session: "Session", logger: LoggerFunction = logging.log) -> None:
+    """
+    Update the state of all replica locks because of many successful transfers.
+
+    The locks of all the replicas and their rules are loaded once, the new states and rule
+    counters are computed in memory, and the locks are written back with one statement.
+    Each rule is evaluated, notified and added to the history once for the whole batch.
+
+    :param replicas: The replicas, as dictionaries with scope, name and rse_id.
+    :param nowait:   Nowait parameter for the for_update queries.
+    :param session:  DB Session.
+    """
+
+    locks = [lock for lock in _get_replica_locks_for_update(replicas, nowait=nowait, session=session) if lock['state'] != LockState.OK]
+    if not locks:
+        return
+    rules = _get_rules_for_update({lock['rule_id'] for lock in locks}, nowait=nowait, session=session)
+    replicating_locks_before = {rule_id: rule.locks_replicating_cnt for rule_id, rule in rules.items()}
+
+    collection_replicas = set()
+    child_datasets = {}
+    for lock in locks:
+        rule = rules[lock['rule_id']]
+        logger(logging.DEBUG, 'Marking lock %s:%s for rule %s on rse %s as OK' % (lock['scope'], lock['name'], str(lock['rule_id']), get_rse_name(rse_id=lock['rse_id'], session=session)))
+        # Update the rule counters
+        if lock['state'] == LockState.REPLICATING:
             rule.locks_replicating_cnt -= 1
-        elif lock.state == LockState.STUCK:
+        elif lock['state'] == LockState.STUCK:
             rule.locks_stuck_cnt -= 1
         rule.locks_ok_cnt += 1
-        lock.state = LockState.OK
-        logger(logging.DEBUG, 'Finished updating rule counters for rule %s [%d/%d/%d]' % (str(rule.id), rule.locks_ok_cnt, rule.locks_replicating_cnt, rule.locks_stuck_cnt))
 
-        # Insert UpdatedCollectionReplica
+        # Collect the UpdatedCollectionReplica
         if rule.did_type == DIDType.DATASET:
-            models.UpdatedCollectionReplica(scope=rule.scope,
-                                            name=rule.name,
-                                            did_type=rule.did_type,
-                                            rse_id=rse_id).save(flush=False, session=session)
+            collection_replicas.add((rule.scope, rule.name, lock['rse_id']))
         elif rule.did_type == DIDType.CONTAINER:
             # Resolve to all child datasets
-            for dataset in rucio.core.did.list_child_datasets(scope=rule.scope, name=rule.name, session=session):
-                models.UpdatedCollectionReplica(scope=dataset['scope'],
-                                                name=dataset['name'],
-                                                did_type=DIDType.DATASET,
-                                                rse_id=rse_id).save(flush=False, session=session)
+            if rule.id not in child_datasets:
+                child_datasets[rule.id] = list(rucio.core.did.list_child_datasets(scope=rule.scope, name=rule.name, session=session))
+            for dataset in child_datasets[rule.id]:
+                collection_replicas.add((dataset['scope'], dataset['name'], lock['rse_id']))
+
+    _set_replica_locks_state(locks, LockState.OK, session=session)
+    if collection_replicas:
+        stmt = insert(
+            models.UpdatedCollectionReplica
+        )
+        session.execute(stmt, [{'scope': scope, 'name': name, 'did_type': DIDType.DATASET, 'rse_id': rse_id} for scope, name, rse_id in collection_replicas])
 
+    for rule in rules.values():
+        logger(logging.DEBUG, 'Finished updating rule counters for rule %s [%d/%d/%d]' % (str(rule.id), rule.locks_ok_cnt, rule.locks_replicating_cnt, rule.locks_stuck_cnt))
         # Update the rule state
         if rule.state == RuleState.SUSPENDED:
             pass
@@ -396,27 +405,18 @@ def successful_transfer(scope: InternalScope, name: str, rse_id: str, nowait: bo
             rule.state = RuleState.OK
             # Try to update the DatasetLocks
             if rule.grouping != RuleGrouping.NONE:
-                stmt = select(
-                    models.DatasetLock
-                ).where(
-                    models.DatasetLock.rule_id == rule.id
-                ).with_for_update(
-                    nowait=nowait
-                )
-                for ds_lock in session.execute(stmt).scalars().all():
-                    ds_lock.state = LockState.OK
-                session.flush()
-            rucio.core.rule.generate_rule_notifications(rule=rule, replicating_locks_before=rule.locks_replicating_cnt + 1, session=session)
+                _set_dataset_locks_state([rule.id], LockState.OK, nowait=nowait, session=session)
+            rucio.core.rule.generate_rule_notifications(rule=rule, replicating_locks_before=replicating_locks_before[rule.id], session=session)
             if rule.notification == RuleNotification.YES:
                 rucio.core.rule.generate_email_for_rule_ok_notification(rule=rule, session=session)
             # Try to release potential parent rules
             rucio.core.rule.release_parent_rule(child_rule_id=rule.id, session=session)
         elif rule.locks_replicating_cnt > 0 and rule.state == RuleState.REPLICATING and rule.notification == RuleNotification.PROGRESS:
-            rucio.core.rule.generate_rule_notifications(rule=rule, replicating_locks_before=rule.locks_replicating_cnt + 1, session=session)
+            rucio.core.rule.generate_rule_notifications(rule=rule, replicating_locks_before=replicating_locks_before[rule.id], session=session)
 
         # Insert rule history
         rucio.core.rule.insert_rule_history(rule=rule, recent=True, longterm=False, session=session)
-        session.flush()
+    session.flush()
 
 
 @transactional_session
@@ -436,57 +436,60 @@ def failed_transfer(scope: InternalScope, name: str, rse_id: str, error_message:
     :param session:         The database session in use.
     """
 
-    staging_required = get_rse_attribute(rse_id, RseAttr.STAGING_REQUIRED, session=session)
-    if staging_required:
-        rse_name = get_rse_name(rse_id=rse_id, session=session)
-        logger(logging.DEBUG, f'Destination RSE {rse_name} is type staging_required so do not update other OK replica locks.')
-        stmt = select(
-            models.ReplicaLock
-        ).where(
-            and_(models.ReplicaLock.scope == scope,
-                 models.ReplicaLock.name == name,
-                 models.ReplicaLock.rse_id == rse_id,
-                 models.ReplicaLock.state == LockState.REPLICATING)
-        ).with_for_update(
-            nowait=nowait
-        )
-    else:
-        stmt = select(
-            models.ReplicaLock
-        ).where(
-            and_(models.ReplicaLock.scope == scope,
-                 models.ReplicaLock.name == name,
-                 models.ReplicaLock.rse_id == rse_id)
-        ).with_for_update(
-            nowait=nowait
-        )
+    failed_transfers([{'scope': scope, 'name': name, 'rse_id': rse_id, 'error_message': error_message,
+                       'broken_rule_id': broken_rule_id, 'broken_message': broken_message}],
+                     nowait=nowait, session=session, logger=logger)
+
+
+@transactional_session
+def failed_transfers(replicas: "Iterable[dict[str, Any]]", nowait: bool = True, *, session: "Session", logger: LoggerFunction = logging.log) -> None:
+    """
+    Update the state of all replica locks because of many failed transfers.
+    If a transfer is permanently broken for a rule, the broken_rule_id of its replica should be filled which puts this rule into the SUSPENDED state.
 
-    for lock in session.execute(stmt).scalars().all():
-        if lock.state == LockState.STUCK:
-            continue
-        logger(logging.DEBUG, 'Marking lock %s:%s for rule %s on rse %s as STUCK' % (lock.scope, lock.name, str(lock.rule_id), get_rse_name(rse_id=lock.rse_id, session=session)))
+    The locks of all the replicas and their rules are loaded once, the new states and rule
+    counters are computed in memory, and the locks are written back with one statement.
+    Each rule is added to the history once for the whole batch.
+
+    :param replicas:        The replicas, as dictionaries with scope, name, rse_id and optionally error_message, broken_rule_id and broken_message.
+    :param nowait:          Nowait parameter for the for_update queries.
+    :param session:         The database session in use.
+    """
+
+    replicas = {(replica['scope'], replica['name'], replica['rse_id']): replica for replica in replicas}
+    staging_required = {}
+    for rse_id in {rse_id for _, _, rse_id in replicas}:
+        staging_required[rse_id] = get_rse_attribute(rse_id, RseAttr.STAGING_REQUIRED, session=session)
+        if staging_required[rse_id]:
+            rse_name = get_rse_name(rse_id=rse_id, session=session)
+            logger(logging.DEBUG, f'Destination RSE {rse_name} is type staging_required so do not update other OK replica locks.')
+
+    locks = [lock for lock in _get_replica_locks_for_update(replicas.values(), nowait=nowait, session=session)
+             if lock['state'] != LockState.STUCK and (lock['state'] == LockState.REPLICATING or not staging_required[lock['rse_id']])]
+    if not locks:
+        return
+    rules = _get_rules_for_update({lock['rule_id'] for lock in locks}, nowait=nowait, session=session)
+
+    stuck_dataset_lock_rule_ids = set()
+    for lock in locks:
+        replica = replicas[lock['scope'], lock['name'], lock['rse_id']]
+        error_message = replica.get('error_message', None)
+        broken_message = replica.get('broken_message', None)
+        rule = rules[lock['rule_id']]
+        logger(logging.DEBUG, 'Marking lock %s:%s for rule %s on rse %s as STUCK' % (lock['scope'], lock['name'], str(lock['rule_id']), get_rse_name(rse_id=lock['rse_id'], session=session)))
         # Update the rule counters
-        stmt = select(
-            models.ReplicationRule
-        ).where(
-            models.ReplicationRule.id == lock.rule_id
-        ).with_for_update(
-            nowait=nowait
-        )
-        rule = session.execute(stmt).scalar_one()
         logger(logging.DEBUG, 'Updating rule counters for rule %s [%d/%d/%d]' % (str(rule.id), rule.locks_ok_cnt, rule.locks_replicating_cnt, rule.locks_stuck_cnt))
-        if lock.state == LockState.REPLICATING:
+        if lock['state'] == LockState.REPLICATING:
             rule.locks_replicating_cnt -= 1
-        elif lock.state == LockState.OK:
+        elif lock['state'] == LockState.OK:
             rule.locks_ok_cnt -= 1
         rule.locks_stuck_cnt += 1
-        lock.state = LockState.STUCK
         logger(logging.DEBUG, 'Finished updating rule counters for rule %s [%d/%d/%d]' % (str(rule.id), rule.locks_ok_cnt, rule.locks_replicating_cnt, rule.locks_stuck_cnt))
 
         # Update the rule state
         if rule.state == RuleState.SUSPENDED:
             pass
-        elif lock.rule_id == broken_rule_id:
+        elif lock['rule_id'] == replica.get('broken_rule_id', None):
             rule.state = RuleState.SUSPENDED
             if broken_message is not None and len(broken_message) > 245:
                 rule.error = (broken_message[:245] + '...')
@@ -494,39 +497,134 @@ def failed_transfer(scope: InternalScope, name: str, rse_id: str, error_message:
                 rule.error = broken_message
             # Try to update the DatasetLocks
             if rule.grouping != RuleGrouping.NONE:
-                stmt = select(
-                    models.DatasetLock
-                ).where(
-                    models.DatasetLock.rule_id == rule.id
-                ).with_for_update(
-                    nowait=nowait
-                )
-                for ds_lock in session.execute(stmt).scalars().all():
-                    ds_lock.state = LockState.STUCK
+                stuck_dataset_lock_rule_ids.add(rule.id)
         elif rule.locks_stuck_cnt > 0:
             if rule.state != RuleState.STUCK:
                 rule.state = RuleState.STUCK
                 # Try to update the DatasetLocks
                 if rule.grouping != RuleGrouping.NONE:
-                    stmt = select(
-                        models.DatasetLock
-                    ).where(
-                        models.DatasetLock.rule_id == rule.id
-                    ).with_for_update(
-                        nowait=nowait
-                    )
-                    for ds_lock in session.execute(stmt).scalars().all():
-                        ds_lock.state = LockState.STUCK
+                    stuck_dataset_lock_rule_ids.add(rule.id)
             if rule.error != error_message:
                 if error_message is not None and len(error_message) > 245:
                     rule.error = (error_message[:245] + '...')
                 else:
                     rule.error = error_message
 
+    _set_replica_locks_state(locks, LockState.STUCK, session=session)
+    if stuck_dataset_lock_rule_ids:
+        _set_dataset_locks_state(stuck_dataset_lock_rule_ids, LockState.STUCK, nowait=nowait, session=session)
+
+    for rule in rules.values():
         # Insert rule history
         rucio.core.rule.insert_rule_history(rule=rule, recent=True, longterm=False, session=session)
 
 
+def _get_replica_locks_for_update(replicas: "Iterable[dict[str, Any]]", nowait: bool, *, session: "Session") -> list[dict[str, Any]]:
+    """
+    Select for update the replica locks of many replicas, with one query per RSE and chunk of replicas.
+
+    :param replicas: The replicas, as dictionaries with scope, name and rse_id.
+    :param nowait:   Nowait parameter for the for_update queries.
+    :param session:  The database session in use.
+    :returns:        The replica locks, as dictionaries with scope, name, rse_id, rule_id and state.
+    """
+    dids_per_rse = {}
+    for replica in replicas:
+        dids_per_rse.setdefault(replica['rse_id'], set()).add((replica['scope'], replica['name']))
+
+    locks = []
+    for rse_id, dids in dids_per_rse.items():
+        for chunk in chunks(sorted(dids), 100):
+            stmt = select(
+                models.ReplicaLock.scope,
+                models.ReplicaLock.name,
+                models.ReplicaLock.rse_id,
+                models.ReplicaLock.rule_id,
+                models.ReplicaLock.state
+            ).where(
+                and_(models.ReplicaLock.rse_id == rse_id,
+                     or_(*[and_(models.ReplicaLock.scope == scope,
+                                models.ReplicaLock.name == name)
+                           for scope, name in chunk]))
+            ).with_for_update(
+                nowait=nowait
+            )
+            locks.extend(row._asdict() for row in session.execute(stmt))
+    return locks
+
+
+def _get_rules_for_update(rule_ids: "Iterable[str]", nowait: bool, *, session: "Session") -> dict[str, models.ReplicationRule]:
+    """
+    Select for update the rules of many replica locks with one query.
+
+    :param rule_ids: The ids of the rules.
+    :param nowait:   Nowait parameter for the for_update queries.
+    :param session:  The database session in use.
+    :returns:        The rules by id.
+    """
+    stmt = select(
+        models.ReplicationRule
+    ).where(
+        models.ReplicationRule.id.in_(list(rule_ids))
+    ).with_for_update(
+        nowait=nowait
+    )
+    return {rule.id: rule for rule in session.execute(stmt).scalars()}
+
+
+def _set_replica_locks_state(locks: "Iterable[dict[str, Any]]", state: LockState, *, session: "Session") -> None:
+    """
+    Write the state of many replica locks with one statement.
+
+    :param locks:    The replica locks, as dictionaries with scope, name, rse_id and rule_id.
+    :param state:    The new state of the locks.
+    :param session:  The database session in use.
+    """
+    stmt = update(
+        models.ReplicaLock
+    ).where(
+        and_(models.ReplicaLock.scope == bindparam('b_scope'),
+             models.ReplicaLock.name == bindparam('b_name'),
+             models.ReplicaLock.rule_id == bindparam('b_rule_id'),
+             models.ReplicaLock.rse_id == bindparam('b_rse_id'))
+    ).values(
+        state=state
+    )
+    # executed by the connection, as an executemany, and not as an ORM bulk update by primary key
+    session.connection().execute(stmt, [{'b_scope': lock['scope'], 'b_name': lock['name'], 'b_rule_id': lock['rule_id'], 'b_rse_id': lock['rse_id']}
+                                        for lock in locks])
+
+
+def _set_dataset_locks_state(rule_ids: "Iterable[str]", state: LockState, nowait: bool, *, session: "Session") -> None:
+    """
+    Write the state of the dataset locks of many rules.
+
+    :param rule_ids: The ids of the rules.
+    :param state:    The new state of the dataset locks.
+    :param nowait:   Nowait parameter for the for_update queries.
+    :param session:  The database session in use.
+    """
+    rule_ids = list(rule_ids)
+    stmt = select(
+        models.DatasetLock.rule_id
+    ).where(
+        models.DatasetLock.rule_id.in_(rule_ids)
+    ).with_for_update(
+        nowait=nowait
+    )
+    session.execute(stmt)
+    stmt = update(
+        models.DatasetLock
+    ).where(
+        models.DatasetLock.rule_id.in_(rule_ids)
+    ).values(
+        state=state
+    ).execution_options(
+        synchronize_session=False
+    )
+    session.execute(stmt)
+
+
 @transactional_session
 def touch_dataset_locks(dataset_locks: "Iterable[dict[str, Any]]", *, session: "Session") -> bool:
     """
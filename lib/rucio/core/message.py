@@ -24,17 +24,23 @@ from rucio.common.exception import InvalidObject, RucioException
 from rucio.common.utils import APIEncoder, chunks
 from rucio.db.sqla import filter_thread_work
 from rucio.db.sqla.models import Message, MessageHistory
-from rucio.db.sqla.session import transactional_session
+from rucio.db.sqla.session import stream_session, transactional_session
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
     from typing import Any, Optional
 
+    from sqlalchemy.engine import Row
     from sqlalchemy.orm import Session
+    from sqlalchemy.sql import Select
 
     MessageType = dict[str, Any]
     MessagesListType = list[MessageType]
 
 
+_JSON_DECODER = json.JSONDecoder()
+
+
 @transactional_session
 def add_messages(messages: "MessagesListType", *, session: "Session") -> None:
     """
@@ -94,6 +100,70 @@ def add_message(event_type: str, payload: dict, *, session: "Session") -> None:
     add_messages([{'event_type': event_type, 'payload': payload}], session=session)
 
 
+def _select_message_ids(
+        bulk: int,
+        thread: "Optional[int]",
+        total_threads: "Optional[int]",
+        event_type: "Optional[str]",
+        old_mode: bool,
+        *, session: "Session") -> "Select":
+    """
+    Build the query of the ids of the next messages to retrieve, ordered by creation date.
+    """
+    stmt = select(
+        Message.id
+    ).order_by(
+        Message.created_at
+    )
+    stmt = filter_thread_work(session=session, query=stmt, total_threads=total_threads, thread_id=thread)
+    if event_type:
+        stmt = stmt.where(
+            Message.event_type == event_type
+        )
+    elif old_mode:
+        stmt = stmt.where(
+            Message.event_type != 'email'
+        )
+    return stmt
+
+
+def _get_nolimit_payloads(message_ids: "Iterable[str]", *, session: "Session") -> "dict[str, str]":
+    """
+    Get the payload_nolimit of the messages with the given ids.
+
+    :param message_ids: The ids of the messages whose payload is the 'nolimit' placeholder.
+    :param session: The database session to use.
+    :returns: Dictionary {id: payload_nolimit}
+    """
+    payloads = {}
+    # Oracle does not allow more than 1000 expressions in an IN list
+    for ids_chunk in chunks(list(message_ids), 1000):
+        stmt = select(
+            Message.id,
+            Message.payload_nolimit
+        ).where(
+            Message.id.in_(ids_chunk)
+        )
+        for id_, payload_nolimit in session.execute(stmt):
+            payloads[id_] = payload_nolimit
+    return payloads
+
+
+def _assemble_messages(rows: "Sequence[Row]", *, session: "Session") -> "MessagesListType":
+    """
+    Build the message dictionaries of the (id, created_at, event_type, payload, services) rows.
+    The nolimit payloads of all the rows are fetched at once, then all payloads are decoded.
+    """
+    nolimit_payloads = _get_nolimit_payloads([row[0] for row in rows if row[3] == 'nolimit'], session=session)
+    decode = _JSON_DECODER.decode
+    return [{'id': id_,
+             'created_at': created_at,
+             'event_type': event_type,
+             'payload': decode(str(nolimit_payloads[id_] if payload == 'nolimit' else payload)),
+             'services': services}
+            for id_, created_at, event_type, payload, services in rows]
+
+
 @transactional_session
 def retrieve_messages(bulk: int = 1000,
                       thread: "Optional[int]" = None,
@@ -115,22 +185,9 @@ def retrieve_messages(bulk: int = 1000,
 
     :returns messages: List of dictionaries {id, created_at, event_type, payload, services}
     """
-    messages = []
     try:
-        stmt_subquery = select(
-            Message.id
-        ).order_by(
-            Message.created_at
-        )
-        stmt_subquery = filter_thread_work(session=session, query=stmt_subquery, total_threads=total_threads, thread_id=thread)
-        if event_type:
-            stmt_subquery = stmt_subquery.where(
-                Message.event_type == event_type
-            )
-        elif old_mode:
-            stmt_subquery = stmt_subquery.where(
-                Message.event_type != 'email'
-            )
+        stmt_subquery = _select_message_ids(bulk=bulk, thread=thread, total_threads=total_threads,
+                                            event_type=event_type, old_mode=old_mode, session=session)
 
         # Step 1:
         # MySQL does not support limits in nested queries, limit on the outer query instead.
@@ -167,32 +224,58 @@ def retrieve_messages(bulk: int = 1000,
             )
 
         # Step 3:
-        # Assemble message object
-        for id_, created_at, event_type, payload, services in session.execute(stmt).all():
-            message = {'id': id_,
-                       'created_at': created_at,
-                       'event_type': event_type,
-                       'services': services}
-
-            # Only switch SQL context when necessary
-            if payload == 'nolimit':
-                nolimit_stmt = select(
-                    Message.payload_nolimit
-                ).where(
-                    Message.id == id_
-                )
-                message['payload'] = json.loads(str(session.execute(nolimit_stmt).scalar_one()))
-            else:
-                message['payload'] = json.loads(str(payload))
-
-            messages.append(message)
-
-        return messages
+        # Assemble message objects, only switching SQL context once for all the nolimit payloads
+        return _assemble_messages(session.execute(stmt).all(), session=session)
 
     except IntegrityError as e:
         raise RucioException(e.args)
 
 
+@stream_session
+def stream_messages(bulk: int = 1000,
+                    thread: "Optional[int]" = None,
+                    total_threads: "Optional[int]" = None,
+                    event_type: "Optional[str]" = None,
+                    old_mode: bool = True,
+                    chunk_size: int = 100,
+                    *, session: "Session") -> "Iterator[MessageType]":
+    """
+    Iterate over up to $bulk messages, in the same order as retrieve_messages.
+
+    The ids of the messages are selected first, then the messages are fetched and decoded
+    chunk by chunk, so that the first messages can be processed before the whole bulk is
+    loaded. Contrary to retrieve_messages, the rows are not locked: concurrent consumers
+    must work on distinct threads.
+
+    :param bulk: Number of messages as an integer.
+    :param thread: Identifier of the caller thread as an integer.
+    :param total_threads: Maximum number of threads as an integer.
+    :param event_type: Return only specified event_type. If None, returns everything.
+    :param old_mode: If True, doesn't return email if event_type is None.
+    :param chunk_size: Number of messages fetched per query.
+    :param session: The database session to use.
+
+    :returns messages: Iterator of dictionaries {id, created_at, event_type, payload, services}
+    """
+    stmt = _select_message_ids(bulk=bulk, thread=thread, total_threads=total_threads,
+                               event_type=event_type, old_mode=old_mode, session=session).limit(bulk)
+    message_ids = session.execute(stmt).scalars().all()
+
+    for ids_chunk in chunks(message_ids, chunk_size):
+        stmt = select(
+            Message.id,
+            Message.created_at,
+            Message.event_type,
+            Message.payload,
+            Message.services
+        ).where(
+            Message.id.in_(ids_chunk)
+        ).order_by(
+            Message.created_at
+        )
+        yield from _assemble_messages(session.execute(stmt).all(), session=session)
+
+
 @transactional_session
 def delete_messages(messages: "MessagesListType", *, session: "Session") -> None:
     """
@@ -25,7 +25,7 @@ from urllib.parse import parse_qs, urljoin, urlparse
 
 import requests
 from dogpile.cache.api import NoValue
-from jwkest.jws import JWS
+from jwkest.jws import JWS, NoSuitableSigningKeys
 from jwkest.jwt import JWT
 from oic import rndstr
 from oic.oauth2.message import CCAccessTokenRequest
@@ -1378,6 +1378,53 @@ def __save_validated_token(token, valid_dict, extra_dict=None, *, session: "Sess
         raise RucioException(error.args) from error
 
 
+def verify_jwt_signature(json_web_token: str) -> Optional[bool]:
+    """
+    Verifies the signature and the expiry of a JSON Web Token of a known issuer
+    against the public keys of the issuer cached by its oidc_client, without the database.
+
+    :param json_web_token: the JWT string to verify
+
+    :returns: True if the token is valid, False if it has expired or if its signature is invalid,
+              None if it is not a JWT of a known issuer, or if the cached keys of its issuer
+              don't include the key it was signed with (e.g. after a key rotation).
+    """
+    if not OIDC_CLIENTS:
+        return None
+    try:
+        jwt = JWT().unpack(json_web_token)
+        claims = jwt.payload()
+        oidc_client = OIDC_CLIENTS.get(claims.get('iss'))
+    except Exception:
+        return None
+    if oidc_client is None:
+        return None
+    try:
+        issuer_keys = oidc_client.keyjar.get_issuer_keys(claims['iss'])
+    except Exception:
+        logging.debug(traceback.format_exc())
+        return None
+    kid = jwt.headers.get('kid')
+    if not issuer_keys or (kid is not None and not any(key.kid == kid for key in issuer_keys)):
+        return None
+    try:
+        expired = float(claims.get('exp', 0)) < datetime.utcnow().timestamp()
+    except (TypeError, ValueError):
+        return None
+    if expired:
+        return False
+    try:
+        JWS().verify_compact(json_web_token, issuer_keys)
+    except NoSuitableSigningKeys:
+        logging.debug(traceback.format_exc())
+        return None
+    except Exception:
+        METRICS.counter(name='JSONWebToken.invalid_signature').inc()
+        logging.debug(traceback.format_exc())
+        return False
+    return True
+
+
 @transactional_session
 def validate_jwt(json_web_token: str, *, session: "Session") -> dict[str, Any]:
     """
@@ -17,7 +17,8 @@ import heapq
 import logging
 import math
 import random
-from collections import defaultdict, namedtuple
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
 from curses.ascii import isprint
 from datetime import datetime, timedelta
 from hashlib import sha256
@@ -25,12 +26,11 @@ from itertools import groupby
 from json import dumps
 from re import match
 from struct import unpack
-from traceback import format_exc
 from typing import TYPE_CHECKING, Any, Literal, Optional, Union
 
 import requests
 from dogpile.cache.api import NO_VALUE
-from sqlalchemy import and_, delete, exists, func, insert, not_, or_, union, update
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, not_, or_, union, update
 from sqlalchemy.exc import DatabaseError, IntegrityError
 from sqlalchemy.orm import aliased
 from sqlalchemy.orm.exc import FlushError, NoResultFound
@@ -57,7 +57,7 @@ from rucio.db.sqla.util import temp_table_mngr
 from rucio.rse import rsemanager as rsemgr
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Iterator, Mapping, Sequence
+    from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 
     from sqlalchemy.engine import Row
     from sqlalchemy.orm import Session
@@ -69,6 +69,13 @@ if TYPE_CHECKING:
 REGION = MemcacheRegion(expiration_time=60)
 METRICS = MetricManager(module=__name__)
 
+# Number of files for which the pfns are generated together by _list_replicas
+LIST_REPLICAS_PFN_BATCH_SIZE = 1000
+# Protocol objects used by _list_replicas, shared by all calls in this process
+LIST_REPLICAS_PROTOCOLS_CACHE_SIZE = 1000
+_LIST_REPLICAS_PROTOCOLS: "OrderedDict[tuple[Any, ...], list[tuple[str, RSEProtocol, int]]]" = OrderedDict()
+_LIST_REPLICAS_PROTOCOLS_LOCK = threading.Lock()
+
 
 ScopeName = namedtuple('ScopeName', ['scope', 'name'])
 Association = namedtuple('Association', ['scope', 'name', 'child_scope', 'child_name'])
@@ -883,19 +890,25 @@ def get_multi_cache_prefix(
     return ''
 
 
+def _rse_info_version(rse_info: "Mapping[str, Any]") -> str:
+    """
+    Fingerprint of the RSE settings: changes whenever the RSE or one of its protocols is modified.
+    """
+    return sha256(dumps(rse_info, sort_keys=True, default=str).encode()).hexdigest()
+
+
 def _get_list_replicas_protocols(
-        rse_id: str,
+        rse_info: "Mapping[str, Any]",
         domain: str,
         schemes: Optional[list[str]],
         additional_schemes: "Iterable[str]",
-        session: "Session"
+        logger: "LoggerFunction" = logging.log,
 ) -> "list[tuple[str, RSEProtocol, int]]":
     """
     Select the protocols to be used by list_replicas to build the PFNs for all replicas on the given RSE
     """
     domains = ['wan', 'lan'] if domain == 'all' else [domain]
 
-    rse_info = rsemgr.get_rse_info(rse_id=rse_id, session=session)
     # compute scheme priorities, and don't forget to exclude disabled protocols
     # 0 or None in RSE protocol definition = disabled, 1 = highest priority
     scheme_priorities = {
@@ -913,7 +926,7 @@ def _get_list_replicas_protocols(
         except exception.RSEProtocolNotSupported:
             pass  # no need to be verbose
         except Exception:
-            print(format_exc())
+            logger(logging.ERROR, 'Failed to select the read protocol of RSE %s', rse_info['rse'], exc_info=True)
 
     for s in additional_schemes:
         if s not in rse_schemes:
@@ -930,77 +943,75 @@ def _get_list_replicas_protocols(
         except exception.RSEProtocolNotSupported:
             pass  # no need to be verbose
         except Exception:
-            print(format_exc())
+            logger(logging.ERROR, 'Failed to create the %s protocol of RSE %s', s, rse_info['rse'], exc_info=True)
     return protocols
 
 
-def _build_list_replicas_pfn(
-        scope: "InternalScope",
-        name: str,
+def _get_cached_list_replicas_protocols(
         rse_id: str,
         domain: str,
-        protocol: "RSEProtocol",
-        path: str,
+        schemes: Optional[list[str]],
+        additional_schemes: "Iterable[str]",
+        session: "Session"
+) -> "list[tuple[str, RSEProtocol, int]]":
+    """
+    Same as _get_list_replicas_protocols, but the protocol objects are kept in a process-wide LRU cache,
+    keyed by the version of the RSE settings, to be re-used by subsequent list_replicas calls.
+    """
+    rse_info = rsemgr.get_rse_info(rse_id=rse_id, session=session)
+    key = (rse_id, _rse_info_version(rse_info), domain, tuple(schemes or ()), tuple(additional_schemes))
+    with _LIST_REPLICAS_PROTOCOLS_LOCK:
+        protocols = _LIST_REPLICAS_PROTOCOLS.get(key)
+        if protocols is not None:
+            _LIST_REPLICAS_PROTOCOLS.move_to_end(key)
+            return protocols
+
+    protocols = _get_list_replicas_protocols(rse_info=rse_info, domain=domain, schemes=schemes, additional_schemes=additional_schemes)
+    with _LIST_REPLICAS_PROTOCOLS_LOCK:
+        _LIST_REPLICAS_PROTOCOLS[key] = protocols
+        while len(_LIST_REPLICAS_PROTOCOLS) > LIST_REPLICAS_PROTOCOLS_CACHE_SIZE:
+            _LIST_REPLICAS_PROTOCOLS.popitem(last=False)
+    return protocols
+
+
+def _get_list_replicas_pfn_settings(
+        rse_id: str,
         sign_urls: bool,
-        signature_lifetime: Optional[int],
         client_location: Optional[dict[str, Any]],
         logger: "LoggerFunction" = logging.log,
         *,
         session: "Session",
-) -> str:
+) -> dict[str, Any]:
     """
-    Generate the PFN for the given scope/name on the rse.
-    If needed, sign the PFN url
-    If relevant, add the server-side root proxy to the pfn url
+    Resolve, once per RSE, the attributes and configuration values needed to finalize the PFNs
+    of the replicas on this RSE.
     """
-    pfn: str = list(protocol.lfns2pfns(lfns={'scope': scope.external,
-                                             'name': name,
-                                             'path': path}).values())[0]
+    settings = {
+        'sign_service': None,
+        'cache_site': '',
+        'root_proxy_internal': '',
+        'simulate_multirange': None,
+    }
 
-    # do we need to sign the URLs?
-    if sign_urls and protocol.attributes['scheme'] == 'https':
-        service = get_rse_attribute(rse_id, RseAttr.SIGN_URL, session=session)
-        if service:
-            pfn = get_signed_url(rse_id=rse_id, service=service, operation='read', url=pfn, lifetime=signature_lifetime)
+    if sign_urls:
+        settings['sign_service'] = get_rse_attribute(rse_id, RseAttr.SIGN_URL, session=session)
 
     # server side root proxy handling if location is set.
-    # supports root and http destinations
     # cannot be pushed into protocols because we need to lookup rse attributes.
-    # ultra-conservative implementation.
-    if domain == 'wan' and protocol.attributes['scheme'] in ['root', 'http', 'https'] and client_location:
-
-        if 'site' in client_location and client_location['site']:
-            replica_site = get_rse_attribute(rse_id, RseAttr.SITE, session=session)
-
-            # does it match with the client? if not, it's an outgoing connection
-            # therefore the internal proxy must be prepended
-            if client_location['site'] != replica_site:
-                cache_site = config_get('clientcachemap', client_location['site'], default='', session=session)
-                if cache_site != '':
-                    # print('client', client_location['site'], 'has cache:', cache_site)
-                    # print('filename', name)
-                    selected_prefix = get_multi_cache_prefix(cache_site, name)
-                    if selected_prefix:
-                        pfn = f"root://{selected_prefix}//{pfn.replace('davs://', 'root://')}"
-                else:
-                    # print('site:', client_location['site'], 'has no cache')
-                    # print('lets check if it has defined an internal root proxy ')
-                    root_proxy_internal = config_get('root-proxy-internal',    # section
-                                                     client_location['site'],  # option
-                                                     default='',               # empty string to circumvent exception
-                                                     session=session)
-
-                    if root_proxy_internal:
-                        # TODO: XCache does not seem to grab signed URLs. Doublecheck with XCache devs.
-                        #       For now -> skip prepending XCache for GCS.
-                        if 'storage.googleapis.com' in pfn or 'atlas-google-cloud.cern.ch' in pfn or 'amazonaws.com' in pfn:
-                            pass  # ATLAS HACK
-                        else:
-                            # don't forget to mangle gfal-style davs URL into generic https URL
-                            pfn = f"root://{root_proxy_internal}//{pfn.replace('davs://', 'https://')}"
+    if client_location and 'site' in client_location and client_location['site']:
+        replica_site = get_rse_attribute(rse_id, RseAttr.SITE, session=session)
+
+        # does it match with the client? if not, it's an outgoing connection
+        # therefore the internal proxy must be prepended
+        if client_location['site'] != replica_site:
+            settings['cache_site'] = config_get('clientcachemap', client_location['site'], default='', session=session)
+            if settings['cache_site'] == '':
+                settings['root_proxy_internal'] = config_get('root-proxy-internal',    # section
+                                                             client_location['site'],  # option
+                                                             default='',               # empty string to circumvent exception
+                                                             session=session)
 
     simulate_multirange = get_rse_attribute(rse_id, RseAttr.SIMULATE_MULTIRANGE, session=session)
-
     if simulate_multirange is not None:
         try:
             # cover values that cannot be cast to int
@@ -1011,11 +1022,167 @@ def _build_list_replicas_pfn(
         if simulate_multirange <= 0:
             logger(logging.WARNING, f'Value {simulate_multirange} encountered when retrieving RSE attribute "{RseAttr.SIMULATE_MULTIRANGE}" is <= 0, used default value "1".')
             simulate_multirange = 1
-        pfn += f'&#multirange=false&nconnections={simulate_multirange}'
+        settings['simulate_multirange'] = simulate_multirange
+    return settings
+
+
+def _build_list_replicas_pfn(
+        pfn: str,
+        name: str,
+        rse_id: str,
+        domain: str,
+        protocol: "RSEProtocol",
+        pfn_settings: dict[str, Any],
+        signature_lifetime: Optional[int],
+) -> str:
+    """
+    Finalize the PFN generated by the protocol for the given name on the rse.
+    If needed, sign the PFN url
+    If relevant, add the server-side root proxy to the pfn url
+    """
+    scheme = protocol.attributes['scheme']
+
+    # do we need to sign the URLs?
+    if pfn_settings['sign_service'] and scheme == 'https':
+        pfn = get_signed_url(rse_id=rse_id, service=pfn_settings['sign_service'], operation='read', url=pfn, lifetime=signature_lifetime)
+
+    # supports root and http destinations
+    # ultra-conservative implementation.
+    if domain == 'wan' and scheme in ['root', 'http', 'https']:
+        if pfn_settings['cache_site']:
+            selected_prefix = get_multi_cache_prefix(pfn_settings['cache_site'], name)
+            if selected_prefix:
+                pfn = f"root://{selected_prefix}//{pfn.replace('davs://', 'root://')}"
+        elif pfn_settings['root_proxy_internal']:
+            # TODO: XCache does not seem to grab signed URLs. Doublecheck with XCache devs.
+            #       For now -> skip prepending XCache for GCS.
+            if 'storage.googleapis.com' in pfn or 'atlas-google-cloud.cern.ch' in pfn or 'amazonaws.com' in pfn:
+                pass  # ATLAS HACK
+            else:
+                # don't forget to mangle gfal-style davs URL into generic https URL
+                pfn = f"root://{pfn_settings['root_proxy_internal']}//{pfn.replace('davs://', 'https://')}"
+
+    if pfn_settings['simulate_multirange'] is not None:
+        pfn += f"&#multirange=false&nconnections={pfn_settings['simulate_multirange']}"
 
     return pfn
 
 
+def _fill_list_replicas_pfns(
+        batch: "list[tuple[dict[str, Any], list[tuple]]]",
+        protocols_by_rse: "Callable[[str, bool], list[tuple[str, RSEProtocol, int]]]",
+        pfn_settings_by_rse: "Callable[[str], dict[str, Any]]",
+        signature_lifetime: Optional[int],
+        by_rse_name: bool,
+        logger: "LoggerFunction" = logging.log,
+) -> "Iterator[dict[str, Any]]":
+    """
+    Build the pfns of a batch of files. The lfns of all files are grouped by protocol and each
+    protocol generates the pfns of the whole batch with a single lfns2pfns call. If this call
+    fails, the lfns are retried one by one, so that only the failing lfns miss their pfn.
+
+    :param batch: List of (file, replicas) with replicas being the rows of the file which have an RSE.
+    """
+    # First pass: group the lfns by protocol
+    lfns_by_protocol = {}
+    requested_pfns = []
+    for file_idx, (file, replicas) in enumerate(batch):
+        for is_archive, archive_scope, archive_name, path, rse_id, rse, rse_type, volatile in replicas:
+            for domain, protocol, priority in protocols_by_rse(rse_id, is_archive):
+                # If the current "replica" is a constituent inside an archive, we must construct the pfn for the
+                # parent (archive) file and append the xrdcl.unzip query string to it.
+                if is_archive:
+                    t_scope = archive_scope
+                    t_name = archive_name
+                else:
+                    t_scope = file['scope']
+                    t_name = file['name']
+
+                lfn = {'scope': t_scope.external, 'name': t_name, 'path': path}
+                lfns_by_protocol.setdefault(protocol, {})['%s:%s' % (t_scope.external, t_name)] = lfn
+                requested_pfns.append((file_idx, is_archive, rse_id, rse, rse_type, volatile, domain, protocol, priority, t_scope, t_name))
+
+    pfns_by_protocol = {}
+    for protocol, lfns in lfns_by_protocol.items():
+        try:
+            pfns_by_protocol[protocol] = protocol.lfns2pfns(lfns=list(lfns.values()))
+        except Exception:
+            logger(logging.DEBUG, 'Failed to build the pfns of %d lfns in one call, retrying them one by one', len(lfns), exc_info=True)
+            pfns = pfns_by_protocol[protocol] = {}
+            for lfn_key, lfn in lfns.items():
+                try:
+                    pfns.update(protocol.lfns2pfns(lfns=lfn))
+                except Exception:
+                    logger(logging.ERROR, 'Failed to build the pfn of %s', lfn_key, exc_info=True)
+
+    # Second pass: finalize the pfns in the initial order
+    pfns_by_file = [{} for _ in batch]
+    for file_idx, is_archive, rse_id, rse, rse_type, volatile, domain, protocol, priority, t_scope, t_name in requested_pfns:
+        file = batch[file_idx][0]
+        pfns = pfns_by_file[file_idx]
+        pfn = pfns_by_protocol[protocol].get('%s:%s' % (t_scope.external, t_name))
+        if pfn is not None:
+            try:
+                pfn = _build_list_replicas_pfn(
+                    pfn=pfn,
+                    name=t_name,
+                    rse_id=rse_id,
+                    domain=domain,
+                    protocol=protocol,
+                    pfn_settings=pfn_settings_by_rse(rse_id),
+                    signature_lifetime=signature_lifetime,
+                )
+
+                client_extract = False
+                if is_archive:
+                    domain = 'zip'
+                    pfn = add_url_query(pfn, {'xrdcl.unzip': file['name']})
+                    if protocol.attributes['scheme'] == 'root':
+                        # xroot supports downloading files directly from inside an archive. Disable client_extract and prioritize xroot.
+                        client_extract = False
+                        priority = -1
+                    else:
+                        client_extract = True
+
+                pfns[pfn] = {
+                    'rse_id': rse_id,
+                    'rse': rse,
+                    'type': str(rse_type.name),
+                    'volatile': volatile,
+                    'domain': domain,
+                    'priority': priority,
+                    'client_extract': client_extract
+                }
+
+            except Exception:
+                # never end up here
+                logger(logging.ERROR, 'Failed to build the pfn of %s:%s', t_scope, t_name, exc_info=True)
+
+        if protocol.attributes['scheme'] == 'srm':
+            try:
+                file['space_token'] = protocol.attributes['extended_attributes']['space_token']
+            except KeyError:
+                file['space_token'] = None
+
+    for (file, _), pfns in zip(batch, pfns_by_file):
+        # fill the 'pfns' and 'rses' dicts in file
+        if pfns:
+            # set the total order for the priority
+            # --> exploit that L(AN) comes before W(AN) before Z(IP) alphabetically
+            # and use 1-indexing to be compatible with metalink
+            sorted_pfns = sorted(pfns.items(), key=lambda item: (item[1]['domain'], item[1]['priority'], item[0]))
+            for i, (pfn, pfn_value) in enumerate(list(sorted_pfns), start=1):
+                pfn_value['priority'] = i
+                file['pfns'][pfn] = pfn_value
+
+            sorted_pfns = sorted(file['pfns'].items(), key=lambda item: (item[1]['rse_id'], item[1]['priority'], item[0]))
+            for pfn, pfn_value in sorted_pfns:
+                rse_key = pfn_value['rse'] if by_rse_name else pfn_value['rse_id']
+                file['rses'].setdefault(rse_key, []).append(pfn)
+
+        yield file
+
+
 def _list_replicas(
         replicas: "Iterable[tuple]",
         show_pfns: bool,
@@ -1044,12 +1211,42 @@ def _list_replicas(
             except Exception:
                 pass  # do not hard fail if site cannot be resolved or is empty
 
-    file, pfns_cache = {}, {}
     protocols_cache = defaultdict(dict)
+    pfn_settings_cache = {}
+
+    def _protocols_by_rse(rse_id: str, is_archive: bool) -> "list[tuple[str, RSEProtocol, int]]":
+        # It's the first time we see this RSE, initialize the protocols needed for PFN generation
+        protocols = protocols_cache.get(rse_id, {}).get(is_archive)
+        if protocols is None:
+            # select the lan door in autoselect mode, otherwise use the wan door
+            domain = input_domain
+            if domain is None:
+                domain = 'wan'
+                if local_rses and rse_id in local_rses:
+                    domain = 'lan'
+
+            protocols = _get_cached_list_replicas_protocols(
+                rse_id=rse_id,
+                domain=domain,
+                schemes=schemes,
+                # We want 'root' for archives even if it wasn't included into 'schemes'
+                additional_schemes=['root'] if is_archive else [],
+                session=session,
+            )
+            protocols_cache[rse_id][is_archive] = protocols
+        return protocols
+
+    def _pfn_settings_by_rse(rse_id: str) -> dict[str, Any]:
+        pfn_settings = pfn_settings_cache.get(rse_id)
+        if pfn_settings is None:
+            pfn_settings = pfn_settings_cache[rse_id] = _get_list_replicas_pfn_settings(rse_id=rse_id, sign_urls=sign_urls,
+                                                                                        client_location=client_location, session=session)
+        return pfn_settings
 
+    batch = []
     for _, replica_group in groupby(replicas, key=lambda x: (x[0], x[1])):  # Group by scope/name
         file = {}
-        pfns = {}
+        file_replicas = []
         for scope, name, archive_scope, archive_name, bytes_, md5, adler32, path, state, rse_id, rse, rse_type, volatile in replica_group:
             if isinstance(archive_scope, str):
                 archive_scope = InternalScope(archive_scope, from_external=False)
@@ -1074,106 +1271,17 @@ def _list_replicas(
             if not show_pfns:
                 continue
 
-            # It's the first time we see this RSE, initialize the protocols needed for PFN generation
-            protocols = protocols_cache.get(rse_id, {}).get(is_archive)
-            if not protocols:
-                # select the lan door in autoselect mode, otherwise use the wan door
-                domain = input_domain
-                if domain is None:
-                    domain = 'wan'
-                    if local_rses and rse_id in local_rses:
-                        domain = 'lan'
-
-                protocols = _get_list_replicas_protocols(
-                    rse_id=rse_id,
-                    domain=domain,
-                    schemes=schemes,
-                    # We want 'root' for archives even if it wasn't included into 'schemes'
-                    additional_schemes=['root'] if is_archive else [],
-                    session=session,
-                )
-                protocols_cache[rse_id][is_archive] = protocols
-
-            # build the pfns
-            for domain, protocol, priority in protocols:
-                # If the current "replica" is a constituent inside an archive, we must construct the pfn for the
-                # parent (archive) file and append the xrdcl.unzip query string to it.
-                if is_archive:
-                    t_scope = archive_scope
-                    t_name = archive_name
-                else:
-                    t_scope = scope
-                    t_name = name
-
-                if 'determinism_type' in protocol.attributes:  # PFN is cacheable
-                    try:
-                        path = pfns_cache['%s:%s:%s' % (protocol.attributes['determinism_type'], t_scope.internal, t_name)]
-                    except KeyError:  # No cache entry scope:name found for this protocol
-                        path = protocol._get_path(t_scope, t_name)
-                        pfns_cache['%s:%s:%s' % (protocol.attributes['determinism_type'], t_scope.internal, t_name)] = path
-
-                try:
-                    pfn = _build_list_replicas_pfn(
-                        scope=t_scope,
-                        name=t_name,
-                        rse_id=rse_id,
-                        domain=domain,
-                        protocol=protocol,
-                        path=path,
-                        sign_urls=sign_urls,
-                        signature_lifetime=signature_lifetime,
-                        client_location=client_location,
-                        session=session,
-                    )
-
-                    client_extract = False
-                    if is_archive:
-                        domain = 'zip'
-                        pfn = add_url_query(pfn, {'xrdcl.unzip': name})
-                        if protocol.attributes['scheme'] == 'root':
-                            # xroot supports downloading files directly from inside an archive. Disable client_extract and prioritize xroot.
-                            client_extract = False
-                            priority = -1
-                        else:
-                            client_extract = True
-
-                    pfns[pfn] = {
-                        'rse_id': rse_id,
-                        'rse': rse,
-                        'type': str(rse_type.name),
-                        'volatile': volatile,
-                        'domain': domain,
-                        'priority': priority,
-                        'client_extract': client_extract
-                    }
-
-                except Exception:
-                    # never end up here
-                    print(format_exc())
-
-                if protocol.attributes['scheme'] == 'srm':
-                    try:
-                        file['space_token'] = protocol.attributes['extended_attributes']['space_token']
-                    except KeyError:
-                        file['space_token'] = None
-
-        # fill the 'pfns' and 'rses' dicts in file
-        if pfns:
-            # set the total order for the priority
-            # --> exploit that L(AN) comes before W(AN) before Z(IP) alphabetically
-            # and use 1-indexing to be compatible with metalink
-            sorted_pfns = sorted(pfns.items(), key=lambda item: (item[1]['domain'], item[1]['priority'], item[0]))
-            for i, (pfn, pfn_value) in enumerate(list(sorted_pfns), start=1):
-                pfn_value['priority'] = i
-                file['pfns'][pfn] = pfn_value
-
-            sorted_pfns = sorted(file['pfns'].items(), key=lambda item: (item[1]['rse_id'], item[1]['priority'], item[0]))
-            for pfn, pfn_value in sorted_pfns:
-                rse_key = pfn_value['rse'] if by_rse_name else pfn_value['rse_id']
-                file['rses'].setdefault(rse_key, []).append(pfn)
+            file_replicas.append((is_archive, archive_scope, archive_name, path, rse_id, rse, rse_type, volatile))
 
         if file:
-            yield file
+            batch.append((file, file_replicas))
+        if len(batch) >= LIST_REPLICAS_PFN_BATCH_SIZE:
+            yield from _fill_list_replicas_pfns(batch, protocols_by_rse=_protocols_by_rse, pfn_settings_by_rse=_pfn_settings_by_rse,
+                                                signature_lifetime=signature_lifetime, by_rse_name=by_rse_name)
+            batch = []
+    if batch:
+        yield from _fill_list_replicas_pfns(batch, protocols_by_rse=_protocols_by_rse, pfn_settings_by_rse=_pfn_settings_by_rse,
+                                            signature_lifetime=signature_lifetime, by_rse_name=by_rse_name)
 
     for scope, name, bytes_, md5, adler32 in _list_files_wo_replicas(files_wo_replica, session=session):
         yield {
@@ -2699,94 +2807,78 @@ def update_replicas_states(
     :param session:         The database session in use.
     """
 
+    replicas = list(replicas)
+    dids_per_rse = {}
     for replica in replicas:
-        stmt = select(
-            models.RSEFileAssociation
-        ).where(
-            models.RSEFileAssociation.rse_id == replica['rse_id'],
-            models.RSEFileAssociation.scope == replica['scope'],
-            models.RSEFileAssociation.name == replica['name']
-        ).with_for_update(
-            nowait=nowait
-        )
-
-        if session.execute(stmt).scalar_one_or_none() is None:
-            # remember scope, name and rse
-            raise exception.ReplicaNotFound("No row found for scope: %s name: %s rse: %s" % (replica['scope'], replica['name'], get_rse_name(replica['rse_id'], session=session)))
-
         if isinstance(replica['state'], str):
             replica['state'] = ReplicaState(replica['state'])
+        dids_per_rse.setdefault(replica['rse_id'], set()).add((replica['scope'], replica['name']))
 
-        values = {'state': replica['state']}
-        if replica['state'] == ReplicaState.BEING_DELETED:
-            # Exclude replicas use as sources
-            stmt = stmt.where(
-                and_(models.RSEFileAssociation.lock_cnt == 0,
-                     not_(exists(select(1)
-                                 .where(and_(models.RSEFileAssociation.scope == models.Source.scope,
-                                             models.RSEFileAssociation.name == models.Source.name,
-                                             models.RSEFileAssociation.rse_id == models.Source.rse_id)))))
+    # Lock all the replicas with one query per RSE and chunk of replicas
+    found_replicas = set()
+    for rse_id, dids in dids_per_rse.items():
+        for chunk in chunks(sorted(dids), 100):
+            stmt = select(
+                models.RSEFileAssociation.scope,
+                models.RSEFileAssociation.name
+            ).where(
+                and_(models.RSEFileAssociation.rse_id == rse_id,
+                     or_(*[and_(models.RSEFileAssociation.scope == scope,
+                                models.RSEFileAssociation.name == name)
+                           for scope, name in chunk]))
+            ).with_for_update(
+                nowait=nowait
             )
-            values['tombstone'] = OBSOLETE
-        elif replica['state'] == ReplicaState.AVAILABLE:
-            rucio.core.lock.successful_transfer(scope=replica['scope'], name=replica['name'], rse_id=replica['rse_id'], nowait=nowait, session=session)
-            stmt_bad_replicas = select(
-                func.count()
-            ).select_from(
+            found_replicas.update((scope, name, rse_id) for scope, name in session.execute(stmt))
+    for replica in replicas:
+        if (replica['scope'], replica['name'], replica['rse_id']) not in found_replicas:
+            # remember scope, name and rse
+            raise exception.ReplicaNotFound("No row found for scope: %s name: %s rse: %s" % (replica['scope'], replica['name'], get_rse_name(replica['rse_id'], session=session)))
+
+    available_replicas = [replica for replica in replicas if replica['state'] == ReplicaState.AVAILABLE]
+    if available_replicas:
+        rucio.core.lock.successful_transfers(available_replicas, nowait=nowait, session=session)
+        for chunk in chunks(available_replicas, 100):
+            stmt = update(
                 models.BadReplica
             ).where(
                 and_(models.BadReplica.state == BadFilesStatus.BAD,
-                     models.BadReplica.rse_id == replica['rse_id'],
-                     models.BadReplica.scope == replica['scope'],
-                     models.BadReplica.name == replica['name'])
+                     or_(*[and_(models.BadReplica.rse_id == replica['rse_id'],
+                                models.BadReplica.scope == replica['scope'],
+                                models.BadReplica.name == replica['name'])
+                           for replica in chunk]))
+            ).values({
+                models.BadReplica.state: BadFilesStatus.RECOVERED,
+                models.BadReplica.updated_at: datetime.utcnow()
+            }).execution_options(
+                synchronize_session=False
             )
+            session.execute(stmt)
 
-            if session.execute(stmt_bad_replicas).scalar():
-                update_stmt = update(
-                    models.BadReplica
-                ).where(
-                    and_(models.BadReplica.state == BadFilesStatus.BAD,
-                         models.BadReplica.rse_id == replica['rse_id'],
-                         models.BadReplica.scope == replica['scope'],
-                         models.BadReplica.name == replica['name'])
-                ).values({
-                    models.BadReplica.state: BadFilesStatus.RECOVERED,
-                    models.BadReplica.updated_at: datetime.utcnow()
-                }).execution_options(
-                    synchronize_session=False
-                )
-                session.execute(update_stmt)
-        elif replica['state'] == ReplicaState.UNAVAILABLE:
-            rucio.core.lock.failed_transfer(scope=replica['scope'], name=replica['name'], rse_id=replica['rse_id'],
-                                            error_message=replica.get('error_message', None),
-                                            broken_rule_id=replica.get('broken_rule_id', None),
-                                            broken_message=replica.get('broken_message', None),
-                                            nowait=nowait, session=session)
-        elif replica['state'] == ReplicaState.TEMPORARY_UNAVAILABLE:
-            stmt = stmt.where(
-                models.RSEFileAssociation.state.in_([ReplicaState.AVAILABLE,
-                                                     ReplicaState.TEMPORARY_UNAVAILABLE])
-            )
+    unavailable_replicas = [replica for replica in replicas if replica['state'] == ReplicaState.UNAVAILABLE]
+    if unavailable_replicas:
+        rucio.core.lock.failed_transfers(unavailable_replicas, nowait=nowait, session=session)
 
+    # Write the replicas with one statement per set of updated columns
+    values_per_columns = {}
+    for replica in replicas:
+        values = {'b_rse_id': replica['rse_id'], 'b_scope': replica['scope'], 'b_name': replica['name'], 'state': replica['state']}
+        if replica['state'] == ReplicaState.BEING_DELETED:
+            values['tombstone'] = OBSOLETE
         if 'path' in replica and replica['path']:
             values['path'] = replica['path']
+        values_per_columns.setdefault(tuple(sorted(values)), []).append(values)
 
+    for values in values_per_columns.values():
         update_stmt = update(
             models.RSEFileAssociation
         ).where(
-            and_(models.RSEFileAssociation.rse_id == replica['rse_id'],
-                 models.RSEFileAssociation.scope == replica['scope'],
-                 models.RSEFileAssociation.name == replica['name'])
-        ).values(
-            values
-        ).execution_options(
-            synchronize_session=False
+            and_(models.RSEFileAssociation.rse_id == bindparam('b_rse_id'),
+                 models.RSEFileAssociation.scope == bindparam('b_scope'),
+                 models.RSEFileAssociation.name == bindparam('b_name'))
         )
-
-        if not session.execute(update_stmt).rowcount:
-            if 'rse' not in replica:
-                replica['rse'] = get_rse_name(rse_id=replica['rse_id'], session=session)
-            raise exception.UnsupportedOperation('State %(state)s for replica %(scope)s:%(name)s on %(rse)s cannot be updated' % replica)
+        # executed by the connection, as an executemany, and not as an ORM bulk update by primary key
+        session.connection().execute(update_stmt, values)
     return True
 
 
@@ -2879,6 +2971,108 @@ def touch_replica(
     return True
 
 
+@transactional_session
+def touch_replicas(
+    replicas: "Iterable[dict[str, Any]]",
+    *,
+    session: "Session"
+) -> list[dict[str, Any]]:
+    """
+    Update the accessed_at timestamp of the given file replicas and of their dids, but skip the rows
+    which are locked by another transaction. Each chunk of replicas is updated with a single statement.
+    If the same replica is given multiple times, the most recent accessed_at is used.
+
+    :param replicas: dictionaries with the rse_id, scope, name and, optionally, accessed_at of the replicas.
+    :param session: The database session in use.
+
+    :returns: The replicas which were not updated because a row was locked.
+    """
+    now = datetime.utcnow()
+    latest_access = {}
+    for replica in replicas:
+        key = (str(replica['rse_id']).replace('-', '').lower(), replica['scope'], replica['name'])
+        accessed_at = replica.get('accessed_at') or now
+        if key not in latest_access or accessed_at > latest_access[key][0]:
+            latest_access[key] = (accessed_at, replica)
+
+    failed = []
+    for chunk in chunks(list(latest_access), 100):
+        replica_columns = (models.RSEFileAssociation.rse_id, models.RSEFileAssociation.scope, models.RSEFileAssociation.name)
+        stmt = select(
+            *replica_columns,
+            models.RSEFileAssociation.tombstone
+        ).where(
+            or_(*[and_(models.RSEFileAssociation.rse_id == rse_id,
+                       models.RSEFileAssociation.scope == scope,
+                       models.RSEFileAssociation.name == name)
+                  for rse_id, scope, name in chunk])
+        ).with_for_update(
+            skip_locked=True
+        )
+        tombstones = {(rse_id, scope, name): tombstone for rse_id, scope, name, tombstone in session.execute(stmt)}
+        skipped = set(chunk).difference(tombstones)
+        failed_keys = _locked_by_others(replica_columns, skipped, session=session)
+
+        did_accesses = {}
+        replica_mappings = []
+        for (rse_id, scope, name), tombstone in tombstones.items():
+            accessed_at = latest_access[rse_id, scope, name][0]
+            replica_mappings.append({
+                'rse_id': rse_id,
+                'scope': scope,
+                'name': name,
+                'accessed_at': accessed_at,
+                'tombstone': accessed_at if tombstone not in (OBSOLETE, None) else tombstone,
+            })
+            did_accesses[scope, name] = max(accessed_at, did_accesses.get((scope, name), accessed_at))
+        if replica_mappings:
+            session.bulk_update_mappings(models.RSEFileAssociation, replica_mappings)
+
+        if did_accesses:
+            did_columns = (models.DataIdentifier.scope, models.DataIdentifier.name)
+            stmt = select(
+                *did_columns
+            ).where(
+                and_(or_(*[and_(models.DataIdentifier.scope == scope,
+                                models.DataIdentifier.name == name)
+                           for scope, name in did_accesses]),
+                     models.DataIdentifier.did_type == DIDType.FILE)
+            ).with_for_update(
+                skip_locked=True
+            )
+            locked_dids = {(scope, name) for scope, name in session.execute(stmt)}
+            if locked_dids:
+                session.bulk_update_mappings(models.DataIdentifier, [{'scope': scope, 'name': name, 'accessed_at': did_accesses[scope, name]}
+                                                                     for scope, name in locked_dids])
+            # The replicas of a did locked by another transaction are retried as a whole
+            failed_dids = _locked_by_others(did_columns, did_accesses.keys() - locked_dids, session=session)
+            failed_keys.update(key for key in tombstones if key[1:] in failed_dids)
+
+        failed.extend(latest_access[key][1] for key in chunk if key in failed_keys)
+    return failed
+
+
+def _locked_by_others(
+    columns: "Sequence[Any]",
+    skipped_keys: "Iterable[tuple[Any, ...]]",
+    *,
+    session: "Session"
+) -> set[tuple[Any, ...]]:
+    """
+    Among the keys of the rows skipped by a SELECT ... FOR UPDATE SKIP LOCKED, find the ones which
+    exist, i.e. which are locked by another transaction.
+    """
+    skipped_keys = list(skipped_keys)
+    if not skipped_keys:
+        return set()
+    stmt = select(
+        *columns
+    ).where(
+        or_(*[and_(*[column == value for column, value in zip(columns, key)]) for key in skipped_keys])
+    )
+    return {tuple(row) for row in session.execute(stmt)}
+
+
 @transactional_session
 def update_replica_state(
     rse_id: str,
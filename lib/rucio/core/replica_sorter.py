@@ -26,21 +26,34 @@ from urllib.parse import urlparse
 
 import geoip2.database
 import requests
+from dogpile.cache import make_region
 from dogpile.cache.api import NO_VALUE
 
-from rucio.common import utils
-from rucio.common.cache import MemcacheRegion
 from rucio.common.config import config_get, config_get_bool, config_get_int
 from rucio.common.constants import SORTING_ALGORITHMS
 from rucio.common.exception import InvalidRSEExpression, SortingAlgorithmNotSupported
+from rucio.common.extra import import_extras
 from rucio.core.rse_expression_parser import parse_expression
 
+EXTRA_MODULES = import_extras(['numpy'])
+
+if EXTRA_MODULES['numpy']:
+    import numpy as np  # pylint: disable=import-error
+
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
     from _typeshed import StrPath
 
     from rucio.common.types import IPDict, ReplicaDict
 
-REGION = MemcacheRegion(expiration_time=900, function_key_generator=utils.my_key_generator)
+# Coordinates of the storage hosts and the custom distance table, kept in the memory of each process
+REGION = make_region().configure('dogpile.cache.memory',
+                                 expiration_time=config_get_int('core', 'replica_sorter_cache_expire', raise_exception=False,
+                                                                default=3600, check_config_table=False))
+CUSTOM_DISTANCE_TABLE_KEY = 'custom_distance_table'
+EARTH_RADIUS = 6378
+MOON_DISTANCE = 360000
 
 # This product uses GeoLite data created by MaxMind,
 # available from <a href="http://www.maxmind.com">http://www.maxmind.com</a>
@@ -128,55 +141,103 @@ def __get_lat_long(
     return None, None
 
 
-def __get_distance(
-        se1: str,
+def __get_cached_lat_long(
+        se: str,
+        geoip_db: 'Callable[[], geoip2.database.Reader]'
+) -> tuple[Optional[float], Optional[float]]:
+    """
+    Get the latitude and longitude of one host, cached in the memory of the process.
+    :param se : A hostname or IP.
+    :param geoip_db : Returns the Reader object (geoip2 API), only called on a cache miss.
+    """
+    cache_key = f'lat_long|{se}'
+    lat_long = REGION.get(cache_key)
+    if lat_long is NO_VALUE:
+        lat_long = __get_lat_long(se, geoip_db())
+        REGION.set(cache_key, lat_long)
+    return lat_long
+
+
+def __haversine(
+        lat: float,
+        long: float,
+        lats: list[float],
+        longs: list[float]
+) -> list[float]:
+    """
+    Great-circle distances in km between one point and a list of points, in degrees.
+    """
+    if EXTRA_MODULES['numpy']:
+        lat, long = np.radians(lat), np.radians(long)
+        lats, longs = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(longs, dtype=float))
+        hav = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2
+        return (EARTH_RADIUS * 2 * np.arcsin(np.sqrt(hav))).tolist()
+
+    lat, long = radians(lat), radians(long)
+    distances = []
+    for lat2, long2 in zip(lats, longs):
+        lat2, long2 = radians(lat2), radians(long2)
+        hav = sin((lat2 - lat) / 2) ** 2 + cos(lat) * cos(lat2) * sin((long2 - long) / 2) ** 2
+        distances.append(EARTH_RADIUS * 2 * asin(sqrt(hav)))
+    return distances
+
+
+def __get_distances(
+        hostnames: 'Iterable[str]',
         client_location: 'IPDict',
         ignore_error: bool
-) -> float:
+) -> dict[str, float]:
     """
-    Get the distance between 2 host using the GeoLite DB
-    :param se1 : A first hostname or IP.
+    Get the distances between hosts and the client using the GeoLite DB.
+    The coordinates of the client are resolved once, the ones of the hosts are cached.
+    :param hostnames : Hostnames or IPs.
     :param client_location : contains {'ip', 'fqdn', 'site', 'latitude', 'longitude'}
     :ignore_error: Ignore exception when the GeoLite DB cannot be retrieved
+    :returns: A dict with the distance in km for each host. Hosts which cannot be located are on the Moon.
     """
-    # does not cache ignore_error, str.lower on hostnames/ips is fine
-    canonical_parties = list(map(lambda x: str(x).lower(), [se1, client_location['ip'], client_location.get('latitude', ''), client_location.get('longitude', '')]))
-    canonical_parties.sort()
-    cache_key = f'replica_sorter:__get_distance|site_distance|{"".join(canonical_parties)}'.replace(' ', '.')
-    cache_val = REGION.get(cache_key)
-    if cache_val is NO_VALUE:
-        try:
-            gi = __geoip_db()
-
-            lat1, long1 = __get_lat_long(se1, gi)
+    distances = {hostname: MOON_DISTANCE for hostname in hostnames}
+    geoip_db = []
 
-            lat2 = client_location.get('latitude')
-            long2 = client_location.get('longitude')
+    def _geoip_db() -> geoip2.database.Reader:
+        if not geoip_db:
+            geoip_db.append(__geoip_db())
+        return geoip_db[0]
 
-            if not (lat2 and long2) and client_location['ip'] is not None:
-                lat2, long2 = __get_lat_long(client_location['ip'], gi)
-
-            if lat1 and lat2:
-                long1, lat1, long2, lat2 = map(radians, [long1, lat1, long2, lat2])  # type: ignore (lat2 and long2 might be None)
-                dlon = long2 - long1
-                dlat = lat2 - lat1
-                cache_val = 6378 * 2 * asin(sqrt(sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2))
-                REGION.set(cache_key, cache_val)
-                return cache_val
+    try:
+        lat, long = client_location.get('latitude'), client_location.get('longitude')
+        if not (lat and long) and client_location['ip'] is not None:
+            lat, long = __get_lat_long(client_location['ip'], _geoip_db())
+        if not (lat and long):
+            return distances
+    except Exception as error:
+        if not ignore_error:
+            raise error
+        return distances
+
+    located, lats, longs = [], [], []
+    for hostname in distances:
+        try:
+            host_lat, host_long = __get_cached_lat_long(hostname, _geoip_db)
         except Exception as error:
             if not ignore_error:
                 raise error
-        # One host is on the Moon
-        cache_val = 360000
-        REGION.set(cache_key, cache_val)
-    return cache_val  # type: ignore (cache_val should not be None)
+            continue
+        if host_lat and host_long:
+            located.append(hostname)
+            lats.append(host_lat)
+            longs.append(host_long)
 
+    if located:
+        distances.update(zip(located, __haversine(lat, long, lats, longs)))  # type: ignore (lat and long are set)
+    return distances
 
-def __download_custom_distance_table() -> None:
+
+def __download_custom_distance_table() -> dict[tuple[str, str], float]:
     """
     Downloads and parses the custom distance table specified by custom_distance_download_url
     in the config file. Each line of this CSV file should contain a site name, a RSE name,
     and a numerical distance value. Any additional fields are silently ignored.
+    :returns: a dict with the distance for each (RSE name, site) pair.
     """
     db_path = Path('/tmp/rucio_custom_distance_table.csv')
     db_expire_delay = timedelta(days=config_get_int('core', 'custom_distance_expire_delay', raise_exception=False, default=30))
@@ -203,7 +264,8 @@ def __download_custom_distance_table() -> None:
                                                                                                 result.status_code,
                                                                                                 result.text))
 
-    # parse the local file and add its contents to REGION
+    # parse the local file
+    table = {}
     with open(db_path, mode='r') as f:
         lines = f.readlines()
         for line in lines:
@@ -219,13 +281,14 @@ def __download_custom_distance_table() -> None:
             distance = float(bits[2].strip())
             if distance < 0.0 or distance > 1.0:
                 raise Exception('Distances in custom distance table must be in range 0-1')
-            cache_key = f'replica_sorter:__get_distance_custom|site_distance|{rse}|{site}'
-            REGION.set(cache_key, distance)
+            table[(rse, site)] = distance
+    return table
 
 
 def __get_distance_custom(rse: Union[tuple, str], client_location: 'IPDict') -> float:
     """
-    Return the distance from a client to a RSE by looking up in custom distance table
+    Return the distance from a client to a RSE by looking up in custom distance table.
+    The table is kept in the memory of the process.
     :param rse: RSE name, or tuple containing replica information with RSE name third
     :param client_location: location dictionary containing {'ip', 'fqdn', 'site', 'latitude', 'longitude'}
     :returns: numerical distance value
@@ -233,16 +296,12 @@ def __get_distance_custom(rse: Union[tuple, str], client_location: 'IPDict') ->
     # get RSE name out of tuple if necessary
     if isinstance(rse, tuple) and len(rse) == 4:
         rse = rse[2]
-    cache_key = f'replica_sorter:__get_distance_custom|site_distance|{rse}|{client_location["site"]}'
-    cache_val = REGION.get(cache_key)
-    if not isinstance(cache_val, float):
-        # download the table and add all its values to the cache
-        __download_custom_distance_table()
-        cache_val = REGION.get(cache_key)
-        if not isinstance(cache_val, float):
-            # assume maximum distance if not specified in table
-            cache_val = 1.0
-    return cache_val
+    table = REGION.get(CUSTOM_DISTANCE_TABLE_KEY)
+    if table is NO_VALUE:
+        table = __download_custom_distance_table()
+        REGION.set(CUSTOM_DISTANCE_TABLE_KEY, table)
+    # assume maximum distance if not specified in table
+    return table.get((rse, client_location['site']), 1.0)
 
 
 def site_selector(
@@ -273,7 +332,8 @@ def site_selector(
 def sort_replicas(
         dictreplica: dict[str, Any],
         client_location: 'IPDict',
-        selection: Optional[str] = None
+        selection: Optional[str] = None,
+        distance_cache: Optional[dict[str, float]] = None
 ) -> list[str]:
     """
     General sorting method for a dictionary of replicas. Returns the List of replicas.
@@ -281,7 +341,9 @@ def sort_replicas(
     :param dictreplica: A dict with replicas as keys (URIs).
     :param client_location: Location dictionary containing {'ip', 'fqdn', 'site', 'latitude', 'longitude'}
     :param selection: the selected sorting algorithm.
-    :param default: the default sorting algorithm (random, if not defined).
+    :param distance_cache: Distances already computed for this client location and sorting algorithm.
+                           Pass the same dict when sorting the replicas of many files for one client,
+                           so that each distance is only computed once.
     :returns: the keys of dictreplica in a sorted list.
     """
     if len(dictreplica) == 0:
@@ -301,9 +363,9 @@ def sort_replicas(
 
     # all sorts must be stable to preserve the priority (the Python standard sorting functions always are stable)
     if selection == 'geoip':
-        replicas = sort_geoip(dictreplica, client_location, ignore_error=config_get_bool('core', 'geoip_ignore_error', raise_exception=False, default=True))
+        replicas = sort_geoip(dictreplica, client_location, ignore_error=None, distance_cache=distance_cache)
     elif selection == 'custom_table':
-        replicas = sort_custom(dictreplica, client_location)
+        replicas = sort_custom(dictreplica, client_location, distance_cache=distance_cache)
     elif selection == 'random':
         replicas = sort_random(dictreplica)
 
@@ -321,42 +383,56 @@ def sort_random(dictreplica: dict[str, Any]) -> list[str]:
     return list_replicas
 
 
+def __get_hostname(pfn: str) -> str:
+    url = urlparse(pfn)
+    if url.scheme == 'root':
+        # handle root proxy urls: root://10.0.0.1//root://192.168.1.1:1094//dpm/....
+        sub_url = urlparse(url.path.lstrip('/'))
+        if sub_url.scheme and sub_url.hostname:
+            url = sub_url
+    return url.hostname  # type: ignore (hostname might be None)
+
+
 def sort_geoip(
         dictreplica: dict[str, Any],
         client_location: 'IPDict',
-        ignore_error: bool = False
+        ignore_error: Optional[bool] = False,
+        distance_cache: Optional[dict[str, float]] = None
 ) -> list[str]:
     """
     Return a list of replicas sorted by geographical distance to the client IP.
     :param dictreplica: A dict with replicas as keys (URIs).
     :param client_location: Location dictionary containing {'ip', 'fqdn', 'site', 'latitude', 'longitude'}
-    :param ignore_error: Ignore exception when the GeoLite DB cannot be retrieved
+    :param ignore_error: Ignore exception when the GeoLite DB cannot be retrieved.
+                         If None, [core] geoip_ignore_error is read when a distance has to be computed.
+    :param distance_cache: Distances by hostname already computed for this client location.
     """
-
-    def distance(pfn: str) -> float:
-        url = urlparse(pfn)
-        if url.scheme == 'root':
-            # handle root proxy urls: root://10.0.0.1//root://192.168.1.1:1094//dpm/....
-            sub_url = urlparse(url.path.lstrip('/'))
-            if sub_url.scheme and sub_url.hostname:
-                url = sub_url
-        return __get_distance(url.hostname, client_location, ignore_error)  # type: ignore (hostname might be None)
-
-    return list(sorted(dictreplica, key=distance))
+    distances = {} if distance_cache is None else distance_cache
+    hostnames = {pfn: __get_hostname(pfn) for pfn in dictreplica}
+    missing = set(hostnames.values()).difference(distances)
+    if missing:
+        if ignore_error is None:
+            ignore_error = config_get_bool('core', 'geoip_ignore_error', raise_exception=False, default=True)
+        distances.update(__get_distances(missing, client_location, ignore_error))
+    return sorted(dictreplica, key=lambda pfn: distances[hostnames[pfn]])
 
 
 def sort_custom(
         dictreplica: dict[str, Any],
-        client_location: 'IPDict'
+        client_location: 'IPDict',
+        distance_cache: Optional[dict[str, float]] = None
 ) -> list[str]:
     """
     Return a list of replicas sorted according to the custom distance table.
     :param dictreplica: A dict with replicas as keys (URIs).
     :param client_location: Location dictionary containing {'ip', 'fqdn', 'site', 'latitude', 'longitude'}
-    :param ignore_error: Ignore exception when the GeoLite DB cannot be retrieved
+    :param distance_cache: Distances by RSE already computed for this client location.
     """
-
-    def distance(pfn: str) -> float:
-        return __get_distance_custom(dictreplica[pfn], client_location)
-
-    return list(sorted(dictreplica, key=distance))
+    distances = {} if distance_cache is None else distance_cache
+    rses = {}
+    for pfn, replica in dictreplica.items():
+        rse = replica[2] if isinstance(replica, tuple) and len(replica) == 4 else replica
+        if rse not in distances:
+            distances[rse] = __get_distance_custom(rse, client_location)
+        rses[pfn] = rse
+    return sorted(dictreplica, key=lambda pfn: distances[rses[pfn]])
@@ -312,9 +312,9 @@ def queue_requests(
     """
     logger(logging.DEBUG, "queue requests")
 
-    request_clause = []
+    transfer_dids = set()
     rses = {}
-    preparer_enabled = config_get_bool('conveyor', 'use_preparer', raise_exception=False, default=False)
+    preparer_enabled = config_get_bool('conveyor', 'use_preparer', raise_exception=False, default=False, session=session)
     for req in requests:
 
         if isinstance(req['attributes'], str):
@@ -323,34 +323,36 @@ def queue_requests(
                 req['attributes'] = json.loads(req['attributes'] or '{}')
 
         if req['request_type'] == RequestType.TRANSFER:
-            request_clause.append(and_(models.Request.scope == req['scope'],
-                                       models.Request.name == req['name'],
-                                       models.Request.dest_rse_id == req['dest_rse_id'],
-                                       models.Request.request_type == RequestType.TRANSFER))
+            transfer_dids.add((req['scope'], req['name']))
 
         if req['dest_rse_id'] not in rses:
             rses[req['dest_rse_id']] = get_rse_name(req['dest_rse_id'], session=session)
 
-    # Check existing requests
-    existing_requests = []
-    if request_clause:
-        for requests_condition in chunks(request_clause, 1000):
-            stmt = select(
-                models.Request.scope,
-                models.Request.name,
-                models.Request.dest_rse_id
-            ).with_hint(
-                models.Request,
-                'INDEX(REQUESTS REQUESTS_SC_NA_RS_TY_UQ_IDX)',
-                'oracle'
-            ).where(
-                or_(*requests_condition)
-            )
-            existing_requests.extend(session.execute(stmt))
+    # Check existing requests, joining on the dids of the transfers instead of one condition per request
+    existing_requests = set()
+    if transfer_dids:
+        temp_table = temp_table_mngr(session).create_scope_name_table()
+        session.execute(insert(temp_table), [{'scope': scope, 'name': name} for scope, name in transfer_dids])
+        stmt = select(
+            models.Request.scope,
+            models.Request.name,
+            models.Request.dest_rse_id
+        ).with_hint(
+            models.Request,
+            'INDEX(REQUESTS REQUESTS_SC_NA_RS_TY_UQ_IDX)',
+            'oracle'
+        ).join(
+            temp_table,
+            and_(models.Request.scope == temp_table.scope,
+                 models.Request.name == temp_table.name)
+        ).where(
+            models.Request.request_type == RequestType.TRANSFER
+        )
+        existing_requests.update((scope, name, dest_rse_id) for scope, name, dest_rse_id in session.execute(stmt))
 
     new_requests, sources, messages = [], [], []
     for request in requests:
-        dest_rse_name = get_rse_name(rse_id=request['dest_rse_id'], session=session)
+        dest_rse_name = rses[request['dest_rse_id']]
         if request['request_type'] == RequestType.TRANSFER and (request['scope'], request['name'], request['dest_rse_id']) in existing_requests:
             logger(logging.WARNING, 'Request TYPE %s for DID %s:%s at RSE %s exists - ignoring' % (request['request_type'],
                                                                                                    request['scope'],
@@ -1283,65 +1285,68 @@ def archive_request(
     :param session:     Database session to use.
     """
 
-    req = get_request(request_id=request_id, session=session)
-
-    if req:
-        hist_request = models.RequestHistory(id=req['id'],
-                                             created_at=req['created_at'],
-                                             request_type=req['request_type'],
-                                             scope=req['scope'],
-                                             name=req['name'],
-                                             dest_rse_id=req['dest_rse_id'],
-                                             source_rse_id=req['source_rse_id'],
-                                             attributes=json.dumps(req['attributes']) if isinstance(req['attributes'], dict) else req['attributes'],
-                                             state=req['state'],
-                                             account=req['account'],
-                                             external_id=req['external_id'],
-                                             retry_count=req['retry_count'],
-                                             err_msg=req['err_msg'],
-                                             previous_attempt_id=req['previous_attempt_id'],
-                                             external_host=req['external_host'],
-                                             rule_id=req['rule_id'],
-                                             activity=req['activity'],
-                                             bytes=req['bytes'],
-                                             md5=req['md5'],
-                                             adler32=req['adler32'],
-                                             dest_url=req['dest_url'],
-                                             requested_at=req['requested_at'],
-                                             submitted_at=req['submitted_at'],
-                                             staging_started_at=req['staging_started_at'],
-                                             staging_finished_at=req['staging_finished_at'],
-                                             started_at=req['started_at'],
-                                             estimated_started_at=req['estimated_started_at'],
-                                             estimated_at=req['estimated_at'],
-                                             transferred_at=req['transferred_at'],
-                                             estimated_transferred_at=req['estimated_transferred_at'],
-                                             transfertool=req['transfertool'])
-        hist_request.save(session=session)
+    archive_requests([request_id], session=session)
+
+
+@METRICS.count_it
+@transactional_session
+def archive_requests(
+    request_ids: "Iterable[str]",
+    *,
+    session: "Session"
+) -> None:
+    """
+    Move many requests to the history table, with one statement per table and chunk of requests.
+
+    :param request_ids:  Request-IDs as 32 character hex strings.
+    :param session:      Database session to use.
+    """
+
+    columns = ['id', 'created_at', 'request_type', 'scope', 'name', 'dest_rse_id', 'source_rse_id', 'attributes', 'state', 'account',
+               'external_id', 'retry_count', 'err_msg', 'previous_attempt_id', 'external_host', 'rule_id', 'activity', 'bytes', 'md5',
+               'adler32', 'dest_url', 'requested_at', 'submitted_at', 'staging_started_at', 'staging_finished_at', 'started_at',
+               'estimated_started_at', 'estimated_at', 'transferred_at', 'estimated_transferred_at', 'transfertool']
+    for chunk in chunks(list(request_ids), 1000):
+        stmt = select(
+            models.Request.updated_at,
+            *[getattr(models.Request, column) for column in columns]
+        ).where(
+            models.Request.id.in_(chunk)
+        )
+        reqs = [row._asdict() for row in session.execute(stmt)]
+        if not reqs:
+            continue
+
+        stmt = insert(
+            models.RequestHistory
+        )
+        session.execute(stmt, [{column: req[column] for column in columns} for req in reqs])
         try:
-            time_diff = req['updated_at'] - req['created_at']
-            time_diff_s = time_diff.seconds + time_diff.days * 24 * 3600
-            METRICS.timer('archive_request_per_activity.{activity}').labels(activity=req['activity'].replace(' ', '_')).observe(time_diff_s)
+            for req in reqs:
+                time_diff = req['updated_at'] - req['created_at']
+                time_diff_s = time_diff.seconds + time_diff.days * 24 * 3600
+                METRICS.timer('archive_request_per_activity.{activity}').labels(activity=req['activity'].replace(' ', '_')).observe(time_diff_s)
+            archived_ids = [req['id'] for req in reqs]
             stmt = delete(
                 models.Source
             ).where(
-                models.Source.request_id == request_id
+                models.Source.request_id.in_(archived_ids)
             )
             session.execute(stmt)
 
             stmt = delete(
                 models.TransferHop
             ).where(
-                or_(models.TransferHop.request_id == request_id,
-                    models.TransferHop.next_hop_request_id == request_id,
-                    models.TransferHop.initial_request_id == request_id)
+                or_(models.TransferHop.request_id.in_(archived_ids),
+                    models.TransferHop.next_hop_request_id.in_(archived_ids),
+                    models.TransferHop.initial_request_id.in_(archived_ids))
             )
             session.execute(stmt)
 
             stmt = delete(
                 models.Request
             ).where(
-                models.Request.id == request_id
+                models.Request.id.in_(archived_ids)
             )
             session.execute(stmt)
         except IntegrityError as error:
@@ -1792,6 +1797,40 @@ class TransferStatsManager:
             )
             oldest_fetched = newest_available_db_timestamp + resolution
 
+    @read_session
+    def link_totals(
+            self,
+            older_t: "datetime.datetime",
+            dest_rse_id: Optional[str] = None,
+            src_rse_id: Optional[str] = None,
+            activity: Optional[str] = None,
+            by_activity: bool = True,
+            now: "Optional[datetime.datetime]" = None,
+            *,
+            session: "Session"
+    ) -> "list[dict[str, Any]]":
+        """
+        Load totals from now up to older_t in the past, with exactly one element per
+        src_rse/dest_rse/activity (or src_rse/dest_rse if not by_activity).
+
+        Read from the in-memory rollups of the process if older_t is within their window,
+        otherwise sum the totals loaded from the database. Callers computing older_t relative
+        to their own current time must pass it as now, for the window check to be exact.
+        """
+        now = now or datetime.datetime.utcnow()
+        if older_t >= now - TRANSFER_STATS_CACHE.window:
+            return TRANSFER_STATS_CACHE.totals(older_t=older_t, dest_rse_id=dest_rse_id, src_rse_id=src_rse_id, activity=activity,
+                                               by_activity=by_activity, now=now, session=session)
+
+        totals = {}
+        for stat in self.load_totals(older_t=older_t, dest_rse_id=dest_rse_id, src_rse_id=src_rse_id, activity=activity, by_activity=by_activity, session=session):
+            key = (stat['src_rse_id'], stat['dest_rse_id'], stat['activity']) if by_activity else (stat['src_rse_id'], stat['dest_rse_id'])
+            total = totals.setdefault(key, dict(stat))
+            if total is not stat:
+                for field in (models.TransferStats.files_failed.name, models.TransferStats.files_done.name, models.TransferStats.bytes_done.name):
+                    total[field] += stat[field]
+        return list(totals.values())
+
     @stream_session
     def _load_totals(
             self,
@@ -1963,6 +2002,140 @@ class TransferStatsManager:
             older_t = older_t - resolution
 
 
+class TransferStatsCache:
+    """
+    In-memory rollups of the latest transfer stats, shared by everything running in the process.
+
+    The samples of each resolution are kept in a ring buffer with one slot per sample timestamp,
+    holding the totals of every link over that time interval. Each refresh only loads the samples
+    created since the previous one, within the window, and the totals of a link over any time
+    interval inside the window are then summed from the slots without querying the samples again.
+    """
+
+    def __init__(self, window: datetime.timedelta = datetime.timedelta(hours=6)):
+        stats_manager = TransferStatsManager()
+        self.lock = threading.Lock()
+        self.window = window
+        # Samples committed more than this after their creation are missed until they leave the window
+        self.created_overlap = 2 * stats_manager.raw_resolution
+        self.raw_resolution = stats_manager.raw_resolution
+        self.rings: "dict[datetime.timedelta, list[Optional[tuple[datetime.datetime, dict[tuple[str, str, str], list[int]]]]]]" = {
+            resolution: [None] * (math.ceil(window / resolution) + 1)
+            for resolution, _ in stats_manager.retentions
+            if resolution < window
+        }
+        self.created_after: Optional[datetime.datetime] = None
+        self.recent_ids: dict[str, datetime.datetime] = {}
+
+    def totals(
+            self,
+            older_t: "datetime.datetime",
+            dest_rse_id: Optional[str] = None,
+            src_rse_id: Optional[str] = None,
+            activity: Optional[str] = None,
+            by_activity: bool = True,
+            now: "Optional[datetime.datetime]" = None,
+            *,
+            session: "Session"
+    ) -> "list[dict[str, Any]]":
+        """
+        Totals from now up to older_t in the past, one element per link, in the format of TransferStatsManager.load_totals.
+
+        Like load_totals, use the lowest resolution available and only fill the most recent
+        time, not covered by it yet, with samples at higher resolution.
+        """
+        with self.lock:
+            self._refresh(now=now or datetime.datetime.utcnow(), session=session)
+
+            totals = {}
+            covered_until = older_t
+            for resolution in sorted(self.rings, reverse=True):
+                newest_timestamp = None
+                for entry in self.rings[resolution]:
+                    if entry is None or entry[0] < covered_until:
+                        continue
+                    timestamp, slot = entry
+                    if newest_timestamp is None or timestamp > newest_timestamp:
+                        newest_timestamp = timestamp
+                    for (link_src_rse_id, link_dest_rse_id, link_activity), values in slot.items():
+                        if (src_rse_id and link_src_rse_id != src_rse_id) or (dest_rse_id and link_dest_rse_id != dest_rse_id) or (activity and link_activity != activity):
+                            continue
+                        key = (link_src_rse_id, link_dest_rse_id, link_activity) if by_activity else (link_src_rse_id, link_dest_rse_id)
+                        total = totals.setdefault(key, [0, 0, 0])
+                        for i, value in enumerate(values):
+                            total[i] += value
+                if newest_timestamp is not None:
+                    covered_until = newest_timestamp + resolution
+
+        result = []
+        for key, (files_failed, files_done, bytes_done) in totals.items():
+            stat = {'src_rse_id': key[0], 'dest_rse_id': key[1]}
+            if by_activity:
+                stat['activity'] = key[2]
+            stat.update(files_failed=files_failed, files_done=files_done, bytes_done=bytes_done)
+            result.append(stat)
+        return result
+
+    def _refresh(self, now: "datetime.datetime", *, session: "Session") -> None:
+        """
+        Load into the ring buffers the samples created since the previous refresh, using the
+        resolution and timestamp of TRANSFER_STATS_KEY_IDX to only read the window.
+        """
+        stmt = select(
+            models.TransferStats.id,
+            models.TransferStats.resolution,
+            models.TransferStats.timestamp,
+            models.TransferStats.src_rse_id,
+            models.TransferStats.dest_rse_id,
+            models.TransferStats.activity,
+            models.TransferStats.files_failed,
+            models.TransferStats.files_done,
+            models.TransferStats.bytes_done,
+            models.TransferStats.created_at,
+        ).where(
+            and_(models.TransferStats.resolution.in_([resolution.total_seconds() for resolution in self.rings]),
+                 models.TransferStats.timestamp >= now - self.window - max(self.rings))
+        )
+        if self.created_after is not None:
+            stmt = stmt.where(
+                models.TransferStats.created_at >= self.created_after - self.created_overlap
+            )
+
+        for row in session.execute(stmt):
+            if row.id in self.recent_ids:
+                continue
+            self.recent_ids[row.id] = row.created_at
+            if self.created_after is None or row.created_at > self.created_after:
+                self.created_after = row.created_at
+
+            resolution = datetime.timedelta(seconds=row.resolution)
+            ring = self.rings[resolution]
+            index = int(row.timestamp.timestamp() // resolution.total_seconds()) % len(ring)
+            entry = ring[index]
+            if entry is None or entry[0] < row.timestamp:
+                entry = ring[index] = (row.timestamp, {})
+            elif entry[0] > row.timestamp:
+                # Too old, the slot was already reused for a newer interval
+                continue
+            values = entry[1].setdefault((row.src_rse_id, row.dest_rse_id, row.activity), [0, 0, 0])
+            sample = (row.files_failed or 0, row.files_done or 0, row.bytes_done or 0)
+            if resolution == self.raw_resolution:
+                # One sample per daemon which observed transfers on the link
+                for i, value in enumerate(sample):
+                    values[i] += value
+            else:
+                # Concurrent downsampling can create the same sample twice, see TransferStatsManager._load_totals
+                for i, value in enumerate(sample):
+                    values[i] = max(values[i], value)
+
+        if self.created_after is not None:
+            self.recent_ids = {stats_id: created_at for stats_id, created_at in self.recent_ids.items()
+                               if created_at >= self.created_after - self.created_overlap}
+
+
+TRANSFER_STATS_CACHE = TransferStatsCache()
+
+
 @read_session
 def get_request_metrics(
         dest_rse_id: Optional[str] = None,
@@ -2004,11 +2177,12 @@ def get_request_metrics(
             (datetime.timedelta(hours=1), '1h'),
             (datetime.timedelta(hours=6), '6h')
     ):
-        db_stats = TransferStatsManager().load_totals(
+        db_stats = TransferStatsManager().link_totals(
             older_t=now - duration,
             dest_rse_id=dest_rse_id,
             src_rse_id=src_rse_id,
             activity=activity,
+            now=now,
             session=session,
         )
 
@@ -2519,6 +2693,86 @@ def release_all_waiting_requests(
         raise RucioException(error.args)
 
 
+@stream_session
+def list_waiting_requests(
+        updated_after: Optional[datetime.datetime] = None,
+        dest_rse_id: Optional[str] = None,
+        source_rse_id: Optional[str] = None,
+        *,
+        session: "Session"
+) -> "Iterator[Row]":
+    """
+    List the waiting requests with the attributes the throttler groups them by.
+
+    :param updated_after: Only list the requests updated at or after this time.
+    :param dest_rse_id: The destination rse id.
+    :param source_rse_id: The source rse id.
+    :param session: The database session in use.
+    """
+    stmt = select(
+        models.Request.id,
+        models.Request.account,
+        models.Request.dest_rse_id,
+        models.Request.source_rse_id,
+        models.Request.activity,
+        models.Request.requested_at,
+        models.Request.updated_at,
+    ).where(
+        and_(models.Request.state == RequestState.WAITING,
+             models.Request.request_type.in_([RequestType.TRANSFER, RequestType.STAGEIN, RequestType.STAGEOUT]))
+    )
+    if updated_after is not None:
+        stmt = stmt.with_hint(
+            models.Request,
+            'INDEX(REQUESTS REQUESTS_TYP_STA_UPD_IDX_OLD)',
+            'oracle'
+        ).where(
+            models.Request.updated_at >= updated_after
+        )
+    if dest_rse_id is not None:
+        stmt = stmt.where(
+            models.Request.dest_rse_id == dest_rse_id
+        )
+    if source_rse_id is not None:
+        stmt = stmt.where(
+            models.Request.source_rse_id == source_rse_id
+        )
+    for row in session.execute(stmt).yield_per(1000):
+        yield row
+
+
+@transactional_session
+def release_waiting_requests_by_ids(
+        request_ids: "Iterable[str]",
+        *,
+        session: "Session"
+) -> int:
+    """
+    Release the waiting requests with the given ids. The requests which are not waiting anymore are left untouched.
+
+    :param request_ids: The ids of the requests to release.
+    :param session: The database session.
+    :returns: The number of released requests.
+    """
+    rowcount = 0
+    try:
+        for chunk in chunks(request_ids, 1000):
+            stmt = update(
+                models.Request
+            ).where(
+                and_(models.Request.id.in_(chunk),
+                     models.Request.state == RequestState.WAITING)
+            ).execution_options(
+                synchronize_session=False
+            ).values({
+                models.Request.state: RequestState.QUEUED
+            })
+            rowcount += session.execute(stmt).rowcount
+    except IntegrityError as error:
+        raise RucioException(error.args)
+    return rowcount
+
+
 @stream_session
 def list_transfer_limits(
         *,
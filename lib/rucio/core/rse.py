@@ -31,6 +31,7 @@ from rucio.common.checksum import CHECKSUM_KEY, GLOBALLY_SUPPORTED_CHECKSUMS
 from rucio.common.config import get_lfn2pfn_algorithm_default
 from rucio.common.constants import RSE_ALL_SUPPORTED_PROTOCOL_OPERATIONS, RSE_ATTRS_BOOL, RSE_ATTRS_STR, SUPPORTED_SIGN_URL_SERVICES_LITERAL, RseAttr
 from rucio.common.utils import Availability
+from rucio.core.rse_attribute_index import RSE_ATTRIBUTE_INDEX
 from rucio.core.rse_counter import add_counter, get_counter
 from rucio.db.sqla import models
 from rucio.db.sqla.constants import ReplicaState, RSEType
@@ -441,6 +442,7 @@ def add_rse(
         raise exception.Duplicate(f"RSE '{rse}' already exists!")
     except DatabaseError as error:
         raise exception.RucioException(error.args)
+    RSE_ATTRIBUTE_INDEX.invalidate(session=session)
 
     # Add rse name as a RSE-Tag
     add_rse_attribute(rse_id=new_rse.id, key=rse, value=True, session=session)
@@ -503,6 +505,7 @@ def del_rse(rse_id, *, session: "Session"):
     except sqlalchemy.orm.exc.NoResultFound:
         raise exception.RSENotFound('RSE with id \'%s\' cannot be found' % rse_id)
     db_rse.delete(session=session)
+    RSE_ATTRIBUTE_INDEX.invalidate(session=session)
     try:
         del_rse_attribute(rse_id=rse_id, key=rse_name, session=session)
     except exception.RSEAttributeNotFound:
@@ -531,6 +534,7 @@ def restore_rse(rse_id, *, session: "Session"):
     db_rse.deleted = False
     db_rse.deleted_at = None
     db_rse.save(session=session)
+    RSE_ATTRIBUTE_INDEX.invalidate(session=session)
     rse_name = db_rse.rse
     add_rse_attribute(rse_id=rse_id, key=rse_name, value=True, session=session)
 
@@ -781,6 +785,7 @@ def add_rse_attribute(rse_id, key, value, *, session: "Session"):
     except IntegrityError:
         rse = get_rse_name(rse_id=rse_id, session=session)
         raise exception.Duplicate(f"RSE attribute '{key}-{value}' for RSE '{rse}' already exists!")
+    RSE_ATTRIBUTE_INDEX.add_attribute(rse_id, key, value, session=session)
     return True
 
 
@@ -806,6 +811,7 @@ def del_rse_attribute(rse_id, key, *, session: "Session"):
     except sqlalchemy.orm.exc.NoResultFound:
         raise exception.RSEAttributeNotFound('RSE attribute \'%s\' cannot be found' % key)
     rse_attr.delete(session=session)
+    RSE_ATTRIBUTE_INDEX.del_attribute(rse_id, key, session=session)
     return True
 
 
@@ -1715,6 +1721,7 @@ def update_rse(rse_id: str, parameters: dict[str, Any], *, session: "Session"):
         add_rse_attribute(rse_id, setting, param[setting], session=session)
 
     db_rse.update(param, session=session)
+    RSE_ATTRIBUTE_INDEX.invalidate(session=session)
     if 'rse' in param:
         add_rse_attribute(rse_id=rse_id, key=parameters['name'], value=True, session=session)
         del_rse_attribute(rse_id=rse_id, key=old_rse_name, session=session)
@@ -0,0 +1,329 @@
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+In-process index of all RSEs and their attributes.
+
+The index keeps one snapshot of the non-deleted RSEs and one bitset (a python integer)
+per attribute (key, value) pair. Bit ``i`` of a bitset is set if the RSE at position ``i``
+of the snapshot has the attribute. The columns of the RSE table (e.g. ``rse_type`` or
+``availability_write``) are indexed the same way and, as in :py:func:`rucio.core.rse.list_rses`,
+take precedence over RSE attributes of the same name. RSE expressions can thus be evaluated
+with bitwise operations without any database round trip.
+
+The snapshot is kept up to date in three ways:
+
+* attribute changes done by this process are applied incrementally, once their
+  transaction is committed;
+* a shared generation marker in memcache is bumped on every committed change, so that
+  other processes notice the change and reload their snapshot;
+* the snapshot is fully reloaded after ``[rse_expression] index_ttl`` seconds.
+"""
+
+import threading
+import time
+import uuid
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Optional
+
+from dogpile.cache.api import NO_VALUE
+from sqlalchemy import event
+from sqlalchemy.orm import scoped_session
+from sqlalchemy.sql.expression import false, select
+
+from rucio.common.cache import MemcacheRegion
+from rucio.common.config import config_get_int
+from rucio.db.sqla import models
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from sqlalchemy.orm import Session
+
+
+REGION = MemcacheRegion(expiration_time=86400)
+GENERATION_KEY = 'rse_attribute_index_generation'
+RSE_COLUMNS = frozenset(column.key for column in models.RSE.__table__.columns)
+
+
+def normalize_attribute_value(value: Any) -> str:
+    """
+    Normalize an attribute value the same way it is stored in the database.
+
+    :param value: The attribute or RSE column value (bool, enum, string or number).
+    :returns:     The normalized string representation.
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, Enum):
+        return value.name
+    value = str(value)
+    if value.lower() in ('true', 'false'):
+        return value.lower()
+    return value
+
+
+class RSEAttributeSnapshot:
+    """
+    Immutable-by-convention view of the RSEs and their attribute bitsets.
+    Only :py:class:`RSEAttributeIndex` mutates it, while holding its lock.
+    """
+
+    def __init__(self, rses: "Iterable[dict[str, Any]]", attributes: "Iterable[tuple[str, str, Any]]"):
+        """
+        :param rses:        RSE dictionaries, in the order they should be returned.
+        :param attributes:  Tuples (rse_id, key, value).
+        """
+        self.rses: list[dict[str, Any]] = list(rses)
+        self.positions: dict[str, int] = {rse['id']: pos for pos, rse in enumerate(self.rses)}
+        self.all_bits = (1 << len(self.rses)) - 1
+        self.value_bits: dict[tuple[str, str], int] = {}
+        self.key_values: dict[str, dict[int, Any]] = {}
+        self.column_bits: dict[tuple[str, str], int] = {}
+        for pos, rse in enumerate(self.rses):
+            for key in RSE_COLUMNS:
+                value = rse.get(key)
+                if value is not None:
+                    column_value = (key, normalize_attribute_value(value))
+                    self.column_bits[column_value] = self.column_bits.get(column_value, 0) | (1 << pos)
+        for rse_id, key, value in attributes:
+            pos = self.positions.get(rse_id)
+            if pos is not None:
+                self.set_attribute(pos, key, value)
+
+    def set_attribute(self, pos: int, key: str, value: Any) -> None:
+        """
+        Set (or overwrite) an attribute of the RSE at the given position.
+        """
+        self.del_attribute(pos, key)
+        bit = 1 << pos
+        norm_value = normalize_attribute_value(value)
+        self.value_bits[(key, norm_value)] = self.value_bits.get((key, norm_value), 0) | bit
+        self.key_values.setdefault(key, {})[pos] = value
+
+    def del_attribute(self, pos: int, key: str) -> None:
+        """
+        Remove an attribute of the RSE at the given position, if it exists.
+        """
+        values = self.key_values.get(key)
+        if not values or pos not in values:
+            return
+        norm_value = normalize_attribute_value(values.pop(pos))
+        bits = self.value_bits[(key, norm_value)] & ~(1 << pos)
+        if bits:
+            self.value_bits[(key, norm_value)] = bits
+        else:
+            del self.value_bits[(key, norm_value)]
+        if not values:
+            del self.key_values[key]
+
+    def equal(self, key: str, value: Any) -> int:
+        """
+        :returns: The bitset of RSEs having the RSE column or attribute key set to value.
+        """
+        if key in RSE_COLUMNS:
+            return self.column_bits.get((key, normalize_attribute_value(value)), 0)
+        return self.value_bits.get((key, normalize_attribute_value(value)), 0)
+
+    def compare(self, key: str, value: Any, smaller: bool) -> int:
+        """
+        :returns: The bitset of RSEs having a numeric attribute value smaller (or larger) than value.
+        """
+        try:
+            threshold = float(value)
+        except (TypeError, ValueError):
+            return 0
+        bits = 0
+        for pos, attr_value in self.key_values.get(key, {}).items():
+            try:
+                attr_value = float(attr_value)
+            except (TypeError, ValueError):
+                continue
+            if (attr_value < threshold) if smaller else (attr_value > threshold):
+                bits |= 1 << pos
+        return bits
+
+    def iter_rses(self, bits: int) -> "Iterator[dict[str, Any]]":
+        """
+        :returns: The RSE dictionaries of the bitset, in snapshot order.
+        """
+        pos = 0
+        while bits:
+            if bits & 1:
+                yield self.rses[pos]
+            bits >>= 1
+            pos += 1
+
+
+class RSEAttributeIndex:
+    """
+    Process-wide, thread-safe holder of the current :py:class:`RSEAttributeSnapshot`.
+    """
+
+    def __init__(self, ttl: Optional[int] = None, check_interval: Optional[int] = None):
+        """
+        :param ttl:             Seconds after which the snapshot is fully reloaded from the database.
+        :param check_interval:  Minimum seconds between two checks of the shared generation marker.
+        """
+        if ttl is None:
+            ttl = config_get_int('rse_expression', 'index_ttl', raise_exception=False, default=600, check_config_table=False)
+        if check_interval is None:
+            check_interval = config_get_int('rse_expression', 'index_check_interval', raise_exception=False, default=0, check_config_table=False)
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[RSEAttributeSnapshot] = None
+        self._generation = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def get_snapshot(self, *, session: "Session") -> RSEAttributeSnapshot:
+        """
+        Return an up-to-date snapshot, reloading it from the database if needed.
+
+        :param session: The database session in use.
+        """
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._loaded_at < self.ttl:
+            if now - self._checked_at < self.check_interval:
+                return snapshot
+            self._checked_at = now
+            generation = REGION.get(GENERATION_KEY)
+            if generation is not NO_VALUE and generation == self._generation:
+                return snapshot
+        return self._reload(session=session)
+
+    def invalidate(self, *, session: "Optional[Session]" = None) -> None:
+        """
+        Drop the snapshot of this process and notify the other processes,
+        once the transaction of the session is committed.
+
+        :param session: The database session of the change, None if it is already committed.
+        """
+        def _invalidate() -> None:
+            self._snapshot = None
+
+        self._after_commit(_invalidate, session=session)
+
+    def add_attribute(self, rse_id: str, key: str, value: Any, *, session: "Optional[Session]" = None) -> None:
+        """
+        Apply an added (or overwritten) RSE attribute to the snapshot,
+        once the transaction of the session is committed.
+        """
+        def _add_attribute() -> None:
+            if self._snapshot is not None:
+                pos = self._snapshot.positions.get(rse_id)
+                if pos is None:
+                    self._snapshot = None
+                else:
+                    self._snapshot.set_attribute(pos, key, value)
+
+        self._after_commit(_add_attribute, session=session)
+
+    def del_attribute(self, rse_id: str, key: str, *, session: "Optional[Session]" = None) -> None:
+        """
+        Apply a deleted RSE attribute to the snapshot,
+        once the transaction of the session is committed.
+        """
+        def _del_attribute() -> None:
+            if self._snapshot is not None:
+                pos = self._snapshot.positions.get(rse_id)
+                if pos is not None:
+                    self._snapshot.del_attribute(pos, key)
+
+        self._after_commit(_del_attribute, session=session)
+
+    def _after_commit(self, change: "Callable[[], None]", *, session: "Optional[Session]") -> None:
+        """
+        Apply a change to the snapshot and bump the shared generation marker after the
+        transaction of the session is committed. Applying it before would keep the change
+        in this process, and let the other processes reload the uncommitted rows, if the
+        transaction is rolled back.
+        """
+        if session is None:
+            with self._lock:
+                change()
+                self._bump_generation()
+            return
+
+        if isinstance(session, scoped_session):
+            session = session()
+        pending_key = f'rse_attribute_index_pending_{id(self)}'
+        pending = session.info.get(pending_key)
+        if pending is None:
+            pending = session.info[pending_key] = []
+
+            def _on_commit(_session: "Session") -> None:
+                changes = list(pending)
+                pending.clear()
+                if changes:
+                    with self._lock:
+                        for pending_change in changes:
+                            pending_change()
+                        self._bump_generation()
+
+            def _on_rollback(_session: "Session") -> None:
+                if pending:
+                    pending.clear()
+                    with self._lock:
+                        # Check the shared generation marker again at the next access
+                        self._generation = None
+
+            event.listen(session, 'after_commit', _on_commit)
+            event.listen(session, 'after_rollback', _on_rollback)
+        pending.append(change)
+
+    def _bump_generation(self) -> None:
+        self._generation = uuid.uuid4().hex
+        REGION.set(GENERATION_KEY, self._generation)
+
+    def _reload(self, *, session: "Session") -> RSEAttributeSnapshot:
+        generation = REGION.get(GENERATION_KEY)
+        if generation is NO_VALUE:
+            generation = uuid.uuid4().hex
+            REGION.set(GENERATION_KEY, generation)
+
+        rse_stmt = select(
+            models.RSE
+        ).where(
+            models.RSE.deleted == false()
+        ).order_by(
+            models.RSE.rse
+        )
+        attr_stmt = select(
+            models.RSEAttrAssociation.rse_id,
+            models.RSEAttrAssociation.key,
+            models.RSEAttrAssociation.value
+        ).join(
+            models.RSE,
+            models.RSE.id == models.RSEAttrAssociation.rse_id
+        ).where(
+            models.RSE.deleted == false()
+        )
+        snapshot = RSEAttributeSnapshot(
+            rses=(rse.to_dict() for rse in session.execute(rse_stmt).scalars()),
+            attributes=((str(rse_id), key, value) for rse_id, key, value in session.execute(attr_stmt))
+        )
+
+        with self._lock:
+            now = time.monotonic()
+            self._snapshot = snapshot
+            self._generation = generation
+            self._loaded_at = now
+            self._checked_at = now
+        return snapshot
+
+
+RSE_ATTRIBUTE_INDEX = RSEAttributeIndex()
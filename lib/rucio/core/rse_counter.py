@@ -11,16 +11,19 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import and_, delete, select
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, select, update
 from sqlalchemy.exc import NoResultFound
 
 from rucio.common.exception import CounterNotFound
 from rucio.db.sqla import filter_thread_work, models
 from rucio.db.sqla.session import read_session, transactional_session
+from rucio.db.sqla.util import temp_table_mngr
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from sqlalchemy.orm import Session
 
 
@@ -141,34 +144,93 @@ def update_rse_counter(rse_id, *, session: "Session"):
     :param rse_id:   The rse_id to update.
     :param session:  Database session in use.
     """
+    update_rse_counters(rse_ids=[rse_id], session=session)
+
+
+@transactional_session
+def update_rse_counters(rse_ids: "Iterable[str]", limit: Optional[int] = None, *, session: "Session") -> int:
+    """
+    Fold the updated_rse_counters of many RSEs into their rse_counters.
+
+    The ids of the consumed updated_rse_counters are recorded in a temporary table. They are summed
+    per RSE with one query, the sums are added to the rse_counters with one UPDATE executed for all
+    RSEs, and the consumed rows are deleted with one DELETE.
+
+    :param rse_ids:  The rse_ids to update.
+    :param limit:    The maximum number of updated_rse_counters to consume, all of them if None.
+    :param session:  Database session in use.
+    :returns:        The number of consumed updated_rse_counters.
+    """
+    rse_ids = list(rse_ids)
+    if not rse_ids:
+        return 0
 
+    id_temp_table = temp_table_mngr(session).create_id_table()
     stmt = select(
-        models.UpdatedRSECounter
+        models.UpdatedRSECounter.id
     ).where(
-        models.UpdatedRSECounter.rse_id == rse_id
+        models.UpdatedRSECounter.rse_id.in_(rse_ids)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    stmt = insert(
+        id_temp_table
+    ).from_select(
+        ['id'],
+        stmt
     )
-    updated_rse_counters = session.execute(stmt).scalars().all()
-    sum_bytes = sum([updated_rse_counter.bytes for updated_rse_counter in updated_rse_counters])
-    sum_files = sum([updated_rse_counter.files for updated_rse_counter in updated_rse_counters])
+    session.execute(stmt)
 
-    try:
-        stmt = select(
+    stmt = select(
+        models.UpdatedRSECounter.rse_id,
+        func.sum(models.UpdatedRSECounter.files).label('files'),
+        func.sum(models.UpdatedRSECounter.bytes).label('bytes'),
+        func.count().label('updates')
+    ).join(
+        id_temp_table,
+        id_temp_table.id == models.UpdatedRSECounter.id
+    ).group_by(
+        models.UpdatedRSECounter.rse_id
+    )
+    sums = session.execute(stmt).all()
+    if not sums:
+        return 0
+
+    stmt = select(
+        models.RSEUsage.rse_id
+    ).where(
+        and_(models.RSEUsage.rse_id.in_([row.rse_id for row in sums]),
+             models.RSEUsage.source == 'rucio')
+    )
+    existing_rse_ids = set(session.execute(stmt).scalars())
+
+    updates = [{'b_rse_id': row.rse_id, 'b_files': row.files, 'b_bytes': row.bytes} for row in sums if row.rse_id in existing_rse_ids]
+    if updates:
+        stmt = update(
             models.RSEUsage
         ).where(
-            and_(models.RSEUsage.rse_id == rse_id,
+            and_(models.RSEUsage.rse_id == bindparam('b_rse_id'),
                  models.RSEUsage.source == 'rucio')
+        ).values(
+            used=func.coalesce(models.RSEUsage.used, 0) + bindparam('b_bytes'),
+            files=func.coalesce(models.RSEUsage.files, 0) + bindparam('b_files')
         )
-        rse_counter = session.execute(stmt).scalar_one()
-        rse_counter.used = (rse_counter.used or 0) + sum_bytes
-        rse_counter.files = (rse_counter.files or 0) + sum_files
-    except NoResultFound:
-        models.RSEUsage(rse_id=rse_id,
-                        used=sum_bytes,
-                        files=sum_files,
-                        source='rucio').save(session=session)
+        # executed by the connection, as an executemany, and not as an ORM bulk update by primary key
+        session.connection().execute(stmt, updates)
 
-    for update in updated_rse_counters:
-        update.delete(flush=False, session=session)
+    inserts = [{'rse_id': row.rse_id, 'source': 'rucio', 'used': row.bytes, 'files': row.files} for row in sums if row.rse_id not in existing_rse_ids]
+    if inserts:
+        session.execute(insert(models.RSEUsage), inserts)
+
+    stmt = delete(
+        models.UpdatedRSECounter
+    ).where(
+        exists(select(1).where(models.UpdatedRSECounter.id == id_temp_table.id))
+    ).execution_options(
+        synchronize_session=False
+    )
+    session.execute(stmt)
+    return sum(row.updates for row in sums)
 
 
 @transactional_session
@@ -14,19 +14,18 @@
 
 import abc
 import re
-from hashlib import sha256
-from typing import TYPE_CHECKING, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from dogpile.cache.api import NoValue
-
-from rucio.common.cache import MemcacheRegion
 from rucio.common.exception import InvalidRSEExpression, RSEWriteBlocked
-from rucio.core.rse import get_rse_attribute, get_rses_with_attribute, list_rses
+from rucio.core.rse_attribute_index import RSE_ATTRIBUTE_INDEX
 from rucio.db.sqla.session import transactional_session
 
 if TYPE_CHECKING:
     from sqlalchemy.orm import Session
 
+    from rucio.core.rse_attribute_index import RSEAttributeSnapshot
+
 
 DEFAULT_RSE_ATTRIBUTE = r'([A-Za-z0-9]+([_-][A-Za-z0-9]+)*)'
 RSE_ATTRIBUTE = r'([A-Za-z0-9\._-]+[=<>][A-Za-z0-9_-]+)'
@@ -37,7 +36,7 @@ COMPLEMENT = r'(\\%s)' % (PRIMITIVE)
 
 PATTERN = r'^%s(%s|%s|%s)*' % (PRIMITIVE, UNION, INTERSECTION, COMPLEMENT)
 
-REGION = MemcacheRegion(expiration_time=600)
+COMPILED_EXPRESSION_CACHE_SIZE = 10000
 
 
 @transactional_session
@@ -51,34 +50,10 @@ def parse_expression(expression, filter_=None, *, session: "Session"):
     :returns:             A list of rse dictionaries.
     :raises:              InvalidRSEExpression, RSENotFound, RSEWriteBlocked
     """
-    result = REGION.get(sha256(expression.encode()).hexdigest())
-    if type(result) is NoValue:
-        # Evaluate the correctness of the parentheses
-        parantheses_open_count = 0
-        parantheses_close_count = 0
-        for char in expression:
-            if (char == '('):
-                parantheses_open_count += 1
-            elif (char == ')'):
-                parantheses_close_count += 1
-            if (parantheses_close_count > parantheses_open_count):
-                raise InvalidRSEExpression('Problem with parentheses.')
-        if (parantheses_open_count != parantheses_close_count):
-            raise InvalidRSEExpression('Problem with parentheses.')
-
-        # Check the expression pattern
-        match = re.match(PATTERN, expression)
-        if match is None:
-            raise InvalidRSEExpression('Expression does not comply to RSE Expression syntax')
-        else:
-            if match.group() != expression:
-                raise InvalidRSEExpression('Expression does not comply to RSE Expression syntax')
-        result_tuple = __resolve_term_expression(expression)[0].resolve_elements(session=session)
-        # result_tuple = ([rse_ids], {rse_id: {rse_info}})
-        result = []
-        for rse in list(result_tuple[0]):
-            result.append(result_tuple[1][rse])
-        REGION.set(sha256(expression.encode()).hexdigest(), result)
+    snapshot = RSE_ATTRIBUTE_INDEX.get_snapshot(session=session)
+    bits = compile_expression(expression).evaluate(snapshot)
+    # Copy the dictionaries, so that callers cannot alter the shared snapshot
+    result = [rse.copy() for rse in snapshot.iter_rses(bits)]
 
     # Filter for VO
     vo_result = []
@@ -110,6 +85,39 @@ def parse_expression(expression, filter_=None, *, session: "Session"):
     return final_result
 
 
+@lru_cache(maxsize=COMPILED_EXPRESSION_CACHE_SIZE)
+def compile_expression(expression):
+    """
+    Validate a RSE expression and compile it into a tree of BaseExpressionElement.
+    The compiled trees are cached by expression string.
+
+    :param expression:    RSE expression, e.g: 'CERN|BNL'.
+    :returns:             The root BaseExpressionElement of the expression.
+    :raises:              InvalidRSEExpression
+    """
+    # Evaluate the correctness of the parentheses
+    parantheses_open_count = 0
+    parantheses_close_count = 0
+    for char in expression:
+        if (char == '('):
+            parantheses_open_count += 1
+        elif (char == ')'):
+            parantheses_close_count += 1
+        if (parantheses_close_count > parantheses_open_count):
+            raise InvalidRSEExpression('Problem with parentheses.')
+    if (parantheses_open_count != parantheses_close_count):
+        raise InvalidRSEExpression('Problem with parentheses.')
+
+    # Check the expression pattern
+    match = re.match(PATTERN, expression)
+    if match is None:
+        raise InvalidRSEExpression('Expression does not comply to RSE Expression syntax')
+    else:
+        if match.group() != expression:
+            raise InvalidRSEExpression('Expression does not comply to RSE Expression syntax')
+    return __resolve_term_expression(expression)[0]
+
+
 def __resolve_term_expression(expression):
     """
     Resolves a Term Expression and returns an object of type BaseExpressionElement
@@ -210,13 +218,12 @@ def __extract_term(expression):
 
 class BaseExpressionElement(metaclass=abc.ABCMeta):
     @abc.abstractmethod
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot: "RSEAttributeSnapshot") -> int:
         """
-        Resolve the ExpressionElement and return a set of RSE ids
+        Evaluate the ExpressionElement against an RSE attribute index snapshot
 
-        :param session:  Database session in use
-        :returns:        (Set of RSE ids, Dictionary of RSE dicts)
-        :rtype:          (Set of Strings, Dictionary of RSE dicts organized by rse_id)
+        :param snapshot:  The RSEAttributeSnapshot in use
+        :returns:         Bitset of the selected RSE positions in the snapshot
         """
         pass
 
@@ -226,17 +233,11 @@ class RSEAll(BaseExpressionElement):
     Representation of all RSEs
     """
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        output = list_rses(session=session)
-        if not output:
-            return (set(), {})
-        rse_dict = {}
-        for rse in output:
-            rse_dict[rse['id']] = rse
-        return (set([rse['id'] for rse in output]), rse_dict)
+        return snapshot.all_bits
 
 
 class RSEAttributeEqualCheck(BaseExpressionElement):
@@ -254,17 +255,11 @@ class RSEAttributeEqualCheck(BaseExpressionElement):
         self.key = key
         self.value = value
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        output = list_rses({self.key: self.value}, session=session)
-        if not output:
-            return (set(), {})
-        rse_dict = {}
-        for rse in output:
-            rse_dict[rse['id']] = rse
-        return (set([rse['id'] for rse in output]), rse_dict)
+        return snapshot.equal(self.key, self.value)
 
 
 class RSEAttributeSmallerCheck(BaseExpressionElement):
@@ -282,24 +277,11 @@ class RSEAttributeSmallerCheck(BaseExpressionElement):
         self.key = key
         self.value = value
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        rse_list: list[dict[str, Any]] = get_rses_with_attribute(key=self.key, session=session)
-        if not rse_list:
-            return (set(), {})
-
-        output = []
-        rse_dict = {}
-        for rse in rse_list:
-            try:
-                if float(get_rse_attribute(rse['id'], self.key, session=session)) < float(self.value):  # type: ignore (get_rse_attribute could return None)
-                    rse_dict[rse['id']] = rse
-                    output.append(rse['id'])
-            except ValueError:
-                continue
-        return (set(output), rse_dict)
+        return snapshot.compare(self.key, self.value, smaller=True)
 
 
 class RSEAttributeLargerCheck(BaseExpressionElement):
@@ -317,24 +299,11 @@ class RSEAttributeLargerCheck(BaseExpressionElement):
         self.key = key
         self.value = value
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        rse_list: list[dict[str, Any]] = get_rses_with_attribute(key=self.key, session=session)
-        if not rse_list:
-            return (set(), {})
-
-        output = []
-        rse_dict = {}
-        for rse in rse_list:
-            try:
-                if float(get_rse_attribute(rse['id'], self.key, session=session)) > float(self.value):  # type: ignore (get_rse_attribute could return None)
-                    rse_dict[rse['id']] = rse
-                    output.append(rse['id'])
-            except ValueError:
-                continue
-        return (set(output), rse_dict)
+        return snapshot.compare(self.key, self.value, smaller=False)
 
 
 class BaseRSEOperator(BaseExpressionElement, metaclass=abc.ABCMeta):
@@ -382,13 +351,11 @@ class ComplementOperator(BaseRSEOperator):
         """
         self.right_term = right_term
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        left_term_tuple = self.left_term.resolve_elements(session=session)
-        right_term_tuple = self.right_term.resolve_elements(session=session)
-        return (left_term_tuple[0] - right_term_tuple[0], dict(list(left_term_tuple[1].items()) + list(right_term_tuple[1].items())))
+        return self.left_term.evaluate(snapshot) & ~self.right_term.evaluate(snapshot)
 
 
 class UnionOperator(BaseRSEOperator):
@@ -416,13 +383,11 @@ class UnionOperator(BaseRSEOperator):
         """
         self.right_term = right_term
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        left_term_tuple = self.left_term.resolve_elements(session=session)
-        right_term_tuple = self.right_term.resolve_elements(session=session)
-        return (left_term_tuple[0] | right_term_tuple[0], dict(list(left_term_tuple[1].items()) + list(right_term_tuple[1].items())))
+        return self.left_term.evaluate(snapshot) | self.right_term.evaluate(snapshot)
 
 
 class IntersectOperator(BaseRSEOperator):
@@ -450,10 +415,8 @@ class IntersectOperator(BaseRSEOperator):
         """
         self.right_term = right_term
 
-    def resolve_elements(self, session):
+    def evaluate(self, snapshot):
         """
-        Inherited from :py:func:`BaseExpressionElement.resolve_elements`
+        Inherited from :py:func:`BaseExpressionElement.evaluate`
         """
-        left_term_tuple = self.left_term.resolve_elements(session=session)
-        right_term_tuple = self.right_term.resolve_elements(session=session)
-        return (left_term_tuple[0] & right_term_tuple[0], dict(list(left_term_tuple[1].items()) + list(right_term_tuple[1].items())))
+        return self.left_term.evaluate(snapshot) & self.right_term.evaluate(snapshot)
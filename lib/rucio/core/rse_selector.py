@@ -12,16 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from random import shuffle, uniform
-from typing import TYPE_CHECKING, Optional
-
-from rucio.common.exception import InsufficientAccountLimit, InsufficientTargetRSEs, InvalidRuleWeight, RSEOverQuota
-from rucio.core.account import get_all_rse_usages_per_account, get_usage, has_account_attribute
-from rucio.core.account_limit import get_global_account_limits, get_local_account_limit
-from rucio.core.rse import get_rse_limits, has_rse_attribute, list_rse_attributes
-from rucio.core.rse_counter import get_counter as get_rse_counter
+from bisect import bisect_left
+from itertools import accumulate
+from random import Random
+from typing import TYPE_CHECKING, Any, Optional
+
+from sqlalchemy import and_, select
+
+from rucio.common.exception import CounterNotFound, InsufficientAccountLimit, InsufficientTargetRSEs, InvalidRuleWeight, RSEOverQuota
+from rucio.core.account import get_all_rse_usages_per_account, has_account_attribute
+from rucio.core.account_limit import get_global_account_limits, get_local_account_limits
+from rucio.core.rse import _fetch_many_rses_attributes
 from rucio.core.rse_expression_parser import parse_expression
+from rucio.db.sqla import models
 from rucio.db.sqla.session import read_session
+from rucio.db.sqla.util import temp_table_mngr
 
 if TYPE_CHECKING:
     from collections.abc import Iterable, Sequence
@@ -30,6 +35,10 @@ if TYPE_CHECKING:
 
     from rucio.common.types import InternalAccount
 
+# Number of weighted draws among the RSEs with quota left for a whole batch, before falling
+# back to a draw among the explicit list of candidates of the group
+MAX_REJECTED_DRAWS = 8
+
 
 class RSESelector:
     """
@@ -37,7 +46,7 @@ class RSESelector:
     """
 
     @read_session
-    def __init__(self, account, rses, weight, copies, ignore_account_limit=False, *, session: "Session"):
+    def __init__(self, account, rses, weight, copies, ignore_account_limit=False, seed=None, *, session: "Session"):
         """
         Initialize the RSE Selector.
 
@@ -46,35 +55,37 @@ class RSESelector:
         :param weight:                Weighting to use.
         :param copies:                Number of copies to create.
         :param ignore_account_limit:  Flag if the quota should be ignored.
+        :param seed:                  Seed of the random choices, to get reproducible selections.
         :param session:               DB Session in use.
         :raises:                      InvalidRuleWeight, InsufficientAccountLimit, InsufficientTargetRSEs
         """
         self.account = account
         self.rses = []  # [{'rse_id':, 'weight':, 'staging_area'}]
         self.copies = copies
-        if weight is not None:
-            for rse in rses:
-                attributes = list_rse_attributes(rse_id=rse['id'], session=session)
-                availability_write = True if rse.get('availability_write', True) else False
-                if weight not in attributes:
+        self.random = Random(seed)
+
+        attributes = {}
+        if rses:
+            temp_table = temp_table_mngr(session).create_id_table()
+            session.bulk_insert_mappings(temp_table, ({'id': rse_id} for rse_id in {rse['id'] for rse in rses}))
+            attributes = dict(_fetch_many_rses_attributes(temp_table, keys=['mock'] if weight is None else ['mock', weight], session=session))
+        for rse in rses:
+            rse_attributes = attributes.get(rse['id'], {})
+            availability_write = True if rse.get('availability_write', True) else False
+            if weight is not None:
+                if weight not in rse_attributes:
                     continue  # The RSE does not have the required weight set, therefore it is ignored
                 try:
-                    self.rses.append({'rse_id': rse['id'],
-                                      'weight': float(attributes[weight]),
-                                      'mock_rse': attributes.get('mock', False),
-                                      'availability_write': availability_write,
-                                      'staging_area': rse['staging_area']})
+                    rse_weight = float(rse_attributes[weight])
                 except ValueError:
                     raise InvalidRuleWeight('The RSE \'%s\' has a non-number specified for the weight \'%s\'' % (rse['rse'], weight))
-        else:
-            for rse in rses:
-                mock_rse = has_rse_attribute(rse['id'], 'mock', session=session)
-                availability_write = True if rse.get('availability_write', True) else False
-                self.rses.append({'rse_id': rse['id'],
-                                  'weight': 1,
-                                  'mock_rse': mock_rse,
-                                  'availability_write': availability_write,
-                                  'staging_area': rse['staging_area']})
+            else:
+                rse_weight = 1
+            self.rses.append({'rse_id': rse['id'],
+                              'weight': rse_weight,
+                              'mock_rse': True if rse_attributes.get('mock') else False,
+                              'availability_write': availability_write,
+                              'staging_area': rse['staging_area']})
 
         if len(self.rses) < self.copies:
             raise InsufficientTargetRSEs('Target RSE set not sufficient for number of copies. (%s copies requested, RSE set size %s)' % (self.copies, len(self.rses)))
@@ -88,6 +99,16 @@ class RSESelector:
         else:
             global_quota_limit = get_global_account_limits(account=account, session=session)
             all_rse_usages = {usage['rse_id']: usage['bytes'] for usage in get_all_rse_usages_per_account(account=account, session=session)}
+            local_quota_limits = get_local_account_limits(account=account, session=session)
+            space_limits, rse_usages = _get_rses_space(rse_ids=[rse['rse_id'] for rse in self.rses if not rse['mock_rse']], session=session)
+
+            global_quota_left = {}
+            for rse_expression, limit in global_quota_limit.items():
+                if limit['limit'] is None:
+                    global_quota_left[rse_expression] = 0
+                else:
+                    global_quota_left[rse_expression] = limit['limit'] - sum(all_rse_usages.get(rse_id, 0) for rse_id in limit['resolved_rse_ids'])
+
             for rse in self.rses:
                 if rse['mock_rse']:
                     rse['quota_left'] = float('inf')
@@ -95,39 +116,31 @@ class RSESelector:
                     rses_with_enough_quota.append(rse)
                 else:
                     # check local quota
-                    local_quota_left = None
-                    quota_limit = get_local_account_limit(account=account, rse_id=rse['rse_id'], session=session)
+                    quota_limit = local_quota_limits.get(rse['rse_id'])
                     if quota_limit is None:
                         local_quota_left = 0
                     else:
-                        local_quota_left = quota_limit - get_usage(rse_id=rse['rse_id'], account=account, session=session)['bytes']
+                        local_quota_left = quota_limit - all_rse_usages.get(rse['rse_id'], 0)
 
                     # check global quota
                     rse['global_quota_left'] = {}
                     all_global_quota_enough = True
                     for rse_expression, limit in global_quota_limit.items():
                         if rse['rse_id'] in limit['resolved_rse_ids']:
-                            quota_limit = limit['limit']
-                            global_quota_left = None
-                            if quota_limit is None:
-                                global_quota_left = 0
-                            else:
-                                rse_expression_usage = 0
-                                for rse_id in limit['resolved_rse_ids']:
-                                    rse_expression_usage += all_rse_usages.get(rse_id, 0)
-                                global_quota_left = quota_limit - rse_expression_usage
-                            if global_quota_left <= 0:
+                            if global_quota_left[rse_expression] <= 0:
                                 all_global_quota_enough = False
                                 break
                             else:
-                                rse['global_quota_left'][rse_expression] = global_quota_left
+                                rse['global_quota_left'][rse_expression] = global_quota_left[rse_expression]
                     if local_quota_left > 0 and all_global_quota_enough:
                         rse['quota_left'] = local_quota_left
-                        space_limit = get_rse_limits(name='MaxSpaceAvailable', rse_id=rse['rse_id'], session=session).get('MaxSpaceAvailable')
+                        space_limit = space_limits.get(rse['rse_id'])
                         if space_limit is None or space_limit < 0:
                             rse['space_left'] = float('inf')
+                        elif rse['rse_id'] not in rse_usages:
+                            raise CounterNotFound()
                         else:
-                            rse['space_left'] = space_limit - get_rse_counter(rse_id=rse['rse_id'], session=session)['bytes']
+                            rse['space_left'] = space_limit - rse_usages[rse['rse_id']]
                         rses_with_enough_quota.append(rse)
 
         self.rses = rses_with_enough_quota
@@ -137,6 +150,14 @@ class RSESelector:
         # don't consider removing rses based on the total space here - because files already on the RSE are taken into account
         # it is possible to have no space but still be able to fulfil the rule
 
+        # Per RSE arrays, in the order of self.rses, of the values checked for every selection.
+        # A single global quota value per RSE is enough: all the global quotas of an RSE are decreased together.
+        self.__positions = {rse['rse_id']: position for position, rse in enumerate(self.rses)}
+        self.__weights = [rse['weight'] for rse in self.rses]
+        self.__space_left = [rse['space_left'] for rse in self.rses]
+        self.__quota_left = [rse['quota_left'] for rse in self.rses]
+        self.__global_quota_left = [min(rse.get('global_quota_left', {}).values(), default=float('inf')) for rse in self.rses]
+
     def select_rse(
         self,
         size: int,
@@ -158,61 +179,85 @@ class RSESelector:
         :returns:                            List of (RSE_id, staging_area, availability_write) tuples.
         :raises:                             InsufficientAccountLimit, InsufficientTargetRSEs
         """
+        return self.select_rses([{'size': size,
+                                  'preferred_rse_ids': preferred_rse_ids,
+                                  'copies': copies,
+                                  'blocklist': blocklist,
+                                  'prioritize_order_over_weight': prioritize_order_over_weight,
+                                  'existing_rse_size': existing_rse_size}])[0]
+
+    def select_rses(self, groups: "Sequence[dict[str, Any]]") -> list[list[tuple[str, bool, bool]]]:
+        """
+        Select the RSEs of many groups (files or datasets) at once.
 
-        blocklist = blocklist or []
-        result = []
-        rses = self.rses
-        count = self.copies if copies == 0 else copies
-
-        # Remove blocklisted rses
-        if blocklist:
-            rses = [rse for rse in self.rses if rse['rse_id'] not in blocklist]
-        if len(rses) < count:
-            raise InsufficientTargetRSEs('There are not enough target RSEs to fulfil the request at this time.')
-
-        # Remove rses which do not have enough space, accounting for the files already at each rse
-        if existing_rse_size is None:
-            existing_rse_size = {}
-        rses = [rse for rse in rses if rse['space_left'] >= size - existing_rse_size.get(rse['rse_id'], 0)]
-        if len(rses) < count:
-            raise RSEOverQuota('There is insufficient space on any of the target RSE\'s to fulfill the operation.')
-
-        # Remove rses which do not have enough local quota
-        rses = [rse for rse in rses if rse['quota_left'] > size]
-        if len(rses) < count:
-            raise InsufficientAccountLimit('There is insufficient quota on any of the target RSE\'s to fulfill the operation.')
+        The result is the same as calling select_rse for each group in turn, but the quota of
+        the RSEs which have enough quota left for the whole batch is only checked once.
 
-        # Remove rses which do not have enough global quota
-        rses_with_enough_quota = []
-        for rse in rses:
-            enough_global_quota = True
-            for rse_expression in rse.get('global_quota_left', []):
-                if rse['global_quota_left'][rse_expression] < size:
-                    enough_global_quota = False
-                    break
-            if enough_global_quota:
-                rses_with_enough_quota.append(rse)
-        rses = rses_with_enough_quota
-        if len(rses) < count:
-            raise InsufficientAccountLimit('There is insufficient quota on any of the target RSE\'s to fulfill the operation.')
-
-        for copy in range(count):
-            # Remove rses already in the result set
-            rses = [rse for rse in rses if rse['rse_id'] not in [item[0] for item in result]]
-            rses_dict = {}
-            for rse in rses:
-                rses_dict[rse['rse_id']] = rse
-            # Prioritize the preferred rses
-            preferred_rses = [rses_dict[rse_id] for rse_id in preferred_rse_ids if rse_id in rses_dict]
-            if prioritize_order_over_weight and preferred_rses:
-                rse = (preferred_rses[0]['rse_id'], preferred_rses[0]['staging_area'], preferred_rses[0]['availability_write'])
-            elif preferred_rses:
-                rse = self.__choose_rse(preferred_rses)
+        :param groups:  List of dictionaries with the keyword arguments of select_rse.
+        :returns:       The list of (RSE_id, staging_area, availability_write) tuples of each group.
+        :raises:        InsufficientAccountLimit, InsufficientTargetRSEs, RSEOverQuota
+        """
+        if not groups:
+            return []
+
+        max_size = max(group['size'] for group in groups)
+        # Each group takes at most one copy on an RSE, so an RSE can lose at most total_size during the batch
+        total_size = sum(group['size'] for group in groups)
+        safe, unsafe = [], []
+        for position in range(len(self.rses)):
+            if (self.__space_left[position] >= max_size
+                    and self.__quota_left[position] - total_size > max_size
+                    and self.__global_quota_left[position] - total_size >= max_size):
+                safe.append(position)
             else:
-                rse = self.__choose_rse(rses)
-            result.append(rse)
-            self.__update_quota(rse, size)
-        return result
+                unsafe.append(position)
+        safe_set = set(safe)
+        safe_cumulative_weights = list(accumulate(self.__weights[position] for position in safe))
+
+        results = []
+        for group in groups:
+            size = group['size']
+            count = group.get('copies') or self.copies
+            blocked = {self.__positions[rse_id] for rse_id in group.get('blocklist') or [] if rse_id in self.__positions}
+            existing_rse_size = group.get('existing_rse_size') or {}
+
+            # Same checks, and same errors, as one select_rse call. The safe RSEs pass all the checks.
+            if len(self.rses) - len(blocked) < count:
+                raise InsufficientTargetRSEs('There are not enough target RSEs to fulfil the request at this time.')
+            nb_safe = len(safe) - len(blocked & safe_set)
+            candidates = [position for position in unsafe if position not in blocked]
+            # Remove rses which do not have enough space, accounting for the files already at each rse
+            candidates = [position for position in candidates
+                          if self.__space_left[position] >= size - existing_rse_size.get(self.rses[position]['rse_id'], 0)]
+            if nb_safe + len(candidates) < count:
+                raise RSEOverQuota('There is insufficient space on any of the target RSE\'s to fulfill the operation.')
+            # Remove rses which do not have enough local quota
+            candidates = [position for position in candidates if self.__quota_left[position] > size]
+            if nb_safe + len(candidates) < count:
+                raise InsufficientAccountLimit('There is insufficient quota on any of the target RSE\'s to fulfill the operation.')
+            # Remove rses which do not have enough global quota
+            candidates = [position for position in candidates if self.__global_quota_left[position] >= size]
+            if nb_safe + len(candidates) < count:
+                raise InsufficientAccountLimit('There is insufficient quota on any of the target RSE\'s to fulfill the operation.')
+
+            unsafe_candidates = set(candidates)
+            selected = []
+            for _ in range(count):
+                # Prioritize the preferred rses
+                preferred = [self.__positions[rse_id] for rse_id in group['preferred_rse_ids'] if rse_id in self.__positions]
+                preferred = [position for position in preferred
+                             if position not in selected and ((position in safe_set and position not in blocked) or position in unsafe_candidates)]
+                if group.get('prioritize_order_over_weight') and preferred:
+                    position = preferred[0]
+                elif preferred:
+                    position = self.__choose_rse(preferred)
+                else:
+                    position = self.__choose_from_batch(safe, safe_cumulative_weights, blocked, selected, candidates)
+                selected.append(position)
+                self.__update_quota(position, size)
+            results.append([(self.rses[position]['rse_id'], self.rses[position]['staging_area'], self.rses[position]['availability_write'])
+                            for position in selected])
+        return results
 
     def get_rse_dictionary(self):
         """
@@ -225,36 +270,94 @@ class RSESelector:
             rse_dict[rse['rse_id']] = rse
         return rse_dict
 
-    def __update_quota(self, rse, size):
+    def __update_quota(self, position, size):
         """
         Update the internal quota value.
 
-        :param rse:      RSE tuple to update.
-        :param size:     Size to subtract.
+        :param position:  Position of the RSE to update.
+        :param size:      Size to subtract.
         """
-
-        for element in self.rses:
-            if element['rse_id'] == rse[0]:
-                element['quota_left'] -= size
-                for rse_expression in element.get('global_quota_left', []):
-                    element['global_quota_left'][rse_expression] -= size
-                return
-
-    def __choose_rse(self, rses):
+        self.__quota_left[position] -= size
+        self.__global_quota_left[position] -= size
+        element = self.rses[position]
+        element['quota_left'] -= size
+        for rse_expression in element.get('global_quota_left', []):
+            element['global_quota_left'][rse_expression] -= size
+
+    def __choose_rse(self, positions):
         """
         Choose an RSE based on weighting.
 
-        :param rses:  The rses to be considered for the choose.
-        :return:      The (rse_id, staging_area) tuple of the chosen RSE.
+        :param positions:  The positions of the rses to be considered for the choose.
+        :return:           The position of the chosen RSE.
         """
+        cumulative_weights = list(accumulate(self.__weights[position] for position in positions))
+        if cumulative_weights[-1] <= 0:
+            return self.random.choice(positions)
+        pick = self.random.uniform(0, cumulative_weights[-1])
+        return positions[min(bisect_left(cumulative_weights, pick), len(positions) - 1)]
 
-        shuffle(rses)
-        pick = uniform(0, sum([rse['weight'] for rse in rses]))  # noqa: S311
-        weight = 0
-        for rse in rses:
-            weight += rse['weight']
-            if pick <= weight:
-                return (rse['rse_id'], rse['staging_area'], rse['availability_write'])
+    def __choose_from_batch(self, safe, safe_cumulative_weights, blocked, selected, candidates):
+        """
+        Choose an RSE based on weighting among the safe RSEs of the batch and the candidates of the group,
+        without the blocked and the already selected ones.
+
+        :param safe:                     Positions of the RSEs with enough quota for the whole batch.
+        :param safe_cumulative_weights:  Cumulative weights of the safe RSEs.
+        :param blocked:                  Positions of the blocked RSEs.
+        :param selected:                 Positions of the RSEs already selected for this group.
+        :param candidates:               Positions of the other RSEs with enough quota for this group.
+        :return:                         The position of the chosen RSE.
+        """
+        candidates = [position for position in candidates if position not in selected]
+        if safe and safe_cumulative_weights[-1] > 0:
+            candidates_cumulative_weights = list(accumulate(self.__weights[position] for position in candidates))
+            safe_weight = safe_cumulative_weights[-1]
+            total_weight = safe_weight + (candidates_cumulative_weights[-1] if candidates else 0)
+            for _ in range(MAX_REJECTED_DRAWS):
+                # The draw is exact: draws on a blocked or already selected RSE are simply retried
+                pick = self.random.uniform(0, total_weight)
+                if pick > safe_weight and candidates:
+                    return candidates[min(bisect_left(candidates_cumulative_weights, pick - safe_weight), len(candidates) - 1)]
+                position = safe[min(bisect_left(safe_cumulative_weights, pick), len(safe) - 1)]
+                if position not in blocked and position not in selected:
+                    return position
+        return self.__choose_rse([position for position in safe if position not in blocked and position not in selected] + candidates)
+
+
+def _get_rses_space(rse_ids: "Sequence[str]", *, session: "Session") -> tuple[dict[str, int], dict[str, int]]:
+    """
+    Get the MaxSpaceAvailable limit and the bytes used according to rucio of many RSEs in two queries.
+
+    :param rse_ids:  The RSE ids.
+    :param session:  The database session in use.
+    :returns:        Dictionaries {rse_id: MaxSpaceAvailable} and {rse_id: used bytes}, without the RSEs without value.
+    """
+    if not rse_ids:
+        return {}, {}
+    temp_table = temp_table_mngr(session).create_id_table()
+    session.bulk_insert_mappings(temp_table, ({'id': rse_id} for rse_id in set(rse_ids)))
+    stmt = select(
+        models.RSELimit.rse_id,
+        models.RSELimit.value
+    ).join_from(
+        temp_table,
+        models.RSELimit,
+        and_(models.RSELimit.rse_id == temp_table.id,
+             models.RSELimit.name == 'MaxSpaceAvailable')
+    )
+    space_limits = {rse_id: value for rse_id, value in session.execute(stmt)}
+    stmt = select(
+        models.RSEUsage.rse_id,
+        models.RSEUsage.used
+    ).join_from(
+        temp_table,
+        models.RSEUsage,
+        and_(models.RSEUsage.rse_id == temp_table.id,
+             models.RSEUsage.source == 'rucio')
+    )
+    rse_usages = {rse_id: used for rse_id, used in session.execute(stmt)}
+    return space_limits, rse_usages
 
 
 @read_session
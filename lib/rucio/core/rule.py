@@ -83,7 +83,7 @@ from rucio.db.sqla.constants import OBSOLETE, BadFilesStatus, DIDAvailability, D
 from rucio.db.sqla.session import read_session, stream_session, transactional_session
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Iterator, Sequence
+    from collections.abc import Callable, Iterable, Iterator, Sequence
 
     from sqlalchemy.orm import Session
 
@@ -2106,6 +2106,121 @@ def re_evaluate_did(
                                         did_type=did.did_type).save(session=session)
 
 
+@transactional_session
+def re_evaluate_dids(
+    updated_dids: 'Sequence[tuple[str, InternalScope, str, DIDReEvaluation]]',
+    *,
+    session: "Session",
+    logger: LoggerFunction = logging.log
+) -> None:
+    """
+    Re-Evaluates a batch of updated dids in a single transaction.
+
+    The rows of the same did are merged, so that each did is evaluated at most once per action.
+    The dids, their new children, their parents and the rules of all of them are loaded with a
+    few set-based queries for the whole batch, and the processed updated_dids rows are deleted
+    at once. The rows of dids which do not exist anymore are deleted as well.
+
+    :param updated_dids:  The updated_dids rows (id, scope, name, rule_evaluation_action), as returned by get_updated_dids.
+    :param session:       The database session in use.
+    :param logger:        Optional decorated logger that can be passed from the calling daemons or servers.
+    :raises:              ReplicationRuleCreationTemporaryFailed
+    """
+
+    row_ids = []
+    actions = {}
+    for row_id, scope, name, action in updated_dids:
+        row_ids.append(row_id)
+        actions.setdefault((scope, name), set()).add(action)
+    if not actions:
+        return
+
+    with METRICS.timer('re_evaluate_dids.get_dids'):
+        dids = {}
+        for chunk in chunks(list(actions), 50):
+            stmt = select(
+                models.DataIdentifier
+            ).where(
+                or_(*[and_(models.DataIdentifier.scope == scope,
+                           models.DataIdentifier.name == name) for scope, name in chunk])
+            )
+            for did in session.execute(stmt).scalars():
+                dids[(did.scope, did.name)] = did
+    for scope, name in actions.keys() - dids.keys():
+        logger(logging.DEBUG, 'Did %s:%s does not exist anymore, dropping its re-evaluation', scope, name)
+
+    with METRICS.timer('re_evaluate_dids.list_new_child_dids'):
+        new_child_dids = {key: [] for key in dids if DIDReEvaluation.ATTACH in actions[key]}
+        for chunk in chunks(list(new_child_dids), 50):
+            stmt = select(
+                models.DataIdentifierAssociation
+            ).with_hint(
+                models.DataIdentifierAssociation, 'INDEX_RS_ASC(CONTENTS CONTENTS_PK)', 'oracle'
+            ).where(
+                and_(or_(*[and_(models.DataIdentifierAssociation.scope == scope,
+                                models.DataIdentifierAssociation.name == name) for scope, name in chunk]),
+                     models.DataIdentifierAssociation.rule_evaluation == true())
+            )
+            for content in session.execute(stmt).scalars():
+                new_child_dids[(content.scope, content.name)].append(content)
+
+    # Only the dids with removed or new children need their rules
+    evaluated_dids = [key for key in dids if DIDReEvaluation.DETACH in actions[key] or new_child_dids.get(key)]
+    with METRICS.timer('re_evaluate_dids.list_parent_dids'):
+        ancestors = __list_all_parent_dids_bulk(evaluated_dids, session=session)
+    with METRICS.timer('re_evaluate_dids.get_rules'):
+        rules = __get_locked_rules_bulk(set(evaluated_dids).union(*ancestors.values()), session=session)
+
+    for key in evaluated_dids:
+        did_rules = [rule for rules_key in [key] + ancestors[key] for rule in rules.get(rules_key, [])]
+        if DIDReEvaluation.DETACH in actions[key]:
+            __evaluate_did_detach(dids[key], rules=did_rules, session=session, logger=logger)
+        if new_child_dids.get(key):
+            # The state of the rules may have been changed by the detach
+            attach_rules = [rule for rule in did_rules if rule.state not in (RuleState.SUSPENDED, RuleState.WAITING_APPROVAL, RuleState.INJECT)]
+            __evaluate_did_attach(dids[key], new_child_dids=new_child_dids[key], rules=attach_rules, session=session, logger=logger)
+
+    # Update size and length of the dids
+    if session.bind.dialect.name == 'oracle':
+        with METRICS.timer('re_evaluate_dids.update_size'):
+            sizes = {}
+            for chunk in chunks(list(dids), 50):
+                stmt = select(
+                    models.DataIdentifierAssociation.scope,
+                    models.DataIdentifierAssociation.name,
+                    func.sum(models.DataIdentifierAssociation.bytes),
+                    func.count(1)
+                ).with_hint(
+                    models.DataIdentifierAssociation, 'INDEX(CONTENTS CONTENTS_PK)', 'oracle'
+                ).where(
+                    or_(*[and_(models.DataIdentifierAssociation.scope == scope,
+                               models.DataIdentifierAssociation.name == name) for scope, name in chunk])
+                ).group_by(
+                    models.DataIdentifierAssociation.scope,
+                    models.DataIdentifierAssociation.name
+                )
+                for scope, name, bytes_, length in session.execute(stmt):
+                    sizes[(scope, name)] = (bytes_, length)
+            for key, did in dids.items():
+                did.bytes, did.length = sizes.get(key, (None, 0))
+
+    # Add the updated_col_reps
+    session.add_all([models.UpdatedCollectionReplica(scope=did.scope, name=did.name, did_type=did.did_type)
+                     for did in dids.values() if did.did_type == DIDType.DATASET])
+
+    # Oracle does not allow more than 1000 expressions in an IN list
+    for chunk in chunks(row_ids, 1000):
+        stmt = delete(
+            models.UpdatedDID
+        ).where(
+            models.UpdatedDID.id.in_(chunk)
+        ).execution_options(
+            synchronize_session=False
+        )
+        session.execute(stmt)
+    METRICS.counter('re_evaluate_dids.dids').inc(len(dids))
+
+
 @read_session
 def get_updated_dids(
     total_workers: int,
@@ -3393,9 +3508,74 @@ def __find_stuck_locks_and_repair_them(
     logger(logging.DEBUG, "Finished finding and repairing stuck locks for rule %s [%d/%d/%d]", str(rule.id), rule.locks_ok_cnt, rule.locks_replicating_cnt, rule.locks_stuck_cnt)
 
 
+@transactional_session
+def __list_all_parent_dids_bulk(
+    dids: 'Sequence[tuple[InternalScope, str]]',
+    *,
+    session: "Session"
+) -> dict[tuple[InternalScope, str], list[tuple[InternalScope, str]]]:
+    """
+    List all parent datasets and containers of many dids, no matter on what level.
+    The parents are resolved one level at a time for all the dids at once.
+
+    :param dids:     The (scope, name) of the dids.
+    :param session:  The database session in use.
+    :returns:        Dictionary {(scope, name): [(parent_scope, parent_name), ...]}, without duplicates.
+    """
+    direct_parents = {}
+    level = set(dids)
+    while level:
+        for key in level:
+            direct_parents[key] = []
+        for parent in rucio.core.did.list_parent_dids_bulk([{'scope': scope, 'name': name} for scope, name in level], session=session):
+            direct_parents[(parent['child_scope'], parent['child_name'])].append((parent['scope'], parent['name']))
+        level = {parent for key in level for parent in direct_parents[key]} - direct_parents.keys()
+
+    all_parents = {}
+    for key in dids:
+        parents, seen = [], {key}
+        pending = list(direct_parents[key])
+        while pending:
+            parent = pending.pop(0)
+            if parent not in seen:
+                seen.add(parent)
+                parents.append(parent)
+                pending.extend(direct_parents[parent])
+        all_parents[key] = parents
+    return all_parents
+
+
+def __get_locked_rules_bulk(
+    dids: 'Iterable[tuple[InternalScope, str]]',
+    *,
+    session: "Session"
+) -> dict[tuple[InternalScope, str], list[models.ReplicationRule]]:
+    """
+    Get and lock the replication rules of many dids.
+
+    :param dids:     The (scope, name) of the dids.
+    :param session:  The database session in use.
+    :returns:        Dictionary {(scope, name): [rule, ...]}.
+    """
+    rules = {}
+    for chunk in chunks(list(dids), 50):
+        stmt = select(
+            models.ReplicationRule
+        ).where(
+            or_(*[and_(models.ReplicationRule.scope == scope,
+                       models.ReplicationRule.name == name) for scope, name in chunk])
+        ).with_for_update(
+            nowait=True
+        )
+        for rule in session.execute(stmt).scalars():
+            rules.setdefault((rule.scope, rule.name), []).append(rule)
+    return rules
+
+
 @transactional_session
 def __evaluate_did_detach(
     eval_did: models.DataIdentifier,
+    rules: Optional['Sequence[models.ReplicationRule]'] = None,
     *,
     session: "Session",
     logger: LoggerFunction = logging.log
@@ -3404,6 +3584,7 @@ def __evaluate_did_detach(
     Evaluate a parent did which has children removed.
 
     :param eval_did:  The did object in use.
+    :param rules:     The locked rules of the did and of all its parents. If None, they are queried.
     :param session:   The database session in use.
     :param logger:    Optional decorated logger that can be passed from the calling daemons or servers.
     """
@@ -3412,29 +3593,30 @@ def __evaluate_did_detach(
     force_epoch = config_get('rules', 'force_epoch_when_detach', default=False, session=session)
 
     with METRICS.timer('evaluate_did_detach.total'):
-        # Get all parent DID's
-        parent_dids = rucio.core.did.list_all_parent_dids(scope=eval_did.scope, name=eval_did.name, session=session)
+        if rules is None:
+            # Get all parent DID's
+            parent_dids = rucio.core.did.list_all_parent_dids(scope=eval_did.scope, name=eval_did.name, session=session)
 
-        # Get all RR from parents and eval_did
-        stmt = select(
-            models.ReplicationRule
-        ).where(
-            and_(models.ReplicationRule.scope == eval_did.scope,
-                 models.ReplicationRule.name == eval_did.name)
-        ).with_for_update(
-            nowait=True
-        )
-        rules = list(session.execute(stmt).scalars().all())
-        for did in parent_dids:
+            # Get all RR from parents and eval_did
             stmt = select(
                 models.ReplicationRule
             ).where(
-                and_(models.ReplicationRule.scope == did['scope'],
-                     models.ReplicationRule.name == did['name'])
+                and_(models.ReplicationRule.scope == eval_did.scope,
+                     models.ReplicationRule.name == eval_did.name)
             ).with_for_update(
                 nowait=True
             )
-            rules.extend(session.execute(stmt).scalars().all())
+            rules = list(session.execute(stmt).scalars().all())
+            for did in parent_dids:
+                stmt = select(
+                    models.ReplicationRule
+                ).where(
+                    and_(models.ReplicationRule.scope == did['scope'],
+                         models.ReplicationRule.name == did['name'])
+                ).with_for_update(
+                    nowait=True
+                )
+                rules.extend(session.execute(stmt).scalars().all())
 
         # Iterate rules and delete locks
         transfers_to_delete = []  # [{'scope': , 'name':, 'rse_id':}]
@@ -3556,6 +3738,8 @@ def __oldest_file_under(
 @transactional_session
 def __evaluate_did_attach(
     eval_did: models.DataIdentifier,
+    new_child_dids: Optional['Sequence[models.DataIdentifierAssociation]'] = None,
+    rules: Optional['Sequence[models.ReplicationRule]'] = None,
     *,
     session: "Session",
     logger: LoggerFunction = logging.log
@@ -3563,32 +3747,35 @@ def __evaluate_did_attach(
     """
     Evaluate a parent did which has new children
 
-    :param eval_did:  The did object in use.
-    :param session:   The database session in use.
-    :param logger:    Optional decorated logger that can be passed from the calling daemons or servers.
-    :raises:          ReplicationRuleCreationTemporaryFailed
+    :param eval_did:        The did object in use.
+    :param new_child_dids:  The content of the did flagged for rule evaluation. If None, it is queried.
+    :param rules:           The locked, unsuspended rules of the did and of all its parents. If None, they are queried.
+    :param session:         The database session in use.
+    :param logger:          Optional decorated logger that can be passed from the calling daemons or servers.
+    :raises:                ReplicationRuleCreationTemporaryFailed
     """
 
     logger(logging.INFO, "Re-Evaluating did %s:%s for ATTACH", eval_did.scope, eval_did.name)
 
     with METRICS.timer('evaluate_did_attach.total'):
-        # Get all parent DID's
-        with METRICS.timer('evaluate_did_attach.list_parent_dids'):
-            parent_dids = rucio.core.did.list_all_parent_dids(scope=eval_did.scope, name=eval_did.name, session=session)
-
         # Get immediate new child DID's
-        with METRICS.timer('evaluate_did_attach.list_new_child_dids'):
-            stmt = select(
-                models.DataIdentifierAssociation
-            ).with_hint(
-                models.DataIdentifierAssociation, 'INDEX_RS_ASC(CONTENTS CONTENTS_PK)', 'oracle'
-            ).where(
-                and_(models.DataIdentifierAssociation.scope == eval_did.scope,
-                     models.DataIdentifierAssociation.name == eval_did.name,
-                     models.DataIdentifierAssociation.rule_evaluation == true())
-            )
-            new_child_dids = session.execute(stmt).scalars().all()
-        if new_child_dids:
+        if new_child_dids is None:
+            with METRICS.timer('evaluate_did_attach.list_new_child_dids'):
+                stmt = select(
+                    models.DataIdentifierAssociation
+                ).with_hint(
+                    models.DataIdentifierAssociation, 'INDEX_RS_ASC(CONTENTS CONTENTS_PK)', 'oracle'
+                ).where(
+                    and_(models.DataIdentifierAssociation.scope == eval_did.scope,
+                         models.DataIdentifierAssociation.name == eval_did.name,
+                         models.DataIdentifierAssociation.rule_evaluation == true())
+                )
+                new_child_dids = session.execute(stmt).scalars().all()
+        if new_child_dids and rules is None:
+            # Get all parent DID's
+            with METRICS.timer('evaluate_did_attach.list_parent_dids'):
+                parent_dids = rucio.core.did.list_all_parent_dids(scope=eval_did.scope, name=eval_did.name, session=session)
+
             # Get all unsuspended RR from parents and eval_did
             with METRICS.timer('evaluate_did_attach.get_rules'):
                 rule_clauses = []
@@ -3608,6 +3795,7 @@ def __evaluate_did_attach(
                     nowait=True
                 )
                 rules = session.execute(stmt).scalars().all()
+        if new_child_dids:
             if rules:
                 # Resolve the new_child_dids to its locks
                 with METRICS.timer('evaluate_did_attach.resolve_did_to_locks_and_replicas'):
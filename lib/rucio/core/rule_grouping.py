@@ -13,10 +13,12 @@
 # limitations under the License.
 
 import logging
+import resource
+import time
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, Optional
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, insert, select
 from sqlalchemy.exc import NoResultFound
 
 import rucio.core.did
@@ -25,6 +27,7 @@ import rucio.core.replica
 from rucio.common.config import config_get_int
 from rucio.common.constants import RseAttr
 from rucio.common.exception import InsufficientTargetRSEs
+from rucio.common.utils import chunks
 from rucio.core import account_counter, rse_counter
 from rucio.core import request as request_core
 from rucio.core.rse import get_rse, get_rse_attribute, get_rse_name
@@ -267,21 +270,19 @@ def __apply_rule_to_files_none_grouping(
 
     for dataset in datasetfiles:
         selected_rse_ids = []
+        files, groups = [], []
         for file in dataset['files']:
             if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id]) == rule.copies:
                 # Nothing to do as the file already has the requested amount of locks
                 continue
             rse_coverage = {str(replica.rse_id): file['bytes'] for replica in replicas[(file['scope'], file['name'])] if replica.state in (ReplicaState.AVAILABLE, ReplicaState.COPYING, ReplicaState.TEMPORARY_UNAVAILABLE)}
-            if len(preferred_rse_ids) == 0:
-                rse_tuples = rseselector.select_rse(size=file['bytes'],
-                                                    preferred_rse_ids=rse_coverage.keys(),
-                                                    blocklist=[str(replica.rse_id) for replica in replicas[(file['scope'], file['name'])] if replica.state == ReplicaState.BEING_DELETED],
-                                                    existing_rse_size=rse_coverage)
-            else:
-                rse_tuples = rseselector.select_rse(size=file['bytes'],
-                                                    preferred_rse_ids=preferred_rse_ids,
-                                                    blocklist=[str(replica.rse_id) for replica in replicas[(file['scope'], file['name'])] if replica.state == ReplicaState.BEING_DELETED],
-                                                    existing_rse_size=rse_coverage)
+            files.append(file)
+            groups.append({'size': file['bytes'],
+                           'preferred_rse_ids': preferred_rse_ids or rse_coverage.keys(),
+                           'blocklist': [str(replica.rse_id) for replica in replicas[(file['scope'], file['name'])] if replica.state == ReplicaState.BEING_DELETED],
+                           'existing_rse_size': rse_coverage})
+        # Select the RSEs of all the files of the dataset at once
+        for file, rse_tuples in zip(files, rseselector.select_rses(groups)):
             for rse_tuple in rse_tuples:
                 if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id and lock.rse_id == rse_tuple[0]]) == 1:
                     # Due to a bug a lock could have been already submitted for this, in that case, skip it
@@ -1314,6 +1315,120 @@ def __set_replica_unavailable(replica, *, session: "Session"):
 #     os.system("ps -U root -o pid,user,rss:10,vsz:10,args:100 | grep 'python -R' | grep -v bin | grep -v grep")
 
 
+@transactional_session
+def __apply_rule_to_partition_none_grouping(files, dataset, rule, rseselector, source_rses, replicas, locks, source_replicas, locks_to_create, replicas_to_create, transfers_to_create,
+                                            used_rse_ids, staging_required, *, session: "Session", logger=logging.log):
+    """
+    Apply a rule with NONE grouping to a partition of the files of a dataset.
+
+    The RSEs of all the files are selected at once. A file without replica at a selected RSE gets a
+    new replica and a new lock, which are returned as compact tuples instead of SQLAlchemy objects,
+    to be inserted in bulk. The other files, and the staging RSEs, go through __create_lock_and_replica.
+
+    :param files:                List of file dictionaries of the partition.
+    :param dataset:              Dataset dictionary holding the dataset information.
+    :param rule:                 Rule object.
+    :param rseselector:          The RSESelector to be used.
+    :param source_rses:          RSE ids of eligible source replicas.
+    :param replicas:             Dictionary of the replicas.
+    :param locks:                Dictionary of all locks.
+    :param source_replicas:      Dictionary of the source replicas.
+    :param locks_to_create:      Dictionary of the locks to create.
+    :param replicas_to_create:   Dictionary of the replicas to create.
+    :param transfers_to_create:  List of transfers to create.
+    :param used_rse_ids:         List of the RSE ids used by the rule.
+    :param staging_required:     Dictionary caching the staging_required attribute of the RSEs.
+    :param session:              The db session in use.
+    :param logger:               Optional decorated logger that can be passed from the calling daemons or servers.
+    :returns:                    List of (rse_id, scope, name, bytes, md5, adler32, replicating) tuples of the new replicas and locks.
+    :attention:                  This method modifies the contents of the locks_to_create, replicas_to_create, transfers_to_create, used_rse_ids and staging_required input parameters.
+    """
+    groups = []
+    selected_files = []
+    for file in files:
+        # check for duplicate due to dataset overlap within container
+        if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id]) == rule.copies:
+            logger(logging.DEBUG, '>>> WARNING skipping (shared?) file %s' % file)
+            continue
+        rse_coverage = {replica.rse_id: file['bytes'] for replica in replicas[(file['scope'], file['name'])]}
+        groups.append({'size': file['bytes'], 'preferred_rse_ids': rse_coverage.keys(),
+                       'prioritize_order_over_weight': True, 'existing_rse_size': rse_coverage})
+        selected_files.append(file)
+
+    new_replicas_and_locks = []
+    for file, rse_tuples in zip(selected_files, rseselector.select_rses(groups)):
+        # keep track of used RSEs
+        for rse_id, _, _ in rse_tuples:
+            if rse_id not in used_rse_ids:
+                used_rse_ids.append(rse_id)
+
+        for rse_id, staging_area, availability_write in rse_tuples:
+            # check for bug ????
+            if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id and lock.rse_id == rse_id]) == 1:
+                logger(logging.DEBUG, '>>> WARNING unexpected duplicate lock for file %s at RSE %s' % (file, rse_id))
+                continue
+            if rse_id not in staging_required:
+                staging_required[rse_id] = get_rse_attribute(rse_id, RseAttr.STAGING_REQUIRED, session=session)
+            if staging_area or staging_required[rse_id] or any(replica.rse_id == rse_id for replica in replicas[(file['scope'], file['name'])]):
+                __create_lock_and_replica(file=file, dataset=dataset, rule=rule,
+                                          rse_id=rse_id, staging_area=staging_area, availability_write=availability_write, source_rses=source_rses,
+                                          replicas=replicas, locks=locks, source_replicas=source_replicas,
+                                          locks_to_create=locks_to_create, replicas_to_create=replicas_to_create, transfers_to_create=transfers_to_create,
+                                          session=session)
+                continue
+
+            # Replica has to be created
+            available_source_replica = True
+            if source_rses:
+                # Check if there is an eligible source replica for this lock
+                available_source_replica = bool(set(source_replicas.get((file['scope'], file['name']), [])).intersection(source_rses))
+            replicating = bool(available_source_replica and availability_write)
+            new_replicas_and_locks.append((rse_id, file['scope'], file['name'], file['bytes'], file['md5'], file['adler32'], replicating))
+            if replicating:
+                rule.locks_replicating_cnt += 1
+                transfer = create_transfer_dict(dest_rse_id=rse_id,
+                                                request_type=RequestType.TRANSFER,
+                                                scope=file['scope'],
+                                                name=file['name'],
+                                                rule=rule,
+                                                bytes_=file['bytes'],
+                                                md5=file['md5'],
+                                                adler32=file['adler32'],
+                                                ds_scope=dataset['scope'],
+                                                ds_name=dataset['name'],
+                                                session=session)
+                # same as a transfer of a lock created by __create_lock_and_replica, which has no created_at before the flush
+                transfer['requested_at'] = None
+                transfers_to_create.append(transfer)
+            else:
+                rule.locks_stuck_cnt += 1
+    return new_replicas_and_locks
+
+
+@transactional_session
+def __insert_replicas_and_locks(new_replicas_and_locks, rule, *, session: "Session"):
+    """
+    Insert in bulk the new replicas, and their lock for the rule, returned by __apply_rule_to_partition_none_grouping.
+
+    :param new_replicas_and_locks:  List of (rse_id, scope, name, bytes, md5, adler32, replicating) tuples.
+    :param rule:                    Rule object.
+    :param session:                 The db session in use.
+    """
+    for chunk in chunks(new_replicas_and_locks, 1000):
+        stmt = insert(
+            models.RSEFileAssociation
+        )
+        session.execute(stmt, [{'rse_id': rse_id, 'scope': scope, 'name': name, 'bytes': bytes_, 'md5': md5, 'adler32': adler32,
+                                'tombstone': None, 'state': ReplicaState.COPYING if replicating else ReplicaState.UNAVAILABLE, 'lock_cnt': 1}
+                               for rse_id, scope, name, bytes_, md5, adler32, replicating in chunk])
+        stmt = insert(
+            models.ReplicaLock
+        )
+        session.execute(stmt, [{'rule_id': rule.id, 'rse_id': rse_id, 'scope': scope, 'name': name, 'account': rule.account, 'bytes': bytes_,
+                                'state': LockState.REPLICATING if replicating else LockState.STUCK}
+                               for rse_id, scope, name, bytes_, _md5, _adler32, replicating in chunk])
+
+
 @transactional_session
 def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session", logger=logging.log):
     """
@@ -1328,6 +1443,9 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
     :param session:      the database session in use
     """
 
+    start = time.monotonic()
+    nb_rows = 0  # replicas, locks and requests created, for the throughput
+
     max_partition_size = config_get_int('rules', 'apply_rule_max_partition_size', default=2000, session=session)  # process dataset files in bunches of max this size
 
     # accounting counters
@@ -1401,6 +1519,8 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
             request_core.queue_requests(requests=transfers_to_create, session=session)
             session.flush()
 
+            nb_rows += sum(len(sublist) for sublist in replicas_to_create.values()) + sum(len(sublist) for sublist in locks_to_create.values()) + len(transfers_to_create)
+
             # increment counters
             # align code with the one used inside the file loop below
             for rse_id in replicas_to_create.keys():
@@ -1435,9 +1555,10 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
 
         # prnt(datasets)
 
-        rse_coverage = {}   # rse_coverage = { rse_id : bytes }
-        rse_tuples = []     # rse_tuples = [(rse_id, staging_area, availability_write)]
-        used_rse_ids = []   # for NONE grouping keep track of actual used RSEs
+        rse_coverage = {}       # rse_coverage = { rse_id : bytes }
+        rse_tuples = []         # rse_tuples = [(rse_id, staging_area, availability_write)]
+        used_rse_ids = []       # for NONE grouping keep track of actual used RSEs
+        staging_required = {}   # for NONE grouping cache the staging_required attribute of the used RSEs
 
         if rule.grouping == RuleGrouping.ALL:
             # calculate target RSEs
@@ -1514,39 +1635,35 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
                 locks_to_create = {}            # {'rse_id': [locks]}
                 replicas_to_create = {}         # {'rse_id': [replicas]}
                 transfers_to_create = []        # [{'dest_rse_id':, 'scope':, 'name':, 'request_type':, 'metadata':}]
-
-                # loop over the rse tuples
-                for file in files:
-                    # check for duplicate due to dataset overlap within container
-                    if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id]) == rule.copies:
-                        logger(logging.DEBUG, '>>> WARNING skipping (shared?) file %s' % file)
-                        continue
-
-                    if rule.grouping == RuleGrouping.NONE:
-                        # calculate target RSEs
-                        rse_coverage = {replica.rse_id: file['bytes'] for replica in replicas[(file['scope'], file['name'])]}
-                        # prnt(rse_coverage)
-                        preferred_rse_ids = rse_coverage.keys()
-                        # prnt(preferred_rse_ids)
-                        rse_tuples = rseselector.select_rse(size=file['bytes'], preferred_rse_ids=preferred_rse_ids,
-                                                            prioritize_order_over_weight=True, existing_rse_size=rse_coverage)
-                        # prnt(rse_tuples)
-                        # keep track of used RSEs
-                        for rt in rse_tuples:
-                            if not rt[0] in used_rse_ids:
-                                used_rse_ids.append(rt[0])
-
-                    for rse_id, staging_area, availability_write in rse_tuples:
-                        # check for bug ????
-                        if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id and lock.rse_id == rse_id]) == 1:
-                            logger(logging.DEBUG, '>>> WARNING unexpected duplicate lock for file %s at RSE %s' % (file, rse_id))
+                new_replicas_and_locks = []     # [(rse_id, scope, name, bytes, md5, adler32, replicating)]
+
+                if rule.grouping == RuleGrouping.NONE:
+                    # select the RSEs of the whole partition, the new replicas and locks are inserted in bulk
+                    new_replicas_and_locks = __apply_rule_to_partition_none_grouping(files=files, dataset={'scope': ds_scope, 'name': ds_name}, rule=rule,
+                                                                                     rseselector=rseselector, source_rses=source_rses,
+                                                                                     replicas=replicas, locks=locks, source_replicas=source_replicas,
+                                                                                     locks_to_create=locks_to_create, replicas_to_create=replicas_to_create,
+                                                                                     transfers_to_create=transfers_to_create, used_rse_ids=used_rse_ids,
+                                                                                     staging_required=staging_required, session=session, logger=logger)
+                else:
+                    # loop over the rse tuples
+                    for file in files:
+                        # check for duplicate due to dataset overlap within container
+                        if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id]) == rule.copies:
+                            logger(logging.DEBUG, '>>> WARNING skipping (shared?) file %s' % file)
                             continue
-                        # proceed
-                        __create_lock_and_replica(file=file, dataset={'scope': ds_scope, 'name': ds_name}, rule=rule,
-                                                  rse_id=rse_id, staging_area=staging_area, availability_write=availability_write, source_rses=source_rses,
-                                                  replicas=replicas, locks=locks, source_replicas=source_replicas,
-                                                  locks_to_create=locks_to_create, replicas_to_create=replicas_to_create, transfers_to_create=transfers_to_create,
-                                                  session=session)
+
+                        for rse_id, staging_area, availability_write in rse_tuples:
+                            # check for bug ????
+                            if len([lock for lock in locks[(file['scope'], file['name'])] if lock.rule_id == rule.id and lock.rse_id == rse_id]) == 1:
+                                logger(logging.DEBUG, '>>> WARNING unexpected duplicate lock for file %s at RSE %s' % (file, rse_id))
+                                continue
+                            # proceed
+                            __create_lock_and_replica(file=file, dataset={'scope': ds_scope, 'name': ds_name}, rule=rule,
+                                                      rse_id=rse_id, staging_area=staging_area, availability_write=availability_write, source_rses=source_rses,
+                                                      replicas=replicas, locks=locks, source_replicas=source_replicas,
+                                                      locks_to_create=locks_to_create, replicas_to_create=replicas_to_create, transfers_to_create=transfers_to_create,
+                                                      session=session)
 
                 # prnt(locks_to_create, 'locks_to_create')
                 # prnt(replicas_to_create, 'replicas_to_create')
@@ -1555,6 +1672,7 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
                 # flush to DB
                 session.add_all([item for sublist in replicas_to_create.values() for item in sublist])
                 session.add_all([item for sublist in locks_to_create.values() for item in sublist])
+                __insert_replicas_and_locks(new_replicas_and_locks=new_replicas_and_locks, rule=rule, session=session)
                 request_core.queue_requests(requests=transfers_to_create, session=session)
                 session.flush()
 
@@ -1572,6 +1690,16 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
                 # prnt(account_counters_files, 'account_counters_files')
                 # prnt(account_counters_bytes, 'account_counters_bytes')
 
+                # each new replica comes with one new lock
+                for rse_id, _scope, _name, bytes_, _md5, _adler32, _replicating in new_replicas_and_locks:
+                    rse_counters_files[rse_id] = 1 + rse_counters_files.get(rse_id, 0)
+                    rse_counters_bytes[rse_id] = bytes_ + rse_counters_bytes.get(rse_id, 0)
+                    account_counters_files[rse_id] = 1 + account_counters_files.get(rse_id, 0)
+                    account_counters_bytes[rse_id] = bytes_ + account_counters_bytes.get(rse_id, 0)
+
+                nb_rows += sum(len(sublist) for sublist in replicas_to_create.values()) + sum(len(sublist) for sublist in locks_to_create.values())
+                nb_rows += 2 * len(new_replicas_and_locks) + len(transfers_to_create)
+
                 # mem()
 
             # dataset lock/replica
@@ -1617,4 +1745,9 @@ def apply_rule(did, rule, rses, source_rses, rseselector, *, session: "Session",
         account_counter.increase(rse_id=rse_id, account=rule.account, files=account_counters_files[rse_id], bytes_=account_counters_bytes[rse_id], session=session)
     session.flush()
 
+    duration = time.monotonic() - start
+    logger(logging.DEBUG, 'Rule %s applied to %s:%s: %d replicas, locks and requests in %.2f seconds (%.0f rows/s), peak memory %d MiB',
+           str(rule.id), did.scope, did.name, nb_rows, duration, nb_rows / duration if duration else 0,
+           resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)
+
     return
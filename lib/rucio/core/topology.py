@@ -13,14 +13,15 @@
 # limitations under the License.
 import copy
 import datetime
-import itertools
 import logging
 import threading
 import weakref
+from array import array
 from decimal import Decimal
+from heapq import heappop, heappush
 from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar, Union, cast
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, func, select
 
 from rucio.common.config import config_get, config_get_int
 from rucio.common.exception import InvalidRSEExpression, NoDistance, RSEProtocolNotSupported
@@ -60,6 +61,10 @@ if TYPE_CHECKING:
 
 DEFAULT_HOP_PENALTY = 10
 INF = float('inf')
+# Rows updated less than this delay before the last synchronization are considered again by the next
+# one, to cover transactions which were still running (and clock differences) during the previous one.
+SYNCHRONIZATION_MARGIN = datetime.timedelta(seconds=60)
+PATH_CACHE_SIZE = 10000
 
 
 class Node(RseData):
@@ -73,6 +78,16 @@ class Node(RseData):
         self.enabled: bool = True
         self.used_for_multihop = False
 
+    def replace_loaded(self, rse_data: RseData) -> None:
+        """
+        Replace the information loaded from the database by the one loaded in rse_data.
+        Fields are never reset to None, so that concurrent readers always find them loaded.
+        """
+        for field in ('_name', '_columns', '_attributes', '_info', '_usage', '_limits', '_transfer_limits'):
+            value = getattr(rse_data, field)
+            if value is not None:
+                setattr(self, field, value)
+
 
 class Edge(Generic[TN]):
     def __init__(self, src_node: TN, dst_node: TN) -> None:
@@ -117,6 +132,151 @@ class Edge(Generic[TN]):
         return f'{self._src_node}-->{self._dst_node}'
 
 
+class PathSearchGraph(Generic[TN, TE]):
+    """
+    Immutable, integer-indexed view of a topology, optimized for shortest path searches.
+
+    Nodes are numbered from 0 to N-1. The inbound edges of all nodes are stored in contiguous
+    arrays (compressed sparse row format): the edges towards node `i` are the ones with ids
+    between in_offsets[i] and in_offsets[i + 1]; sources[k] and costs[k] are respectively the
+    id of the source node and the cost of edge `k`.
+    """
+
+    def __init__(
+            self,
+            nodes: "Iterable[TN]",
+            edges: "Iterable[TE]",
+            multihop_nodes: "Iterable[TN]" = (),
+    ) -> None:
+        self.nodes: list[TN] = list(nodes)
+        self.node_ids: dict[TN, int] = {node: node_id for node_id, node in enumerate(self.nodes)}
+
+        in_edges_by_node: list[list[TE]] = [[] for _ in self.nodes]
+        for edge in edges:
+            in_edges_by_node[self.node_ids[edge.dst_node]].append(edge)
+
+        self.in_offsets = array('q', [0])
+        self.sources = array('q')
+        self.costs = array('q')
+        self.edges: list[TE] = []
+        for in_edges in in_edges_by_node:
+            for edge in in_edges:
+                self.sources.append(self.node_ids[edge.src_node])
+                self.costs.append(int(edge.cost))
+                self.edges.append(edge)
+            self.in_offsets.append(len(self.edges))
+
+        self.is_multihop = bytearray(len(self.nodes))
+        for node in multihop_nodes:
+            self.is_multihop[self.node_ids[node]] = 1
+
+        self._node_costs: dict[_Number, list[Optional[int]]] = {}
+
+    def node_costs(self, hop_penalty: _Number) -> "_LazyNodeCosts":
+        """
+        Return the cost of using each node as an intermediate hop: the `hop_penalty` attribute of
+        the node, or the default hop_penalty. Costs are computed on first access, once the
+        attributes of the node are loaded.
+        """
+        return _LazyNodeCosts(self, self._node_costs.setdefault(hop_penalty, [None] * len(self.nodes)), hop_penalty)
+
+    def search(
+            self,
+            dst_id: int,
+            target_ids: "set[int]",
+            node_costs: "_LazyNodeCosts",
+            edge_enabled: "Callable[[int], bool]" = lambda edge_id: True,
+    ) -> "Iterator[tuple[int, _Number, int]]":
+        """
+        Backwards Dijkstra search: start from the destination and follow inbound edges.
+        Only the destination and the multihop nodes are expanded; other nodes are only reached if
+        they are in target_ids. Stops as soon as all target nodes are found.
+
+        Yields (node_id, distance to destination, id of the edge towards the next hop) in order of
+        distance from the destination.
+        """
+        in_offsets, sources, costs, is_multihop = self.in_offsets, self.sources, self.costs, self.is_multihop
+        remaining = set(target_ids)
+        distances = {dst_id: 0}
+        next_hop_edge = {}
+        done = set()
+        heap = [(0, dst_id)]
+        while heap:
+            node_dist, node_id = heappop(heap)
+            if node_id in done:
+                continue
+            done.add(node_id)
+
+            if node_id != dst_id:
+                yield node_id, node_dist, next_hop_edge[node_id]
+                remaining.discard(node_id)
+                if not remaining:
+                    # We found the shortest paths to all desired nodes
+                    return
+                if not is_multihop[node_id]:
+                    continue
+                node_dist += node_costs[node_id]
+
+            for edge_id in range(in_offsets[node_id], in_offsets[node_id + 1]):
+                adjacent_id = sources[edge_id]
+                if adjacent_id in done or not (is_multihop[adjacent_id] or adjacent_id in remaining):
+                    continue
+                new_adjacent_dist = node_dist + costs[edge_id]
+                if new_adjacent_dist < distances.get(adjacent_id, INF) and edge_enabled(edge_id):
+                    distances[adjacent_id] = new_adjacent_dist
+                    next_hop_edge[adjacent_id] = edge_id
+                    heappush(heap, (new_adjacent_dist, adjacent_id))
+
+
+class _LazyNodeCosts:
+    def __init__(self, graph: PathSearchGraph, costs: list[Optional[int]], hop_penalty: _Number) -> None:
+        self._graph = graph
+        self._costs = costs
+        self._hop_penalty = hop_penalty
+
+    def __getitem__(self, node_id: int) -> _Number:
+        cost = self._costs[node_id]
+        if cost is None:
+            attributes = self._graph.nodes[node_id]._attributes or {}
+            try:
+                cost = int(attributes.get('hop_penalty', self._hop_penalty))
+            except ValueError:
+                cost = self._hop_penalty
+            self._costs[node_id] = cost
+        return cost
+
+
+class ShortestPathTree(Generic[TN]):
+    """
+    Shortest paths found by one search towards a destination node.
+    """
+
+    def __init__(
+            self,
+            searched_nodes: "set[TN]",
+            paths: "dict[TN, list[dict[str, Any]]]",
+            scheme_missmatch_found: "set[TN]",
+    ) -> None:
+        self.searched_nodes = searched_nodes
+        self.paths = paths
+        self.scheme_missmatch_found = scheme_missmatch_found
+
+    def paths_from(self, src_nodes: "Iterable[TN]") -> dict[TN, list[dict[str, Any]]]:
+        """
+        Return the paths of the given source nodes. Sources which cannot reach the destination
+        only because of incompatible protocols get an empty path; unreachable sources are omitted.
+        The path lists are shared, they must not be modified by the caller.
+        """
+        result = {}
+        for node in src_nodes:
+            path = self.paths.get(node)
+            if path is not None:
+                result[node] = path
+            elif node in self.scheme_missmatch_found:
+                result[node] = []
+        return result
+
+
 class Topology(RseCollection, Generic[TN, TE]):
     """
     Helper private class used to easily fetch topological information for a subset of RSEs.
@@ -136,6 +296,14 @@ class Topology(RseCollection, Generic[TN, TE]):
         self._hop_penalty = DEFAULT_HOP_PENALTY
         self.ignore_availability = ignore_availability
 
+        # Shortest path trees and search structures, valid as long as the graph doesn't change
+        self._path_cache: dict[tuple[Any, ...], ShortestPathTree[TN]] = {}
+        self._edge_scheme_cache: dict[tuple[str, str, str], dict[int, Optional[dict[str, Any]]]] = {}
+        self._search_graph: Optional[PathSearchGraph[TN, TE]] = None
+        # Incremented on each invalidation, to detect the searches which ran concurrently with it
+        self._path_cache_generation = 0
+        self._synchronized_at = datetime.datetime.utcnow()
+
         self._lock = threading.RLock()
 
     @transactional_session
@@ -177,8 +345,16 @@ class Topology(RseCollection, Generic[TN, TE]):
                     self.rse_id_to_data_map[rse_id] = rse_data = self._rse_data_cls(rse_id)
                     # A new node added. Edges which were already loaded are probably incomplete now.
                     self._edges_loaded = False
+                    self._invalidate_paths()
         return rse_data
 
+    def _invalidate_paths(self) -> None:
+        with self._lock:
+            self._path_cache_generation += 1
+            self._path_cache.clear()
+            self._edge_scheme_cache.clear()
+            self._search_graph = None
+
     @property
     def edges(self) -> dict[tuple[TN, TN], TE]:
         with self._lock:
@@ -194,12 +370,21 @@ class Topology(RseCollection, Generic[TN, TE]):
                 edge = self._edges.get((src_node, dst_node))
                 if not edge:
                     self._edges[src_node, dst_node] = edge = self._edge_cls(src_node, dst_node)
+                    self._invalidate_paths()
         return edge
 
     def delete_edge(self, src_node: TN, dst_node: TN) -> None:
         with self._lock:
-            edge = self._edges[src_node, dst_node]
+            edge = self._edges.pop((src_node, dst_node))
             edge.remove_from_nodes()
+            self._invalidate_paths()
+
+    def _set_edge_cost(self, src_node: TN, dst_node: TN, distance: int) -> None:
+        edge = self.get_or_create_edge(src_node, dst_node)
+        sanitized_dist = int(distance) if distance >= 0 else 0
+        if edge.cost != sanitized_dist:
+            edge.cost = sanitized_dist
+            self._invalidate_paths()
 
     @property
     def multihop_enabled(self) -> bool:
@@ -224,18 +409,22 @@ class Topology(RseCollection, Generic[TN, TE]):
                 if not multihop_rse_ids:
                     logger(logging.WARNING, 'multihop_rse_expression is not empty, but returned no RSEs')
 
+        previous_multihop_nodes = set(self._multihop_nodes)
         for node in self._multihop_nodes:
             node.used_for_multihop = False
 
         self._multihop_nodes.clear()
 
         for rse_id in multihop_rse_ids:
-            node = self.get_or_create(rse_id).ensure_loaded(load_columns=True)
+            node = self.get_or_create(rse_id).ensure_loaded(load_columns=True, session=session)
             if self.ignore_availability or (node.columns['availability_read'] and node.columns['availability_write']):
                 node.used_for_multihop = True
                 self._multihop_nodes.add(node)
 
-        self._hop_penalty = config_get_int('transfers', 'hop_penalty', default=DEFAULT_HOP_PENALTY, session=session)
+        hop_penalty = config_get_int('transfers', 'hop_penalty', default=DEFAULT_HOP_PENALTY, session=session)
+        if hop_penalty != self._hop_penalty or previous_multihop_nodes != self._multihop_nodes:
+            self._invalidate_paths()
+        self._hop_penalty = hop_penalty
         return self
 
     @read_session
@@ -266,10 +455,7 @@ class Topology(RseCollection, Generic[TN, TE]):
 
             src_node = self[distance.src_rse_id]
             dst_node = self[distance.dest_rse_id]
-            edge = self.get_or_create_edge(src_node, dst_node)
-
-            sanitized_dist = int(distance.distance) if distance.distance >= 0 else 0
-            edge.cost = sanitized_dist
+            self._set_edge_cost(src_node, dst_node, distance.distance)
 
             loaded_edges.add((src_node, dst_node))
 
@@ -281,6 +467,92 @@ class Topology(RseCollection, Generic[TN, TE]):
 
         self._edges_loaded = True
 
+    @read_session
+    def apply_deltas(self, *, session: "Session", logger: "LoggerFunction" = logging.log) -> None:
+        """
+        Apply to this topology the changes done in the database since the previous synchronization,
+        instead of rebuilding it from scratch. Relies on the `updated_at` column of the rses,
+        rse_attr_map, rse_protocols and distances tables.
+
+        Deleted distances are detected by comparing the number of edges; in which case all edges
+        are reloaded on next use. Deleted attributes and protocols are only seen by a full rebuild.
+        """
+        with self._lock:
+            return self._apply_deltas(session=session, logger=logger)
+
+    def _apply_deltas(self, *, session: "Session", logger: "LoggerFunction" = logging.log) -> None:
+        now = datetime.datetime.utcnow()
+        since = self._synchronized_at - SYNCHRONIZATION_MARGIN
+        rse_ids = list(self.rse_id_to_data_map)
+        if not rse_ids:
+            self._synchronized_at = now
+            return
+
+        changed_rse_ids = set()
+        for model in (models.RSE, models.RSEAttrAssociation, models.RSEProtocol):
+            rse_id_column = models.RSE.id if model is models.RSE else model.rse_id
+            stmt = select(
+                rse_id_column
+            ).where(
+                model.updated_at >= since
+            ).distinct()
+            changed_rse_ids.update(str(rse_id) for rse_id in session.execute(stmt).scalars())
+        changed_nodes = [self.rse_id_to_data_map[rse_id] for rse_id in changed_rse_ids.intersection(self.rse_id_to_data_map)]
+        if changed_nodes:
+            fresh_data = {node.id: RseData(node.id) for node in changed_nodes}
+            RseData.bulk_load(
+                fresh_data,
+                load_columns=any(node._columns is not None for node in changed_nodes),
+                load_attributes=any(node._attributes is not None for node in changed_nodes),
+                load_info=any(node._info is not None for node in changed_nodes),
+                load_usage=any(node._usage is not None for node in changed_nodes),
+                load_limits=any(node._limits is not None for node in changed_nodes),
+                include_deleted=True,
+                session=session,
+            )
+            for node in changed_nodes:
+                node.replace_loaded(fresh_data[node.id])
+            self._invalidate_paths()
+
+        if self._edges_loaded:
+            stmt = select(
+                models.Distance
+            ).where(
+                and_(
+                    models.Distance.updated_at >= since,
+                    models.Distance.src_rse_id.in_(rse_ids),
+                    models.Distance.dest_rse_id.in_(rse_ids),
+                )
+            )
+            nb_changed_edges = 0
+            for distance in session.execute(stmt).scalars():
+                src_node = self[distance.src_rse_id]
+                dst_node = self[distance.dest_rse_id]
+                if distance.distance is None:
+                    if (src_node, dst_node) in self._edges:
+                        self.delete_edge(src_node, dst_node)
+                else:
+                    self._set_edge_cost(src_node, dst_node, distance.distance)
+                nb_changed_edges += 1
+
+            stmt = select(
+                func.count()
+            ).select_from(
+                models.Distance
+            ).where(
+                and_(
+                    models.Distance.distance.isnot(None),
+                    models.Distance.src_rse_id.in_(rse_ids),
+                    models.Distance.dest_rse_id.in_(rse_ids),
+                )
+            )
+            if session.execute(stmt).scalar_one() != len(self._edges):
+                # Some distances were deleted. Reload all edges on next use.
+                self._edges_loaded = False
+            logger(logging.DEBUG, 'Topology synchronized: %d nodes and %d edges updated', len(changed_nodes), nb_changed_edges)
+
+        self._synchronized_at = now
+
     @read_session
     def search_shortest_paths(
             self,
@@ -296,91 +568,142 @@ class Topology(RseCollection, Generic[TN, TE]):
         """
         Find the shortest paths from multiple sources towards dest_rse_id.
         """
+        [result] = self.search_shortest_paths_bulk(queries=[(src_nodes, dst_node)], operation_src=operation_src, operation_dest=operation_dest,
+                                                   domain=domain, limit_dest_schemes=limit_dest_schemes, session=session)
+        return result
 
-        for rse in itertools.chain(src_nodes, [dst_node], self._multihop_nodes):
+    @read_session
+    def search_shortest_paths_bulk(
+            self,
+            queries: "Iterable[tuple[Iterable[TN], TN]]",
+            operation_src: str,
+            operation_dest: str,
+            domain: str,
+            limit_dest_schemes: list[str],
+            *,
+            session: "Session",
+    ) -> list[dict[TN, list[dict[str, Any]]]]:
+        """
+        Find the shortest paths for a batch of (source nodes, destination node) queries.
+        A single search is done for each distinct destination, towards the union of the sources of
+        all its queries. The resulting shortest path trees are cached and reused by later calls
+        until the topology changes.
+
+        Only the destination and the multihop nodes are used as intermediate hops. The path found
+        for a source is thus independent of the other sources searched together with it.
+        """
+        queries = [(list(src_nodes), dst_node) for src_nodes, dst_node in queries]
+        to_load = set(self._multihop_nodes)
+        for src_nodes, dst_node in queries:
+            to_load.update(src_nodes)
+            to_load.add(dst_node)
+        for rse in to_load:
             rse.ensure_loaded(load_attributes=True, load_info=True, session=session)
         self.ensure_edges_loaded(session=session)
 
+        limit_dest_schemes_key = tuple(limit_dest_schemes or ())
+        sources_by_destination: dict[TN, set[TN]] = {}
+        for src_nodes, dst_node in queries:
+            sources_by_destination.setdefault(dst_node, set()).update(src_nodes)
+
+        trees = {}
+        for dst_node, src_nodes in sources_by_destination.items():
+            cache_key = (dst_node, operation_src, operation_dest, domain, limit_dest_schemes_key)
+            tree = self._path_cache.get(cache_key)
+            if tree is None or not src_nodes.issubset(tree.searched_nodes):
+                searched_nodes = src_nodes.union(tree.searched_nodes) if tree is not None else src_nodes
+                generation = self._path_cache_generation
+                tree = self._search_shortest_path_tree(src_nodes=searched_nodes, dst_node=dst_node, operation_src=operation_src,
+                                                       operation_dest=operation_dest, domain=domain, limit_dest_schemes=limit_dest_schemes)
+                with self._lock:
+                    # Don't cache the result if the topology was changed during the search
+                    if generation == self._path_cache_generation:
+                        if len(self._path_cache) >= PATH_CACHE_SIZE:
+                            self._path_cache.pop(next(iter(self._path_cache)), None)
+                        self._path_cache[cache_key] = tree
+            trees[dst_node] = tree
+
+        return [trees[dst_node].paths_from(src_nodes) for src_nodes, dst_node in queries]
+
+    def _get_search_graph(self) -> "PathSearchGraph[TN, TE]":
+        graph = self._search_graph
+        if graph is None:
+            with self._lock:
+                graph = self._search_graph = PathSearchGraph(
+                    nodes=self.rse_id_to_data_map.values(),
+                    edges=self._edges.values(),
+                    multihop_nodes=self._multihop_nodes,
+                )
+        return graph
+
+    def _search_shortest_path_tree(
+            self,
+            src_nodes: "set[TN]",
+            dst_node: TN,
+            operation_src: str,
+            operation_dest: str,
+            domain: str,
+            limit_dest_schemes: list[str],
+    ) -> "ShortestPathTree[TN]":
+        graph = self._get_search_graph()
+        dst_id = graph.node_ids[dst_node]
+
         if self._multihop_nodes:
             # Filter out island source RSEs
-            nodes_to_find = {node for node in src_nodes if node.out_edges}
+            target_ids = {graph.node_ids[node] for node in src_nodes if node.out_edges}
         else:
-            nodes_to_find = set(src_nodes)
-
-        class _NodeStateProvider:
-            _hop_penalty = self._hop_penalty
-
-            def __init__(self, node: TN) -> None:
-                self.enabled: bool = True
-                self.cost: _Number = 0
-                if node != dst_node:
-                    try:
-                        self.cost = int(node.attributes.get('hop_penalty', self._hop_penalty))
-                    except ValueError:
-                        self.cost = self._hop_penalty
-
-        scheme_missmatch_found = {}
+            target_ids = {graph.node_ids[node] for node in src_nodes}
 
-        class _EdgeStateProvider:
-            def __init__(self, edge: TE) -> None:
-                self.edge = edge
-                self.chosen_scheme = {}
-
-            @property
-            def cost(self) -> _Number:
-                return self.edge.cost
-
-            @property
-            def enabled(self) -> bool:
+        node_costs = graph.node_costs(self._hop_penalty)
+        # Scheme matching results of edges which don't end at the destination don't depend
+        # on limit_dest_schemes. Share them between the searches using the same operations.
+        with self._lock:
+            edge_schemes = self._edge_scheme_cache.setdefault((operation_src, operation_dest, domain), {})
+        dst_edge_schemes = {}
+        scheme_missmatch_found = set()
+
+        def _edge_scheme(edge_id: int) -> Optional[dict[str, Any]]:
+            edge = graph.edges[edge_id]
+            to_dst = edge.dst_node == dst_node and limit_dest_schemes
+            cache = dst_edge_schemes if to_dst else edge_schemes
+            if edge_id not in cache:
                 try:
                     matching_scheme = rsemgr.find_matching_scheme(
-                        rse_settings_src=self.edge.src_node.info,
-                        rse_settings_dest=self.edge.dst_node.info,
+                        rse_settings_src=edge.src_node.info,
+                        rse_settings_dest=edge.dst_node.info,
                         operation_src=operation_src,
                         operation_dest=operation_dest,
                         domain=domain,
-                        scheme=limit_dest_schemes if self.edge.dst_node == dst_node and limit_dest_schemes else None,
+                        scheme=limit_dest_schemes if to_dst else None,
                     )
-                    self.chosen_scheme = {
+                    cache[edge_id] = {
                         'source_scheme': matching_scheme[1],
                         'dest_scheme': matching_scheme[0],
                         'source_scheme_priority': matching_scheme[3],
                         'dest_scheme_priority': matching_scheme[2],
                     }
-                    return True
                 except RSEProtocolNotSupported:
-                    scheme_missmatch_found[self.edge.src_node] = True
-                    return False
-
-        paths = {dst_node: []}
-        for node, distance, _, edge_to_next_hop, edge_state in self.dijkstra_spf(dst_node=dst_node,
-                                                                                 nodes_to_find=nodes_to_find,
-                                                                                 node_state_provider=_NodeStateProvider,
-                                                                                 edge_state_provider=_EdgeStateProvider):
-            nh_node = edge_to_next_hop.dst_node
-            edge_state = cast(_EdgeStateProvider, edge_state)
+                    cache[edge_id] = None
+            if cache[edge_id] is None:
+                scheme_missmatch_found.add(edge.src_node)
+                return None
+            return cache[edge_id]
+
+        paths: dict[TN, list[dict[str, Any]]] = {dst_node: []}
+        for node_id, distance, edge_id in graph.search(dst_id=dst_id, target_ids=target_ids, node_costs=node_costs,
+                                                       edge_enabled=lambda edge_id: _edge_scheme(edge_id) is not None):
+            edge = graph.edges[edge_id]
+            nh_node = edge.dst_node
             hop = {
-                'source_rse': node,
+                'source_rse': graph.nodes[node_id],
                 'dest_rse': nh_node,
-                'hop_distance': edge_state.cost,
+                'hop_distance': edge.cost,
                 'cumulated_distance': distance,
-                **edge_state.chosen_scheme,
+                **_edge_scheme(edge_id),
             }
-            paths[node] = [hop] + paths[nh_node]
-
-            nodes_to_find.discard(node)
-            if not nodes_to_find:
-                # We found the shortest paths to all desired nodes
-                break
+            paths[hop['source_rse']] = [hop] + paths[nh_node]
 
-        result = {}
-        for node in src_nodes:
-            path = paths.get(node)
-            if path is not None:
-                result[node] = path
-            elif scheme_missmatch_found.get(node):
-                result[node] = []
-        return result
+        return ShortestPathTree(searched_nodes=src_nodes, paths=paths, scheme_missmatch_found=scheme_missmatch_found)
 
     def dijkstra_spf(
             self,
@@ -452,6 +775,44 @@ class ExpiringObjectCache(Generic[ExpiringObjectCacheNewObject]):
             return self._object
 
 
+class TopologyCache(Generic[ExpiringObjectCacheNewObject]):
+    """
+    Thread-safe container which keeps one long-lived Topology built with the function passed in parameter.
+    Every refresh_interval seconds, the database changes are applied incrementally to the topology.
+    A full rebuild only happens every ttl seconds, to catch the changes which cannot be applied incrementally.
+    """
+
+    def __init__(
+            self,
+            new_obj_fnc: "Callable[[], ExpiringObjectCacheNewObject]",
+            refresh_interval: Optional[int] = None,
+            ttl: Optional[int] = None,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._object: Optional[ExpiringObjectCacheNewObject] = None
+        self._creation_time: Optional[datetime.datetime] = None
+        self._refresh_time: Optional[datetime.datetime] = None
+        self._new_obj_fnc = new_obj_fnc
+        if refresh_interval is None:
+            refresh_interval = config_get_int('transfers', 'topology_refresh_interval', raise_exception=False, default=30)
+        if ttl is None:
+            ttl = config_get_int('transfers', 'topology_ttl', raise_exception=False, default=300)
+        self._refresh_interval = datetime.timedelta(seconds=refresh_interval)
+        self._ttl = datetime.timedelta(seconds=ttl)
+
+    def get(self, logger: "LoggerFunction" = logging.log) -> ExpiringObjectCacheNewObject:
+        with self._lock:
+            now = datetime.datetime.utcnow()
+            if not self._object or not self._creation_time or now - self._creation_time > self._ttl:
+                self._object = self._new_obj_fnc()
+                self._creation_time = self._refresh_time = now
+                logger(logging.INFO, "Rebuilt topology object")
+            elif not self._refresh_time or now - self._refresh_time > self._refresh_interval:
+                cast(Topology, self._object).apply_deltas(logger=logger)
+                self._refresh_time = now
+            return self._object
+
+
 @transactional_session
 def get_hops(
         source_rse_id: str,
@@ -514,13 +514,53 @@ def update_transfer_state(
     :returns:                     The number of updated requests
     """
 
+    try:
+        return _update_transfer_state(tt_status_report, stats_manager, session=session, logger=logger)
+    except Exception:
+        logger(logging.CRITICAL, "Exception", exc_info=True)
+
+
+@transactional_session
+def update_transfer_states(
+        tt_status_reports: 'Iterable[TransferStatusReport]',
+        observations: "list[dict[str, Any]]",
+        *,
+        session: "Session",
+        logger=logging.log
+) -> list[int]:
+    """
+    Used by the poller to update the internal state of many requests in one transaction.
+    Contrary to update_transfer_state, exceptions are raised, so that the caller can roll
+    back the transaction and retry the reports one by one.
+
+    The state changes are not observed by the transfer statistics manager directly: the
+    arguments of each observation are appended to observations, for the caller to observe
+    them once the transaction is committed.
+
+    :param tt_status_reports:     The transfertool status updates.
+    :param observations:          The list to which the observations of the state changes are appended.
+    :param session:               The database session to use.
+    :param logger:                Optional decorated logger that can be passed from the calling daemons or servers.
+    :returns:                     The number of updated requests for each status update
+    """
+    return [_update_transfer_state(tt_status_report, None, observations=observations, session=session, logger=logger) for tt_status_report in tt_status_reports]
+
+
+def _update_transfer_state(
+        tt_status_report: 'TransferStatusReport',
+        stats_manager: "Optional[request_core.TransferStatsManager]",
+        *,
+        observations: "Optional[list[dict[str, Any]]]" = None,
+        session: "Session",
+        logger=logging.log
+) -> int:
     request_id = tt_status_report.request_id
     nb_updated = 0
     try:
         fields_to_update = tt_status_report.get_db_fields_to_update(session=session, logger=logger)
         if not fields_to_update:
             request_core.update_request(request_id, raise_on_missing=True, session=session)
-            return False
+            return 0
         else:
             logger(logging.INFO, 'UPDATING REQUEST %s FOR %s with changes: %s' % (str(request_id), tt_status_report, fields_to_update))
 
@@ -536,17 +576,20 @@ def update_transfer_state(
                     nb_updated += request_core.handle_failed_intermediate_hop(request, session=session)
 
             if tt_status_report.state:
-                stats_manager.observe(
-                    src_rse_id=request['source_rse_id'],
-                    dst_rse_id=request['dest_rse_id'],
-                    activity=request['activity'],
-                    state=tt_status_report.state,
-                    file_size=request['bytes'],
-                    submitted_at=request.get('submitted_at', None),
-                    started_at=fields_to_update.get('started_at', None),
-                    transferred_at=fields_to_update.get('transferred_at', None),
-                    session=session,
-                )
+                observation = {
+                    'src_rse_id': request['source_rse_id'],
+                    'dst_rse_id': request['dest_rse_id'],
+                    'activity': request['activity'],
+                    'state': tt_status_report.state,
+                    'file_size': request['bytes'],
+                    'submitted_at': request.get('submitted_at', None),
+                    'started_at': fields_to_update.get('started_at', None),
+                    'transferred_at': fields_to_update.get('transferred_at', None),
+                }
+                if observations is not None:
+                    observations.append(observation)
+                else:
+                    stats_manager.observe(**observation, session=session)
             request_core.add_monitor_message(
                 new_state=tt_status_report.state,
                 request=request,
@@ -557,8 +600,6 @@ def update_transfer_state(
     except UnsupportedOperation as error:
         logger(logging.WARNING, "Request %s doesn't exist - Error: %s" % (request_id, str(error).replace('\n', '')))
         return 0
-    except Exception:
-        logger(logging.CRITICAL, "Exception", exc_info=True)
 
 
 @transactional_session
@@ -581,6 +622,18 @@ def touch_transfer(external_host, transfer_id, *, session: "Session"):
     :param transfer_id:    External transfer job id as a string.
     :param session:        Database session to use.
     """
+    touch_transfers(external_host, [transfer_id], session=session)
+
+
+@METRICS.count_it
+@transactional_session
+def touch_transfers(external_host, transfer_ids, *, session: "Session"):
+    """
+    Update the timestamp of requests in many transfers. Fails silently for the transfer_ids which do not exist.
+    :param request_host:   Name of the external host.
+    :param transfer_ids:   External transfer job ids as strings.
+    :param session:        Database session to use.
+    """
     try:
         # don't touch it if it's already touched in 30 seconds
         stmt = update(
@@ -588,7 +641,7 @@ def touch_transfer(external_host, transfer_id, *, session: "Session"):
         ).prefix_with(
             "/*+ INDEX(REQUESTS REQUESTS_EXTERNALID_UQ) */", dialect='oracle'
         ).where(
-            models.Request.external_id == transfer_id,
+            models.Request.external_id.in_(transfer_ids),
             models.Request.state == RequestState.SUBMITTED,
             models.Request.updated_at < datetime.datetime.utcnow() - datetime.timedelta(seconds=30)
         ).execution_options(
@@ -872,6 +925,30 @@ class TransferPathBuilder:
         self.definition_by_request_id[rws.request_id] = definition
         return definition
 
+    def prefetch_paths(
+            self,
+            requests_with_sources: "Iterable[RequestWithSources]",
+            *,
+            session: "Session"
+    ) -> None:
+        """
+        Search the shortest paths of all the given requests in bulk: a single search per distinct
+        destination and set of schemes. The results are cached in the topology and will be re-used
+        when the transfer definitions are built for each request.
+        """
+        queries_by_schemes = {}
+        for rws in requests_with_sources:
+            if rws.request_type == RequestType.STAGEIN or not rws.sources:
+                continue
+            transfer_schemes = self.schemes
+            if rws.previous_attempt_id and self.failover_schemes:
+                transfer_schemes = self.failover_schemes
+            queries_by_schemes.setdefault(tuple(transfer_schemes), []).append(([s.rse for s in rws.sources], rws.dest_rse))
+
+        for transfer_schemes, queries in queries_by_schemes.items():
+            self.topology.search_shortest_paths_bulk(queries=queries, operation_src='third_party_copy_read', operation_dest='third_party_copy_write',
+                                                     domain='wan', limit_dest_schemes=list(transfer_schemes), session=session)
+
 
 class _SkipSource:
     pass
@@ -1090,7 +1167,7 @@ class FailureRate(SourceRankingStrategy):
         super().__init__()
         self.source_stats = {}
 
-        for stat in stats_manager.load_totals(
+        for stat in stats_manager.link_totals(
             datetime.datetime.utcnow() - datetime.timedelta(hours=1),
             by_activity=False
         ):
@@ -1206,6 +1283,9 @@ def build_transfer_paths(
     # transfers issues when there are many sources, but can be very useful for small number of sources.
     num_sources_in_logs = 4
 
+    requests_with_sources = list(requests_with_sources)
+    transfer_path_builder.prefetch_paths(requests_with_sources, session=session)
+
     candidate_paths_by_request_id, reqs_no_source, reqs_only_tape_source, reqs_scheme_mismatch = {}, set(), set(), set()
     reqs_unsupported_transfertool = set()
     for rws in requests_with_sources:
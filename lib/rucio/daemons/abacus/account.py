@@ -24,8 +24,8 @@ from typing import TYPE_CHECKING
 import rucio.db.sqla.util
 from rucio.common import exception
 from rucio.common.logging import setup_logging
-from rucio.common.utils import get_thread_with_periodic_running_function
-from rucio.core.account_counter import fill_account_counter_history_table, get_updated_account_counters, update_account_counter
+from rucio.common.utils import chunks, get_thread_with_periodic_running_function
+from rucio.core.account_counter import fill_account_counter_history_table, get_updated_account_counters, update_account_counters
 from rucio.daemons.common import HeartbeatHandler, run_daemon
 
 if TYPE_CHECKING:
@@ -34,6 +34,9 @@ if TYPE_CHECKING:
 
 graceful_stop = threading.Event()
 DAEMON_NAME = 'abacus-account'
+# Account-RSE counters folded together, and maximum number of updated counters consumed, per transaction
+COUNTERS_PER_PASS = 100
+UPDATES_PER_PASS = 100000
 
 
 def account_update(
@@ -56,7 +59,7 @@ def account_update(
 def run_once(
         heartbeat_handler: HeartbeatHandler,
         **_kwargs
-) -> None:
+) -> bool:
     worker_number, total_workers, logger = heartbeat_handler.live()
 
     start = time.time()  # NOQA
@@ -67,15 +70,20 @@ def run_once(
     # If the list is empty, sent the worker to sleep
     if not updated_account_counters:
         logger(logging.INFO, 'did not get any work')
-        return
+        return True
 
-    for account_counter in updated_account_counters:
+    must_sleep = True
+    for chunk in chunks(updated_account_counters, COUNTERS_PER_PASS):
         worker_number, total_workers, logger = heartbeat_handler.live()
         if graceful_stop.is_set():
             break
         start_time = time.time()
-        update_account_counter(account=account_counter['account'], rse_id=account_counter['rse_id'])
-        logger(logging.DEBUG, 'update of account-rse counter "%s-%s" took %f' % (account_counter['account'], account_counter['rse_id'], time.time() - start_time))
+        nb_updates = update_account_counters(counters=chunk, limit=UPDATES_PER_PASS)
+        logger(logging.DEBUG, 'update of %d account-rse counters folded %d updates and took %f' % (len(chunk), nb_updates, time.time() - start_time))
+        if nb_updates >= UPDATES_PER_PASS:
+            # some updates of these counters are left, come back without sleeping
+            must_sleep = False
+    return must_sleep
 
 
 def stop(signum: "Optional[int]" = None, frame: "Optional[FrameType]" = None) -> None:
@@ -24,8 +24,8 @@ from typing import TYPE_CHECKING
 import rucio.db.sqla.util
 from rucio.common import exception
 from rucio.common.logging import setup_logging
-from rucio.common.utils import get_thread_with_periodic_running_function
-from rucio.core.rse_counter import fill_rse_counter_history_table, get_updated_rse_counters, update_rse_counter
+from rucio.common.utils import chunks, get_thread_with_periodic_running_function
+from rucio.core.rse_counter import fill_rse_counter_history_table, get_updated_rse_counters, update_rse_counters
 from rucio.daemons.common import HeartbeatHandler, run_daemon
 
 if TYPE_CHECKING:
@@ -34,6 +34,9 @@ if TYPE_CHECKING:
 
 graceful_stop = threading.Event()
 DAEMON_NAME = 'abacus-rse'
+# RSEs folded together, and maximum number of updated counters consumed, per transaction
+RSES_PER_PASS = 100
+UPDATES_PER_PASS = 100000
 
 
 def rse_update(
@@ -56,7 +59,7 @@ def rse_update(
 def run_once(
         heartbeat_handler: HeartbeatHandler,
         **_kwargs
-) -> None:
+) -> bool:
     worker_number, total_workers, logger = heartbeat_handler.live()
 
     # Select a bunch of rses for to update for this worker
@@ -68,15 +71,20 @@ def run_once(
     # If the list is empty, sent the worker to sleep
     if not rse_ids:
         logger(logging.INFO, 'did not get any work')
-        return
+        return True
 
-    for rse_id in rse_ids:
+    must_sleep = True
+    for chunk in chunks(rse_ids, RSES_PER_PASS):
         worker_number, total_workers, logger = heartbeat_handler.live()
         if graceful_stop.is_set():
             break
         start_time = time.time()
-        update_rse_counter(rse_id=rse_id)
-        logger(logging.DEBUG, 'update of rse "%s" took %f' % (rse_id, time.time() - start_time))
+        nb_updates = update_rse_counters(rse_ids=chunk, limit=UPDATES_PER_PASS)
+        logger(logging.DEBUG, 'update of %d rses folded %d updates and took %f' % (len(chunk), nb_updates, time.time() - start_time))
+        if nb_updates >= UPDATES_PER_PASS:
+            # some updates of these RSEs are left, come back without sleeping
+            must_sleep = False
+    return must_sleep
 
 
 def stop(signum: "Optional[int]" = None, frame: "Optional[FrameType]" = None) -> None:
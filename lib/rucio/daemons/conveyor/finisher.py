@@ -40,7 +40,7 @@ from rucio.core import replica as replica_core
 from rucio.core import request as request_core
 from rucio.core.monitor import MetricManager
 from rucio.core.rse import list_rses
-from rucio.core.topology import ExpiringObjectCache, Topology
+from rucio.core.topology import Topology, TopologyCache
 from rucio.core.transfer import ProtocolFactory
 from rucio.daemons.common import ProducerConsumerDaemon, db_workqueue
 from rucio.db.sqla.constants import MYSQL_LOCK_WAIT_TIMEOUT_EXCEEDED, ORACLE_DEADLOCK_DETECTED_REGEX, ORACLE_RESOURCE_BUSY_REGEX, BadFilesStatus, ReplicaState, RequestState, RequestType
@@ -64,7 +64,7 @@ FAILED_DURING_SUBMISSION_DELAY = datetime.timedelta(minutes=120)
 def _fetch_requests(
         db_bulk: int,
         set_last_processed_by: bool,
-        cached_topology: Optional[ExpiringObjectCache],
+        cached_topology: Optional[TopologyCache],
         heartbeat_handler: "HeartbeatHandler",
         activity: str,
 ) -> tuple[bool, tuple[list[dict[str, Any]], Topology]]:
@@ -153,7 +153,7 @@ def finisher(
         bulk: int = 100,
         db_bulk: int = 1000,
         partition_wait_time: int = 10,
-        cached_topology: Optional[ExpiringObjectCache] = None,
+        cached_topology: Optional[TopologyCache] = None,
         total_threads: int = 1,
 ) -> None:
     """
@@ -231,7 +231,7 @@ def run(
     if rucio.db.sqla.util.is_old_db():
         raise DatabaseException('Database was not updated, daemon won\'t start')
 
-    cached_topology = ExpiringObjectCache(ttl=300, new_obj_fnc=lambda: Topology())
+    cached_topology = TopologyCache(new_obj_fnc=lambda: Topology())
     finisher(
         once=once,
         activities=activities,
@@ -449,6 +449,7 @@ def __update_bulk_replicas(
 ) -> Literal[True]:
     """
     Used by finisher to handle available and unavailable replicas belongs to same rule in bulk way.
+    The locks and rules of all the replicas are updated at once, and the requests are archived at once.
 
     :param replicas:              List of replicas.
     :param session:               The database session to use.
@@ -460,9 +461,8 @@ def __update_bulk_replicas(
         logger(logging.WARNING, 'Failed to bulk update replicas, will do it one by one: %s', str(error))
         raise ReplicaNotFound(error)
 
+    request_core.archive_requests([replica['request_id'] for replica in replicas if not replica['archived']], session=session)
     for replica in replicas:
-        if not replica['archived']:
-            request_core.archive_request(replica['request_id'], session=session)
         logger(logging.INFO, "HANDLED REQUEST %s DID %s:%s AT RSE %s STATE %s", replica['request_id'], replica['scope'], replica['name'], replica['rse_id'], str(replica['state']))
     return True
 
@@ -23,6 +23,7 @@ import logging
 import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import groupby
 from typing import TYPE_CHECKING, Any, Optional
 
@@ -30,7 +31,7 @@ from requests.exceptions import RequestException
 from sqlalchemy.exc import DatabaseError
 
 import rucio.db.sqla.util
-from rucio.common.config import config_get, config_get_bool, config_get_float
+from rucio.common.config import config_get, config_get_bool, config_get_float, config_get_int
 from rucio.common.exception import DatabaseException, TransferToolTimeout, TransferToolWrongAnswer
 from rucio.common.logging import setup_logging
 from rucio.common.stopwatch import Stopwatch
@@ -38,15 +39,18 @@ from rucio.common.utils import dict_chunks
 from rucio.core import request as request_core
 from rucio.core import transfer as transfer_core
 from rucio.core.monitor import MetricManager
-from rucio.core.topology import ExpiringObjectCache, Topology
+from rucio.core.topology import Topology, TopologyCache
 from rucio.daemons.common import ProducerConsumerDaemon, db_workqueue
 from rucio.db.sqla.constants import MYSQL_LOCK_WAIT_TIMEOUT_EXCEEDED, ORACLE_DEADLOCK_DETECTED_REGEX, ORACLE_RESOURCE_BUSY_REGEX, RequestState, RequestType
+from rucio.db.sqla.session import transactional_session
 from rucio.transfertool.fts3 import FTS3Transfertool
 
 if TYPE_CHECKING:
     from collections.abc import Mapping, Sequence
     from types import FrameType
 
+    from sqlalchemy.orm import Session
+
     from rucio.common.types import LoggerFunction
     from rucio.daemons.common import HeartbeatHandler
     from rucio.transfertool.transfertool import Transfertool
@@ -65,7 +69,7 @@ def _fetch_requests(
         activity_shares: Optional['Mapping[str, float]'],
         transfertool: Optional[str],
         filter_transfertool: Optional[str],
-        cached_topology: Optional[ExpiringObjectCache],
+        cached_topology: Optional[TopologyCache],
         activity: str,
         set_last_processed_by: bool,
         heartbeat_handler: "HeartbeatHandler"
@@ -117,6 +121,8 @@ def _handle_requests(
         transfertool: str,
         transfer_stats_manager: request_core.TransferStatsManager,
         oidc_support: bool,
+        query_threads: int = 1,
+        db_batch: int = 100,
         *,
         logger: "LoggerFunction" = logging.log,
 ) -> None:
@@ -124,29 +130,43 @@ def _handle_requests(
                                 t['scope'].vo if multi_vo else '',
                                 t['external_id'] or '',
                                 t['request_id'] or ''))
+    polls = []
     for (external_host, vo), transfers_for_host in groupby(transfs, key=lambda t: (t['external_host'],
                                                                                    t['scope'].vo if multi_vo else None)):
         transfers_by_eid = {}
         for external_id, xfers in groupby(transfers_for_host, key=lambda t: t['external_id']):
             transfers_by_eid[external_id] = {t['request_id']: t for t in xfers}
 
-        for chunk in dict_chunks(transfers_by_eid, fts_bulk):
-            try:
-                transfertool_cls = transfer_core.TRANSFERTOOL_CLASSES_BY_NAME.get(transfertool, FTS3Transfertool)
+        try:
+            transfertool_cls = transfer_core.TRANSFERTOOL_CLASSES_BY_NAME.get(transfertool, FTS3Transfertool)
 
-                transfertool_kwargs = {}
-                if transfertool_cls.external_name == FTS3Transfertool.external_name:
-                    transfertool_kwargs.update({
-                        'vo': vo,
-                        'oidc_support': oidc_support,
-                    })
+            transfertool_kwargs = {}
+            if transfertool_cls.external_name == FTS3Transfertool.external_name:
+                transfertool_kwargs.update({
+                    'vo': vo,
+                    'oidc_support': oidc_support,
+                })
 
-                transfertool_obj = transfertool_cls(external_host=external_host, **transfertool_kwargs)
-                poll_transfers(
+            transfertool_obj = transfertool_cls(external_host=external_host, **transfertool_kwargs)
+        except Exception:
+            logger(logging.ERROR, 'Exception', exc_info=True)
+            continue
+        for chunk in dict_chunks(transfers_by_eid, fts_bulk):
+            polls.append((transfertool_obj, chunk))
+
+    # The bulk queries run concurrently, while this thread writes the responses of the finished ones to the database
+    with ThreadPoolExecutor(max_workers=max(1, query_threads)) as executor:
+        futures = {executor.submit(query_transfers, transfertool_obj, chunk, timeout=timeout, logger=logger): (transfertool_obj, chunk)
+                   for transfertool_obj, chunk in polls}
+        for future in as_completed(futures):
+            transfertool_obj, chunk = futures[future]
+            try:
+                update_transfers(
                     transfertool_obj=transfertool_obj,
                     transfers_by_eid=chunk,
+                    resps=future.result(),
                     transfer_stats_manager=transfer_stats_manager,
-                    timeout=timeout,
+                    db_batch=db_batch,
                     logger=logger,
                 )
             except Exception:
@@ -164,7 +184,7 @@ def poller(
         partition_wait_time: int = 10,
         transfertool: Optional[str] = TRANSFER_TOOL,
         filter_transfertool: Optional[str] = FILTER_TRANSFERTOOL,
-        cached_topology: Optional[ExpiringObjectCache] = None,
+        cached_topology: Optional[TopologyCache] = None,
         total_threads: int = 1,
 ) -> None:
     """
@@ -173,6 +193,8 @@ def poller(
     timeout = config_get_float('conveyor', 'poll_timeout', default=None, raise_exception=False)
     multi_vo = config_get_bool('common', 'multi_vo', False, None)
     oidc_support = config_get_bool('conveyor', 'poller_oidc_support', default=False, raise_exception=False)
+    query_threads = config_get_int('conveyor', 'poller_query_threads', default=4, raise_exception=False)
+    db_batch = config_get_int('conveyor', 'poller_db_batch', default=100, raise_exception=False)
 
     executable = DAEMON_NAME
 
@@ -220,6 +242,8 @@ def poller(
             oidc_support=oidc_support,
             transfertool=transfertool,  # type: ignore (transfertool is not None)
             transfer_stats_manager=transfer_stats_manager,
+            query_threads=query_threads,
+            db_batch=db_batch,
         )
 
     with transfer_stats_manager:
@@ -276,7 +300,7 @@ def run(
         parsed_activity_shares.update((share, int(percentage * db_bulk)) for share, percentage in parsed_activity_shares.items())
         logging.info('activity shares enabled: %s' % parsed_activity_shares)
 
-    cached_topology = ExpiringObjectCache(ttl=300, new_obj_fnc=lambda: Topology())
+    cached_topology = TopologyCache(new_obj_fnc=lambda: Topology())
     poller(
         once=once,
         fts_bulk=fts_bulk,
@@ -300,32 +324,46 @@ def poll_transfers(
     """
     Poll a list of transfers from an FTS server
     """
+    resps = query_transfers(transfertool_obj, transfers_by_eid, timeout=timeout, logger=logger)
+    update_transfers(transfertool_obj, transfers_by_eid, resps, transfer_stats_manager, logger=logger)
+
+
+def query_transfers(
+        transfertool_obj: 'Transfertool',
+        transfers_by_eid: 'Mapping[str, Mapping[str, Any]]',
+        timeout: "Optional[int]" = None,
+        logger: "LoggerFunction" = logging.log
+) -> dict[str, Any]:
+    """
+    Query the state of a list of transfers from an FTS server, in bulk if possible.
 
-    poll_individual_transfers = False
+    :returns: The responses of the transfertool by external id, empty if the query failed.
+    """
+    stopwatch = Stopwatch()
     try:
-        _poll_transfers(transfertool_obj, transfers_by_eid, transfer_stats_manager, timeout, logger)
+        resps = _query_transfers(transfertool_obj, transfers_by_eid, timeout, logger)
     except TransferToolWrongAnswer:
-        poll_individual_transfers = True
-
-    if poll_individual_transfers:
         logger(logging.ERROR, 'Problem querying %s on %s. All jobs are being checked individually' % (list(transfers_by_eid), transfertool_obj))
+        resps = {}
         for external_id, transfers in transfers_by_eid.items():
             logger(logging.DEBUG, 'Checking %s on %s' % (external_id, transfertool_obj))
             try:
-                _poll_transfers(transfertool_obj, {external_id: transfers}, transfer_stats_manager, timeout, logger)
+                resps.update(_query_transfers(transfertool_obj, {external_id: transfers}, timeout, logger))
             except Exception as err:
                 logger(logging.ERROR, 'Problem querying %s on %s . Error returned : %s' % (external_id, transfertool_obj, str(err)))
+    stopwatch.stop()
+    METRICS.timer('poll_stage.{stage}').labels(stage='query').observe(stopwatch.elapsed)
+    return resps
 
 
-def _poll_transfers(
+def _query_transfers(
         transfertool_obj: 'Transfertool',
         transfers_by_eid: 'Mapping[str, Mapping[str, Any]]',
-        transfer_stats_manager: request_core.TransferStatsManager,
         timeout: "Optional[int]" = None,
         logger: "LoggerFunction" = logging.log
-) -> None:
+) -> dict[str, Any]:
     """
-    Helper function for poll_transfers which performs the actual polling and database update.
+    Helper function for query_transfers which performs the actual polling.
     """
     is_bulk = len(transfers_by_eid) > 1
     try:
@@ -335,60 +373,147 @@ def _poll_transfers(
         stopwatch.stop()
         METRICS.timer('bulk_query_transfers').observe(stopwatch.elapsed / (len(transfers_by_eid) or 1))
         logger(logging.DEBUG, 'Polled %s transfer requests status in %s seconds' % (len(transfers_by_eid), stopwatch.elapsed))
+        return resps
     except TransferToolTimeout as error:
         logger(logging.ERROR, str(error))
-        return
     except TransferToolWrongAnswer as error:
         logger(logging.ERROR, str(error))
         if is_bulk:
             raise  # The calling context will retry transfers one-by-one
-        else:
-            return
     except RequestException as error:
         logger(logging.ERROR, "Failed to contact FTS server: %s" % (str(error)))
-        return
     except Exception:
         logger(logging.ERROR, "Failed to query FTS info", exc_info=True)
-        return
+    return {}
 
+
+def update_transfers(
+        transfertool_obj: 'Transfertool',
+        transfers_by_eid: 'Mapping[str, Mapping[str, Any]]',
+        resps: 'Mapping[str, Any]',
+        transfer_stats_manager: request_core.TransferStatsManager,
+        db_batch: int = 100,
+        logger: "LoggerFunction" = logging.log
+) -> None:
+    """
+    Write the polled state of a list of transfers to the database.
+
+    The responses of db_batch transfers are written in one transaction. If it fails, the
+    transfers of the batch are written again one by one, as it was done before batching.
+    The state changes of a batch are observed by the transfer statistics manager only once
+    its transaction is committed.
+    """
     tss = time.time()
     logger(logging.DEBUG, 'Updating %s transfer requests status' % (len(transfers_by_eid)))
     cnt = 0
 
     request_ids = set(itertools.chain.from_iterable(transfers_by_eid.values()))
-    for transfer_id in resps:
+    for batch in dict_chunks(dict(resps), db_batch):
+        stopwatch = Stopwatch()
+        observations = []
         try:
-            transf_resp = resps[transfer_id]
-            # transf_resp is None: Lost.
-            #             is Exception: Failed to get fts job status.
-            #             is {}: No terminated jobs.
-            #             is {request_id: {file_status}}: terminated jobs.
-            if transf_resp is None:
-                for request_id, request in transfers_by_eid[transfer_id].items():
-                    transfer_core.mark_transfer_lost(request, logger=logger)
-                METRICS.counter('transfer_lost').inc()
-            elif isinstance(transf_resp, Exception):
-                logger(logging.WARNING, "Failed to poll FTS(%s) job (%s): %s" % (transfertool_obj, transfer_id, transf_resp))
-                METRICS.counter('query_transfer_exception').inc()
-            else:
-                for request_id in request_ids.intersection(transf_resp):
-                    ret = transfer_core.update_transfer_state(
-                        tt_status_report=transf_resp[request_id],
-                        stats_manager=transfer_stats_manager,
-                        logger=logger,
-                    )
-                    cnt += ret
-                    if ret:
-                        METRICS.counter('update_request_state.{updated}').labels(updated=True).inc(delta=ret)
-                    else:
-                        METRICS.counter('update_request_state.{updated}').labels(updated=False).inc()
-
-            # should touch transfers.
-            # Otherwise if one bulk transfer includes many requests and one is not terminated, the transfer will be poll again.
-            transfer_core.touch_transfer(transfertool_obj.external_host, transfer_id)
-        except (DatabaseException, DatabaseError) as error:
-            if re.match(ORACLE_RESOURCE_BUSY_REGEX, error.args[0]) or re.match(ORACLE_DEADLOCK_DETECTED_REGEX, error.args[0]) or MYSQL_LOCK_WAIT_TIMEOUT_EXCEEDED in error.args[0]:
-                logger(logging.WARNING, "Lock detected when handling request %s - skipping" % transfer_id)
-            else:
-                logger(logging.ERROR, 'Exception', exc_info=True)
+            nb_updated = _update_transfers_in_bulk(transfertool_obj, transfers_by_eid, batch, request_ids, observations, logger=logger)
+        except Exception:
+            logger(logging.WARNING, 'Failed to update %i transfers in one transaction, updating them one by one' % len(batch), exc_info=True)
+            METRICS.counter('update_batch_failed').inc()
+            for transfer_id, transf_resp in batch.items():
+                cnt += _update_transfer(transfertool_obj, transfers_by_eid, transfer_id, transf_resp, request_ids, transfer_stats_manager, logger=logger)
+            continue
+        finally:
+            stopwatch.stop()
+            METRICS.timer('poll_stage.{stage}').labels(stage='write').observe(stopwatch.elapsed)
+
+        for observation in observations:
+            transfer_stats_manager.observe(**observation)
+        cnt += sum(nb_updated)
+        METRICS.counter('update_request_state.{updated}').labels(updated=True).inc(delta=sum(nb_updated))
+        METRICS.counter('update_request_state.{updated}').labels(updated=False).inc(delta=nb_updated.count(0))
+        METRICS.counter('transfer_lost').inc(delta=sum(1 for transf_resp in batch.values() if transf_resp is None))
+        METRICS.counter('query_transfer_exception').inc(delta=sum(1 for transf_resp in batch.values() if isinstance(transf_resp, Exception)))
     logger(logging.DEBUG, 'Finished updating %s transfer requests status (%i requests state changed) in %s seconds' % (len(transfers_by_eid), cnt, (time.time() - tss)))
+
+
+@transactional_session
+def _update_transfers_in_bulk(
+        transfertool_obj: 'Transfertool',
+        transfers_by_eid: 'Mapping[str, Mapping[str, Any]]',
+        resps: 'Mapping[str, Any]',
+        request_ids: set[str],
+        observations: list[dict[str, Any]],
+        *,
+        session: "Session",
+        logger: "LoggerFunction" = logging.log
+) -> list[int]:
+    """
+    Write the polled state of many transfers in one transaction.
+    The observations of the state changes are appended to observations.
+
+    :returns: The number of updated requests for each status report.
+    """
+    tt_status_reports = []
+    for transfer_id, transf_resp in resps.items():
+        # transf_resp is None: Lost.
+        #             is Exception: Failed to get fts job status.
+        #             is {}: No terminated jobs.
+        #             is {request_id: {file_status}}: terminated jobs.
+        if transf_resp is None:
+            for request in transfers_by_eid[transfer_id].values():
+                transfer_core.mark_transfer_lost(request, session=session, logger=logger)
+        elif isinstance(transf_resp, Exception):
+            logger(logging.WARNING, "Failed to poll FTS(%s) job (%s): %s" % (transfertool_obj, transfer_id, transf_resp))
+        else:
+            tt_status_reports.extend(transf_resp[request_id] for request_id in request_ids.intersection(transf_resp))
+
+    nb_updated = transfer_core.update_transfer_states(tt_status_reports, observations=observations, session=session, logger=logger)
+
+    # should touch transfers.
+    # Otherwise if one bulk transfer includes many requests and one is not terminated, the transfer will be poll again.
+    transfer_core.touch_transfers(transfertool_obj.external_host, list(resps), session=session)
+    return nb_updated
+
+
+def _update_transfer(
+        transfertool_obj: 'Transfertool',
+        transfers_by_eid: 'Mapping[str, Mapping[str, Any]]',
+        transfer_id: str,
+        transf_resp: Any,
+        request_ids: set[str],
+        transfer_stats_manager: request_core.TransferStatsManager,
+        logger: "LoggerFunction" = logging.log
+) -> int:
+    """
+    Write the polled state of one transfer, with one transaction per request.
+
+    :returns: The number of updated requests.
+    """
+    cnt = 0
+    try:
+        if transf_resp is None:
+            for request_id, request in transfers_by_eid[transfer_id].items():
+                transfer_core.mark_transfer_lost(request, logger=logger)
+            METRICS.counter('transfer_lost').inc()
+        elif isinstance(transf_resp, Exception):
+            logger(logging.WARNING, "Failed to poll FTS(%s) job (%s): %s" % (transfertool_obj, transfer_id, transf_resp))
+            METRICS.counter('query_transfer_exception').inc()
+        else:
+            for request_id in request_ids.intersection(transf_resp):
+                ret = transfer_core.update_transfer_state(
+                    tt_status_report=transf_resp[request_id],
+                    stats_manager=transfer_stats_manager,
+                    logger=logger,
+                )
+                if ret:
+                    cnt += ret
+                    METRICS.counter('update_request_state.{updated}').labels(updated=True).inc(delta=ret)
+                else:
+                    METRICS.counter('update_request_state.{updated}').labels(updated=False).inc()
+
+        # should touch transfers.
+        # Otherwise if one bulk transfer includes many requests and one is not terminated, the transfer will be poll again.
+        transfer_core.touch_transfer(transfertool_obj.external_host, transfer_id)
+    except (DatabaseException, DatabaseError) as error:
+        if re.match(ORACLE_RESOURCE_BUSY_REGEX, error.args[0]) or re.match(ORACLE_DEADLOCK_DETECTED_REGEX, error.args[0]) or MYSQL_LOCK_WAIT_TIMEOUT_EXCEEDED in error.args[0]:
+            logger(logging.WARNING, "Lock detected when handling request %s - skipping" % transfer_id)
+        else:
+            logger(logging.ERROR, 'Exception', exc_info=True)
+    return cnt
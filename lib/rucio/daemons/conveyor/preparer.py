@@ -24,7 +24,7 @@ from rucio.common.exception import RucioException
 from rucio.common.logging import setup_logging
 from rucio.core import transfer as transfer_core
 from rucio.core.request import RequestWithSources, list_and_mark_transfer_requests_and_source_replicas, transition_requests_state_if_possible
-from rucio.core.topology import ExpiringObjectCache, Topology
+from rucio.core.topology import Topology, TopologyCache
 from rucio.core.transfer import ProtocolFactory, build_transfer_paths, list_transfer_admin_accounts, prepare_transfers
 from rucio.daemons.common import ProducerConsumerDaemon, db_workqueue
 from rucio.db.sqla.constants import RequestState, RequestType
@@ -65,7 +65,7 @@ def run(
     if rucio.db.sqla.util.is_old_db():
         raise exception.DatabaseException('Database was not updated, daemon won\'t start')
 
-    cached_topology = ExpiringObjectCache(ttl=300, new_obj_fnc=lambda: Topology(ignore_availability=ignore_availability))
+    cached_topology = TopologyCache(new_obj_fnc=lambda: Topology(ignore_availability=ignore_availability))
 
     preparer(
         once=once,
@@ -84,7 +84,7 @@ def preparer(
         ignore_availability: bool = False,
         partition_wait_time: int = 10,
         transfertools: Optional[list[str]] = None,
-        cached_topology: Optional[ExpiringObjectCache] = None,
+        cached_topology: Optional[TopologyCache] = None,
         total_threads: int = 1
 ) -> None:
     # Make an initial heartbeat so that all instanced daemons have the correct worker number on the next try
@@ -128,7 +128,7 @@ def preparer(
 def _fetch_requests(
         bulk: int,
         ignore_availability: bool,
-        cached_topology: Optional[ExpiringObjectCache],
+        cached_topology: Optional[TopologyCache],
         heartbeat_handler: "HeartbeatHandler",
         set_last_processed_by: bool,
         *,
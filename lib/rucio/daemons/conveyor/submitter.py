@@ -27,7 +27,7 @@ from rucio.common.schema import get_schema_value
 from rucio.common.stopwatch import Stopwatch
 from rucio.core.monitor import MetricManager
 from rucio.core.request import RequestWithSources, list_and_mark_transfer_requests_and_source_replicas
-from rucio.core.topology import ExpiringObjectCache, Topology
+from rucio.core.topology import Topology, TopologyCache
 from rucio.core.transfer import DEFAULT_MULTIHOP_TOMBSTONE_DELAY, TRANSFERTOOL_CLASSES_BY_NAME, ProtocolFactory, list_transfer_admin_accounts, transfer_path_str
 from rucio.daemons.common import ProducerConsumerDaemon, db_workqueue
 from rucio.daemons.conveyor.common import get_conveyor_rses, pick_and_prepare_submission_path, submit_transfer
@@ -60,7 +60,7 @@ def _fetch_requests(
         ignore_availability: bool,
         filter_transfertool: Optional[str],
         metrics: MetricManager,
-        cached_topology: Optional[ExpiringObjectCache],
+        cached_topology: Optional[TopologyCache],
         set_last_processed_by: bool,
         heartbeat_handler: "HeartbeatHandler",
 ) -> tuple[bool, tuple[Topology, dict[str, RequestWithSources]]]:
@@ -207,7 +207,7 @@ def submitter(
         request_type: Optional[list[RequestType]] = None,
         default_lifetime: int = 172800,
         metrics: MetricManager = METRICS,
-        cached_topology: Optional[ExpiringObjectCache] = None,
+        cached_topology: Optional[TopologyCache] = None,
         total_threads: int = 1,
 ) -> None:
     """
@@ -385,7 +385,7 @@ def run(
                 if activity in activities:
                     activities.remove(activity)
 
-    cached_topology = ExpiringObjectCache(ttl=300, new_obj_fnc=lambda: Topology(ignore_availability=ignore_availability))
+    cached_topology = TopologyCache(new_obj_fnc=lambda: Topology(ignore_availability=ignore_availability))
     submitter(
         once=once,
         rses=working_rses,
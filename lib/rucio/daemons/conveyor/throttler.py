@@ -15,30 +15,47 @@
 """
 Conveyor throttler is a daemon to manage rucio internal queue.
 """
+import datetime
+import heapq
 import logging
 import math
 import threading
 import traceback
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from typing import TYPE_CHECKING, Optional, TypedDict, Union
 
 from sqlalchemy import null
 
 import rucio.db.sqla.util
 from rucio.common import exception
+from rucio.common.config import config_get_bool, config_get_int
 from rucio.common.logging import setup_logging
+from rucio.common.stopwatch import Stopwatch
+from rucio.common.types import InternalAccount
 from rucio.core.monitor import MetricManager
-from rucio.core.request import get_request_stats, re_sync_all_transfer_limits, release_all_waiting_requests, release_waiting_requests_fifo, release_waiting_requests_grouped_fifo, reset_stale_waiting_requests, set_transfer_limit_stats
+from rucio.core.request import (
+    get_request_stats,
+    list_waiting_requests,
+    re_sync_all_transfer_limits,
+    release_all_waiting_requests,
+    release_waiting_requests_by_ids,
+    release_waiting_requests_fifo,
+    release_waiting_requests_grouped_fifo,
+    reset_stale_waiting_requests,
+    set_transfer_limit_stats,
+)
 from rucio.core.rse import RseCollection, RseData
 from rucio.core.transfer import applicable_rse_transfer_limits
 from rucio.daemons.common import ProducerConsumerDaemon, db_workqueue
 from rucio.db.sqla.constants import RequestState, TransferLimitDirection
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Iterable, Iterator
     from types import FrameType
 
-    from rucio.common.types import InternalAccount, LoggerFunction
+    from sqlalchemy.engine import Row
+
+    from rucio.common.types import LoggerFunction
     from rucio.daemons.common import HeartbeatHandler
 
     class LimitDict(TypedDict):
@@ -76,11 +93,20 @@ if TYPE_CHECKING:
         list[LimitStatDict]  # applicable_limits
     ]
 
+    WaitingGroupKey = tuple[
+        Optional[InternalAccount],  # account
+        str,                        # dest_rse_id
+        Optional[str],              # source_rse_id
+        Optional[str],              # activity
+    ]
+
 
 GRACEFUL_STOP = threading.Event()
 METRICS = MetricManager(module=__name__)
 DAEMON_NAME = 'conveyor-throttler'
 
+WaitingStat = namedtuple('WaitingStat', ['account', 'state', 'dest_rse_id', 'source_rse_id', 'activity', 'counter'])
+
 
 def throttler(
         once: bool = False,
@@ -93,6 +119,13 @@ def throttler(
 
     logging.info('Throttler starting')
 
+    waiting_requests = None
+    if config_get_bool('conveyor', 'throttler_incremental', default=False, raise_exception=False):
+        waiting_requests = WaitingRequests(
+            reconcile_interval=config_get_int('conveyor', 'throttler_reconcile_interval', default=3600, raise_exception=False),
+            delta_overlap=config_get_int('conveyor', 'throttler_delta_overlap', default=600, raise_exception=False),
+        )
+
     @db_workqueue(
         once=once,
         graceful_stop=GRACEFUL_STOP,
@@ -111,7 +144,7 @@ def throttler(
 
         re_sync_all_transfer_limits()
         rse_collection = RseCollection()
-        release_groups = _get_request_stats(rse_collection, logger=logger)
+        release_groups = _get_request_stats(rse_collection, waiting_requests=waiting_requests, logger=logger)
         return True, release_groups
 
     def _consumer(release_groups: Optional["ReleaseGroupsDict"]) -> None:
@@ -120,7 +153,7 @@ def throttler(
         logger = logging.log
         logger(logging.INFO, "Throttler - schedule requests")
         try:
-            _handle_requests(release_groups, logger=logger)
+            _handle_requests(release_groups, waiting_requests=waiting_requests, logger=logger)
         except Exception:
             logger(logging.CRITICAL, "Failed to schedule requests, error: %s" % (traceback.format_exc()))
         reset_stale_waiting_requests()
@@ -243,9 +276,211 @@ class RequestGrouper:
         return merged_groups
 
 
+class WaitingRequests:
+    """
+    In-memory view of the waiting requests, used by the incremental mode of the throttler.
+
+    The waiting requests are counted per (account, destination rse, source rse, activity) and
+    kept in one heap per such group, oldest request first. Each cycle only loads the requests
+    which became waiting since the previous cycle. Releases pop the oldest requests of the
+    matching groups and queue them by id. Requests which stop waiting outside of the throttler
+    are dropped when they are popped, and the whole view is rebuilt from the database every
+    reconcile_interval seconds.
+    """
+
+    RELEASE_BATCH = 10000
+
+    def __init__(
+            self,
+            reconcile_interval: int = 3600,
+            delta_overlap: int = 600
+    ):
+        """
+        :param reconcile_interval: Seconds after which the view is rebuilt from the database.
+        :param delta_overlap: Seconds by which consecutive loads of new waiting requests overlap,
+                              to not miss the requests committed late or by hosts with a skewed clock.
+        """
+        self.reconcile_interval = datetime.timedelta(seconds=reconcile_interval)
+        self.delta_overlap = datetime.timedelta(seconds=delta_overlap)
+        self.lock = threading.Lock()
+        self._group_of: dict[str, "WaitingGroupKey"] = {}
+        self._heaps: dict["WaitingGroupKey", list[tuple[datetime.datetime, str]]] = {}
+        self._counters: dict["WaitingGroupKey", int] = {}
+        self._watermark: Optional[datetime.datetime] = None
+        self._reconciled_at: Optional[datetime.datetime] = None
+        self._invalidated: set[tuple[Optional[str], Optional[str]]] = set()
+
+    def refresh(
+            self,
+            *,
+            logger: "LoggerFunction" = logging.log
+    ) -> None:
+        """
+        Load the requests which became waiting since the previous refresh, or rebuild the
+        whole view if it was never built or is due for reconciliation.
+        """
+        with self.lock:
+            stopwatch = Stopwatch()
+            now = datetime.datetime.utcnow()
+            if self._reconciled_at is None or now - self._reconciled_at >= self.reconcile_interval:
+                mode = 'reconcile'
+                self._reconcile(now)
+            else:
+                mode = 'delta'
+                for source_rse_id, dest_rse_id in self._invalidated:
+                    self._reload(source_rse_id=source_rse_id, dest_rse_id=dest_rse_id)
+                self._invalidated.clear()
+                self._load(list_waiting_requests(updated_after=self._watermark - self.delta_overlap))  # type: ignore (Session parameter is missing)
+            stopwatch.stop()
+            METRICS.timer('refresh_waiting_requests.{mode}').labels(mode=mode).observe(stopwatch.elapsed)
+            logger(logging.DEBUG, 'Refreshed (%s) %s waiting requests in %s groups in %s seconds', mode, len(self._group_of), len(self._counters), stopwatch.elapsed)
+
+    def stats(self) -> list[WaitingStat]:
+        """
+        The number of waiting requests per group, in the format of get_request_stats.
+        """
+        with self.lock:
+            return [WaitingStat(account, RequestState.WAITING, dest_rse_id, source_rse_id, activity, counter)
+                    for (account, dest_rse_id, source_rse_id, activity), counter in self._counters.items()]
+
+    def release(
+            self,
+            source_rse_id: Optional[str] = None,
+            dest_rse_id: Optional[str] = None,
+            activity: Optional[str] = None,
+            count: float = math.inf,
+            account: Optional[InternalAccount] = None
+    ) -> int:
+        """
+        Release the oldest waiting requests matching the filters, by id. Like release_waiting_requests_fifo,
+        a filter set to None matches all requests, except for account where the null() of _get_request_stats
+        only matches the requests without account.
+
+        :returns: The number of released requests.
+        """
+        filter_account = account is not None
+        if filter_account and not isinstance(account, InternalAccount):
+            account = None
+        released = 0
+        with self.lock:
+            groups = [key for key in self._counters
+                      if (not filter_account or key[0] == account)
+                      and (dest_rse_id is None or key[1] == dest_rse_id)
+                      and (source_rse_id is None or key[2] == source_rse_id)
+                      and (activity is None or key[3] == activity)]
+            while released < count:
+                request_ids = self._pop_oldest(groups, min(count - released, self.RELEASE_BATCH))
+                if not request_ids:
+                    break
+                released += release_waiting_requests_by_ids(request_ids)  # type: ignore (Session parameter is missing)
+        return released
+
+    def invalidate(
+            self,
+            source_rse_id: Optional[str] = None,
+            dest_rse_id: Optional[str] = None
+    ) -> None:
+        """
+        Reload the waiting requests matching the filters at the next refresh, after they were
+        released by a query which doesn't tell which requests it released.
+        """
+        with self.lock:
+            self._invalidated.add((source_rse_id, dest_rse_id))
+
+    def _reconcile(self, now: datetime.datetime) -> None:
+        self._group_of.clear()
+        self._heaps.clear()
+        self._counters.clear()
+        self._invalidated.clear()
+        self._watermark = now
+        self._load(list_waiting_requests(), heapify=True)  # type: ignore (Session parameter is missing)
+        self._reconciled_at = now
+
+    def _reload(
+            self,
+            source_rse_id: Optional[str],
+            dest_rse_id: Optional[str]
+    ) -> None:
+        for key in [key for key in self._counters if (dest_rse_id is None or key[1] == dest_rse_id) and (source_rse_id is None or key[2] == source_rse_id)]:
+            for _, request_id in list(self._heaps.get(key, [])):
+                if self._group_of.get(request_id) == key:
+                    self._discard(request_id)
+        self._load(list_waiting_requests(dest_rse_id=dest_rse_id, source_rse_id=source_rse_id))  # type: ignore (Session parameter is missing)
+
+    def _load(
+            self,
+            rows: "Iterable[Row]",
+            heapify: bool = False
+    ) -> None:
+        """
+        Add or move the listed requests into their group. When building the view from scratch,
+        the heaps are filled unordered and heapified once at the end.
+        """
+        for row in rows:
+            key = (row.account, row.dest_rse_id, row.source_rse_id, row.activity)
+            previous_key = self._group_of.get(row.id)
+            if previous_key != key:
+                if previous_key is not None:
+                    self._discard(row.id)
+                self._group_of[row.id] = key
+                self._counters[key] = self._counters.get(key, 0) + 1
+                entry = (row.requested_at or datetime.datetime.min, row.id)
+                if heapify:
+                    self._heaps.setdefault(key, []).append(entry)
+                else:
+                    heapq.heappush(self._heaps.setdefault(key, []), entry)
+            if row.updated_at and row.updated_at > self._watermark:
+                self._watermark = row.updated_at
+        if heapify:
+            for heap in self._heaps.values():
+                heapq.heapify(heap)
+
+    def _discard(self, request_id: str) -> None:
+        key = self._group_of.pop(request_id, None)
+        if key is None:
+            return
+        self._counters[key] -= 1
+        if not self._counters[key]:
+            del self._counters[key]
+            self._heaps.pop(key, None)
+
+    def _top(self, key: "WaitingGroupKey") -> Optional[tuple[datetime.datetime, str]]:
+        """
+        The oldest request of a group, after dropping the entries of the requests which left the group.
+        """
+        heap = self._heaps.get(key)
+        while heap:
+            if self._group_of.get(heap[0][1]) == key:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _pop_oldest(
+            self,
+            groups: list["WaitingGroupKey"],
+            count: float
+    ) -> list[str]:
+        """
+        Pop the count oldest requests over all the given groups, with a k-way merge of their heaps.
+        """
+        heads = [(top, key) for key in groups if (top := self._top(key))]
+        heapq.heapify(heads)
+        request_ids = []
+        while heads and len(request_ids) < count:
+            (_, request_id), key = heapq.heappop(heads)
+            heapq.heappop(self._heaps[key])
+            self._discard(request_id)
+            request_ids.append(request_id)
+            top = self._top(key)
+            if top:
+                heapq.heappush(heads, (top, key))
+        return request_ids
+
+
 def _get_request_stats(
         rse_collection: RseCollection,
         *,
+        waiting_requests: Optional[WaitingRequests] = None,
         logger: "LoggerFunction" = logging.log
 ) -> "ReleaseGroupsDict":
     """
@@ -261,15 +496,26 @@ def _get_request_stats(
 
     For each limit, compute the total number of active and waiting transfers
     subject to that limit.
+
+    With waiting_requests, the waiting requests are counted incrementally in memory
+    and only the active requests, which the limits keep few, are counted in the database.
     """
     logging.info("Throttler retrieve requests statistics")
 
-    db_stats = get_request_stats(  # type: ignore (Session parameter is missing)
-        state=[RequestState.QUEUED,
-               RequestState.SUBMITTING,
-               RequestState.SUBMITTED,
-               RequestState.WAITING],
-    )
+    if waiting_requests is None:
+        db_stats = get_request_stats(  # type: ignore (Session parameter is missing)
+            state=[RequestState.QUEUED,
+                   RequestState.SUBMITTING,
+                   RequestState.SUBMITTED,
+                   RequestState.WAITING],
+        )
+    else:
+        waiting_requests.refresh(logger=logger)
+        db_stats = list(get_request_stats(  # type: ignore (Session parameter is missing)
+            state=[RequestState.QUEUED,
+                   RequestState.SUBMITTING,
+                   RequestState.SUBMITTED],
+        )) + waiting_requests.stats()
 
     # for each active limit, compute how many waiting and active transfers are currently in the database
     limit_stats = {}
@@ -453,7 +699,8 @@ def _combine_limits(
 
 def _handle_requests(
         release_groups: "ReleaseGroupsDict",
-        logger: "LoggerFunction"
+        logger: "LoggerFunction",
+        waiting_requests: Optional[WaitingRequests] = None
 ) -> None:
     """
     Release (set to queued state) waiting requests in groups defined by release_groups.
@@ -461,6 +708,10 @@ def _handle_requests(
     The same limit can be shared by multiple groups. Because of that, releasing requests
     from one group can impact how many requests may be released in other groups subjected
     to the same limit.
+
+    With waiting_requests, the requests to release are picked in memory and queued by id.
+    The grouped_fifo strategy keeps its queries, and the released groups are reloaded at the
+    next refresh.
     """
 
     for (source_rse, dest_rse, activity), applicable_limits in release_groups.items():
@@ -484,7 +735,10 @@ def _handle_requests(
             total_released = 0
         elif to_release == math.inf:
             logger(logging.DEBUG, "will release all waiting requests%s", log_str)
-            total_released = release_all_waiting_requests(dest_rse_id=dest_rse_id, source_rse_id=source_rse_id, activity=activity)
+            if waiting_requests is None:
+                total_released = release_all_waiting_requests(dest_rse_id=dest_rse_id, source_rse_id=source_rse_id, activity=activity)
+            else:
+                total_released = waiting_requests.release(dest_rse_id=dest_rse_id, source_rse_id=source_rse_id, activity=activity)
         elif strategy == 'grouped_fifo':
             logger(logging.DEBUG, "will release %s remaining requests%s", to_release, log_str)
             additional_kwargs = {}
@@ -498,6 +752,8 @@ def _handle_requests(
                 count=to_release,
                 **additional_kwargs,
             )
+            if waiting_requests is not None:
+                waiting_requests.invalidate(source_rse_id=source_rse_id, dest_rse_id=dest_rse_id)
         else:
             total_released = 0
             to_release_for_account = {}
@@ -513,7 +769,8 @@ def _handle_requests(
                     continue
 
                 logger(logging.DEBUG, 'releasing %s waiting requests%s%s', to_release_account, log_str, f' account {account}' if account is not None else '')
-                nb_released = release_waiting_requests_fifo(
+                release_fnc = release_waiting_requests_fifo if waiting_requests is None else waiting_requests.release
+                nb_released = release_fnc(
                     source_rse_id=source_rse_id,
                     dest_rse_id=dest_rse_id,
                     count=to_release_account,
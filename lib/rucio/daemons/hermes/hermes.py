@@ -21,6 +21,7 @@ import datetime
 import functools
 import json
 import logging
+import queue
 import re
 import smtplib
 import sys
@@ -31,10 +32,11 @@ from email.mime.text import MIMEText
 from typing import TYPE_CHECKING, Any, Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
 import rucio.db.sqla.util
-from rucio.common.config import config_get, config_get_bool, config_get_list
+from rucio.common.config import config_get, config_get_bool, config_get_int, config_get_list
 from rucio.common.exception import DatabaseException
 from rucio.common.logging import formatted_logger, setup_logging
 from rucio.common.stomp_utils import ListenerBase, StompConnectionManager
@@ -43,7 +45,7 @@ from rucio.core.monitor import MetricManager
 from rucio.daemons.common import run_daemon
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable
     from types import FrameType
 
     from rucio.common.types import LoggerFunction
@@ -60,6 +62,26 @@ RECONNECT_COUNTER = METRICS.counter(
     documentation="Counts Hermes reconnects to different ActiveMQ brokers",
     labelnames=("host",),
 )
+SINK_DELIVERED_COUNTER = METRICS.counter(
+    name="sink.{service}.delivered",
+    documentation="Number of messages delivered by the pipelined Hermes sinks",
+    labelnames=("service",),
+)
+SINK_FAILED_COUNTER = METRICS.counter(
+    name="sink.{service}.failed",
+    documentation="Number of messages the pipelined Hermes sinks failed to deliver",
+    labelnames=("service",),
+)
+SINK_RATE_GAUGE = METRICS.gauge(
+    name="sink.{service}.messages_per_second",
+    documentation="Delivery rate of the last batch of each pipelined Hermes sink",
+    labelnames=("service",),
+)
+SINK_DELIVERY_TIMER = METRICS.timer(
+    name="sink.{service}.delivery",
+    documentation="Time to deliver and acknowledge a batch of messages in the pipelined Hermes sinks",
+    labelnames=("service",),
+)
 
 
 def default(datetype: Union[datetime.date, datetime.datetime]) -> str:
@@ -115,7 +137,8 @@ def deliver_emails(messages: "Iterable[dict[str, Any]]", logger: "LoggerFunction
 def submit_to_elastic(
         messages: "Iterable[dict[str, Any]]",
         endpoint: str,
-        logger: "LoggerFunction"
+        logger: "LoggerFunction",
+        http_session: Optional[requests.Session] = None
 ) -> int:
     """
     Aggregate a list of message to ElasticSearch
@@ -123,6 +146,7 @@ def submit_to_elastic(
     :param messages:           The list of messages.
     :param endpoint:           The ES endpoint were to send the messages.
     :param logger:             The logger object.
+    :param http_session:       The requests session to use. If None, a new connection is opened.
 
     :returns:                  HTTP status code. 200 and 204 OK. Rest is failure.
     """
@@ -137,10 +161,10 @@ def submit_to_elastic(
 
     for message in messages:
         text += '{ "index":{ } }\n%s\n' % json.dumps(message, default=default)
-    res = requests.post(endpoint,
-                        data=text,
-                        headers={"Content-Type": "application/json"},
-                        auth=auth)
+    res = (http_session or requests).post(endpoint,
+                                          data=text,
+                                          headers={"Content-Type": "application/json"},
+                                          auth=auth)
     return res.status_code
 
 
@@ -148,7 +172,8 @@ def aggregate_to_influx(
     messages: "Iterable[dict[str, Any]]",
     bin_size: str,
     endpoint: str,
-    logger: "LoggerFunction"
+    logger: "LoggerFunction",
+    http_session: Optional[requests.Session] = None
 ) -> int:
     """
     Aggregate a list of message using a certain bin_size
@@ -158,6 +183,7 @@ def aggregate_to_influx(
     :param bin_size:           The size of the bins for the aggregation (e.g. 10m, 1h, etc.).
     :param endpoint:           The InfluxDB endpoint were to send the messages.
     :param logger:             The logger object.
+    :param http_session:       The requests session to use. If None, a new connection is opened.
 
     :returns:                  HTTP status code. 200 and 204 OK. Rest is failure.
     """
@@ -234,13 +260,307 @@ def aggregate_to_influx(
     if influx_token:
         headers["Authorization"] = f"Token {influx_token!s}"
     if points:
-        res = requests.post(endpoint, headers=headers, data=points)
+        res = (http_session or requests).post(endpoint, headers=headers, data=points)
         logger(logging.DEBUG, "%s", str(res.text))
         return res.status_code
     return 204
 
 
-def hermes(once: bool = False, bulk: int = 1000, sleep_time: int = 10) -> None:
+def _to_history(messages: "Iterable[dict[str, Any]]") -> list[dict[str, Any]]:
+    """
+    Convert retrieved messages into the format expected by delete_messages.
+    """
+    return [
+        {
+            "id": message["id"],
+            "created_at": message["created_at"],
+            "updated_at": message["created_at"],
+            "payload": str(message["payload"]),
+            "event_type": message["event_type"],
+            "services": message["services"]
+        }
+        for message in messages
+    ]
+
+
+class HermesSink:
+    """
+    Delivers the messages of one service in a dedicated thread.
+
+    Batches are read from a bounded queue, so that a slow service only delays its own
+    messages. The delivered messages are acknowledged (deleted) by the sink itself.
+    """
+
+    def __init__(
+            self,
+            service: str,
+            deliver: "Callable[[list[dict[str, Any]]], list[dict[str, Any]]]",
+            acknowledge: "Callable[[list[dict[str, Any]]], None]",
+            release: "Callable[[list[dict[str, Any]]], None]",
+            queue_size: int = 2,
+            logger: "LoggerFunction" = logging.log
+    ):
+        """
+        :param service:      The name of the service.
+        :param deliver:      Function delivering a batch of messages and returning the delivered ones.
+        :param acknowledge:  Function called with the delivered messages of each batch.
+        :param release:      Function called with every batch once it has been handled.
+        :param queue_size:   Maximum number of batches waiting to be delivered.
+        :param logger:       The logger object.
+        """
+        self.service = service
+        self._deliver = deliver
+        self._acknowledge = acknowledge
+        self._release = release
+        self._logger = logger
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"hermes-{service}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, messages: list[dict[str, Any]]) -> bool:
+        """
+        Queue a batch of messages without blocking.
+
+        :returns: False if the queue of the sink is full.
+        """
+        try:
+            self._queue.put_nowait(messages)
+        except queue.Full:
+            return False
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Deliver the queued batches, then stop the thread.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            messages = self._queue.get()
+            if messages is None:
+                break
+            try:
+                self._process(messages)
+            finally:
+                self._release(messages)
+
+    def _process(self, messages: list[dict[str, Any]]) -> None:
+        start_time = time.time()
+        try:
+            delivered = self._deliver(messages)
+        except Exception as error:
+            self._logger(logging.ERROR, "Error sending to %s : %s", self.service, str(error))
+            delivered = []
+
+        if delivered:
+            try:
+                self._acknowledge(delivered)
+            except Exception as error:
+                # The messages will be retrieved and delivered again
+                self._logger(logging.ERROR, "Cannot delete %s messages delivered to %s : %s", len(delivered), self.service, str(error))
+
+        duration = time.time() - start_time
+        SINK_DELIVERY_TIMER.labels(service=self.service).observe(duration)
+        SINK_DELIVERED_COUNTER.labels(service=self.service).inc(len(delivered))
+        if len(messages) > len(delivered):
+            SINK_FAILED_COUNTER.labels(service=self.service).inc(len(messages) - len(delivered))
+        if duration > 0:
+            SINK_RATE_GAUGE.labels(service=self.service).set(len(delivered) / duration)
+        self._logger(
+            logging.INFO,
+            "%s/%s messages successfully submitted to %s in %s seconds",
+            len(delivered),
+            len(messages),
+            self.service,
+            duration,
+        )
+
+
+class HermesPipeline:
+    """
+    The sinks of the pipelined mode, and the messages they are working on.
+
+    Messages stay in the database until a sink acknowledges them. They are tracked as
+    in flight in the meantime, so that the next batch can be retrieved while the current
+    one is still being delivered without handing the same message over twice.
+
+    A batch retrieved just before some of its messages were acknowledged still contains
+    them. The acknowledged messages are therefore remembered for one more dispatch.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None, pool_size: Optional[int] = None):
+        """
+        :param queue_size:  Maximum number of batches waiting in the queue of each sink.
+        :param pool_size:   Maximum number of pooled HTTP connections per endpoint.
+        """
+        if queue_size is None:
+            queue_size = config_get_int("hermes", "pipeline_queue_size", raise_exception=False, default=2)
+        if pool_size is None:
+            pool_size = config_get_int("hermes", "pipeline_pool_size", raise_exception=False, default=10)
+        self.queue_size = queue_size
+        self.pool_size = pool_size
+        self.sinks: dict[str, HermesSink] = {}
+        self._in_flight = set()
+        # Messages acknowledged since the previous dispatch, and during the one before it
+        self._acknowledged = set()
+        self._previously_acknowledged = set()
+        self._lock = threading.Lock()
+        self._http_sessions = []
+        self._conn_mgr = None
+        self._started = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def start(self, logger: "LoggerFunction" = logging.log) -> None:
+        """
+        Create and start one sink per configured service. Does nothing if already started.
+        """
+        if self._started:
+            return
+        try:
+            services_list = config_get_list("hermes", "services_list")
+        except (NoOptionError, NoSectionError, RuntimeError):
+            logger(logging.DEBUG, "No services found, exiting")
+            sys.exit(1)
+
+        self._started = True
+        for service in services_list:
+            deliver = self._sink_delivery(service, logger=logger)
+            if deliver is None:
+                continue
+            sink = HermesSink(
+                service=service,
+                deliver=deliver,
+                acknowledge=self._acknowledge,
+                release=self._release,
+                queue_size=self.queue_size,
+                logger=logger,
+            )
+            sink.start()
+            self.sinks[service] = sink
+
+    def stop(self) -> None:
+        """
+        Wait for the sinks to deliver the queued batches, and close their connections.
+        """
+        for sink in self.sinks.values():
+            sink.stop()
+        self.sinks = {}
+        for http_session in self._http_sessions:
+            http_session.close()
+        self._http_sessions = []
+        if self._conn_mgr:
+            self._conn_mgr.disconnect()
+            self._conn_mgr = None
+        self._started = False
+
+    def dispatch(self, messages: "Iterable[dict[str, Any]]") -> int:
+        """
+        Hand the messages over to the sinks of their service. Messages already in flight or
+        recently acknowledged, messages without sink and messages of a sink with a full queue
+        are skipped.
+
+        :returns: The number of messages handed over.
+        """
+        message_dict = {}
+        with self._lock:
+            for message in messages:
+                message_id = message["id"]
+                if message_id not in self._in_flight \
+                        and message_id not in self._acknowledged \
+                        and message_id not in self._previously_acknowledged:
+                    message_dict.setdefault(message["services"], []).append(message)
+            self._previously_acknowledged = self._acknowledged
+            self._acknowledged = set()
+
+        dispatched = 0
+        for service, service_messages in message_dict.items():
+            sink = self.sinks.get(service)
+            if sink is None:
+                continue
+            with self._lock:
+                self._in_flight.update(message["id"] for message in service_messages)
+            if sink.submit(service_messages):
+                dispatched += len(service_messages)
+            else:
+                self._release(service_messages)
+        return dispatched
+
+    def _acknowledge(self, messages: list[dict[str, Any]]) -> None:
+        delete_messages(messages=_to_history(messages))
+        # Remembered before the messages are released, so that they are never dispatched again
+        with self._lock:
+            self._acknowledged.update(message["id"] for message in messages)
+
+    def _release(self, messages: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._in_flight.difference_update(message["id"] for message in messages)
+
+    def _http_session(self) -> requests.Session:
+        http_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        http_session.mount("http://", adapter)
+        http_session.mount("https://", adapter)
+        self._http_sessions.append(http_session)
+        return http_session
+
+    def _sink_delivery(
+            self,
+            service: str,
+            logger: "LoggerFunction"
+    ) -> "Optional[Callable[[list[dict[str, Any]]], list[dict[str, Any]]]]":
+        """
+        :returns: The delivery function of the service, or None if the service cannot be used.
+        """
+        if service in ("influx", "elastic"):
+            option = "influxdb_endpoint" if service == "influx" else "elastic_endpoint"
+            endpoint = config_get("hermes", option, False, None)
+            if not endpoint:
+                logger(logging.ERROR, "%s defined in the services list, but no endpoint can be found", service)
+                return None
+            http_session = self._http_session()
+
+            def _deliver_http(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+                # Bulk submission, either everything succeeds or fails
+                if service == "influx":
+                    state = aggregate_to_influx(messages=messages, bin_size="1m", endpoint=endpoint,
+                                                logger=logger, http_session=http_session)
+                else:
+                    state = submit_to_elastic(messages=messages, endpoint=endpoint,
+                                              logger=logger, http_session=http_session)
+                if state in [200, 204]:
+                    return messages
+                logger(logging.ERROR, "Failure to submit %s messages to %s. Returned status: %s", len(messages), service, state)
+                return []
+            return _deliver_http
+
+        if service == "email":
+            def _deliver_emails(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+                messages_sent = set(deliver_emails(messages=messages, logger=logger))
+                return [message for message in messages if message["id"] in messages_sent]
+            return _deliver_emails
+
+        if service == "activemq":
+            conn_mgr = StompConnectionManager(config_section="messaging-hermes", logger=logger)
+            conn_mgr.set_listener_factory("rucio-hermes", HermesListener, heartbeats=conn_mgr.config.heartbeats)
+            self._conn_mgr = conn_mgr
+
+            def _deliver_activemq(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+                messages_sent = set(conn_mgr.deliver_messages(messages=messages))
+                return [message for message in messages if message["id"] in messages_sent]
+            return _deliver_activemq
+
+        logger(logging.WARNING, "Unknown service %s in the services list", service)
+        return None
+
+
+def hermes(once: bool = False, bulk: int = 1000, sleep_time: int = 10, pipelined: Optional[bool] = None) -> None:
     """
     Creates a Hermes Worker that can submit messages to different services (InfluXDB, ElasticSearch, ActiveMQ)
     The list of services need to be define in the config service in the hermes section.
@@ -249,18 +569,68 @@ def hermes(once: bool = False, bulk: int = 1000, sleep_time: int = 10) -> None:
     :param once:       Run only once.
     :param bulk:       The number of requests to process.
     :param sleep_time: Time between two cycles.
+    :param pipelined:  Deliver to each service in its own thread. If None, use the hermes/pipelined configuration.
+    """
+    if pipelined is None:
+        pipelined = config_get_bool("hermes", "pipelined", raise_exception=False, default=False)
+    if not pipelined:
+        run_daemon(
+            once=once,
+            graceful_stop=graceful_stop,
+            executable=DAEMON_NAME,
+            partition_wait_time=1,
+            sleep_time=sleep_time,
+            run_once_fnc=functools.partial(
+                run_once,
+                bulk=bulk,
+            ),
+        )
+        return
+
+    pipeline = HermesPipeline()
+    try:
+        run_daemon(
+            once=once,
+            graceful_stop=graceful_stop,
+            executable=DAEMON_NAME,
+            partition_wait_time=1,
+            sleep_time=sleep_time,
+            run_once_fnc=functools.partial(
+                run_once_pipelined,
+                bulk=bulk,
+                pipeline=pipeline,
+            ),
+        )
+    finally:
+        pipeline.stop()
+
+
+def run_once_pipelined(heartbeat_handler: "HeartbeatHandler", bulk: int, pipeline: HermesPipeline, **_kwargs) -> bool:
     """
-    run_daemon(
-        once=once,
-        graceful_stop=graceful_stop,
-        executable=DAEMON_NAME,
-        partition_wait_time=1,
-        sleep_time=sleep_time,
-        run_once_fnc=functools.partial(
-            run_once,
-            bulk=bulk,
-        ),
+    Retrieve a batch of messages and hand it over to the sinks of the pipeline.
+
+    The sinks deliver and acknowledge the batch in the background, so the next call
+    retrieves the next batch while the current one is still being delivered.
+    """
+    worker_number, total_workers, logger = heartbeat_handler.live()
+    pipeline.start(logger=logger)
+
+    start_time = time.time()
+    # Messages in flight are still in the database, retrieve them on top of a full new batch
+    messages = retrieve_messages(bulk=bulk + pipeline.in_flight,
+                                 old_mode=False,
+                                 thread=worker_number,
+                                 total_threads=total_workers)
+    dispatched = pipeline.dispatch(messages)
+    logger(
+        logging.DEBUG,
+        "Retrieved %i messages and dispatched %i new messages in %s seconds",
+        len(messages),
+        dispatched,
+        time.time() - start_time,
     )
+    must_sleep = dispatched < bulk
+    return must_sleep
 
 
 def run_once(heartbeat_handler: "HeartbeatHandler", bulk: int, **_kwargs) -> bool:
@@ -416,18 +786,7 @@ def run_once(heartbeat_handler: "HeartbeatHandler", bulk: int, **_kwargs) -> boo
                 logger(logging.ERROR, "Error sending to ActiveMQ : %s", str(error))
 
     logger(logging.INFO, "Deleting %s messages", len(to_delete))
-    to_delete = [
-        {
-            "id": message["id"],
-            "created_at": message["created_at"],
-            "updated_at": message["created_at"],
-            "payload": str(message["payload"]),
-            "event_type": message["event_type"],
-            "services": message["services"]
-        }
-        for message in to_delete
-    ]
-    delete_messages(messages=to_delete)
+    delete_messages(messages=_to_history(to_delete))
     must_sleep = True
     return must_sleep
 
@@ -446,6 +805,7 @@ def run(
     bulk: int = 1000,
     sleep_time: int = 10,
     broker_timeout: int = 3,
+    pipelined: Optional[bool] = None,
 ) -> None:
     """
     Starts up the hermes threads.
@@ -459,7 +819,7 @@ def run(
     logger(logging.INFO, "starting hermes threads")
     thread_list = []
     for _ in range(threads):
-        her_thread = threading.Thread(target=hermes, kwargs={"once": once, "bulk": bulk, "sleep_time": sleep_time})
+        her_thread = threading.Thread(target=hermes, kwargs={"once": once, "bulk": bulk, "sleep_time": sleep_time, "pipelined": pipelined})
         her_thread.start()
         thread_list.append(her_thread)
 
@@ -30,11 +30,12 @@ from sqlalchemy.exc import DatabaseError
 from sqlalchemy.orm.exc import FlushError
 
 import rucio.db.sqla.util
+from rucio.common.config import config_get_bool
 from rucio.common.exception import DatabaseException, DataIdentifierNotFound, ReplicationRuleCreationTemporaryFailed
 from rucio.common.logging import setup_logging
 from rucio.common.types import InternalScope
 from rucio.core.monitor import MetricManager
-from rucio.core.rule import delete_updated_did, get_updated_dids, re_evaluate_did
+from rucio.core.rule import delete_updated_did, get_updated_dids, re_evaluate_did, re_evaluate_dids
 from rucio.daemons.common import HeartbeatHandler, run_daemon
 from rucio.db.sqla.constants import ORACLE_CONNECTION_LOST_CONTACT_REGEX, ORACLE_RESOURCE_BUSY_REGEX, ORACLE_UNIQUE_CONSTRAINT_VIOLATED_REGEX
 
@@ -49,12 +50,17 @@ DAEMON_NAME = 'judge-evaluator'
 def re_evaluator(
         once: bool = False,
         sleep_time: int = 30,
-        did_limit: int = 100
+        did_limit: int = 100,
+        batch: Optional[bool] = None
 ) -> None:
     """
     Main loop to check the re-evaluation of dids.
+
+    :param batch:  Re-evaluate each fetched set of dids in a single transaction. If None, use the judge/evaluator_batch configuration.
     """
 
+    if batch is None:
+        batch = config_get_bool('judge', 'evaluator_batch', raise_exception=False, default=False)
     paused_dids = {}  # {(scope, name): datetime}
     run_daemon(
         once=once,
@@ -66,6 +72,7 @@ def re_evaluator(
             run_once,
             did_limit=did_limit,
             paused_dids=paused_dids,
+            batch=batch,
         )
     )
 
@@ -74,6 +81,7 @@ def run_once(
         paused_dids: dict[tuple[str, str], datetime],
         did_limit: int,
         heartbeat_handler: HeartbeatHandler,
+        batch: bool = False,
         **_kwargs
 ) -> None:
     worker_number, total_workers, logger = heartbeat_handler.live()
@@ -100,6 +108,17 @@ def run_once(
         logger(logging.DEBUG, 'did not get any work (paused_dids=%s)', str(len(paused_dids)))
         return
 
+    if batch:
+        try:
+            start_time = time.time()
+            re_evaluate_dids(updated_dids=dids, logger=logger)
+            logger(logging.DEBUG, 'evaluation of %d updated dids took %f', len(dids), time.time() - start_time)
+            return
+        except (DatabaseException, DatabaseError, ReplicationRuleCreationTemporaryFailed, FlushError) as e:
+            # The whole batch is rolled back, the dids are evaluated one by one to isolate the failing ones
+            METRICS.counter('batch_fallback').inc()
+            logger(logging.WARNING, 'Evaluation of %d updated dids in a batch failed, evaluating them one by one: %s', len(dids), str(e))
+
     done_dids = {}
     for did in dids:
         _, _, logger = heartbeat_handler.live()
@@ -162,7 +181,8 @@ def run(
         once: bool = False,
         threads: int = 1,
         sleep_time: int = 30,
-        did_limit: int = 100
+        did_limit: int = 100,
+        batch: Optional[bool] = None
 ) -> None:
     """
     Starts up the Judge-Eval threads.
@@ -173,12 +193,13 @@ def run(
         raise DatabaseException('Database was not updated, daemon won\'t start')
 
     if once:
-        re_evaluator(once=once, did_limit=did_limit)
+        re_evaluator(once=once, did_limit=did_limit, batch=batch)
     else:
         logging.info('Evaluator starting %s threads' % str(threads))
         thread_list = [threading.Thread(target=re_evaluator, kwargs={'once': once,
                                                                      'sleep_time': sleep_time,
-                                                                     'did_limit': did_limit}) for i in range(0, threads)]
+                                                                     'did_limit': did_limit,
+                                                                     'batch': batch}) for i in range(0, threads)]
         [t.start() for t in thread_list]
         # Interruptible joins require a timeout.
         while thread_list[0].is_alive():
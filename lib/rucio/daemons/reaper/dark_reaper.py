@@ -113,6 +113,7 @@ def run_once(
 
         try:
             prot.connect()
+            pfns = []
             for replica in dark_replicas:
                 worker_number, total_workers, logger = heartbeat_handler.live()
                 nothing_to_do = False
@@ -127,10 +128,19 @@ def run_once(
                                                     operation='delete',
                                                     scheme=scheme).values())[0])
                     logger(logging.INFO, 'Deletion ATTEMPT of %s:%s as %s on %s', scope, replica['name'], pfn, rse)
-                    start = time.time()
-                    prot.delete(pfn)
+                    pfns.append((replica, scope, pfn))
+                except Exception:
+                    logging.critical(traceback.format_exc())
+
+            # The duration of each deletion is the average over the bulk
+            start = time.time()
+            results = prot.delete_many([pfn for _, _, pfn in pfns]) if pfns else {}
+            duration = (time.time() - start) / len(pfns) if pfns else 0.
+
+            for replica, scope, pfn in pfns:
+                result = results[pfn]
+                if result is True:
                     METRICS.counter('deleted_replicas').inc()
-                    duration = time.time() - start
                     logger(logging.INFO, 'Deletion SUCCESS of %s:%s as %s on %s in %s seconds', scope, replica['name'], pfn, rse, duration)
                     payload = {'scope': scope,
                                'name': replica['name'],
@@ -145,14 +155,14 @@ def run_once(
                         payload['vo'] = replica['scope'].vo
                     add_message('deletion-done', payload)
                     deleted_replicas.append(replica)
-                except SourceNotFound:
+                elif isinstance(result, SourceNotFound):
                     err_msg = ('Deletion NOTFOUND of %s:%s as %s on %s'
                                % (scope, replica['name'], pfn, rse))
                     logger(logging.WARNING, err_msg)
                     deleted_replicas.append(replica)
-                except (ServiceUnavailable, RSEAccessDenied, ResourceTemporaryUnavailable) as error:
+                elif isinstance(result, (ServiceUnavailable, RSEAccessDenied, ResourceTemporaryUnavailable)):
                     err_msg = ('Deletion NOACCESS of %s:%s as %s on %s: %s'
-                               % (scope, replica['name'], pfn, rse, str(error)))
+                               % (scope, replica['name'], pfn, rse, str(result)))
                     logger(logging.WARNING, err_msg)
                     payload = {'scope': scope,
                                'name': replica['name'],
@@ -161,14 +171,13 @@ def run_once(
                                'file-size': replica['bytes'] or 0,
                                'bytes': replica['bytes'] or 0,
                                'url': pfn,
-                               'reason': str(error),
+                               'reason': str(result),
                                'protocol': prot.attributes['scheme']}
                     if replica['scope'].vo != 'def':
                         payload['vo'] = replica['scope'].vo
                     add_message('deletion-failed', payload)
-
-                except Exception:
-                    logging.critical(traceback.format_exc())
+                else:
+                    logging.critical(''.join(traceback.format_exception(type(result), result, result.__traceback__)))
         finally:
             prot.close()
 
@@ -20,6 +20,7 @@ import concurrent.futures.thread  # noqa (https://github.com/rucio/rucio/issues/
 
 import functools
 import logging
+import queue
 import random
 import threading
 import time
@@ -54,11 +55,12 @@ from rucio.daemons.common import run_daemon
 from rucio.rse import rsemanager as rsemgr
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable, Sequence
+    from collections.abc import Callable, Iterable, Sequence
     from types import FrameType
 
     from rucio.common.types import LoggerFunction
     from rucio.daemons.common import HeartbeatHandler
+    from rucio.rse.protocols.protocol import RSEProtocol
 
 GRACEFUL_STOP = threading.Event()
 METRICS = MetricManager(module=__name__)
@@ -66,6 +68,9 @@ REGION = MemcacheRegion(expiration_time=600)
 DAEMON_NAME = 'reaper'
 
 EXCLUDED_RSE_GAUGE = METRICS.gauge('excluded_rses.{rse}', documentation='Temporarly excluded RSEs')
+PIPELINE_QUEUE_GAUGE = METRICS.gauge('pipeline.queued_jobs.{hostname}', documentation='Deletion jobs waiting in the queue of each hostname')
+PIPELINE_WAIT_TIMEOUT = 10
+PIPELINE_CONCURRENCY_GAUGE = METRICS.gauge('pipeline.concurrency.{hostname}', documentation='Concurrency limit of the deletion workers of each hostname')
 
 
 def get_rses_to_process(
@@ -136,6 +141,11 @@ def get_rses_to_process(
 
 
 def delete_from_storage(heartbeat_handler, hb_payload, replicas, prot, rse_info, is_staging, auto_exclude_threshold, logger=logging.log):
+    """
+    Delete the replicas from the storage.
+
+    :returns: The deleted files, and the number of deletions which failed because the storage could not be accessed.
+    """
     deleted_files = []
     rse_name = rse_info['rse']
     rse_id = rse_info['id']
@@ -143,10 +153,8 @@ def delete_from_storage(heartbeat_handler, hb_payload, replicas, prot, rse_info,
     pfns_to_bulk_delete = []
     try:
         prot.connect()
+        to_delete = []
         for replica in replicas:
-            # Physical deletion
-            _, _, logger = heartbeat_handler.live(payload=hb_payload)
-            stopwatch = Stopwatch()
             deletion_dict = {'scope': replica['scope'].external,
                              'name': replica['name'],
                              'rse': rse_name,
@@ -155,66 +163,71 @@ def delete_from_storage(heartbeat_handler, hb_payload, replicas, prot, rse_info,
                              'url': replica['pfn'],
                              'protocol': prot.attributes['scheme'],
                              'datatype': replica['datatype']}
-            try:
-                if replica['scope'].vo != 'def':
-                    deletion_dict['vo'] = replica['scope'].vo
-                logger(logging.DEBUG, 'Deletion ATTEMPT of %s:%s as %s on %s', replica['scope'], replica['name'], replica['pfn'], rse_name)
-                # For STAGING RSEs, no physical deletion
-                if is_staging:
-                    logger(logging.WARNING, 'Deletion STAGING of %s:%s as %s on %s, will only delete the catalog and not do physical deletion', replica['scope'], replica['name'], replica['pfn'], rse_name)
-                    deleted_files.append({'scope': replica['scope'], 'name': replica['name']})
-                    continue
+            if replica['scope'].vo != 'def':
+                deletion_dict['vo'] = replica['scope'].vo
+            logger(logging.DEBUG, 'Deletion ATTEMPT of %s:%s as %s on %s', replica['scope'], replica['name'], replica['pfn'], rse_name)
+            # For STAGING RSEs, no physical deletion
+            if is_staging:
+                logger(logging.WARNING, 'Deletion STAGING of %s:%s as %s on %s, will only delete the catalog and not do physical deletion', replica['scope'], replica['name'], replica['pfn'], rse_name)
+                deleted_files.append({'scope': replica['scope'], 'name': replica['name']})
+                continue
 
-                if replica['pfn']:
-                    pfn = replica['pfn']
-                    # sign the URL if necessary
-                    if prot.attributes['scheme'] == 'https' and rse_info['sign_url'] is not None:
+            pfn, error = None, None
+            if replica['pfn']:
+                pfn = replica['pfn']
+                # sign the URL if necessary
+                if prot.attributes['scheme'] == 'https' and rse_info['sign_url'] is not None:
+                    try:
                         pfn = get_signed_url(rse_id, rse_info['sign_url'], 'delete', pfn)
-                    if prot.attributes['scheme'] == 'globus':
-                        pfns_to_bulk_delete.append(replica['pfn'])
-                    else:
-                        prot.delete(pfn)
-                else:
-                    logger(logging.WARNING, 'Deletion UNAVAILABLE of %s:%s as %s on %s', replica['scope'], replica['name'], replica['pfn'], rse_name)
+                    except Exception as sign_error:
+                        pfn, error = None, sign_error
+                if prot.attributes['scheme'] == 'globus':
+                    pfns_to_bulk_delete.append(replica['pfn'])
+                    pfn = None
+            else:
+                logger(logging.WARNING, 'Deletion UNAVAILABLE of %s:%s as %s on %s', replica['scope'], replica['name'], replica['pfn'], rse_name)
+            to_delete.append((replica, pfn, error, deletion_dict))
 
-                duration = stopwatch.elapsed
+        # Physical deletion, in bulk. The duration of each deletion is the average over the bulk.
+        pfns = [pfn for _, pfn, _, _ in to_delete if pfn]
+        if heartbeat_handler:
+            _, _, logger = heartbeat_handler.live(payload=hb_payload)
+        stopwatch = Stopwatch()
+        results = prot.delete_many(pfns) if pfns else {}
+        duration = stopwatch.elapsed / len(pfns) if pfns else 0.
+
+        for replica, pfn, error, deletion_dict in to_delete:
+            result = error or (results[pfn] if pfn else True)
+            deletion_dict['duration'] = duration
+            if result is True:
                 METRICS.timer('delete.{scheme}.{rse}').labels(scheme=prot.attributes['scheme'], rse=rse_name).observe(duration)
-
                 deleted_files.append({'scope': replica['scope'], 'name': replica['name']})
-
-                deletion_dict['duration'] = duration
                 add_message('deletion-done', deletion_dict)
                 logger(logging.INFO, 'Deletion SUCCESS of %s:%s as %s on %s in %.2f seconds', replica['scope'], replica['name'], replica['pfn'], rse_name, duration)
 
-            except SourceNotFound:
-                duration = stopwatch.elapsed
+            elif isinstance(result, SourceNotFound):
                 err_msg = 'Deletion NOTFOUND of %s:%s as %s on %s in %.2f seconds' % (replica['scope'], replica['name'], replica['pfn'], rse_name, duration)
                 logger(logging.WARNING, '%s', err_msg)
                 deletion_dict['reason'] = 'File Not Found'
-                deletion_dict['duration'] = duration
                 add_message('deletion-not-found', deletion_dict)
                 deleted_files.append({'scope': replica['scope'], 'name': replica['name']})
 
-            except (ServiceUnavailable, RSEAccessDenied, ResourceTemporaryUnavailable) as error:
-                duration = stopwatch.elapsed
-                logger(logging.WARNING, 'Deletion NOACCESS of %s:%s as %s on %s: %s in %.2f', replica['scope'], replica['name'], replica['pfn'], rse_name, str(error), duration)
-                deletion_dict['reason'] = str(error)
-                deletion_dict['duration'] = duration
+            elif isinstance(result, (ServiceUnavailable, RSEAccessDenied, ResourceTemporaryUnavailable)):
+                logger(logging.WARNING, 'Deletion NOACCESS of %s:%s as %s on %s: %s in %.2f', replica['scope'], replica['name'], replica['pfn'], rse_name, str(result), duration)
+                deletion_dict['reason'] = str(result)
                 add_message('deletion-failed', deletion_dict)
                 noaccess_attempts += 1
-                if noaccess_attempts >= auto_exclude_threshold:
+                if noaccess_attempts == auto_exclude_threshold:
                     logger(logging.INFO, 'Too many (%d) NOACCESS attempts for %s. RSE will be temporarily excluded.', noaccess_attempts, rse_name)
                     REGION.set('temporary_exclude_%s' % rse_id, True)
                     METRICS.gauge('excluded_rses.{rse}').labels(rse=rse_name).set(1)
 
                     EXCLUDED_RSE_GAUGE.labels(rse=rse_name).set(1)
-                    break
 
-            except Exception as error:
-                duration = stopwatch.elapsed
-                logger(logging.CRITICAL, 'Deletion CRITICAL of %s:%s as %s on %s in %.2f seconds : %s', replica['scope'], replica['name'], replica['pfn'], rse_name, duration, str(traceback.format_exc()))
-                deletion_dict['reason'] = str(error)
-                deletion_dict['duration'] = duration
+            else:
+                logger(logging.CRITICAL, 'Deletion CRITICAL of %s:%s as %s on %s in %.2f seconds : %s', replica['scope'], replica['name'], replica['pfn'], rse_name, duration,
+                       ''.join(traceback.format_exception(type(result), result, result.__traceback__)))
+                deletion_dict['reason'] = str(result)
                 add_message('deletion-failed', deletion_dict)
 
         if pfns_to_bulk_delete and prot.attributes['scheme'] == 'globus':
@@ -235,12 +248,49 @@ def delete_from_storage(heartbeat_handler, hb_payload, replicas, prot, rse_info,
             if replica['scope'].vo != 'def':
                 payload['vo'] = replica['scope'].vo
             add_message('deletion-failed', payload)
+        noaccess_attempts = len(replicas)
         logger(logging.INFO, 'Cannot connect to %s. RSE will be temporarily excluded.', rse_name)
         REGION.set('temporary_exclude_%s' % rse_id, True)
         EXCLUDED_RSE_GAUGE.labels(rse=rse_name).set(1)
     finally:
         prot.close()
-    return deleted_files
+    return deleted_files, noaccess_attempts
+
+
+def _create_deletion_protocol(rse: RseData, scheme: Optional[str], logger: "LoggerFunction" = logging.log) -> "RSEProtocol":
+    """
+    Create the protocol used to delete on the RSE, with a token if the RSE supports OIDC.
+    """
+    prot = rsemgr.create_protocol(rse.info, 'delete', scheme=scheme, logger=logger)
+    if rse.attributes.get(RseAttr.OIDC_SUPPORT) is True and prot.attributes['scheme'] == 'davs':
+        audience = determine_audience_for_rse(rse.id)
+        # FIXME: At the time of writing, StoRM requires `storage.read`
+        # in order to perform a stat operation.
+        scope = determine_scope_for_rse(rse.id, scopes=['storage.modify', 'storage.read'])
+        auth_token = request_token(audience, scope)
+        if auth_token:
+            logger(logging.INFO, 'Using a token to delete on RSE %s', rse.name)
+            prot = rsemgr.create_protocol(rse.info, 'delete', scheme=scheme, auth_token=auth_token, logger=logger)
+        else:
+            logger(logging.WARNING, 'Failed to procure a token to delete on RSE %s', rse.name)
+    return prot
+
+
+def _set_deletion_pfns(replicas: "Iterable[dict[str, Any]]", rse: RseData, scheme: Optional[str], logger: "LoggerFunction" = logging.log) -> None:
+    """
+    Set the pfn to delete of each replica, or None if it cannot be determined.
+    """
+    for replica in replicas:
+        try:
+            replica['pfn'] = str(list(rsemgr.lfns2pfns(rse_settings=rse.info,
+                                                       lfns=[{'scope': replica['scope'].external, 'name': replica['name'], 'path': replica['path']}],
+                                                       operation='delete', scheme=scheme).values())[0])
+        except (ReplicaUnAvailable, ReplicaNotFound) as error:
+            logger(logging.WARNING, 'Failed get pfn UNAVAILABLE replica %s:%s on %s with error %s', replica['scope'], replica['name'], rse.name, str(error))
+            replica['pfn'] = None
+
+        except Exception:
+            logger(logging.CRITICAL, 'Exception', exc_info=True)
 
 
 def _rse_deletion_hostname(rse: RseData, scheme: Optional[str]) -> Optional[str]:
@@ -379,6 +429,373 @@ def __check_rse_usage(rse: RseData, greedy: bool = False, logger: "LoggerFunctio
     return 0, True
 
 
+class AdaptiveConcurrency:
+    """
+    Concurrency limit adapted to the observed latency, by additive increase and multiplicative decrease.
+
+    The limit grows by one after each observation close to the best latency seen so far, and is
+    halved when the smoothed latency gets `tolerance` times worse. The best latency slowly follows
+    the observations after each decrease, as the performance of a storage changes over time.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, tolerance: float = 2.0, smoothing: float = 0.3):
+        """
+        :param max_limit:  Maximum concurrency.
+        :param min_limit:  Minimum concurrency.
+        :param tolerance:  Latency degradation, relative to the best latency, triggering a decrease.
+        :param smoothing:  Weight of the last observation in the smoothed latency.
+        """
+        self.max_limit = max(max_limit, min_limit)
+        self.min_limit = min_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.limit = self.max_limit
+        self.latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self._active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        Wait until the number of active tasks is below the limit, then count a new active task.
+        """
+        with self._condition:
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._active += 1
+
+    def release(self, latency: Optional[float] = None) -> None:
+        """
+        Count the end of an active task, and adapt the limit to its latency.
+        """
+        with self._condition:
+            self._active -= 1
+            if latency is not None:
+                self._observe(latency)
+            self._condition.notify_all()
+
+    def _observe(self, latency: float) -> None:
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = self.smoothing * latency + (1 - self.smoothing) * self.latency
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+
+        if self.latency > self.best_latency * self.tolerance:
+            self.limit = max(self.min_limit, self.limit // 2)
+            self.best_latency = (self.best_latency + self.latency) / 2
+        else:
+            self.limit = min(self.max_limit, self.limit + 1)
+
+
+class HostDeletionPool:
+    """
+    Deletion workers of one storage hostname, fed by a queue of deletion jobs.
+    The number of jobs running at the same time adapts to the latency of the storage.
+
+    The size of the queue is only a target: submitting never blocks, and new jobs should
+    only be prepared while the queue has free slots.
+    """
+
+    def __init__(
+            self,
+            hostname: str,
+            delete: "Callable[[RseData, list[dict[str, Any]]], list[dict[str, Any]]]",
+            done: "Callable[[RseData, list[dict[str, Any]], list[dict[str, Any]]], None]",
+            max_workers: int,
+            queue_size: int,
+            dequeued: Optional[threading.Condition] = None,
+            logger: "LoggerFunction" = logging.log
+    ):
+        """
+        :param hostname:     The hostname of the storage.
+        :param delete:       Function deleting the replicas of a job from the storage and returning the deleted ones.
+        :param done:         Function called with the replicas of each job and the deleted ones.
+        :param max_workers:  Maximum number of concurrent deletion jobs.
+        :param queue_size:   Number of jobs waiting in the queue above which it is considered full.
+        :param dequeued:     Condition notified each time a job leaves the queue.
+        :param logger:       The logger object.
+        """
+        self.hostname = hostname
+        self.concurrency = AdaptiveConcurrency(max_limit=max_workers)
+        self.dequeued = dequeued or threading.Condition()
+        self._delete = delete
+        self._done = done
+        self._logger = logger
+        self.queue_size = queue_size
+        self._queue = queue.Queue()
+        self._threads = [threading.Thread(target=self._run, name=f'reaper-{hostname}-{i}', daemon=True) for i in range(max_workers)]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def free_slots(self) -> int:
+        return max(self.queue_size - self._queue.qsize(), 0)
+
+    def submit(self, rse: RseData, replicas: list[dict[str, Any]]) -> None:
+        """
+        Queue a deletion job without blocking, even if the queue is full. The caller
+        is expected to check the free slots before listing the replicas of new jobs.
+        """
+        self._queue.put_nowait((rse, replicas))
+        PIPELINE_QUEUE_GAUGE.labels(hostname=self.hostname).set(self._queue.qsize())
+
+    def stop(self, drain: bool = True) -> list[tuple[RseData, list[dict[str, Any]]]]:
+        """
+        Stop the workers once the running jobs, and the queued ones if drain is set, are done.
+
+        :returns: The queued jobs which were not run.
+        """
+        dropped = []
+        if not drain:
+            while True:
+                try:
+                    dropped.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return dropped
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self.dequeued:
+                self.dequeued.notify_all()
+            if job is None:
+                break
+            PIPELINE_QUEUE_GAUGE.labels(hostname=self.hostname).set(self._queue.qsize())
+            rse, replicas = job
+            deleted_files = []
+            latency = None
+            self.concurrency.acquire()
+            try:
+                start_time = time.time()
+                deleted_files = self._delete(rse, replicas)
+                latency = (time.time() - start_time) / max(len(replicas), 1)
+            except Exception:
+                self._logger(logging.CRITICAL, 'Exception in the deletion worker of %s', self.hostname, exc_info=True)
+            finally:
+                self.concurrency.release(latency)
+                PIPELINE_CONCURRENCY_GAUGE.labels(hostname=self.hostname).set(self.concurrency.limit)
+                self._done(rse, replicas, deleted_files)
+
+
+class DeletionPipeline:
+    """
+    Pipelined deletion. The reaper thread lists and marks the replicas to delete, then hands
+    them over, in small jobs, to one pool of deletion workers per storage hostname. The
+    replicas deleted from the storages are removed from the database in batches by a
+    dedicated thread.
+
+    Listed replicas are tracked as in flight until they are removed from the database, so
+    that they are not handed over twice if they are listed again in the meantime.
+    """
+
+    def __init__(
+            self,
+            scheme: Optional[str] = None,
+            auto_exclude_threshold: int = 100,
+            job_size: Optional[int] = None,
+            prefetch: Optional[int] = None,
+            db_batch_size: Optional[int] = None
+    ):
+        """
+        :param scheme:                  Force the reaper to use a particular protocol, e.g., mock.
+        :param auto_exclude_threshold:  Number of consecutive NOACCESS deletions after which the RSE gets temporarily excluded.
+        :param job_size:                Number of replicas per deletion job.
+        :param prefetch:                Number of jobs waiting in the queue of each hostname, per deletion worker.
+        :param db_batch_size:           Maximum number of deleted replicas removed from the database at once.
+        """
+        if job_size is None:
+            job_size = config_get_int('reaper', 'pipeline_job_size', raise_exception=False, default=10)
+        if prefetch is None:
+            prefetch = config_get_int('reaper', 'pipeline_prefetch', raise_exception=False, default=2)
+        if db_batch_size is None:
+            db_batch_size = config_get_int('reaper', 'pipeline_db_batch_size', raise_exception=False, default=1000)
+        self.scheme = scheme
+        self.auto_exclude_threshold = auto_exclude_threshold
+        self.job_size = job_size
+        self.prefetch = prefetch
+        self.db_batch_size = db_batch_size
+        self.pools: dict[str, HostDeletionPool] = {}
+        self._in_flight = set()
+        self._failures = {}
+        self._lock = threading.Lock()
+        self._deleted_queue = queue.Queue()
+        self._dequeued = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
+        self._logger: "LoggerFunction" = logging.log
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def start(self, logger: "LoggerFunction" = logging.log) -> None:
+        """
+        Start the database writer. Does nothing if already started.
+        """
+        if self._writer:
+            return
+        self._logger = logger
+        self._writer = threading.Thread(target=self._write_deleted, name='reaper-db-writer', daemon=True)
+        self._writer.start()
+
+    def stop(self, drain: bool = True) -> None:
+        """
+        Stop the deletion workers, then remove the last deleted replicas from the database.
+
+        :param drain:  Run the queued deletion jobs before stopping. Otherwise, the replicas of
+                       the queued jobs stay BEING_DELETED and are listed again after the delay.
+        """
+        for pool in self.pools.values():
+            for rse, replicas in pool.stop(drain=drain):
+                self._done(rse, replicas, [])
+        self.pools = {}
+        if self._writer:
+            self._deleted_queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def has_capacity(self, hostname: str) -> bool:
+        """
+        Whether the queue of the hostname can take the jobs of a new chunk of replicas.
+        All the jobs of a chunk are queued without blocking, so a queue exceeds its size
+        by at most one chunk.
+        """
+        pool = self.pools.get(hostname)
+        return pool is None or pool.free_slots() > 0
+
+    def wait_for_capacity(self, hostnames: "Iterable[str]", timeout: float) -> bool:
+        """
+        Wait until the queue of one of the hostnames has a free slot.
+
+        :returns: False if the timeout expired.
+        """
+        pools = [self.pools[hostname] for hostname in hostnames if hostname in self.pools]
+        with self._dequeued:
+            return self._dequeued.wait_for(lambda: not pools or any(pool.free_slots() > 0 for pool in pools), timeout)
+
+    def submit(
+            self,
+            rse: RseData,
+            hostname: str,
+            replicas: "Iterable[dict[str, Any]]",
+            total_workers: int = 1,
+            logger: "LoggerFunction" = logging.log
+    ) -> int:
+        """
+        Split the replicas, which are not already in flight, in deletion jobs for the pool of the hostname.
+
+        :param rse:            The RSE of the replicas, with its info and attributes loaded.
+        :param hostname:       The hostname of the storage.
+        :param replicas:       The replicas listed and marked for deletion.
+        :param total_workers:  The number of reaper workers, sharing the deletion threads of the hostname.
+        :returns:              The number of replicas handed over.
+        """
+        with self._lock:
+            new_replicas = []
+            for replica in replicas:
+                key = (rse.id, replica['scope'], replica['name'])
+                if key not in self._in_flight:
+                    self._in_flight.add(key)
+                    new_replicas.append(replica)
+
+            pool = self.pools.get(hostname)
+            if pool is None:
+                max_workers = max(1, get_max_deletion_threads_by_hostname(hostname) // max(total_workers, 1))
+                pool = HostDeletionPool(hostname=hostname,
+                                        delete=self._delete,
+                                        done=self._done,
+                                        max_workers=max_workers,
+                                        queue_size=max_workers * self.prefetch,
+                                        dequeued=self._dequeued,
+                                        logger=logger)
+                pool.start()
+                self.pools[hostname] = pool
+                logger(logging.INFO, 'Started %d deletion workers for %s', max_workers, hostname)
+
+        for job in chunks(new_replicas, self.job_size):
+            pool.submit(rse, job)
+        return len(new_replicas)
+
+    def _delete(self, rse: RseData, replicas: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        result = REGION.get('temporary_exclude_%s' % rse.id)
+        if not isinstance(result, NoValue):
+            self._logger(logging.DEBUG, 'RSE %s is temporarily excluded, skipping the deletion of %d replicas', rse.name, len(replicas))
+            return []
+
+        _set_deletion_pfns(replicas, rse, self.scheme, logger=self._logger)
+        try:
+            prot = _create_deletion_protocol(rse, self.scheme, logger=self._logger)
+        except RSEProtocolNotSupported:
+            self._logger(logging.WARNING, 'Protocol %s not supported on %s', self.scheme, rse.name)
+            return []
+        deleted_files, noaccess_attempts = delete_from_storage(None, None, replicas, prot, rse.info, rse.columns['staging_area'],
+                                                               self.auto_exclude_threshold, logger=self._logger)
+
+        # The NOACCESS failures are counted across the jobs of the RSE, until a job has none
+        with self._lock:
+            failures = (self._failures.get(rse.id, 0) + noaccess_attempts) if noaccess_attempts else 0
+            self._failures[rse.id] = failures
+        if failures >= self.auto_exclude_threshold:
+            self._logger(logging.INFO, 'Too many (%d) NOACCESS attempts for %s. RSE will be temporarily excluded.', failures, rse.name)
+            REGION.set('temporary_exclude_%s' % rse.id, True)
+            EXCLUDED_RSE_GAUGE.labels(rse=rse.name).set(1)
+            with self._lock:
+                self._failures[rse.id] = 0
+        return deleted_files
+
+    def _done(self, rse: RseData, replicas: list[dict[str, Any]], deleted_files: list[dict[str, Any]]) -> None:
+        self._deleted_queue.put((rse, replicas, deleted_files))
+
+    def _write_deleted(self) -> None:
+        """
+        Remove the deleted replicas from the database, in batches per RSE.
+        """
+        stopping = False
+        while not stopping:
+            batches = {}
+            released = []
+            nb_deleted = 0
+            # Wait for the next job, then take the ones done in the meantime
+            item = self._deleted_queue.get()
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    rse, replicas, deleted_files = item
+                    batches.setdefault(rse.id, (rse, []))[1].extend(deleted_files)
+                    released.extend((rse.id, replica['scope'], replica['name']) for replica in replicas)
+                    nb_deleted += len(deleted_files)
+                if stopping or nb_deleted >= self.db_batch_size:
+                    break
+                try:
+                    item = self._deleted_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            for rse, deleted_files in batches.values():
+                if not deleted_files:
+                    continue
+                del_start = time.time()
+                try:
+                    delete_replicas(rse_id=rse.id, files=deleted_files)  # type: ignore (argument missing: session)
+                except Exception:
+                    # The replicas stay BEING_DELETED, and will be listed again after the delay
+                    self._logger(logging.CRITICAL, 'Exception', exc_info=True)
+                    continue
+                self._logger(logging.DEBUG, 'delete_replicas succeeded on %s : %s replicas in %s seconds', rse.name, len(deleted_files), time.time() - del_start)
+                METRICS.counter('deletion.done').inc(len(deleted_files))
+
+            with self._lock:
+                self._in_flight.difference_update(released)
+
+
 def reaper(
         rses: "Sequence[str]",
         include_rses: Optional[str],
@@ -391,7 +808,8 @@ def reaper(
         delay_seconds: int = 0,
         sleep_time: int = 60,
         auto_exclude_threshold: int = 100,
-        auto_exclude_timeout: int = 600
+        auto_exclude_timeout: int = 600,
+        pipelined: Optional[bool] = None
 ) -> None:
     """
     Main loop to select and delete files.
@@ -409,27 +827,40 @@ def reaper(
     :param sleep_time:             Time between two cycles.
     :param auto_exclude_threshold: Number of service unavailable exceptions after which the RSE gets temporarily excluded.
     :param auto_exclude_timeout:   Timeout for temporarily excluded RSEs.
+    :param pipelined:              Delete with one pool of workers per storage hostname, while listing the next replicas.
+                                   If None, use the reaper/pipelined configuration.
     """
-    run_daemon(
-        once=once,
-        graceful_stop=GRACEFUL_STOP,
-        executable=DAEMON_NAME,
-        partition_wait_time=0 if once else 10,
-        sleep_time=sleep_time,
-        run_once_fnc=functools.partial(
-            run_once,
-            rses=rses,
-            include_rses=include_rses,
-            exclude_rses=exclude_rses,
-            vos=vos,
-            chunk_size=chunk_size,
-            greedy=greedy,
-            scheme=scheme,
-            delay_seconds=delay_seconds,
-            auto_exclude_threshold=auto_exclude_threshold,
-            auto_exclude_timeout=auto_exclude_timeout,
+    if pipelined is None:
+        pipelined = config_get_bool('reaper', 'pipelined', raise_exception=False, default=False)
+    pipeline = None
+    if pipelined:
+        pipeline = DeletionPipeline(scheme=scheme, auto_exclude_threshold=auto_exclude_threshold)
+        pipeline.start()
+    try:
+        run_daemon(
+            once=once,
+            graceful_stop=GRACEFUL_STOP,
+            executable=DAEMON_NAME,
+            partition_wait_time=0 if once else 10,
+            sleep_time=sleep_time,
+            run_once_fnc=functools.partial(
+                run_once,
+                rses=rses,
+                include_rses=include_rses,
+                exclude_rses=exclude_rses,
+                vos=vos,
+                chunk_size=chunk_size,
+                greedy=greedy,
+                scheme=scheme,
+                delay_seconds=delay_seconds,
+                auto_exclude_threshold=auto_exclude_threshold,
+                auto_exclude_timeout=auto_exclude_timeout,
+                pipeline=pipeline,
+            )
         )
-    )
+    finally:
+        if pipeline:
+            pipeline.stop(drain=not GRACEFUL_STOP.is_set())
 
 
 def run_once(
@@ -444,6 +875,7 @@ def run_once(
         auto_exclude_threshold: int,
         auto_exclude_timeout: int,
         heartbeat_handler: "HeartbeatHandler",
+        pipeline: Optional["DeletionPipeline"] = None,
         **_kwargs
 ) -> bool:
 
@@ -495,6 +927,7 @@ def run_once(
             auto_exclude_threshold=auto_exclude_threshold,
             auto_exclude_timeout=auto_exclude_timeout,
             heartbeat_handler=heartbeat_handler,
+            pipeline=pipeline,
         )
         if rses_to_process and iteration < max_fast_reiterations:
             logger(logging.INFO, "Will perform fast-reiteration %d/%d with rses: %s", iteration + 1, max_fast_reiterations, [str(rse) for rse in rses_to_process])
@@ -517,6 +950,7 @@ def _run_once(
         auto_exclude_threshold: int,
         auto_exclude_timeout: int,
         heartbeat_handler: "HeartbeatHandler",
+        pipeline: Optional["DeletionPipeline"] = None,
         **_kwargs
 ) -> list[RseData]:
 
@@ -552,6 +986,7 @@ def _run_once(
 
     work_remaining_by_rse = {}
     paused_rses = []
+    full_hostnames = set()
     for rse, needed_free_space, only_delete_obsolete, enable_greedy in rses_with_params:
         result = REGION.get('pause_deletion_%s' % rse.id, expiration_time=120)
         if not isinstance(result, NoValue):
@@ -580,10 +1015,19 @@ def _run_once(
             REGION.set('pause_deletion_%s' % rse.id, True)
             continue
 
-        hb_payload = __try_reserve_worker_slot(heartbeat_handler=heartbeat_handler, rse=rse, hostname=rse_hostname, logger=logger)
-        if not hb_payload:
-            # Might need to reschedule a try on this RSE later in the same cycle
-            continue
+        if pipeline:
+            # The deletion workers of this hostname are local to the pipeline
+            hb_payload = None
+            if not pipeline.has_capacity(rse_hostname):
+                logger(logging.DEBUG, 'Deletion queue of %s is full. Skipping RSE %s', rse_hostname, rse.name)
+                full_hostnames.add(rse_hostname)
+                work_remaining_by_rse[rse] = True
+                continue
+        else:
+            hb_payload = __try_reserve_worker_slot(heartbeat_handler=heartbeat_handler, rse=rse, hostname=rse_hostname, logger=logger)
+            if not hb_payload:
+                # Might need to reschedule a try on this RSE later in the same cycle
+                continue
 
         # List and mark BEING_DELETED the files to delete
         del_start_time = time.time()
@@ -614,36 +1058,18 @@ def _run_once(
         # Physical  deletion will take place there
         try:
             rse.ensure_loaded(load_info=True, load_attributes=True)
-            prot = rsemgr.create_protocol(rse.info, 'delete', scheme=scheme, logger=logger)
-            if rse.attributes.get(RseAttr.OIDC_SUPPORT) is True and prot.attributes['scheme'] == 'davs':
-                audience = determine_audience_for_rse(rse.id)
-                # FIXME: At the time of writing, StoRM requires `storage.read`
-                # in order to perform a stat operation.
-                scope = determine_scope_for_rse(rse.id, scopes=['storage.modify', 'storage.read'])
-                auth_token = request_token(audience, scope)
-                if auth_token:
-                    logger(logging.INFO, 'Using a token to delete on RSE %s', rse.name)
-                    prot = rsemgr.create_protocol(rse.info, 'delete', scheme=scheme, auth_token=auth_token, logger=logger)
-                else:
-                    logger(logging.WARNING, 'Failed to procure a token to delete on RSE %s', rse.name)
+            if pipeline:
+                pipeline.submit(rse, rse_hostname, replicas, total_workers=total_workers, logger=logger)
+                continue
+            prot = _create_deletion_protocol(rse, scheme, logger=logger)
             for file_replicas in chunks(replicas, chunk_size):
                 # Refresh heartbeat
                 _, total_workers, logger = heartbeat_handler.live(payload=hb_payload)
                 del_start_time = time.time()
-                for replica in file_replicas:
-                    try:
-                        replica['pfn'] = str(list(rsemgr.lfns2pfns(rse_settings=rse.info,
-                                                                   lfns=[{'scope': replica['scope'].external, 'name': replica['name'], 'path': replica['path']}],
-                                                                   operation='delete', scheme=scheme).values())[0])
-                    except (ReplicaUnAvailable, ReplicaNotFound) as error:
-                        logger(logging.WARNING, 'Failed get pfn UNAVAILABLE replica %s:%s on %s with error %s', replica['scope'], replica['name'], rse.name, str(error))
-                        replica['pfn'] = None
-
-                    except Exception:
-                        logger(logging.CRITICAL, 'Exception', exc_info=True)
+                _set_deletion_pfns(file_replicas, rse, scheme, logger=logger)
 
                 is_staging = rse.columns['staging_area']
-                deleted_files = delete_from_storage(heartbeat_handler, hb_payload, file_replicas, prot, rse.info, is_staging, auto_exclude_threshold, logger=logger)
+                deleted_files, _ = delete_from_storage(heartbeat_handler, hb_payload, file_replicas, prot, rse.info, is_staging, auto_exclude_threshold, logger=logger)
                 logger(logging.INFO, '%i files processed in %s seconds', len(file_replicas), time.time() - del_start_time)
 
                 # Then finally delete the replicas
@@ -659,6 +1085,10 @@ def _run_once(
     if paused_rses:
         logger(logging.INFO, 'Deletion paused for a while for following RSEs: %s', ', '.join(paused_rses))
 
+    if full_hostnames:
+        # Don't list again before the deletion workers catch up
+        pipeline.wait_for_capacity(full_hostnames, timeout=PIPELINE_WAIT_TIMEOUT)  # type: ignore (pipeline is set)
+
     rses_with_more_work = [rse for rse, has_more_work in work_remaining_by_rse.items() if has_more_work]
     return rses_with_more_work
 
@@ -683,7 +1113,8 @@ def run(
         delay_seconds: int = 0,
         sleep_time: int = 60,
         auto_exclude_threshold: int = 100,
-        auto_exclude_timeout: int = 600
+        auto_exclude_timeout: int = 600,
+        pipelined: Optional[bool] = None
 ) -> None:
     """
     Starts up the reaper threads.
@@ -705,6 +1136,7 @@ def run(
     :param sleep_time:             Time between two cycles.
     :param auto_exclude_threshold: Number of service unavailable exceptions after which the RSE gets temporarily excluded.
     :param auto_exclude_timeout:   Timeout for temporarily excluded RSEs.
+    :param pipelined:              Delete with one pool of workers per storage hostname, while listing the next replicas.
     """
     setup_logging(process_name=DAEMON_NAME)
 
@@ -731,7 +1163,8 @@ def run(
                                                             'delay_seconds': delay_seconds,
                                                             'scheme': scheme,
                                                             'auto_exclude_threshold': auto_exclude_threshold,
-                                                            'auto_exclude_timeout': auto_exclude_timeout}) for _ in range(0, threads)]
+                                                            'auto_exclude_timeout': auto_exclude_timeout,
+                                                            'pipelined': pipelined}) for _ in range(0, threads)]
 
     for thread in threads_list:
         thread.start()
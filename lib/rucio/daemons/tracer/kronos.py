@@ -34,10 +34,10 @@ from rucio.common.logging import formatted_logger, setup_logging
 from rucio.common.stomp_utils import ListenerBase, StompConnectionManager
 from rucio.common.stopwatch import Stopwatch
 from rucio.common.types import InternalAccount, InternalScope, LoggerFunction
-from rucio.core.did import list_parent_dids, touch_dids
+from rucio.core.did import list_parent_dids_bulk, touch_dids
 from rucio.core.lock import touch_dataset_locks
 from rucio.core.monitor import MetricManager
-from rucio.core.replica import declare_bad_file_replicas, touch_collection_replicas, touch_replica
+from rucio.core.replica import declare_bad_file_replicas, touch_collection_replicas, touch_replicas
 from rucio.core.rse import get_rse_id
 from rucio.daemons.common import HeartbeatHandler, run_daemon
 from rucio.db.sqla.constants import BadFilesStatus, DIDType
@@ -127,12 +127,31 @@ class AMQConsumer(ListenerBase):
             self.__reports = []
             self.__ids = []
 
+    def __get_rse_id(self, rse: str, vo: str, rse_ids: dict[tuple[str, str], "str | None"]) -> "str | None":
+        """
+        Resolve the rse_id, caching the result (also negative) for the current chunk of reports.
+        """
+        if (rse, vo) not in rse_ids:
+            try:
+                rse_ids[rse, vo] = get_rse_id(rse=rse, vo=vo)
+            except RSENotFound:
+                rse_ids[rse, vo] = None
+        if rse_ids[rse, vo] is None:
+            self._logger(logging.WARNING, "Cannot lookup rse_id for %s. Will skip this report.", rse)
+            METRICS.counter('rse_not_found').inc()
+        return rse_ids[rse, vo]
+
     def __update_atime(self) -> None:
         """
         Bulk update atime.
+
+        The accesses are first coalesced by replica (or dataset replica), keeping the most recent
+        one. The parent datasets of all files are resolved with a single bulk query and the
+        replicas are updated in bulk. Only the replicas which couldn't be updated are resubmitted.
         """
-        replicas = []
-        rses = []
+        replicas = {}
+        parent_lookups = []
+        rse_ids = {}
         for report in self.__reports:
             if 'vo' not in report:
                 report['vo'] = 'def'
@@ -198,6 +217,8 @@ class AMQConsumer(ListenerBase):
 
                 if report['usrdn'] in self.__excluded_usrdns:
                     continue
+                accessed_at = datetime.utcfromtimestamp(report['traceTimeentryUnix'])
+                report_replicas = []
                 # handle touch and non-touch traces differently
                 if report['eventType'] != 'touch':
                     # check if the report has the right state.
@@ -215,16 +236,12 @@ class AMQConsumer(ListenerBase):
                         if 'name' in report:
                             report['filename'] = report['name']
 
-                    rses = report['remoteSite'].strip().split(',')
-                    for rse in rses:
-                        try:
-                            rse_id = get_rse_id(rse=rse, vo=report['vo'])
-                        except RSENotFound:
-                            self._logger(logging.WARNING, "Cannot lookup rse_id for %s. Will skip this report.", rse)
-                            METRICS.counter('rse_not_found').inc()
+                    for rse in report['remoteSite'].strip().split(','):
+                        rse_id = self.__get_rse_id(rse, report['vo'], rse_ids)
+                        if rse_id is None:
                             continue
-                        replicas.append({'name': report['filename'], 'scope': report['scope'], 'rse': rse, 'rse_id': rse_id, 'accessed_at': datetime.utcfromtimestamp(report['traceTimeentryUnix']),
-                                         'traceTimeentryUnix': report['traceTimeentryUnix'], 'eventVersion': report['eventVersion']})
+                        report_replicas.append({'name': report['filename'], 'scope': report['scope'], 'rse': rse, 'rse_id': rse_id, 'accessed_at': accessed_at,
+                                                'traceTimeentryUnix': report['traceTimeentryUnix'], 'eventVersion': report['eventVersion']})
                 else:
                     # if touch event and if datasetScope is in the report then it means
                     # that there is no file scope/name and therefore only the dataset is
@@ -233,25 +250,22 @@ class AMQConsumer(ListenerBase):
                     rse = None
                     if 'remoteSite' in report:
                         rse = report['remoteSite']
-                        try:
-                            rse_id = get_rse_id(rse=rse, vo=report['vo'])
-                        except RSENotFound:
-                            self._logger(logging.WARNING, "Cannot lookup rse_id for %s.", rse)
-                            METRICS.counter('rse_not_found').inc()
+                        rse_id = self.__get_rse_id(rse, report['vo'], rse_ids)
                     if 'datasetScope' in report:
                         self.__dataset_queue.put({'scope': InternalScope(report['datasetScope'], vo=report['vo']),
                                                   'name': report['dataset'],
                                                   'rse_id': rse_id,
-                                                  'accessed_at': datetime.utcfromtimestamp(report['traceTimeentryUnix'])})
+                                                  'accessed_at': accessed_at})
                         continue
                     else:
                         if 'remoteSite' not in report:
                             continue
-                        replicas.append({'name': report['filename'],
-                                         'scope': report['scope'],
-                                         'rse': rse,
-                                         'rse_id': rse_id,
-                                         'accessed_at': datetime.utcfromtimestamp(report['traceTimeentryUnix'])})
+                        report_replicas.append({'name': report['filename'],
+                                                'scope': report['scope'],
+                                                'rse': rse,
+                                                'rse_id': rse_id,
+                                                'accessed_at': accessed_at,
+                                                'traceTimeentryUnix': report['traceTimeentryUnix']})
 
             except (KeyError, AttributeError):
                 self._logger(logging.ERROR, "Cannot handle report.", exc_info=True)
@@ -261,43 +275,40 @@ class AMQConsumer(ListenerBase):
                 self._logger(logging.ERROR, "Exception", exc_info=True)
                 continue
 
-            for did in list_parent_dids(report['scope'], report['filename']):
-                if did['type'] != DIDType.DATASET:
+            # coalesce the accesses to the same replica, keeping the most recent one
+            for replica in report_replicas:
+                if replica['rse_id'] is None:
                     continue
-                # do not update _dis datasets
-                if did['scope'].external == 'panda' and '_dis' in did['name']:
-                    continue
-                for rse in rses:
-                    try:
-                        rse_id = get_rse_id(rse=rse, vo=report['vo'])
-                    except RSENotFound:
-                        self._logger(logging.WARNING, "Cannot lookup rse_id for %s. Will skip this report.", rse)
-                        METRICS.counter('rse_not_found').inc()
-                        continue
-                    self.__dataset_queue.put({'scope': did['scope'], 'name': did['name'], 'did_type': did['type'], 'rse_id': rse_id, 'accessed_at': datetime.utcfromtimestamp(report['traceTimeentryUnix'])})
+                key = (replica['scope'], replica['name'], replica['rse_id'])
+                if key not in replicas or replica['accessed_at'] > replicas[key]['accessed_at']:
+                    replicas[key] = replica
+            report_rse_ids = [replica['rse_id'] for replica in report_replicas if replica['rse_id'] is not None]
+            if report_rse_ids:
+                parent_lookups.append((report['scope'], report['filename'], report_rse_ids, accessed_at))
+
+        self.__queue_parent_datasets(parent_lookups)
 
         if not replicas:
             return
 
-        self._logger(logging.DEBUG, "trying to update replicas: %s", replicas)
+        self._logger(logging.DEBUG, "trying to update replicas: %s", list(replicas.values()))
 
         stopwatch = Stopwatch()
         try:
-            for replica in replicas:
-                # if touch replica hits a locked row put the trace back into queue for later retry
-                if not touch_replica(replica):
-                    resubmit = {'filename': replica['name'],
-                                'scope': replica['scope'].external,
-                                'remoteSite': replica['rse'],
-                                'traceTimeentryUnix': replica['traceTimeentryUnix'],
-                                'eventType': 'get',
-                                'usrdn': 'someuser',
-                                'clientState': 'DONE',
-                                'eventVersion': replica['eventVersion']}
-                    if replica['scope'].vo != 'def':
-                        resubmit['vo'] = replica['scope'].vo
-                    self._conn.send(body=jdumps(resubmit), destination=self.__queue, headers={'appversion': 'rucio', 'resubmitted': '1'})
-                    METRICS.counter('sent_resubmitted').inc()
+            # if touch replica hits a locked row put the trace back into queue for later retry
+            for replica in touch_replicas(list(replicas.values())):
+                resubmit = {'filename': replica['name'],
+                            'scope': replica['scope'].external,
+                            'remoteSite': replica['rse'],
+                            'traceTimeentryUnix': replica['traceTimeentryUnix'],
+                            'eventType': 'get',
+                            'usrdn': 'someuser',
+                            'clientState': 'DONE',
+                            'eventVersion': replica.get('eventVersion')}
+                if replica['scope'].vo != 'def':
+                    resubmit['vo'] = replica['scope'].vo
+                self._conn.send(body=jdumps(resubmit), destination=self.__queue, headers={'appversion': 'rucio', 'resubmitted': '1'})
+                METRICS.counter('sent_resubmitted').inc()
             METRICS.timer('update_atime').observe(stopwatch.elapsed)
         except Exception:
             self._logger(logging.ERROR, "Cannot update replicas.", exc_info=True)
@@ -305,6 +316,38 @@ class AMQConsumer(ListenerBase):
 
         METRICS.counter('updated_replicas').inc()
 
+    def __queue_parent_datasets(self, parent_lookups: "list[tuple[InternalScope, str, list[str], datetime]]") -> None:
+        """
+        Put the accesses to the parent datasets of the files in the dataset queue.
+        The parents of all files are resolved with a single bulk query.
+        """
+        files = {(scope, name) for scope, name, _, _ in parent_lookups}
+        if not files:
+            return
+
+        parents_by_file = {}
+        try:
+            for did in list_parent_dids_bulk(dids=[{'scope': scope, 'name': name} for scope, name in files]):
+                if did['type'] != DIDType.DATASET:
+                    continue
+                # do not update _dis datasets
+                if did['scope'].external == 'panda' and '_dis' in did['name']:
+                    continue
+                parents_by_file.setdefault((did['child_scope'], did['child_name']), []).append(did)
+        except Exception:
+            self._logger(logging.ERROR, "Cannot resolve the parent datasets.", exc_info=True)
+            return
+
+        dataset_accesses = {}
+        for scope, name, rse_ids, accessed_at in parent_lookups:
+            for did in parents_by_file.get((scope, name), []):
+                for rse_id in rse_ids:
+                    key = (did['scope'], did['name'], rse_id)
+                    if key not in dataset_accesses or accessed_at > dataset_accesses[key]['accessed_at']:
+                        dataset_accesses[key] = {'scope': did['scope'], 'name': did['name'], 'did_type': did['type'], 'rse_id': rse_id, 'accessed_at': accessed_at}
+        for dataset_access in dataset_accesses.values():
+            self.__dataset_queue.put(dataset_access)
+
 
 def kronos_file(once: bool = False,
                 dataset_queue: "Queue | None" = None,
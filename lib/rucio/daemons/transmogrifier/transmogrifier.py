@@ -41,7 +41,7 @@ from rucio.common.logging import setup_logging
 from rucio.common.stopwatch import Stopwatch
 from rucio.common.types import InternalAccount, InternalScope, LoggerFunction
 from rucio.common.utils import chunks
-from rucio.core.did import get_metadata, list_new_dids, set_new_dids
+from rucio.core.did import get_metadata_bulk, list_new_dids, set_new_dids
 from rucio.core.monitor import MetricManager
 from rucio.core.rse import get_rse_id, list_rse_attributes, list_rses, rse_exists
 from rucio.core.rse_expression_parser import parse_expression
@@ -52,6 +52,7 @@ from rucio.daemons.common import run_daemon
 from rucio.db.sqla.constants import DIDType, SubscriptionState
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
     from types import FrameType
 
     from rucio.daemons.common import HeartbeatHandler
@@ -289,97 +290,154 @@ def get_subscriptions(logger: LoggerFunction = logging.log) -> list[dict]:
     return subscriptions
 
 
-def __is_matching_subscription(
-        subscription: dict[str, Any],
-        did: dict[str, Any],
-        metadata: dict[str, Any]
-) -> bool:
-    """
-    Internal method to identify if a DID matches a subscription.
+_MISSING = object()
+
 
-    :param subscription: The subscription dictionary.
-    :param did: The DID dictionary
-    :param metadata: The metadata dictionary for the DID
-    :return: True/False
+class SubscriptionMatcher:
     """
-    if metadata["hidden"]:
-        return False
-    try:
-        filter_string = loads(subscription["filter"])
-    except ValueError as error:
-        logging.error("%s : Subscription will be skipped" % error)
-        return False
-    # Loop over the keys of filter_string for subscription
-    for key in filter_string:
-        values = filter_string[key]
-        if key == "pattern":
-            if not re.match(values, did["name"]):
-                return False
-        elif key == "excluded_pattern":
-            if re.match(values, did["name"]):
-                return False
-        elif key == "split_rule":
-            pass
-        elif key == "scope":
-            match_scope = False
-            for scope in values:
-                if re.match(scope, did["scope"].internal):
-                    match_scope = True
-                    break
-            if not match_scope:
-                return False
-        elif key == "account":
-            match_account = False
-            if not isinstance(values, list):
-                values = [values]
-            for account in values:
-                if account == metadata["account"].internal:
-                    match_account = True
-                    break
-            if not match_account:
-                return False
-        elif key == "did_type":
-            match_did_type = False
-            if not isinstance(values, list):
-                values = [values]
-            for did_type in values:
-                if did_type == metadata["did_type"].name:
-                    match_did_type = True
-                    break
-            if not match_did_type:
-                return False
-        elif key in ["min_avg_file_size", "max_avg_file_size"]:
-            length = metadata["length"]
-            size = metadata["bytes"]
-            if length and size:
-                avg_file_size = size / length
-                if key == "min_avg_file_size" and avg_file_size < values:
-                    return False
-                if key == "max_avg_file_size" and avg_file_size > values:
-                    return False
-            else:
-                # If the DID is evaluated at the creation, length and bytes are not set yet
-                # In that case, just ignore min_avg_file_size and max_avg_file_size filter
+    Matches DIDs against the filters of a list of subscriptions.
+
+    The filters are parsed and their patterns compiled once. The filters which only
+    depend on one attribute of the DID (scope, account, did_type and metadata keys such
+    as datatype or project) are indexed: for each attribute value seen, the set of
+    subscriptions accepting it is computed once and stored as a bitset (bit ``i`` is
+    the subscription at position ``i``). Matching a DID is then a bitwise AND of one
+    bitset per indexed attribute, followed by the name and file size filters of the
+    remaining candidates only.
+    """
+
+    def __init__(self, subscriptions: list[dict[str, Any]], logger: LoggerFunction = logging.log):
+        """
+        :param subscriptions: The subscriptions, in priority order.
+        :param logger: The logger.
+        """
+        self.subscriptions = []
+        self.filters = []
+        self._name_filters = []
+        self._size_filters = []
+        # attribute -> list of (position, predicate)
+        self._attribute_filters: "dict[str, list[tuple[int, Callable[[Any], bool]]]]" = {}
+        # attribute -> value -> bitset of the subscriptions accepting the value
+        self._attribute_index: dict[str, dict[Any, int]] = {}
+
+        for subscription in subscriptions:
+            try:
+                filter_string = loads(subscription["filter"])
+                compiled = self.__compile_filter(filter_string)
+            except (ValueError, TypeError, re.error) as error:
+                logger(logging.ERROR, "%s : Subscription %s will be skipped", error, subscription["id"])
                 continue
-        else:
-            if not isinstance(values, list):
-                values = [
-                    values,
-                ]
-            has_metadata = False
-            for meta in metadata:
-                if str(meta) == str(key):
-                    has_metadata = True
-                    match_meta = False
-                    for value in values:
-                        if re.match(str(value), str(metadata[meta])):
-                            match_meta = True
-                            break
-                    if not match_meta:
-                        return False
-            if not has_metadata:
-                return False
-    return True
+            name_filter, size_filter, attribute_filters = compiled
+            pos = len(self.subscriptions)
+            self.subscriptions.append(subscription)
+            self.filters.append(filter_string)
+            self._name_filters.append(name_filter)
+            self._size_filters.append(size_filter)
+            for attribute, predicate in attribute_filters:
+                self._attribute_filters.setdefault(attribute, []).append((pos, predicate))
+        self._all_bits = (1 << len(self.subscriptions)) - 1
+
+    @staticmethod
+    def __compile_filter(filter_string: dict[str, Any]) -> "tuple[Any, Any, list[tuple[str, Callable[[Any], bool]]]]":
+        """
+        Compile the filter of one subscription.
+
+        :returns: The name filter (pattern, excluded pattern), the average file size
+                  filter (min, max) and the list of (attribute, predicate) filters.
+        """
+        pattern = excluded_pattern = min_avg_file_size = max_avg_file_size = None
+        attribute_filters = []
+        for key, values in filter_string.items():
+            if key == "pattern":
+                pattern = re.compile(values)
+            elif key == "excluded_pattern":
+                excluded_pattern = re.compile(values)
+            elif key == "split_rule":
+                pass
+            elif key == "min_avg_file_size":
+                min_avg_file_size = values
+            elif key == "max_avg_file_size":
+                max_avg_file_size = values
+            elif key == "scope":
+                scope_patterns = [re.compile(scope) for scope in values]
+                attribute_filters.append((
+                    "scope",
+                    lambda value, patterns=scope_patterns: any(pattern.match(value) for pattern in patterns),
+                ))
+            elif key in ("account", "did_type"):
+                accepted = set(values if isinstance(values, list) else [values])
+                attribute_filters.append((key, lambda value, accepted=accepted: value in accepted))
+            else:
+                value_patterns = [re.compile(str(value)) for value in (values if isinstance(values, list) else [values])]
+                attribute_filters.append((
+                    "meta." + str(key),
+                    lambda value, patterns=value_patterns: value is not _MISSING and any(pattern.match(str(value)) for pattern in patterns),
+                ))
+        return (pattern, excluded_pattern), (min_avg_file_size, max_avg_file_size), attribute_filters
+
+    def __evaluate(self, attribute: str, value: Any) -> int:
+        bits = self._all_bits
+        for pos, predicate in self._attribute_filters[attribute]:
+            if not predicate(value):
+                bits &= ~(1 << pos)
+        return bits
+
+    def __attribute_bits(self, attribute: str, value: Any) -> int:
+        values = self._attribute_index.setdefault(attribute, {})
+        key = (value.__class__, value)
+        try:
+            bits = values.get(key)
+        except TypeError:
+            # Unhashable metadata value, evaluate without the index
+            return self.__evaluate(attribute, value)
+        if bits is None:
+            bits = values[key] = self.__evaluate(attribute, value)
+        return bits
+
+    def match(self, did: dict[str, Any], metadata: dict[str, Any]) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+        """
+        Identify the subscriptions matching a DID.
+
+        :param did: The DID dictionary.
+        :param metadata: The metadata dictionary of the DID.
+        :returns: The matching (subscription, filter) tuples, in priority order.
+        """
+        if metadata["hidden"]:
+            return []
+        bits = self._all_bits
+        for attribute in self._attribute_filters:
+            if not bits:
+                return []
+            if attribute == "scope":
+                value = did["scope"].internal
+            elif attribute == "account":
+                value = metadata["account"].internal
+            elif attribute == "did_type":
+                value = metadata["did_type"].name
+            else:
+                value = metadata.get(attribute[len("meta."):], _MISSING)
+            bits &= self.__attribute_bits(attribute, value)
+
+        length, size = metadata.get("length"), metadata.get("bytes")
+        avg_file_size = size / length if length and size else None
+        matching = []
+        pos = 0
+        while bits:
+            if bits & 1:
+                pattern, excluded_pattern = self._name_filters[pos]
+                min_avg_file_size, max_avg_file_size = self._size_filters[pos]
+                if (
+                    (pattern is None or pattern.match(did["name"]))
+                    and (excluded_pattern is None or not excluded_pattern.match(did["name"]))
+                    # If the DID is evaluated at the creation, length and bytes are not set yet
+                    # In that case, just ignore min_avg_file_size and max_avg_file_size filter
+                    and (avg_file_size is None or min_avg_file_size is None or avg_file_size >= min_avg_file_size)
+                    and (avg_file_size is None or max_avg_file_size is None or avg_file_size <= max_avg_file_size)
+                ):
+                    matching.append((self.subscriptions[pos], self.filters[pos]))
+            bits >>= 1
+            pos += 1
+        return matching
 
 
 def select_algorithm(
@@ -483,6 +541,45 @@ def transmogrifier(bulk: int = 5, once: bool = False, sleep_time: int = 60) -> N
     )
 
 
+def __list_new_dids_with_metadata(
+        thread: int,
+        total_threads: int,
+        bulk: int,
+        logger: LoggerFunction = logging.log
+) -> "Iterator[tuple[dict[str, Any], Optional[dict[str, Any]]]]":
+    """
+    Internal method listing the new DIDs by chunks of bulk DIDs, with the metadata of
+    the datasets and containers fetched in one bulk query per chunk.
+
+    :param thread: The thread number.
+    :param total_threads: The total number of threads.
+    :param bulk: The number of DIDs per chunk.
+    :param logger: The logger.
+    :return: Tuples (did, metadata). The metadata is None for files.
+    """
+    new_dids = list_new_dids(
+        thread=thread,
+        total_threads=total_threads,
+        chunk_size=bulk,
+        did_type=None,
+    )
+    for did_chunk in chunks(new_dids, bulk):
+        collections = [did for did in did_chunk if did["did_type"] in (DIDType.DATASET, DIDType.CONTAINER)]
+        metadata_per_did = {}
+        if collections:
+            for metadata in get_metadata_bulk([{"scope": did["scope"], "name": did["name"]} for did in collections]):
+                metadata_per_did[metadata["scope"], metadata["name"]] = metadata
+        for did in did_chunk:
+            if did["did_type"] not in (DIDType.DATASET, DIDType.CONTAINER):
+                yield did, None
+                continue
+            metadata = metadata_per_did.get((did["scope"], did["name"]))
+            if metadata is None:
+                logger(logging.WARNING, "%s:%s not found, it will be skipped", did["scope"], did["name"])
+                continue
+            yield did, metadata
+
+
 def run_once(heartbeat_handler: "HeartbeatHandler", bulk: int, **_kwargs) -> bool:
 
     worker_number, total_workers, logger = heartbeat_handler.live()
@@ -491,21 +588,20 @@ def run_once(heartbeat_handler: "HeartbeatHandler", bulk: int, **_kwargs) -> boo
     identifiers = []
     #  List all the active subscriptions
     subscriptions = get_subscriptions(logger=logger)
+    matcher = SubscriptionMatcher(subscriptions, logger=logger)
 
     #  Loop over all the new dids
     #  Get the new DIDs based on the is_new flag
     logger(logging.DEBUG, "Listing new dids")
-    for did in list_new_dids(
+    for did, metadata in __list_new_dids_with_metadata(
         thread=worker_number,
         total_threads=total_workers,
-        chunk_size=bulk,
-        did_type=None,
+        bulk=bulk,
+        logger=logger,
     ):
         _, _, logger = heartbeat_handler.live()
         did_success = True
-        if not (
-            did["did_type"] == DIDType.DATASET or did["did_type"] == DIDType.CONTAINER
-        ):
+        if metadata is None:
             identifiers.append(
                 {
                     "scope": did["scope"],
@@ -514,168 +610,164 @@ def run_once(heartbeat_handler: "HeartbeatHandler", bulk: int, **_kwargs) -> boo
                 }
             )
             continue
-        metadata = get_metadata(did["scope"], did["name"])
 
-        #  Loop over all the subscriptions
-        for subscription in subscriptions:
-            #  Check if the DID match the subscription
-            if __is_matching_subscription(subscription, did, metadata) is True:
-                filter_string = loads(subscription["filter"])
-                split_rule = filter_string.get("split_rule", False)
-                stime = time.time()
-                logger(
-                    logging.INFO,
-                    "%s:%s matches subscription %s"
-                    % (did["scope"], did["name"], subscription["name"]),
+        #  Loop over the subscriptions matching the DID
+        for subscription, filter_string in matcher.match(did, metadata):
+            split_rule = filter_string.get("split_rule", False)
+            stime = time.time()
+            logger(
+                logging.INFO,
+                "%s:%s matches subscription %s"
+                % (did["scope"], did["name"], subscription["name"]),
+            )
+            rules = loads(subscription["replication_rules"])
+            created_rules = {}
+            for cnt, rule_dict in enumerate(rules):
+                created_rules[cnt + 1] = []
+                #  Get all the rule and subscription parameters
+                rule_dict = __get_rule_dict(rule_dict, subscription)
+                weight = rule_dict.get("weight", None)
+                source_replica_expression = rule_dict.get(
+                    "source_replica_expression", None
                 )
-                rules = loads(subscription["replication_rules"])
-                created_rules = {}
-                for cnt, rule_dict in enumerate(rules):
-                    created_rules[cnt + 1] = []
-                    #  Get all the rule and subscription parameters
-                    rule_dict = __get_rule_dict(rule_dict, subscription)
-                    weight = rule_dict.get("weight", None)
-                    source_replica_expression = rule_dict.get(
-                        "source_replica_expression", None
+                copies = rule_dict["copies"]
+                success = False
+
+                chained_idx = rule_dict.get("chained_idx", None)
+                #  By default selected_rses contains only the rse_expression
+                #  It is overwritten in 2 cases : Chained subscription and split_rule
+                selected_rses = [rule_dict.get("rse_expression")]
+                if chained_idx:
+                    #  In the case of chained subscription, don't use rseselector but use the rses returned by the algorithm
+                    params = {}
+                    params['rse_expression'] = rule_dict.get("rse_expression")
+                    params['subscription_id'] = subscription["id"]
+                    params['subscription_name'] = subscription["name"]
+                    params['blocklisted_rse_id'] = blocklisted_rse_id
+                    if rule_dict.get("associated_site_idx", None):
+                        params["associated_site_idx"] = rule_dict.get(
+                            "associated_site_idx", None
+                        )
+                    logger(
+                        logging.DEBUG,
+                        "Chained subscription identified. Will use %s",
+                        str(created_rules[chained_idx]),
                     )
-                    copies = rule_dict["copies"]
-                    success = False
-
-                    chained_idx = rule_dict.get("chained_idx", None)
-                    #  By default selected_rses contains only the rse_expression
-                    #  It is overwritten in 2 cases : Chained subscription and split_rule
-                    selected_rses = [rule_dict.get("rse_expression")]
-                    if chained_idx:
-                        #  In the case of chained subscription, don't use rseselector but use the rses returned by the algorithm
-                        params = {}
-                        params['rse_expression'] = rule_dict.get("rse_expression")
-                        params['subscription_id'] = subscription["id"]
-                        params['subscription_name'] = subscription["name"]
-                        params['blocklisted_rse_id'] = blocklisted_rse_id
-                        if rule_dict.get("associated_site_idx", None):
-                            params["associated_site_idx"] = rule_dict.get(
-                                "associated_site_idx", None
+                    algorithm = rule_dict.get("algorithm", None)
+                    selected_rses = select_algorithm(
+                        algorithm,
+                        created_rules[chained_idx],
+                        params,
+                        logger
+                    )
+                    copies = 1
+                elif split_rule:
+                    (
+                        selected_rses,
+                        create_rule,
+                        wont_reevaluate,
+                    ) = __split_rule_select_rses(
+                        subscription_id=subscription["id"],
+                        subscription_name=subscription["name"],
+                        scope=did["scope"],
+                        name=did["name"],
+                        account=rule_dict.get("account"),
+                        weight=weight,
+                        rse_expression=rule_dict.get("rse_expression"),
+                        copies=copies,
+                        blocklisted_rse_id=blocklisted_rse_id,
+                        logger=logger,
+                    )
+                    copies = 1
+                    if not create_rule:
+                        continue
+                    # The DID won't be reevaluated at the next cycle
+                    did_success = did_success and wont_reevaluate
+
+                nb_rule = 0
+                #  Try to create the rule
+                logger(logging.DEBUG, 'selected_rses : %s' % selected_rses)
+                try:
+                    for rse in selected_rses:
+                        if isinstance(selected_rses, dict):
+                            #  selected_rses is a dictionary only when split_rule is True or for chained subscriptions
+                            source_replica_expression = selected_rses[rse].get(
+                                "source_replica_expression",
+                                None,
                             )
+                            weight = selected_rses[rse].get("weight", None)
                         logger(
-                            logging.DEBUG,
-                            "Chained subscription identified. Will use %s",
-                            str(created_rules[chained_idx]),
-                        )
-                        algorithm = rule_dict.get("algorithm", None)
-                        selected_rses = select_algorithm(
-                            algorithm,
-                            created_rules[chained_idx],
-                            params,
-                            logger
+                            logging.INFO,
+                            "Will insert one rule for %s:%s on %s"
+                            % (did["scope"], did["name"], rse),
                         )
-                        copies = 1
-                    elif split_rule:
-                        (
-                            selected_rses,
-                            create_rule,
-                            wont_reevaluate,
-                        ) = __split_rule_select_rses(
-                            subscription_id=subscription["id"],
-                            subscription_name=subscription["name"],
-                            scope=did["scope"],
-                            name=did["name"],
+                        rule_ids = add_rule(
+                            dids=[
+                                {
+                                    "scope": did["scope"],
+                                    "name": did["name"],
+                                }
+                            ],
                             account=rule_dict.get("account"),
-                            weight=weight,
-                            rse_expression=rule_dict.get("rse_expression"),
                             copies=copies,
-                            blocklisted_rse_id=blocklisted_rse_id,
-                            logger=logger,
-                        )
-                        copies = 1
-                        if not create_rule:
-                            continue
-                        # The DID won't be reevaluated at the next cycle
-                        did_success = did_success and wont_reevaluate
-
-                    nb_rule = 0
-                    #  Try to create the rule
-                    logger(logging.DEBUG, 'selected_rses : %s' % selected_rses)
-                    try:
-                        for rse in selected_rses:
-                            if isinstance(selected_rses, dict):
-                                #  selected_rses is a dictionary only when split_rule is True or for chained subscriptions
-                                source_replica_expression = selected_rses[rse].get(
-                                    "source_replica_expression",
-                                    None,
-                                )
-                                weight = selected_rses[rse].get("weight", None)
-                            logger(
-                                logging.INFO,
-                                "Will insert one rule for %s:%s on %s"
-                                % (did["scope"], did["name"], rse),
-                            )
-                            rule_ids = add_rule(
-                                dids=[
-                                    {
-                                        "scope": did["scope"],
-                                        "name": did["name"],
-                                    }
-                                ],
-                                account=rule_dict.get("account"),
-                                copies=copies,
-                                rse_expression=rse,
-                                grouping=rule_dict.get("grouping", "DATASET"),
-                                weight=weight,
-                                lifetime=rule_dict.get("lifetime", None),
-                                locked=rule_dict.get("locked", None),
-                                subscription_id=subscription["id"],
-                                source_replica_expression=source_replica_expression,
-                                activity=rule_dict.get("activity"),
-                                purge_replicas=rule_dict.get("purge_replicas", False),
-                                ignore_availability=rule_dict.get(
-                                    "ignore_availability", None
-                                ),
-                                comment=rule_dict.get("comment"),
-                                delay_injection=rule_dict.get("delay_injection"),
-                            )
-                            created_rules[cnt + 1].append(rule_ids[0])
-                            nb_rule += 1
-                            if nb_rule == copies:
-                                success = True
-                            if split_rule:
-                                success = True
-
-                        METRICS.counter("addnewrule.done").inc(nb_rule)
-                        METRICS.counter("addnewrule.activity.{activity}").labels(activity="".join(rule_dict.get("activity").split())).inc(nb_rule)
-                        success = True
-                    except (
-                        InvalidReplicationRule,
-                        InvalidRuleWeight,
-                        InvalidRSEExpression,
-                        StagingAreaRuleRequiresLifetime,
-                        DuplicateRule,
-                    ) as error:
-                        # Errors that won't be retried
-                        success = True
-                        logger(logging.ERROR, str(error))
-                        METRICS.counter("addnewrule.errortype.{exception}").labels(exception=str(error.__class__.__name__)).inc()
-                    except Exception:
-                        # Errors that will be retried
-                        METRICS.counter("addnewrule.errortype.{exception}").labels(exception="unknown").inc()
-                        logger(logging.ERROR, "Unexpected error", exc_info=True)
-
-                    did_success = did_success and success
-                    if not success:
-                        logger(
-                            logging.ERROR,
-                            "Rule for %s:%s on %s cannot be inserted"
-                            % (
-                                did["scope"],
-                                did["name"],
-                                rule_dict.get("rse_expression"),
+                            rse_expression=rse,
+                            grouping=rule_dict.get("grouping", "DATASET"),
+                            weight=weight,
+                            lifetime=rule_dict.get("lifetime", None),
+                            locked=rule_dict.get("locked", None),
+                            subscription_id=subscription["id"],
+                            source_replica_expression=source_replica_expression,
+                            activity=rule_dict.get("activity"),
+                            purge_replicas=rule_dict.get("purge_replicas", False),
+                            ignore_availability=rule_dict.get(
+                                "ignore_availability", None
                             ),
+                            comment=rule_dict.get("comment"),
+                            delay_injection=rule_dict.get("delay_injection"),
                         )
-                    else:
-                        logger(
-                            logging.INFO,
-                            "%s rule(s) inserted in %f seconds"
-                            % (str(nb_rule), time.time() - stime),
-                        )
+                        created_rules[cnt + 1].append(rule_ids[0])
+                        nb_rule += 1
+                        if nb_rule == copies:
+                            success = True
+                        if split_rule:
+                            success = True
+
+                    METRICS.counter("addnewrule.done").inc(nb_rule)
+                    METRICS.counter("addnewrule.activity.{activity}").labels(activity="".join(rule_dict.get("activity").split())).inc(nb_rule)
+                    success = True
+                except (
+                    InvalidReplicationRule,
+                    InvalidRuleWeight,
+                    InvalidRSEExpression,
+                    StagingAreaRuleRequiresLifetime,
+                    DuplicateRule,
+                ) as error:
+                    # Errors that won't be retried
+                    success = True
+                    logger(logging.ERROR, str(error))
+                    METRICS.counter("addnewrule.errortype.{exception}").labels(exception=str(error.__class__.__name__)).inc()
+                except Exception:
+                    # Errors that will be retried
+                    METRICS.counter("addnewrule.errortype.{exception}").labels(exception="unknown").inc()
+                    logger(logging.ERROR, "Unexpected error", exc_info=True)
+
+                did_success = did_success and success
+                if not success:
+                    logger(
+                        logging.ERROR,
+                        "Rule for %s:%s on %s cannot be inserted"
+                        % (
+                            did["scope"],
+                            did["name"],
+                            rule_dict.get("rse_expression"),
+                        ),
+                    )
+                else:
+                    logger(
+                        logging.INFO,
+                        "%s rule(s) inserted in %f seconds"
+                        % (str(nb_rule), time.time() - stime),
+                    )
 
         if did_success:
             if did["did_type"] == str(DIDType.FILE):
@@ -19,7 +19,7 @@ from rucio.common.types import InternalAccount, TokenDict
 from rucio.common.utils import gateway_update_return_dict
 from rucio.core import authentication, identity, oidc
 from rucio.db.sqla.constants import IdentityType
-from rucio.db.sqla.session import transactional_session
+from rucio.db.sqla.session import read_session, transactional_session
 from rucio.gateway import permission
 
 if TYPE_CHECKING:
@@ -379,3 +379,15 @@ def validate_auth_token(
     auth = gateway_update_return_dict(auth, session=session)
     auth['vo'] = vo
     return auth
+
+
+@read_session
+def prewarm_token_cache(*, session: "Session") -> int:
+    """
+    Load the valid tokens into the token validation cache.
+
+    :param session: The database session in use.
+
+    :returns: The number of loaded tokens.
+    """
+    return authentication.prewarm_token_cache(session=session)
@@ -393,6 +393,34 @@ def list_content(
         yield gateway_update_return_dict(d, session=session)
 
 
+@read_session
+def list_content_page(
+    scope: str,
+    name: str,
+    limit: int,
+    marker: Optional[tuple[str, str]] = None,
+    vo: str = 'def',
+    *,
+    session: "Session"
+) -> list[dict[str, Any]]:
+    """
+    List one page of the data identifier contents, ordered by scope and name.
+
+    :param scope: The scope name.
+    :param name: The data identifier name.
+    :param limit: The maximum number of children in the page.
+    :param marker: The (scope, name) of the last child of the previous page, None for the first page.
+    :param vo: The VO to act on.
+    :param session: The database session in use.
+    """
+
+    internal_scope = InternalScope(scope, vo=vo)
+    internal_marker = (InternalScope(marker[0], vo=vo), marker[1]) if marker else None
+
+    dids = did.list_content_page(scope=internal_scope, name=name, limit=limit, marker=internal_marker, session=session)
+    return [gateway_update_return_dict(d, session=session) for d in dids]
+
+
 @stream_session
 def list_content_history(
     scope: str,
@@ -469,6 +497,36 @@ def list_files(
         yield gateway_update_return_dict(d, session=session)
 
 
+@read_session
+def list_files_page(
+    scope: str,
+    name: str,
+    limit: int,
+    marker: Optional[tuple[str, str]] = None,
+    long: bool = False,
+    vo: str = 'def',
+    *,
+    session: "Session"
+) -> list[dict[str, Any]]:
+    """
+    List one page of the data identifier file contents, ordered by scope and name.
+
+    :param scope: The scope name.
+    :param name: The data identifier name.
+    :param limit: The maximum number of files in the page.
+    :param marker: The (scope, name) of the last file of the previous page, None for the first page.
+    :param long: A boolean to choose if GUID is returned or not.
+    :param vo: The VO to act on.
+    :param session: The database session in use.
+    """
+
+    internal_scope = InternalScope(scope, vo=vo)
+    internal_marker = (InternalScope(marker[0], vo=vo), marker[1]) if marker else None
+
+    dids = did.list_files_page(scope=internal_scope, name=name, limit=limit, marker=internal_marker, long=long, session=session)
+    return [gateway_update_return_dict(d, session=session) for d in dids]
+
+
 @stream_session
 def scope_list(
     scope: str,
@@ -310,6 +310,35 @@ class Default(protocol.RSEProtocol):
         except Exception as error:
             raise exception.ServiceUnavailable(error)
 
+    def delete_many(self, paths, max_workers=protocol.DEFAULT_BULK_WORKERS):
+        """
+        Deletes several files from the connected RSE with a single gfal2 bulk unlink.
+
+        :param paths: paths to the to be deleted files
+        :param max_workers: ignored, the bulk unlink is done by gfal2
+
+        :returns: a dict with the path as key and True, or the exception raised for this path, as value.
+        """
+        paths = list(dict.fromkeys(paths))
+        self.logger(logging.DEBUG, 'deleting {} files'.format(len(paths)))
+        if not paths:
+            return {}
+
+        try:
+            errors = self.__gfal2_rm_bulk(paths)
+        except Exception as error:
+            return {path: exception.ServiceUnavailable(error) for path in paths}
+
+        ret = {}
+        for path, error in zip(paths, errors):
+            if error is None:
+                ret[path] = True
+            elif error.code == errno.ENOENT or 'No such file' in str(error):
+                ret[path] = exception.SourceNotFound(str(error))
+            else:
+                ret[path] = exception.ServiceUnavailable(error)
+        return ret
+
     def rename(self, path, new_path):
         """
         Allows to rename a file stored inside the connected RSE.
@@ -501,6 +530,21 @@ class Default(protocol.RSEProtocol):
                 raise exception.SourceNotFound(error)
             raise exception.RucioException(error)
 
+    def __gfal2_rm_bulk(self, paths):
+        """
+        Uses the gfal2 bulk unlink to remove the files.
+
+        :param paths: Physical file names
+
+        :returns: a list with, for each path, None if removed successfully or the gfal2 error.
+        """
+        # GFAL does a PROPFIND request before DELETE when the scheme is
+        # davs://, which is wasteful.
+        errors = self.__ctx.unlink([re.sub('^davs://', 'https://', str(path)) for path in paths])
+        if len(errors) != len(paths):
+            raise exception.RucioException('gfal2 returned %d results for %d files' % (len(errors), len(paths)))
+        return errors
+
     def __gfal2_exist(self, path):
         """
         Uses gfal2 to check whether the file exists.
@@ -135,6 +135,18 @@ class Default(protocol.RSEProtocol):
             if e.errno == 2:
                 raise exception.SourceNotFound(e)
 
+    def delete_many(self, pfns, max_workers=protocol.DEFAULT_BULK_WORKERS):
+        """ Deletes several files from the connected RSE.
+
+            Local unlinks don't wait on the network, so they are done sequentially without threads.
+
+            :param pfns: pfns to the to be deleted files
+            :param max_workers: ignored
+
+            :returns: a dict with the pfn as key and True, or the exception raised for this pfn, as value.
+        """
+        return self._run_many(self._delete_one, pfns, max_workers=1)
+
     def rename(self, pfn, new_pfn):
         """ Allows to rename a file stored inside the connected RSE.
 
@@ -18,6 +18,7 @@ along with some of the default methods for LFN2PFN translations.
 """
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 from rucio.common import exception
@@ -32,6 +33,11 @@ if getattr(rsemanager, 'SERVER_MODE', None):
     from rucio.core import replica
     from rucio.core.rse import get_rse_vo
 
+# The default implementations of the bulk operations share the connection of the protocol
+# between their threads. Only protocols whose connection is thread-safe should use more
+# than one worker.
+DEFAULT_BULK_WORKERS = 1
+
 
 class RSEProtocol(ABC):
     """ This class is virtual and acts as a base to inherit new protocols from. It further provides some common functionality which applies for the majority of the protocols."""
@@ -310,3 +316,51 @@ class RSEProtocol(ABC):
             :returns: a dict with two keys, filesize and adler32 of the file provided in path.
         """
         raise NotImplementedError
+
+    def delete_many(self, paths, max_workers=DEFAULT_BULK_WORKERS):
+        """
+            Deletes several files from the connected RSE.
+
+            The default implementation calls `delete` for each path, sequentially unless `max_workers`
+            threads are allowed to share the connection. Protocols supporting bulk deletions should override it.
+
+            :param paths: paths to the to be deleted files
+            :param max_workers: maximum number of deletions running in parallel
+
+            :returns: a dict with the path as key and True, or the exception raised for this path, as value.
+        """
+        return self._run_many(self._delete_one, paths, max_workers)
+
+    def stat_many(self, paths, max_workers=DEFAULT_BULK_WORKERS):
+        """
+            Returns the stats of several files.
+
+            The default implementation calls `stat` for each path, sequentially unless `max_workers`
+            threads are allowed to share the connection. Protocols supporting bulk stats should override it.
+
+            :param paths: paths to the files
+            :param max_workers: maximum number of stat calls running in parallel
+
+            :returns: a dict with the path as key and the result of `stat`, or the exception raised for this path, as value.
+        """
+        return self._run_many(self.stat, paths, max_workers)
+
+    def _delete_one(self, path):
+        self.delete(path)
+        return True
+
+    def _run_many(self, function, paths, max_workers):
+        """
+            Calls function on each path, and returns its result or the raised exception per path.
+        """
+        def _run(path):
+            try:
+                return function(path)
+            except Exception as error:
+                return error
+
+        paths = list(dict.fromkeys(paths))
+        if max_workers <= 1 or len(paths) <= 1:
+            return {path: _run(path) for path in paths}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            return dict(zip(paths, executor.map(_run, paths)))
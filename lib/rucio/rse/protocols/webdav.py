@@ -26,6 +26,10 @@ from urllib3.poolmanager import PoolManager
 from rucio.common import exception
 from rucio.rse.protocols import protocol
 
+# The requests session can be shared between the threads of the bulk operations,
+# each of them using its own pooled connection
+BULK_WORKERS = 4
+
 
 class TLSHTTPAdapter(HTTPAdapter):
     '''
@@ -391,6 +395,17 @@ class Default(protocol.RSEProtocol):
         except requests.exceptions.ReadTimeout as error:
             raise exception.ServiceUnavailable(error)
 
+    def delete_many(self, paths, max_workers=BULK_WORKERS):
+        """
+            Deletes several files from the connected RSE, with up to `max_workers` DELETE requests in parallel.
+
+            :param paths: paths to the to be deleted files
+            :param max_workers: maximum number of DELETE requests running in parallel
+
+            :returns: a dict with the path as key and True, or the exception raised for this path, as value.
+        """
+        return super().delete_many(paths, max_workers=max_workers)
+
     def delete(self, pfn):
         """ Deletes a file from the connected RSE.
 
@@ -529,6 +544,59 @@ class Default(protocol.RSEProtocol):
 
         return dict_
 
+    def stat_many(self, paths, max_workers=BULK_WORKERS):
+        """
+            Returns the stats of several files, with one PROPFIND request per directory.
+
+            :param paths: paths to the files
+            :param max_workers: maximum number of PROPFIND requests running in parallel
+
+            :returns: a dict with the path as key and a dict with the filesize, or the exception raised for this path, as value.
+        """
+        directories = {}
+        for path in dict.fromkeys(paths):
+            path_parts = self.parse_pfns(path)[path]
+            local_path = os.path.join(path_parts['prefix'], path_parts['path'][1:], path_parts['name'])
+            directories.setdefault(path.rsplit('/', 1)[0] + '/', {})[local_path] = path
+
+        def _stat_directory(directory):
+            files = directories[directory]
+            headers = {'Depth': '1'}
+            try:
+                result = self.session.request('PROPFIND', directory, verify=False, headers=headers, timeout=self.timeout, cert=self.cert)
+                if result.status_code in [404, ]:
+                    raise exception.SourceNotFound()
+                elif result.status_code in [401, ]:
+                    raise exception.RSEAccessDenied()
+                if result.status_code in [400, ]:
+                    raise exception.InvalidRequest()
+                try:
+                    propfind = _PropfindResponse.parse(result.text)
+                except ValueError:
+                    raise exception.ServiceUnavailable("Couldn't parse WebDAV response.")
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as error:
+                return {path: exception.ServiceUnavailable(error) for path in files.values()}
+            except exception.RucioException as error:
+                return {path: error for path in files.values()}
+
+            ret = {path: exception.SourceNotFound() for path in files.values()}
+            for file in propfind.files:
+                path = files.get(file.href)
+                if path is None:
+                    continue
+                if file.size is None:
+                    ret[path] = exception.ServiceUnavailable("WebDAV response didn't include content length for requested path.")
+                else:
+                    ret[path] = {'filesize': file.size}
+            return ret
+
+        ret = {}
+        for directory, result in self._run_many(_stat_directory, directories, max_workers).items():
+            if isinstance(result, Exception):
+                result = {path: result for path in directories[directory].values()}
+            ret.update(result)
+        return ret
+
     def get_space_usage(self):
         """
         Get RSE space usage information.
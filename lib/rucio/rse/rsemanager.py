@@ -531,13 +531,11 @@ def delete(rse_settings: types.RSESettingsDict, lfns, domain='wan', auth_token=N
     protocol.connect()
 
     lfns = [lfns] if not type(lfns) is list else lfns
-    for lfn in lfns:
-        pfn = list(protocol.lfns2pfns(lfn).values())[0]
-        try:
-            protocol.delete(pfn)
-            ret['%s:%s' % (lfn['scope'], lfn['name'])] = True
-        except Exception as e:
-            ret['%s:%s' % (lfn['scope'], lfn['name'])] = e
+    pfns = {'%s:%s' % (lfn['scope'], lfn['name']): list(protocol.lfns2pfns(lfn).values())[0] for lfn in lfns}
+    results = protocol.delete_many(pfns.values())
+    for did, pfn in pfns.items():
+        ret[did] = results[pfn]
+        if isinstance(ret[did], Exception):
             gs = False
 
     protocol.close()
@@ -16,6 +16,7 @@ import datetime
 import json
 import logging
 import pathlib
+import threading
 import traceback
 import uuid
 from configparser import NoOptionError, NoSectionError
@@ -25,7 +26,7 @@ from urllib.parse import urlparse
 
 import requests
 from dogpile.cache.api import NoValue
-from requests.adapters import ReadTimeout
+from requests.adapters import HTTPAdapter, ReadTimeout
 from requests.packages.urllib3 import disable_warnings  # pylint: disable=import-error
 
 from rucio.common.cache import MemcacheRegion
@@ -77,6 +78,8 @@ QUERY_DETAILS_COUNTER = METRICS.counter(name='{host}.query_details.{state}',
 
 REWRITE_HTTPS_TO_DAVS = config_get_bool('transfers', 'rewrite_https_to_davs', default=False)
 VO_CERTS_PATH = config_get('conveyor', 'vo_certs_path', False, None)
+# Maximum number of idle connections kept open to each FTS host
+FTS_POOL_MAXSIZE = config_get_int('conveyor', 'fts_pool_maxsize', False, 16)
 
 # https://fts3-docs.web.cern.ch/fts3-docs/docs/state_machine.html
 FINAL_FTS_JOB_STATES = (FTS_STATE.FAILED, FTS_STATE.CANCELED, FTS_STATE.FINISHED, FTS_STATE.FINISHEDDIRTY)
@@ -113,6 +116,27 @@ _SCITAGS_ACTIVITY_IDS = {}
 FTS_FILE_EXISTS_ERROR_MSG = 'Destination file exists and is on tape'  # used in FTS  >= 3.12.12
 FTS_FILE_EXISTS_ERROR_MSG_LEGACY = 'Destination file exists and overwrite is not enabled'  # Error message used in FTS < 3.12.12, checked in Rucio for backwards compatibility
 
+_FTS_SESSIONS: dict[tuple[str, Optional[tuple[str, str]]], requests.Session] = {}
+_FTS_SESSIONS_LOCK = threading.Lock()
+
+
+def _fts_session(external_host: str, cert: Optional[tuple[str, str]]) -> requests.Session:
+    """
+    Return the requests session shared by all the transfertools of this process talking to
+    the given FTS host with the given certificate, so that their connections are re-used
+    instead of doing a new TLS handshake for each query.
+    """
+    key = (external_host, cert)
+    with _FTS_SESSIONS_LOCK:
+        fts_session = _FTS_SESSIONS.get(key)
+        if fts_session is None:
+            fts_session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FTS_POOL_MAXSIZE)
+            fts_session.mount('https://', adapter)
+            fts_session.mount('http://', adapter)
+            _FTS_SESSIONS[key] = fts_session
+    return fts_session
+
 
 def _scitags_ids(logger: "LoggerFunction" = logging.log) -> "tuple[int | None, dict[str, int]]":
     """
@@ -1211,11 +1235,12 @@ class FTS3Transfertool(Transfertool):
 
         job = None
 
-        job = requests.get('%s/jobs/%s' % (self.external_host, transfer_id),
-                           verify=self.verify,
-                           cert=self.cert,
-                           headers=self.headers,
-                           timeout=timeout)  # TODO Set to 5 in conveyor
+        fts_session = _fts_session(self.external_host, self.cert)
+        job = fts_session.get('%s/jobs/%s' % (self.external_host, transfer_id),
+                              verify=self.verify,
+                              cert=self.cert,
+                              headers=self.headers,
+                              timeout=timeout)  # TODO Set to 5 in conveyor
         if job and job.status_code == 200:
             QUERY_COUNTER.labels(state='success', host=self.__extract_host(self.external_host)).inc()
             return [job.json()]
@@ -1276,7 +1301,7 @@ class FTS3Transfertool(Transfertool):
         """
 
         responses = {}
-        fts_session = requests.Session()
+        fts_session = _fts_session(self.external_host, self.cert)
         xfer_ids = ','.join(requests_by_eid)
         jobs = fts_session.get('%s/jobs/%s?files=file_state,dest_surl,finish_time,start_time,staging_start,staging_finished,reason,source_surl,file_metadata' % (self.external_host, xfer_ids),
                                verify=self.verify,
@@ -220,6 +220,45 @@ def parse_scope_name(scope_name: str, vo: Optional[str]) -> tuple[str, ...]:
     return scope_regex.group(1, 2)
 
 
+def page_parameters() -> tuple[Optional[int], Optional[tuple[str, str]]]:
+    """
+    Returns the page size and the marker of a listing paginated with the 'limit' and 'marker'
+    query parameters, the marker being the scope:name of the last item of the previous page.
+    The page size is bounded by the 'max_page_size' option of the 'api' section.
+
+    :raises ValueError: when the parameters cannot be parsed.
+    :returns: a (limit, (scope, name)) tuple, the limit is None if the listing is not paginated.
+    """
+    if 'limit' not in flask.request.args:
+        return None, None
+    limit = int(flask.request.args['limit'])
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    limit = min(limit, config.config_get_int('api', 'max_page_size', raise_exception=False, default=10000))
+    marker = flask.request.args.get('marker')
+    if marker is None:
+        return limit, None
+    if ':' not in marker:
+        raise ValueError('cannot parse marker, expected scope:name')
+    marker_scope, marker_name = marker.split(':', 1)
+    return limit, (marker_scope, marker_name)
+
+
+def page_response(page: list[dict[str, Any]], limit: int) -> flask.Response:
+    """
+    Returns the response of one page of a paginated listing. If the page is full, the
+    X-Rucio-Next-Marker header holds the marker of the next page.
+
+    :param page: the items of the page.
+    :param limit: the page size.
+    :returns: a response object with the 'application/x-json-stream' Content-Type.
+    """
+    response = flask.Response(''.join(render_json(**item) + '\n' for item in page), content_type='application/x-json-stream')
+    if len(page) == limit:
+        response.headers['X-Rucio-Next-Marker'] = '%s:%s' % (page[-1]['scope'], page[-1]['name'])
+    return response
+
+
 def try_stream(
         generator: 'SupportsIter',
         content_type: Optional[str] = None
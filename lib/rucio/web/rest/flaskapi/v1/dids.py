@@ -57,8 +57,10 @@ from rucio.gateway.did import (
     get_users_following_did,
     list_content,
     list_content_history,
+    list_content_page,
     list_dids,
     list_files,
+    list_files_page,
     list_new_dids,
     list_parent_dids,
     remove_did_from_followed,
@@ -71,7 +73,20 @@ from rucio.gateway.did import (
 )
 from rucio.gateway.rule import list_associated_replication_rules_for_file, list_replication_rules
 from rucio.web.rest.flaskapi.authenticated_bp import AuthenticatedBlueprint
-from rucio.web.rest.flaskapi.v1.common import ErrorHandlingMethodView, check_accept_header_wrapper_flask, generate_http_error_flask, json_list, json_parameters, json_parse, param_get, parse_scope_name, response_headers, try_stream
+from rucio.web.rest.flaskapi.v1.common import (
+    ErrorHandlingMethodView,
+    check_accept_header_wrapper_flask,
+    generate_http_error_flask,
+    json_list,
+    json_parameters,
+    json_parse,
+    page_parameters,
+    page_response,
+    param_get,
+    parse_scope_name,
+    response_headers,
+    try_stream,
+)
 
 
 class Scope(ErrorHandlingMethodView):
@@ -778,9 +793,26 @@ class Attachment(ErrorHandlingMethodView):
           schema:
             type: string
           style: simple
+        - name: limit
+          in: query
+          description: Returns one page of at most `limit` children, ordered by scope and name, instead of streaming all of them. The page size is bounded by the server.
+          schema:
+            type: integer
+          required: false
+        - name: marker
+          in: query
+          description: The `scope:name` of the last child of the previous page, taken from the `X-Rucio-Next-Marker` header of its response.
+          schema:
+            type: string
+          required: false
         responses:
           200:
             description: Did found
+            headers:
+              X-Rucio-Next-Marker:
+                description: The marker of the next page, only set if the page is full.
+                schema:
+                  type: string
             content:
               application/x-json-stream:
                 schema:
@@ -823,6 +855,10 @@ class Attachment(ErrorHandlingMethodView):
         """
         try:
             scope, name = parse_scope_name(scope_name, request.environ.get('vo'))
+            limit, marker = page_parameters()
+            if limit is not None:
+                page = list_content_page(scope=scope, name=name, limit=limit, marker=marker, vo=request.environ.get('vo'))
+                return page_response(page, limit)
 
             def generate(vo):
                 for did in list_content(scope=scope, name=name, vo=vo):
@@ -1074,9 +1110,26 @@ class Files(ErrorHandlingMethodView):
           schema:
             type: object
           required: false
+        - name: limit
+          in: query
+          description: Returns one page of at most `limit` files, ordered by scope and name, instead of streaming all of them. The page size is bounded by the server.
+          schema:
+            type: integer
+          required: false
+        - name: marker
+          in: query
+          description: The `scope:name` of the last file of the previous page, taken from the `X-Rucio-Next-Marker` header of its response.
+          schema:
+            type: string
+          required: false
         responses:
           200:
             description: OK
+            headers:
+              X-Rucio-Next-Marker:
+                description: The marker of the next page, only set if the page is full.
+                schema:
+                  type: string
             content:
               application/x-json-stream:
                 schema:
@@ -1141,6 +1194,10 @@ class Files(ErrorHandlingMethodView):
 
         try:
             scope, name = parse_scope_name(scope_name, request.environ.get('vo'))
+            limit, marker = page_parameters()
+            if limit is not None:
+                page = list_files_page(scope=scope, name=name, limit=limit, marker=marker, long=long, vo=request.environ.get('vo'))
+                return page_response(page, limit)
 
             def generate(vo):
                 for file in list_files(scope=scope, name=name, long=long, vo=vo):
@@ -18,9 +18,10 @@ import logging
 
 from flask import Flask
 
-from rucio.common.config import config_get
+from rucio.common.config import config_get, config_get_bool
 from rucio.common.exception import ConfigurationError
 from rucio.common.logging import setup_logging
+from rucio.gateway.authentication import prewarm_token_cache
 from rucio.web.rest.flaskapi.v1.common import CORSMiddleware
 
 DEFAULT_ENDPOINTS = [
@@ -86,6 +87,12 @@ application.wsgi_app = CORSMiddleware(application.wsgi_app)
 apply_endpoints(application, endpoints)
 setup_logging(application)
 
+if config_get_bool('cache', 'prewarm_auth_tokens', raise_exception=False, default=False):
+    try:
+        logging.info('Loaded %d tokens into the token cache', prewarm_token_cache())
+    except Exception:
+        logging.exception('Could not load the tokens into the token cache')
+
 
 if __name__ == '__main__':
     application.run()
@@ -142,7 +142,8 @@ class MetaLinkRedirector(ErrorHandlingMethodView):
                 # first, set the appropriate content type, and stream the header
                 yield '<?xml version="1.0" encoding="UTF-8"?>\n<metalink xmlns="urn:ietf:params:xml:ns:metalink">\n'
 
-                # iteratively stream the XML per file
+                # iteratively stream the XML per file, the distances are computed once per request
+                distance_cache = {}
                 for rfile in itertools.chain((first,), replicas_iter):
                     replicas = []
                     dictreplica = {}
@@ -165,7 +166,7 @@ class MetaLinkRedirector(ErrorHandlingMethodView):
                     yield f'  <glfn name="/atlas/rucio/{rfile["scope"]}:{rfile["name"]}">'
                     yield '</glfn>\n'
 
-                    replicas = sort_replicas(dictreplica, client_location, selection=sortby)
+                    replicas = sort_replicas(dictreplica, client_location, selection=sortby, distance_cache=distance_cache)
 
                     # stream URLs
                     idx = 1
@@ -0,0 +1,260 @@
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Serializers of list_replicas responses.
+
+The 'simple' serializers yield one small string per XML element (metalink) or per file (json
+stream). The 'chunked' serializers render each file into a reusable buffer and only yield
+when about ``chunk_size`` characters are accumulated, which drastically reduces the number of
+writes done by the WSGI server for large responses. The chunked metalink serializer also
+escapes the scope and name of the files; otherwise both produce the same output.
+"""
+
+import json
+from typing import TYPE_CHECKING, Any, Optional
+from xml.sax.saxutils import escape
+
+from rucio.common.config import config_get
+from rucio.common.exception import InvalidObject
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+METALINK_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<metalink xmlns="urn:ietf:params:xml:ns:metalink">\n'
+METALINK_FOOTER = '</metalink>\n'
+STREAM_CHUNK_SIZE = 64 * 1024
+
+SIMPLE_SERIALIZER = 'simple'
+CHUNKED_SERIALIZER = 'chunked'
+SERIALIZERS = (SIMPLE_SERIALIZER, CHUNKED_SERIALIZER)
+
+_JSON_ENCODER = json.JSONEncoder(check_circular=False)
+
+
+def _escape_text(value: str) -> str:
+    if '&' in value or '<' in value or '>' in value:
+        return escape(value)
+    return value
+
+
+def _escape_attribute(value: Any) -> str:
+    value = str(value)
+    if '&' in value or '<' in value or '>' in value or '"' in value:
+        return escape(value, {'"': '&quot;'})
+    return value
+
+
+def get_replica_serializer(name: Optional[str] = None) -> str:
+    """
+    Validate the serializer requested by the client, or return the configured default.
+
+    :param name: The requested serializer name, if any.
+    :returns: The serializer name.
+    :raises InvalidObject: If the serializer doesn't exist.
+    """
+    if not name:
+        name = config_get('api', 'replicas_serializer', raise_exception=False, default=CHUNKED_SERIALIZER)
+    if name not in SERIALIZERS:
+        raise InvalidObject('Unknown replica serializer %s. Supported serializers: %s' % (name, ', '.join(SERIALIZERS)))
+    return name
+
+
+class _ChunkBuffer:
+    """
+    Accumulates strings until about chunk_size characters are buffered.
+    """
+
+    def __init__(self, chunk_size: int = STREAM_CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, data: str) -> bool:
+        """
+        Buffer the data. Returns True if the buffer should be flushed.
+        """
+        self._parts.append(data)
+        self._size += len(data)
+        return self._size >= self.chunk_size
+
+    def flush(self) -> str:
+        chunk = ''.join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        return chunk
+
+
+class _MetalinkFileRenderer:
+    """
+    Renders the <file> element of a replica. The XML fragments which only depend on the RSE are
+    rendered and escaped once, then re-used for all the pfns of this RSE.
+    """
+
+    def __init__(self, policy_schema: str, detailed_url: bool = True) -> None:
+        self.detailed_url = detailed_url
+        self._glfn_prefix = '  <glfn name="/%s/rucio/' % _escape_attribute(policy_schema)
+        self._url_fragments: dict[tuple[Any, ...], tuple[str, str]] = {}
+
+    def _url_fragment(self, replica: dict[str, Any]) -> tuple[str, str]:
+        if self.detailed_url:
+            key = (replica['rse'], replica['domain'], replica['client_extract'])
+        else:
+            key = (replica['rse'], )
+        fragments = self._url_fragments.get(key)
+        if fragments is None:
+            prefix = '  <url location="%s"' % _escape_attribute(replica['rse'])
+            if self.detailed_url:
+                prefix += ' domain="%s"' % _escape_attribute(replica['domain'])
+                suffix = '" client_extract="%s">' % _escape_attribute(str(replica['client_extract']).lower())
+            else:
+                suffix = '">'
+            fragments = self._url_fragments[key] = (prefix + ' priority="', suffix)
+        return fragments
+
+    def render(self, rfile: dict[str, Any]) -> str:
+        scope, name = _escape_text(rfile['scope']), _escape_text(rfile['name'])
+        parts = [' <file name="', _escape_attribute(rfile['name']), '">\n']
+
+        parents = rfile.get('parents')
+        if parents:
+            parts.append('  <parents>\n')
+            for parent in parents:
+                parts.extend(('   <did>', _escape_text(parent), '</did>\n'))
+            parts.append('  </parents>\n')
+
+        parts.extend(('  <identity>', scope, ':', name, '</identity>\n'))
+        if rfile['adler32'] is not None:
+            parts.extend(('  <hash type="adler32">', rfile['adler32'], '</hash>\n'))
+        if rfile['md5'] is not None:
+            parts.extend(('  <hash type="md5">', rfile['md5'], '</hash>\n'))
+        parts.extend(('  <size>', str(rfile['bytes']), '</size>\n'))
+        parts.extend((self._glfn_prefix, _escape_attribute(rfile['scope']), ':', _escape_attribute(rfile['name']), '"></glfn>\n'))
+
+        for pfn, replica in rfile['pfns'].items():
+            prefix, suffix = self._url_fragment(replica)
+            parts.extend((prefix, str(replica['priority']), suffix, escape(pfn), '</url>\n'))
+        parts.append(' </file>\n')
+        return ''.join(parts)
+
+
+def _generate_one_metalink_file(rfile: dict[str, Any], policy_schema: str, detailed_url: bool = True) -> "Iterator[str]":
+    yield ' <file name="' + rfile['name'] + '">\n'
+
+    if 'parents' in rfile and rfile['parents']:
+        yield '  <parents>\n'
+        for parent in rfile['parents']:
+            yield '   <did>' + parent + '</did>\n'
+        yield '  </parents>\n'
+
+    yield '  <identity>' + rfile['scope'] + ':' + rfile['name'] + '</identity>\n'
+    if rfile['adler32'] is not None:
+        yield '  <hash type="adler32">' + rfile['adler32'] + '</hash>\n'
+    if rfile['md5'] is not None:
+        yield '  <hash type="md5">' + rfile['md5'] + '</hash>\n'
+
+    yield '  <size>' + str(rfile['bytes']) + '</size>\n'
+
+    yield f'  <glfn name="/{policy_schema}/rucio/{rfile["scope"]}:{rfile["name"]}"></glfn>\n'
+
+    for pfn, replica in rfile['pfns'].items():
+        if detailed_url:
+            yield (
+                '  '
+                f'<url location="{replica["rse"]}"'
+                f' domain="{replica["domain"]}"'
+                f' priority="{replica["priority"]}"'
+                f' client_extract="{str(replica["client_extract"]).lower()}"'
+                f'>{escape(pfn)}</url>\n'
+            )
+        else:
+            yield (
+                '  '
+                f'<url location="{replica["rse"]}"'
+                f' priority="{replica["priority"]}"'
+                f'>{escape(pfn)}</url>\n'
+            )
+    yield ' </file>\n'
+
+
+def generate_metalink_response(
+        rfiles: "Iterable[dict[str, Any]]",
+        policy_schema: str,
+        detailed_url: bool = True,
+        serializer: str = SIMPLE_SERIALIZER,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+) -> "Iterator[str]":
+    """
+    Serialize the replicas as a metalink document.
+
+    :param rfiles: The replicas, as returned by list_replicas, with sorted pfns.
+    :param policy_schema: The policy schema used in the glfn of each file.
+    :param detailed_url: Include the domain and client_extract attributes in the urls.
+    :param serializer: The serializer to use.
+    :param chunk_size: The approximate size of the yielded strings, for the chunked serializer.
+    """
+    if serializer == CHUNKED_SERIALIZER:
+        renderer = _MetalinkFileRenderer(policy_schema=policy_schema, detailed_url=detailed_url)
+        buffer = _ChunkBuffer(chunk_size)
+        buffer.write(METALINK_HEADER)
+        for rfile in rfiles:
+            if buffer.write(renderer.render(rfile)):
+                yield buffer.flush()
+        buffer.write(METALINK_FOOTER)
+        yield buffer.flush()
+        return
+
+    first = True
+    for rfile in rfiles:
+        if first:
+            # first, set the appropriate content type, and stream the header
+            yield METALINK_HEADER
+            first = False
+
+        yield from _generate_one_metalink_file(rfile, policy_schema=policy_schema, detailed_url=detailed_url)
+
+    if first:
+        # if still first output, i.e. there were no replicas
+        yield METALINK_HEADER + METALINK_FOOTER
+    else:
+        # don't forget to send the metalink footer
+        yield METALINK_FOOTER
+
+
+def generate_json_response(
+        rfiles: "Iterable[dict[str, Any]]",
+        serializer: str = SIMPLE_SERIALIZER,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+) -> "Iterator[str]":
+    """
+    Serialize the replicas as a json stream: one json document per line.
+
+    :param rfiles: The replicas, as returned by list_replicas.
+    :param serializer: The serializer to use.
+    :param chunk_size: The approximate size of the yielded strings, for the chunked serializer.
+    """
+    if serializer == CHUNKED_SERIALIZER:
+        encode = _JSON_ENCODER.encode
+        buffer = _ChunkBuffer(chunk_size)
+        for rfile in rfiles:
+            buffer.write(encode(rfile))
+            if buffer.write('\n'):
+                yield buffer.flush()
+        chunk = buffer.flush()
+        if chunk:
+            yield chunk
+        return
+
+    for rfile in rfiles:
+        yield json.dumps(rfile) + '\n'
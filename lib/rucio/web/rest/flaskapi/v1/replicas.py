@@ -17,7 +17,6 @@ from itertools import chain
 from json import dumps, loads
 from typing import TYPE_CHECKING
 from urllib.parse import parse_qs, unquote
-from xml.sax.saxutils import escape
 
 from flask import Flask, Response, request
 
@@ -63,6 +62,7 @@ from rucio.gateway.replica import (
 )
 from rucio.web.rest.flaskapi.authenticated_bp import AuthenticatedBlueprint
 from rucio.web.rest.flaskapi.v1.common import ErrorHandlingMethodView, check_accept_header_wrapper_flask, generate_http_error_flask, json_parameters, param_get, parse_scope_name, response_headers, try_stream
+from rucio.web.rest.flaskapi.v1.replica_serializers import generate_json_response, generate_metalink_response, get_replica_serializer
 
 if TYPE_CHECKING:
     from rucio.common.types import IPDict
@@ -85,68 +85,6 @@ def _sorted_with_priorities(replicas, sorted_pfns, limit=None):
             yield pfn, replica
 
 
-def _generate_one_metalink_file(rfile, policy_schema, detailed_url=True):
-    yield ' <file name="' + rfile['name'] + '">\n'
-
-    if 'parents' in rfile and rfile['parents']:
-        yield '  <parents>\n'
-        for parent in rfile['parents']:
-            yield '   <did>' + parent + '</did>\n'
-        yield '  </parents>\n'
-
-    yield '  <identity>' + rfile['scope'] + ':' + rfile['name'] + '</identity>\n'
-    if rfile['adler32'] is not None:
-        yield '  <hash type="adler32">' + rfile['adler32'] + '</hash>\n'
-    if rfile['md5'] is not None:
-        yield '  <hash type="md5">' + rfile['md5'] + '</hash>\n'
-
-    yield '  <size>' + str(rfile['bytes']) + '</size>\n'
-
-    yield f'  <glfn name="/{policy_schema}/rucio/{rfile["scope"]}:{rfile["name"]}"></glfn>\n'
-
-    for pfn, replica in rfile['pfns'].items():
-        if detailed_url:
-            yield (
-                '  '
-                f'<url location="{replica["rse"]}"'
-                f' domain="{replica["domain"]}"'
-                f' priority="{replica["priority"]}"'
-                f' client_extract="{str(replica["client_extract"]).lower()}"'
-                f'>{escape(pfn)}</url>\n'
-            )
-        else:
-            yield (
-                '  '
-                f'<url location="{replica["rse"]}"'
-                f' priority="{replica["priority"]}"'
-                f'>{escape(pfn)}</url>\n'
-            )
-    yield ' </file>\n'
-
-
-def _generate_metalink_response(rfiles, policy_schema, detailed_url=True):
-    first = True
-    for rfile in rfiles:
-        if first:
-            # first, set the appropriate content type, and stream the header
-            yield '<?xml version="1.0" encoding="UTF-8"?>\n<metalink xmlns="urn:ietf:params:xml:ns:metalink">\n'
-            first = False
-
-        yield from _generate_one_metalink_file(rfile, policy_schema=policy_schema, detailed_url=detailed_url)
-
-    if first:
-        # if still first output, i.e. there were no replicas
-        yield '<?xml version="1.0" encoding="UTF-8"?>\n<metalink xmlns="urn:ietf:params:xml:ns:metalink">\n</metalink>\n'
-    else:
-        # don't forget to send the metalink footer
-        yield '</metalink>\n'
-
-
-def _generate_json_response(rfiles):
-    for rfile in rfiles:
-        yield dumps(rfile) + '\n'
-
-
 class Replicas(ErrorHandlingMethodView):
 
     @check_accept_header_wrapper_flask(['application/x-json-stream', 'application/metalink4+xml'])
@@ -185,6 +123,12 @@ class Replicas(ErrorHandlingMethodView):
           description: The maximum number of replicas returned.
           schema:
             type: integer
+        - name: serializer
+          in: query
+          description: The serializer of the response. Defaults to the server configuration.
+          schema:
+            type: string
+            enum: ["chunked", "simple"]
         responses:
           200:
             description: OK
@@ -243,6 +187,10 @@ class Replicas(ErrorHandlingMethodView):
         limit = request.args.get('limit', default=None)
         if limit:
             limit = int(limit)
+        try:
+            serializer = get_replica_serializer(request.args.get('serializer', default=None))
+        except InvalidObject as error:
+            return generate_http_error_flask(400, error)
 
         # Resolve all reasonable protocols when doing metalink for maximum access possibilities
         if metalink and schemes is None:
@@ -252,6 +200,7 @@ class Replicas(ErrorHandlingMethodView):
             def _list_and_sort_replicas(vo):
                 # we need to call list_replicas before starting to reply
                 # otherwise the exceptions won't be propagated correctly
+                distance_cache = {}
                 for rfile in list_replicas(dids=dids, schemes=schemes, vo=vo):
                     replicas = []
                     dictreplica = {}
@@ -260,15 +209,15 @@ class Replicas(ErrorHandlingMethodView):
                             replicas.append(replica)
                             dictreplica[replica] = rse
 
-                    replicas = sort_replicas(dictreplica, client_location, selection=select)
+                    replicas = sort_replicas(dictreplica, client_location, selection=select, distance_cache=distance_cache)
                     rfile['pfns'] = dict(_sorted_with_priorities(rfile['pfns'], replicas, limit=limit))
                     yield rfile
 
             rfiles = _list_and_sort_replicas(vo=request.environ.get('vo'))
             if metalink:
-                response_generator = _generate_metalink_response(rfiles, 'atlas', detailed_url=False)
+                response_generator = generate_metalink_response(rfiles, 'atlas', detailed_url=False, serializer=serializer)
             else:
-                response_generator = _generate_json_response(rfiles)
+                response_generator = generate_json_response(rfiles, serializer=serializer)
             return try_stream(response_generator, content_type=content_type)
         except (DataIdentifierNotFound, SortingAlgorithmNotSupported) as error:
             return generate_http_error_flask(404, error)
@@ -591,6 +540,10 @@ class ListReplicas(ErrorHandlingMethodView):
                   nrandom:
                     description: The maximum number of replicas to return.
                     type: integer
+                  serializer:
+                    description: The serializer of the response. Defaults to the server configuration.
+                    type: string
+                    enum: ["chunked", "simple"]
         responses:
           200:
             description: OK
@@ -701,6 +654,7 @@ class ListReplicas(ErrorHandlingMethodView):
         limit = request.args.get('limit', default=None)
         select = request.args.get('select', default=select)
         select = request.args.get('sort', default=select)
+        serializer = request.args.get('serializer', default=param_get(parameters, 'serializer', default=None))
 
         # Resolve all reasonable protocols when doing metalink for maximum access possibilities
         if metalink and schemes is None:
@@ -709,9 +663,12 @@ class ListReplicas(ErrorHandlingMethodView):
         content_type = 'application/metalink4+xml' if metalink else 'application/x-json-stream'
 
         try:
+            serializer = get_replica_serializer(serializer)
+
             def _list_and_sort_replicas(request_id, issuer, vo):
                 # we need to call list_replicas before starting to reply
                 # otherwise the exceptions won't be propagated correctly
+                distance_cache = {}
                 for rfile in list_replicas(dids=dids, schemes=schemes,
                                            unavailable=unavailable,
                                            request_id=request_id,
@@ -741,7 +698,7 @@ class ListReplicas(ErrorHandlingMethodView):
                     rfile['pfns'] = dict(_sorted_with_priorities(replicas=rfile['pfns'],
                                                                  # Lan replicas sorted by priority; followed by wan replicas sorted by selection criteria
                                                                  sorted_pfns=chain(sorted(lanreplicas.keys(), key=lambda pfn: lanreplicas[pfn][1]),
-                                                                                   sort_replicas(wanreplicas, client_location, selection=select)),
+                                                                                   sort_replicas(wanreplicas, client_location, selection=select, distance_cache=distance_cache)),
                                                                  limit=limit))
                     yield rfile
 
@@ -750,9 +707,9 @@ class ListReplicas(ErrorHandlingMethodView):
                                              vo=request.environ.get('vo'))
             if metalink:
                 policy_schema = config_get('policy', 'schema', raise_exception=False, default='generic')
-                response_generator = _generate_metalink_response(rfiles, policy_schema)
+                response_generator = generate_metalink_response(rfiles, policy_schema, serializer=serializer)
             else:
-                response_generator = _generate_json_response(rfiles)
+                response_generator = generate_json_response(rfiles, serializer=serializer)
             return try_stream(response_generator, content_type=content_type)
         except (InvalidObject, DataIdentifierNotFound, SortingAlgorithmNotSupported) as error:
             return generate_http_error_flask(400, error)
@@ -24,6 +24,7 @@ import pytest
 from rucio.common import exception
 from rucio.common.checksum import adler32, md5
 from rucio.rse import rsemanager as mgr
+from rucio.rse.protocols.protocol import RSEProtocol
 from rucio.tests.common import load_test_conf_file, skip_rse_tests_with_accounts
 
 
@@ -48,6 +49,7 @@ class MgrTestCases:
         "2_rse_remote_delete.raw",
         "3_rse_remote_delete.raw",
         "4_rse_remote_delete.raw",
+        "5_rse_remote_delete.raw",
         "1_rse_remote_exists.raw",
         "2_rse_remote_exists.raw",
         "1_rse_remote_rename.raw",
@@ -201,6 +203,34 @@ class MgrTestCases:
         with pytest.raises(exception.SourceNotFound):
             mgr.delete(self.rse_settings, {'name': 'not_existing_data.raw', 'scope': 'user.%s' % self.user}, impl=self.impl)
 
+    def test_delete_many_protocol(self):
+        """(RSE/PROTOCOLS): Delete multiple files from storage with a single protocol call"""
+        protocol = mgr.create_protocol(self.rse_settings, 'delete', impl=self.impl)
+        pfn_a = list(protocol.lfns2pfns({'name': '5_rse_remote_delete.raw', 'scope': 'user.%s' % self.user}).values())[0]
+        pfn_b = list(protocol.lfns2pfns({'name': 'not_existing_data.raw', 'scope': 'user.%s' % self.user}).values())[0]
+        protocol.connect()
+        try:
+            details = protocol.delete_many([pfn_a, pfn_b])
+        finally:
+            protocol.close()
+        assert details[pfn_a] is True
+        assert isinstance(details[pfn_b], exception.SourceNotFound)
+
+    def test_stat_many_protocol(self):
+        """(RSE/PROTOCOLS): Stat multiple files on storage with a single protocol call"""
+        protocol = mgr.create_protocol(self.rse_settings, 'read', impl=self.impl)
+        if type(protocol).stat is RSEProtocol.stat:
+            pytest.skip('stat is not implemented by the protocol')
+        pfn_a = list(protocol.lfns2pfns({'name': '3_rse_remote_get.raw', 'scope': 'user.%s' % self.user}).values())[0]
+        pfn_b = list(protocol.lfns2pfns({'name': 'not_existing_data.raw', 'scope': 'user.%s' % self.user}).values())[0]
+        protocol.connect()
+        try:
+            details = protocol.stat_many([pfn_a, pfn_b])
+        finally:
+            protocol.close()
+        assert int(details[pfn_a]['filesize']) == 1024 * 1024
+        assert isinstance(details[pfn_b], Exception)
+
     # MGR-Tests: EXISTS
     def test_exists_mgr_ok_multi(self):
         """(RSE/PROTOCOLS): Check multiple files on storage (Success)"""
@@ -29,6 +29,7 @@ import requests
 from rucio.common import config, dumper
 from rucio.common.dumper import data_models
 from rucio.common.dumper.consistency import Consistency, _try_to_advance, compare3, gnu_sort, min_value, parse_and_filter_file
+from rucio.common.dumper.merge_sort import external_sort
 from rucio.common.dumper.path_parsing import components, remove_prefix
 from rucio.tests.common import make_temp_file, mock_open
 
@@ -893,3 +894,41 @@ class TestDumperConsistency:
 
         os.unlink(path)
         os.unlink(sorted_file)
+
+    def test_external_sort_sorts_strings_using_byte_value(self, tmp_path):
+        unsorted_data = ''.join(['z\n', 'a\tb\n', 'a\n', '\xc3\xb1\n'])
+        sorted_data = ''.join(['a\n', 'a\tb\n', 'z\n', '\xc3\xb1\n'])
+
+        path = make_temp_file(tmp_path, unsorted_data)
+        sorted_file = external_sort(path, cache_dir=tmp_path)
+
+        with open(sorted_file, encoding='utf-8') as f:
+            assert f.read() == sorted_data
+
+    def test_external_sort_can_sort_by_field(self, tmp_path):
+        unsorted_data = ''.join(['1,z\n', '2,a\n', '3,\xc3\xb1\n'])
+        sorted_data = ''.join(['2,a\n', '1,z\n', '3,\xc3\xb1\n'])
+
+        path = make_temp_file(tmp_path, unsorted_data)
+        sorted_file = external_sort(path, delimiter=',', fieldspec='2', cache_dir=tmp_path)
+
+        with open(sorted_file, encoding='utf-8') as f:
+            assert f.read() == sorted_data
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_external_sort_merges_spilled_runs(self, tmp_path, processes):
+        lines = ['user/someuser/{0}/file_{1},A'.format(uuid.uuid4().hex[:2], uuid.uuid4().hex) for _ in range(2000)]
+        path = make_temp_file(tmp_path, ''.join(line + '\n' for line in lines))
+        progress = []
+
+        sorted_file = external_sort(path, delimiter=',', fieldspec='1', cache_dir=tmp_path,
+                                    run_size=4096, processes=processes, progress=progress.append)
+
+        with open(sorted_file) as f:
+            assert f.read() == ''.join(line + '\n' for line in sorted(lines))
+        stats = progress[-1]
+        assert stats.total_runs > 1
+        assert stats.sorted_runs == stats.total_runs
+        assert stats.lines_sorted == stats.lines_merged == len(lines)
+        # The compressed runs are removed once merged
+        assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(path), os.path.basename(sorted_file)])
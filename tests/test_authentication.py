@@ -13,13 +13,14 @@
 # limitations under the License.
 
 import datetime
+import hashlib
 import time
 
 import pytest
 from requests import session
 
 from rucio.common.exception import AccessDenied, CannotAuthenticate, Duplicate
-from rucio.common.utils import ssh_sign
+from rucio.common.utils import generate_uuid, ssh_sign
 from rucio.core.authentication import strip_x509_proxy_attributes
 from rucio.core.identity import add_account_identity, del_account_identity
 from rucio.db.sqla import models
@@ -293,3 +294,39 @@ def test_non_jwt_validation():
     from rucio.gateway.authentication import validate_auth_token
     with pytest.raises(CannotAuthenticate):
         validate_auth_token('a.b.c')
+
+
+def test_token_cache(root_account, db_session, monkeypatch):
+    """ AUTHENTICATION: tokens are cached in process, and rejected tokens are cached for a short time """
+    from rucio.core import authentication
+    from rucio.core.authentication import prewarm_token_cache, validate_auth_token
+
+    monkeypatch.setattr(authentication, '_LOCAL_TOKENS', type(authentication._LOCAL_TOKENS)())
+    token = 'dummytoken' + generate_uuid()
+    with pytest.raises(CannotAuthenticate):
+        validate_auth_token(token, session=db_session)
+
+    # A token which is only unknown is not remembered as rejected
+    models.Token(account=root_account, token=token, ip='127.0.0.1', expired_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)).save(session=db_session)
+    assert validate_auth_token(token, session=db_session)['account'] == root_account
+
+    # The rejection of a token is cached in process
+    rejected_token = 'dummytoken' + generate_uuid()
+    models.Token(account=root_account, token=rejected_token, ip='127.0.0.1', expired_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)).save(session=db_session)
+    authentication._reject_token(hashlib.sha256(rejected_token.encode()).hexdigest())
+    with pytest.raises(CannotAuthenticate):
+        validate_auth_token(rejected_token, session=db_session)
+    monkeypatch.setattr(authentication, 'TOKEN_NEGATIVE_CACHE_TTL', -1)
+    authentication._reject_token(hashlib.sha256(rejected_token.encode()).hexdigest())
+    assert validate_auth_token(rejected_token, session=db_session)['account'] == root_account
+
+    # The validation is served by the caches, without the database
+    db_session.query(models.Token).filter_by(token=token).delete()
+    assert validate_auth_token(token, session=db_session)['account'] == root_account
+
+    # The valid tokens are loaded in bulk
+    monkeypatch.setattr(authentication, '_LOCAL_TOKENS', type(authentication._LOCAL_TOKENS)())
+    token = 'dummytoken' + generate_uuid()
+    models.Token(account=root_account, token=token, ip='127.0.0.1', expired_at=datetime.datetime.utcnow() + datetime.timedelta(days=400)).save(session=db_session)
+    assert prewarm_token_cache(limit=1, session=db_session) == 1
+    assert authentication._local_token_get(hashlib.sha256(token.encode()).hexdigest())['account'] == root_account
@@ -22,7 +22,7 @@ from rucio.core.did import attach_dids, set_metadata, set_status
 from rucio.core.lock import successful_transfer
 from rucio.core.replica import add_replicas
 from rucio.core.rse import add_rse_attribute, fill_rse_expired, get_rse_usage, set_rse_usage
-from rucio.core.rse_expression_parser import REGION
+from rucio.core.rse_attribute_index import RSE_ATTRIBUTE_INDEX
 from rucio.core.rule import add_rule, delete_rule, get_rule, update_rule
 from rucio.daemons.abacus.rse import run as run_abacus
 from rucio.daemons.bb8.bb8 import run as bb8_run
@@ -63,8 +63,8 @@ def test_bb8_rebalance_rule(vo, root_account, jdoe_account, rse_factory, mock_sc
     attach_dids(mock_scope, dataset['name'], files, jdoe_account)
     set_status(mock_scope, dataset['name'], open=False)
 
-    # Invalid the cache because the result of parse_expression is cached
-    REGION.invalidate()
+    # Invalidate the RSE attribute index because parse_expression evaluates RSE expressions on it
+    RSE_ATTRIBUTE_INDEX.invalidate()
 
     rule_id = add_rule(dids=[{'scope': mock_scope, 'name': dataset['name']}], account=jdoe_account, copies=1, rse_expression=rse1, grouping='NONE', weight='fakeweight', lifetime=None, locked=False, subscription_id=None)[0]
     rule = {}
@@ -139,8 +139,8 @@ def test_bb8_full_workflow(vo, root_account, jdoe_account, rse_factory, mock_sco
     set_local_account_limit(root_account, rse3_id, -1)
     set_local_account_limit(root_account, rse4_id, -1)
 
-    # Invalid the cache because the result of parse_expression is cached
-    REGION.invalidate()
+    # Invalidate the RSE attribute index because parse_expression evaluates RSE expressions on it
+    RSE_ATTRIBUTE_INDEX.invalidate()
 
     tot_datasets = 4
     # Create a list of datasets
@@ -177,6 +177,40 @@ class TestBaseClient:
         # The client did back-off multiple times before succeeding: 2 * 0.25s (authentication) + 2 * 0.25s (request) = 1s
         assert datetime.utcnow() - start_time > timedelta(seconds=0.9)
 
+    def test_batch_call_renews_token_once(self, vo):
+        """ CLIENTS (BASECLIENT): Ensure concurrent calls return in order and share the renewal of an expired token"""
+        from rucio.client.baseclient import BaseClient
+
+        tokens, auth_requests = ['token-1'], []
+
+        class ExpiringToken(MockServer.Handler):
+            def do_GET(self, tokens=tokens, auth_requests=auth_requests):
+                if self.path.startswith('/auth/userpass'):
+                    auth_requests.append(self.path)
+                    self.send_code_and_message(200, {'x-rucio-auth-token': tokens[-1]}, '')
+                elif self.headers.get('X-Rucio-Auth-Token') != tokens[-1]:
+                    self.send_code_and_message(401, {}, '')
+                else:
+                    self.send_code_and_message(200, {}, self.path)
+
+        with MockServer(ExpiringToken) as server:
+            creds = {'username': 'ddmlab', 'password': 'secret'}
+            client = BaseClient(rucio_host=server.base_url, auth_host=server.base_url, account='root', auth_type='userpass', creds=creds, vo=vo)
+            assert client.auth_token == 'token-1'
+            tokens.append('token-2')
+
+            calls = [lambda i=i: client._send_request('%s/call/%d' % (server.base_url, i)).text for i in range(20)]  # noqa
+            assert client.batch_call(calls, max_workers=5) == ['/call/%d' % i for i in range(20)]
+            assert client.auth_token == 'token-2'
+            assert len(auth_requests) == 2
+
+            def fail():
+                raise RucioException('failed')
+            results = client.batch_call([calls[0], fail, calls[1]], return_exceptions=True)
+            assert results[0] == '/call/0' and isinstance(results[1], RucioException) and results[2] == '/call/1'
+            with pytest.raises(RucioException):
+                client.batch_call([calls[0], fail, calls[1]])
+
 
 class TestRucioClients:
     """ To test Clients"""
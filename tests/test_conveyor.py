@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import logging
 import threading
 import time
@@ -39,7 +40,7 @@ from rucio.core import rse as rse_core
 from rucio.core import rule as rule_core
 from rucio.core.account_limit import set_local_account_limit
 from rucio.daemons.conveyor.finisher import finisher
-from rucio.daemons.conveyor.poller import poller
+from rucio.daemons.conveyor.poller import poller, update_transfers
 from rucio.daemons.conveyor.preparer import preparer
 from rucio.daemons.conveyor.receiver import GRACEFUL_STOP as RECEIVER_GRACEFUL_STOP
 from rucio.daemons.conveyor.receiver import Receiver, receiver
@@ -51,6 +52,7 @@ from rucio.db.sqla import models
 from rucio.db.sqla.constants import LockState, ReplicaState, RequestState, RequestType, RSEType, RuleState
 from rucio.db.sqla.session import read_session, transactional_session
 from rucio.tests.common import skip_rse_tests_with_accounts
+from rucio.transfertool import fts3
 from rucio.transfertool.fts3 import FTS3Transfertool
 from tests.mocks.mock_http_server import MockServer
 from tests.ruciopytest import NoParallelGroups
@@ -166,7 +168,7 @@ def scitags_mock(core_config_mock):
     ('transfers', 'multihop_tombstone_delay', -1),  # Set OBSOLETE tombstone for intermediate replicas
 ]}], indirect=True)
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
     'rucio.core.config.REGION',
     'rucio.daemons.reaper.reaper.REGION',
 ]}], indirect=True)
@@ -287,7 +289,7 @@ def test_multihop_intermediate_replica_lifecycle(vo, did_factory, root_account,
 @skip_rse_tests_with_accounts
 @pytest.mark.noparallel(groups=[NoParallelGroups.XRD, NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER, NoParallelGroups.FINISHER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
 ]}], indirect=True)
 def test_fts_non_recoverable_failures_handled_on_multihop(vo, did_factory, root_account, replica_client, caches_mock, metrics_mock):
     """
@@ -336,7 +338,7 @@ def test_fts_non_recoverable_failures_handled_on_multihop(vo, did_factory, root_
 @pytest.mark.dirty(reason="leaves files in XRD containers")
 @pytest.mark.noparallel(groups=[NoParallelGroups.XRD, NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER, NoParallelGroups.FINISHER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
 ]}], indirect=True)
 def test_fts_recoverable_failures_handled_on_multihop(vo, did_factory, root_account, replica_client, file_factory, caches_mock, metrics_mock):
     """
@@ -384,7 +386,7 @@ def test_fts_recoverable_failures_handled_on_multihop(vo, did_factory, root_acco
 @pytest.mark.dirty(reason="leaves files in XRD containers")
 @pytest.mark.noparallel(groups=[NoParallelGroups.XRD, NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER, NoParallelGroups.FINISHER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
 ]}], indirect=True)
 def test_multisource(vo, did_factory, root_account, replica_client, caches_mock, metrics_mock):
     src_rse1 = 'XRD4'
@@ -528,7 +530,7 @@ def test_multisource_receiver(vo, did_factory, replica_client, root_account, met
 @skip_rse_tests_with_accounts
 @pytest.mark.noparallel(groups=[NoParallelGroups.XRD, NoParallelGroups.SUBMITTER, NoParallelGroups.RECEIVER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
 ]}], indirect=True)
 def test_multihop_receiver_on_failure(vo, did_factory, replica_client, root_account, caches_mock, metrics_mock):
     """
@@ -582,7 +584,7 @@ def test_multihop_receiver_on_failure(vo, did_factory, replica_client, root_acco
 @skip_rse_tests_with_accounts
 @pytest.mark.noparallel(groups=[NoParallelGroups.XRD, NoParallelGroups.SUBMITTER, NoParallelGroups.RECEIVER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
 ]}], indirect=True)
 def test_multihop_receiver_on_success(vo, did_factory, root_account, caches_mock, metrics_mock):
     """
@@ -628,7 +630,7 @@ def test_multihop_receiver_on_success(vo, did_factory, root_account, caches_mock
 @pytest.mark.noparallel(groups=[NoParallelGroups.XRD, NoParallelGroups.SUBMITTER, NoParallelGroups.RECEIVER, NoParallelGroups.POLLER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.core.rse.REGION',
-    'rucio.core.rse_expression_parser.REGION',
+    'rucio.core.rse_attribute_index.REGION',
     'rucio.rse.rsemanager.RSE_REGION',  # for RSE info
 ]}], indirect=True)
 def test_receiver_archiving(vo, did_factory, root_account, caches_mock, scitags_mock):
@@ -1193,7 +1195,7 @@ def overwrite_on_tape_topology(rse_factory, did_factory, root_account, vo, file_
 @pytest.mark.noparallel(groups=[NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.core.rse.REGION',
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
     'rucio.rse.rsemanager.RSE_REGION',  # for RSE info
 ]}], indirect=True)
 def test_overwrite_on_tape(overwrite_on_tape_topology, caches_mock):
@@ -1218,7 +1220,7 @@ def test_overwrite_on_tape(overwrite_on_tape_topology, caches_mock):
 @pytest.mark.noparallel(groups=[NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.core.rse.REGION',
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
     'rucio.rse.rsemanager.RSE_REGION',  # for RSE info
 ]}], indirect=True)
 def test_overwrite_hops(overwrite_on_tape_topology, caches_mock, did_factory, file_factory):
@@ -1266,7 +1268,7 @@ def test_overwrite_hops(overwrite_on_tape_topology, caches_mock, did_factory, fi
 @pytest.mark.noparallel(groups=[NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.core.rse.REGION',
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
     'rucio.core.config.REGION',
     'rucio.rse.rsemanager.RSE_REGION',  # for RSE info
 ]}], indirect=True)
@@ -1307,7 +1309,7 @@ def test_file_exists_handled(overwrite_on_tape_topology, caches_mock):
 ]}], indirect=True)
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.core.rse.REGION',
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
     'rucio.core.config.REGION',
     'rucio.rse.rsemanager.RSE_REGION',  # for RSE info
 ]}], indirect=True)
@@ -1425,6 +1427,119 @@ def test_multi_vo_certificates(file_config_mock, rse_factory, did_factory, scope
         assert sorted(certs_used_by_poller) == ['DEFAULT_DUMMY_CERT', 'NEW_VO_DUMMY_CERT']
 
 
+@pytest.mark.noparallel(groups=[NoParallelGroups.POLLER])
+def test_poller_mock_fts_server(rse_factory, did_factory, root_account):
+    """
+    The poller queries the jobs of a local mock FTS server concurrently, over one pooled session,
+    and writes the terminated, lost and running transfers to the database in batches
+    """
+    src_rse, src_rse_id = rse_factory.make_mock_rse()
+    dst_rse, dst_rse_id = rse_factory.make_mock_rse()
+    dids = [did_factory.random_file_did() for _ in range(7)]
+    for did in dids:
+        replica_core.add_replica(rse_id=src_rse_id, bytes_=1, account=root_account, adler32=None, md5=None, **did)
+    rule_core.add_rule(dids=dids, account=root_account, copies=1, rse_expression=dst_rse, grouping='NONE', weight=None, lifetime=None, locked=False, subscription_id=None)
+    requests = [request_core.get_request_by_did(rse_id=dst_rse_id, **did) for did in dids]
+    file_states, file_metadata = {}, {}
+    for request, file_state in zip(requests, ['FINISHED', 'FINISHED', 'FINISHED', 'FAILED', 'ACTIVE', 'ACTIVE', None]):
+        file_states[request['id']] = file_state
+        file_metadata[request['id']] = {'request_id': request['id'], 'scope': request['scope'].external, 'name': request['name'],
+                                        'src_rse': src_rse, 'src_rse_id': src_rse_id, 'dst_rse': dst_rse, 'dst_type': 'DISK', 'src_type': 'DISK'}
+    queried_job_ids = []
+
+    class _MockFTSJobs(MockServer.Handler):
+        def do_GET(self):
+            job_ids = urlparse(self.path).path.split('/')[-1].split(',')
+            queried_job_ids.extend(job_ids)
+            jobs = []
+            for request_id in job_ids:
+                file_state = file_states[request_id]
+                if file_state is None:
+                    jobs.append({'job_id': request_id, 'http_status': '404 Not Found'})
+                    continue
+                jobs.append({'job_id': request_id, 'http_status': '200 Ok', 'job_state': file_state, 'job_metadata': {},
+                             'files': [{'file_state': file_state, 'file_metadata': file_metadata[request_id], 'reason': 'mock failure' if file_state == 'FAILED' else '',
+                                        'source_surl': None, 'dest_surl': None, 'start_time': '2024-01-01T00:00:00', 'finish_time': None,
+                                        'staging_start': None, 'staging_finished': None}]})
+            self.send_code_and_message(200, {'Content-Type': 'application/json'}, json.dumps(jobs))
+
+    with MockServer(_MockFTSJobs) as mock_server:
+        for request in requests:
+            # the job id of each request is its request id
+            __update_request(request['id'], state=RequestState.SUBMITTED, external_host=mock_server.base_url, external_id=request['id'],
+                             source_rse_id=src_rse_id, submitted_at=datetime.utcnow(), transfertool='fts3')
+
+        poller(once=True, older_than=0, partition_wait_time=0, fts_bulk=2, transfertool=None, filter_transfertool=None)
+
+        assert sorted(queried_job_ids) == sorted(file_states)
+        assert (mock_server.base_url, None) in fts3._FTS_SESSIONS
+    expected_states = {'FINISHED': RequestState.DONE, 'FAILED': RequestState.FAILED, 'ACTIVE': RequestState.SUBMITTED, None: RequestState.LOST}
+    for request in requests:
+        assert request_core.get_request(request['id'])['state'] == expected_states[file_states[request['id']]]
+
+
+def test_poller_observes_committed_batches():
+    """
+    The transfer statistics of a batch of state changes are observed only once the batch
+    is committed, and not for a batch which is rolled back and written again one by one
+    """
+    observed = []
+
+    class _StatsManager:
+        def observe(self, **kwargs):
+            observed.append(kwargs)
+
+    def _update_transfer_states(tt_status_reports, observations, *, session, logger):
+        observations.append({'activity': 'batch'})
+        return [1]
+
+    transfertool_obj = FTS3Transfertool(external_host='https://fts.example.com:8446')
+    kwargs = {'transfertool_obj': transfertool_obj, 'transfers_by_eid': {'job': {'request': {}}}, 'resps': {'job': {'request': 'status report'}},
+              'transfer_stats_manager': _StatsManager()}
+    with patch('rucio.daemons.conveyor.poller.transfer_core.update_transfer_states', side_effect=_update_transfer_states), \
+            patch('rucio.daemons.conveyor.poller.transfer_core.touch_transfers', side_effect=RequestNotFound), \
+            patch('rucio.daemons.conveyor.poller._update_transfer', return_value=1) as update_one:
+        update_transfers(**kwargs)
+    update_one.assert_called_once()
+    assert observed == []
+
+    with patch('rucio.daemons.conveyor.poller.transfer_core.update_transfer_states', side_effect=_update_transfer_states), \
+            patch('rucio.daemons.conveyor.poller.transfer_core.touch_transfers'):
+        update_transfers(**kwargs)
+    assert observed == [{'activity': 'batch'}]
+
+
+@pytest.mark.noparallel(groups=[NoParallelGroups.FINISHER])
+def test_finisher_batch(rse_factory, did_factory, root_account):
+    """
+    The finisher updates the locks, the rule and the dataset lock of many finished transfers
+    of one rule together, and archives their requests in bulk
+    """
+    src_rse, src_rse_id = rse_factory.make_mock_rse()
+    dst_rse, dst_rse_id = rse_factory.make_mock_rse()
+    dataset = did_factory.make_dataset()
+    dids = [did_factory.random_file_did() for _ in range(4)]
+    for did in dids:
+        replica_core.add_replica(rse_id=src_rse_id, bytes_=1, account=root_account, adler32=None, md5=None, **did)
+    did_core.attach_dids(dids=dids, account=root_account, **dataset)
+    rule_id = rule_core.add_rule(dids=[dataset], account=root_account, copies=1, rse_expression=dst_rse, grouping='DATASET', weight=None, lifetime=None, locked=False, subscription_id=None)[0]
+    requests = [request_core.get_request_by_did(rse_id=dst_rse_id, **did) for did in dids]
+    for request in requests:
+        __update_request(request['id'], state=RequestState.DONE, external_id=request['id'], source_rse_id=src_rse_id, transfertool='fts3')
+
+    finisher(once=True, partition_wait_time=0)
+
+    rule = rule_core.get_rule(rule_id)
+    assert rule['state'] == RuleState.OK
+    assert (rule['locks_ok_cnt'], rule['locks_replicating_cnt'], rule['locks_stuck_cnt']) == (4, 0, 0)
+    assert all(lock['state'] == LockState.OK for lock in lock_core.get_replica_locks_for_rule_id(rule_id))
+    assert [lock['state'] for lock in lock_core.get_dataset_locks(**dataset)] == [LockState.OK]
+    for did, request in zip(dids, requests):
+        assert replica_core.get_replica(rse_id=dst_rse_id, **did)['state'] == ReplicaState.AVAILABLE
+        assert request_core.get_request(request['id']) is None
+        assert request_core.get_request_history_by_did(rse_id=dst_rse_id, **did)['state'] == RequestState.DONE
+
+
 @skip_rse_tests_with_accounts
 @pytest.mark.noparallel(groups=[NoParallelGroups.SUBMITTER, NoParallelGroups.POLLER, NoParallelGroups.FINISHER])
 @pytest.mark.parametrize("core_config_mock", [
@@ -1434,7 +1549,7 @@ def test_multi_vo_certificates(file_config_mock, rse_factory, did_factory, scope
     ]},
 ], indirect=True)
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
     'rucio.core.config.REGION',
     'rucio.daemons.reaper.reaper.REGION',
 ]}], indirect=True)
@@ -143,7 +143,7 @@ def test_skip_requests_from_expired_rules(rse_factory, did_factory, root_account
     }
 ], indirect=True)
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
     'rucio.core.config.REGION',
 ]}], indirect=True)
 def test_multihop_sources_created(rse_factory, did_factory, root_account, core_config_mock, caches_mock, metrics_mock):
@@ -235,7 +235,7 @@ def test_multihop_sources_created(rse_factory, did_factory, root_account, core_c
 @pytest.mark.noparallel(groups=[NoParallelGroups.SUBMITTER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.daemons.reaper.reaper.REGION',
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
 ]}], indirect=True)
 def test_source_avoid_deletion(caches_mock, rse_factory, did_factory, root_account):
     """ Test that sources on a file block it from deletion """
@@ -302,7 +302,7 @@ def test_source_avoid_deletion(caches_mock, rse_factory, did_factory, root_accou
 
 @pytest.mark.noparallel(groups=[NoParallelGroups.SUBMITTER])
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by rse expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by rse expression
 ]}], indirect=True)
 def test_ignore_availability(rse_factory, did_factory, root_account, caches_mock):
 
@@ -441,7 +441,7 @@ def test_globus(rse_factory, did_factory, root_account):
 ]}], indirect=True)
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.daemons.reaper.reaper.REGION',
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
 ]}], indirect=True)
 def test_hop_penalty(rse_factory, did_factory, root_account, file_config_mock, caches_mock):
     """
@@ -74,6 +74,27 @@ class TestCoreRSECounter:
             del cnt['updated_at']
             assert cnt == {'files': count, 'bytes': sum_}
 
+    def test_update_rse_counters(self, rse_factory):
+        """ RSE COUNTER (CORE): Fold the updates of many RSEs at once """
+        rse_update(once=True)
+        rse_ids = [rse_factory.make_mock_rse()[1] for _ in range(3)]
+        for rse_id in rse_ids[:2]:
+            rse_counter.del_counter(rse_id=rse_id)
+            rse_counter.add_counter(rse_id=rse_id)
+        rse_counter.del_counter(rse_id=rse_ids[2])
+        for i, rse_id in enumerate(rse_ids):
+            for _ in range(i + 2):
+                rse_counter.increase(rse_id=rse_id, files=1, bytes_=10)
+        rse_counter.decrease(rse_id=rse_ids[0], files=1, bytes_=10)
+
+        # only the consumed updates are deleted when the number of updates is limited
+        assert rse_counter.update_rse_counters(rse_ids=rse_ids, limit=4) == 4
+        assert rse_counter.update_rse_counters(rse_ids=rse_ids) == 6
+        assert rse_counter.update_rse_counters(rse_ids=rse_ids) == 0
+        for rse_id, (files, bytes_) in zip(rse_ids, [(1, 10), (3, 30), (4, 40)]):
+            cnt = rse_counter.get_counter(rse_id=rse_id)
+            assert (cnt['files'], cnt['bytes']) == (files, bytes_)
+
     def test_fill_counter_history(self, db_session):
         """RSE COUNTER (CORE): Fill the usage history with the current value."""
         stmt = delete(models.RSEUsageHistory)
@@ -141,6 +162,23 @@ class TestCoreAccountCounter:
             del cnt['updated_at']
             assert cnt == {'files': count, 'bytes': sum_}
 
+        # fold the updates of many account-rse counters at once, creating the missing counters
+        rse_ids = [rse_id] + [rse_factory.make_mock_rse(session=db_session)[1] for _ in range(2)]
+        db_session.commit()
+        account_counter.del_counter(rse_id=rse_ids[2], account=account)
+        for i, rse_id_ in enumerate(rse_ids):
+            for _ in range(i + 1):
+                account_counter.increase(rse_id=rse_id_, account=account, files=1, bytes_=10)
+        counters = [{'account': account, 'rse_id': rse_id_} for rse_id_ in rse_ids]
+        assert account_counter.update_account_counters(counters=counters, limit=2) == 2
+        assert account_counter.update_account_counters(counters=counters) == 4
+        assert account_counter.update_account_counters(counters=counters) == 0
+        count += 1
+        sum_ += 10
+        for rse_id_, (files, bytes_) in zip(rse_ids, [(count, sum_), (2, 20), (3, 30)]):
+            cnt = get_usage(rse_id=rse_id_, account=account)
+            assert (cnt['files'], cnt['bytes']) == (files, bytes_)
+
         # check that the counters are correctly copied into the history table
         stmt = delete(models.AccountUsageHistory)
         db_session.execute(stmt)
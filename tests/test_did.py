@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from datetime import datetime, timedelta
+from json import loads
 
 import pytest
 
@@ -32,7 +33,9 @@ from rucio.core.did import (
     get_did_atime,
     get_metadata,
     get_users_following_did,
+    list_content_page,
     list_dids,
+    list_files_page,
     list_new_dids,
     remove_did_from_followed,
     set_metadata,
@@ -44,7 +47,7 @@ from rucio.core.replica import add_replica, get_replica
 from rucio.db.sqla.constants import DIDType
 from rucio.db.sqla.util import json_implemented
 from rucio.gateway import did, scope
-from rucio.tests.common import did_name_generator, rse_name_generator, scope_name_generator
+from rucio.tests.common import auth, did_name_generator, headers, rse_name_generator, scope_name_generator
 
 
 def skip_without_json():
@@ -294,6 +297,40 @@ class TestDIDCore:
         for dataset in non_existing_datasets:
             assert (dataset['scope'], dataset['name']) not in parent_datasets
 
+    def test_list_files_and_content_pages(self, mock_scope, root_account, rse_factory, did_factory):
+        """ DATA IDENTIFIERS (CORE): List the files and the contents of a container by pages """
+        _, rse_id = rse_factory.make_mock_rse()
+        container = did_factory.make_container()
+        datasets = [did_factory.make_dataset() for _ in range(2)]
+        attach_dids(dids=datasets, account=root_account, **container)
+        files = [{'scope': mock_scope, 'name': did_name_generator('file'), 'bytes': 1, 'adler32': '0cc737eb'} for _ in range(7)]
+        attach_dids(dids=files[:4], rse_id=rse_id, account=root_account, **datasets[0])
+        attach_dids(dids=files[3:], rse_id=rse_id, account=root_account, **datasets[1])
+
+        # The file attached to both datasets is listed once
+        listed, marker = [], None
+        while True:
+            page = list_files_page(limit=3, marker=marker, **container)
+            assert len(page) <= 3
+            listed.extend((file_['scope'], file_['name']) for file_ in page)
+            if len(page) < 3:
+                break
+            marker = (page[-1]['scope'], page[-1]['name'])
+        assert listed == [(mock_scope, name) for name in sorted(file_['name'] for file_ in files)]
+        assert 'lumiblocknr' in list_files_page(limit=1, long=True, **container)[0]
+        assert list_files_page(limit=3, marker=(mock_scope, files[0]['name']), scope=mock_scope, name=files[0]['name']) == []
+
+        page = list_content_page(limit=1, **container)
+        assert [child['name'] for child in page] == [min(dataset['name'] for dataset in datasets)]
+        page += list_content_page(limit=1, marker=(page[-1]['scope'], page[-1]['name']), **container)
+        assert sorted(child['name'] for child in page) == sorted(dataset['name'] for dataset in datasets)
+        assert list_content_page(limit=1, marker=(page[-1]['scope'], page[-1]['name']), **container) == []
+
+        with pytest.raises(DataIdentifierNotFound):
+            list_files_page(scope=mock_scope, name=did_name_generator('dataset'), limit=3)
+        with pytest.raises(DataIdentifierNotFound):
+            list_content_page(scope=mock_scope, name=did_name_generator('dataset'), limit=3)
+
 
 class TestDIDGateway:
 
@@ -1174,6 +1211,21 @@ class TestDIDClients:
         for dataset in non_existing_datasets:
             assert (dataset['scope'], dataset['name']) not in parent_datasets
 
+    def test_list_files_and_content_pages(self, did_client, mock_scope, root_account, rse_factory, did_factory):
+        """ DATA IDENTIFIERS (CLIENT): List the files and the contents of a dataset by pages """
+        _, rse_id = rse_factory.make_mock_rse()
+        dataset = did_factory.make_dataset()
+        files = [{'scope': mock_scope, 'name': did_name_generator('file'), 'bytes': 1, 'adler32': '0cc737eb'} for _ in range(5)]
+        attach_dids(dids=files, rse_id=rse_id, account=root_account, **dataset)
+        names = sorted(file_['name'] for file_ in files)
+        scope, name = dataset['scope'].external, dataset['name']
+
+        assert [file_['name'] for file_ in did_client.list_files(scope, name, page_size=2)] == names
+        assert [file_['name'] for file_ in did_client.list_files(scope, name, page_size=2, marker='%s:%s' % (scope, names[1]))] == names[2:]
+        assert [child['name'] for child in did_client.list_content(scope, name, page_size=2)] == names
+        with pytest.raises(DataIdentifierNotFound):
+            did_client.list_files(scope, did_name_generator('dataset'), page_size=2)
+
 
 @pytest.mark.noparallel(reason='uses mock scope')
 def test_bulk_get_meta_inheritance(vo, rse_factory, mock_scope, did_factory, rucio_client):
@@ -1267,3 +1319,27 @@ def test_client_bulk_add_containers(mock_scope, did_client, rse_factory):
     returned_names = [did for did in dids]
     for name in container_names:
         assert name in returned_names
+
+
+def test_list_files_pages_rest(rest_client, auth_token, mock_scope, root_account, rse_factory, did_factory):
+    """ DATA IDENTIFIERS (REST): List the files of a dataset by pages, following the marker of the next page """
+    _, rse_id = rse_factory.make_mock_rse()
+    dataset = did_factory.make_dataset()
+    files = [{'scope': mock_scope, 'name': did_name_generator('file'), 'bytes': 1, 'adler32': '0cc737eb'} for _ in range(5)]
+    attach_dids(dids=files, rse_id=rse_id, account=root_account, **dataset)
+    url = '/dids/%s/%s/files' % (dataset['scope'].external, dataset['name'])
+
+    names, query = [], {'limit': 2}
+    for _ in range(len(files)):
+        response = rest_client.get(url, query_string=query, headers=headers(auth(auth_token)))
+        assert response.status_code == 200
+        names.extend(loads(line)['name'] for line in response.get_data(as_text=True).splitlines())
+        if 'X-Rucio-Next-Marker' not in response.headers:
+            break
+        query = {'limit': 2, 'marker': response.headers['X-Rucio-Next-Marker']}
+    assert names == sorted(file_['name'] for file_ in files)
+
+    response = rest_client.get(url, query_string={'limit': 2, 'marker': files[0]['name']}, headers=headers(auth(auth_token)))
+    assert response.status_code == 400
+    response = rest_client.get(url, query_string={'limit': 0}, headers=headers(auth(auth_token)))
+    assert response.status_code == 400
@@ -25,9 +25,11 @@ import requests
 import stomp
 
 from rucio.common.config import config_get, config_get_int, config_get_list
+from rucio.core.config import set as config_set
 from rucio.core.message import add_message, retrieve_messages, truncate_messages
 from rucio.daemons.hermes import hermes
 from rucio.tests.common import rse_name_generator, skip_missing_elasticsearch_influxdb_in_env
+from tests.mocks.mock_http_server import MockServer
 
 
 class MyListener:
@@ -276,3 +278,95 @@ def test_hermes(core_config_mock, caches_mock):
 
     # Checking email
     assert service_dict["email"] == 0
+
+
+@pytest.mark.noparallel(reason="truncates the message table")
+@pytest.mark.parametrize(
+    "core_config_mock",
+    [{"table_content": [("hermes", "services_list", "influx,elastic")]}],
+    indirect=True,
+)
+@pytest.mark.parametrize(
+    "caches_mock",
+    [{"caches_to_mock": ["rucio.core.config.REGION"]}],
+    indirect=True,
+)
+def test_hermes_pipelined(core_config_mock, caches_mock):
+    """HERMES (DAEMON): Test that each sink of the pipelined mode acknowledges its own messages."""
+    truncate_messages()
+    influx_bodies = []
+
+    class _Influx(MockServer.Handler):
+        def do_POST(self):
+            influx_bodies.append(self.rfile.read(int(self.headers["Content-Length"])).decode())
+            self.send_code_and_message(204, {}, "")
+
+    class _BrokenElastic(MockServer.Handler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_code_and_message(500, {}, "broken")
+
+    mock_rse = rse_name_generator()
+    nb_messages = 5
+    for _ in range(nb_messages):
+        add_message("deletion-done", {"bytes": 2, "rse": mock_rse})
+
+    with MockServer(_Influx) as influx, MockServer(_BrokenElastic) as elastic:
+        config_set("hermes", "influxdb_endpoint", influx.base_url + "/api/v2/write")
+        config_set("hermes", "elastic_endpoint", elastic.base_url + "/ddm_events/doc/_bulk")
+        hermes.hermes(once=True, pipelined=True)
+
+    assert len(influx_bodies) == 1
+    assert f"deletion,rse={mock_rse} nb_deletion_done={nb_messages}," in influx_bodies[0]
+
+    # The elastic messages failed and must be kept, without preventing the influx ones from being deleted
+    services = [message["services"] for message in retrieve_messages(50, old_mode=False)]
+    assert services.count("influx") == 0
+    assert services.count("elastic") == nb_messages
+
+
+@pytest.mark.noparallel(reason="truncates the message table")
+@pytest.mark.parametrize(
+    "core_config_mock",
+    [{"table_content": [("hermes", "services_list", "influx")]}],
+    indirect=True,
+)
+@pytest.mark.parametrize(
+    "caches_mock",
+    [{"caches_to_mock": ["rucio.core.config.REGION"]}],
+    indirect=True,
+)
+def test_hermes_pipelined_acknowledged_not_dispatched_again(core_config_mock, caches_mock):
+    """HERMES (DAEMON): Test that a batch retrieved before the acknowledgement of its messages isn't delivered twice."""
+    truncate_messages()
+    influx_bodies = []
+
+    class _Influx(MockServer.Handler):
+        def do_POST(self):
+            influx_bodies.append(self.rfile.read(int(self.headers["Content-Length"])).decode())
+            self.send_code_and_message(204, {}, "")
+
+    nb_messages = 5
+    for _ in range(nb_messages):
+        add_message("deletion-done", {"bytes": 2, "rse": rse_name_generator()})
+
+    pipeline = hermes.HermesPipeline()
+    with MockServer(_Influx) as influx:
+        config_set("hermes", "influxdb_endpoint", influx.base_url + "/api/v2/write")
+        pipeline.start()
+        try:
+            messages = retrieve_messages(50, old_mode=False)
+            # Retrieved while the first batch is being delivered
+            stale_messages = retrieve_messages(50, old_mode=False)
+            assert pipeline.dispatch(messages) == nb_messages
+            for _ in range(100):
+                if not pipeline.in_flight:
+                    break
+                time.sleep(0.1)
+            assert not pipeline.in_flight
+            assert pipeline.dispatch(stale_messages) == 0
+        finally:
+            pipeline.stop()
+
+    assert len(influx_bodies) == 1
+    assert not retrieve_messages(50, old_mode=False)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from typing import TYPE_CHECKING
+from unittest import mock
 
 import pytest
 from sqlalchemy import delete
@@ -26,7 +27,7 @@ from rucio.core.did import add_did, attach_dids, detach_dids
 from rucio.core.lock import get_dataset_locks, get_replica_locks, get_replica_locks_for_rule_id
 from rucio.core.replica import add_replica
 from rucio.core.rse import add_rse_attribute
-from rucio.core.rule import add_rule, get_rule
+from rucio.core.rule import add_rule, get_rule, re_evaluate_dids
 from rucio.daemons.abacus.account import account_update
 from rucio.daemons.judge.evaluator import re_evaluator
 from rucio.db.sqla.constants import DIDType, LockState
@@ -522,3 +523,68 @@ def test_judge_double_container_with_existing_rule(
 
     assert not get_replica_locks(**file)
     assert not get_replica_locks(**dataset)
+
+
+def test_judge_batch_evaluation(
+    did_factory: "TemporaryDidFactory",
+    rse_factory: "TemporaryRSEFactory",
+    root_account: "InternalAccount"
+):
+    """
+    JUDGE EVALUATOR:
+    Test the evaluation of attachments and detachments of several datasets,
+    sharing the same parent container, in a single batch.
+    """
+    mock_rse = RSE_namedtuple(*rse_factory.make_mock_rse())
+
+    container = did_factory.make_container()
+    rule_id, = add_rule(
+        dids=[container],
+        account=root_account,
+        copies=1,
+        rse_expression=mock_rse.name,
+        grouping='DATASET',
+        weight=None,
+        lifetime=None,
+        locked=False,
+        subscription_id=None
+    )
+
+    datasets, files = [], []
+    for _ in range(3):
+        dataset = did_factory.make_dataset()
+        attach_dids(dids=[dataset], account=root_account, **container)
+        dataset_files = [did_factory.random_file_did() for _ in range(2)]
+        for file in dataset_files:
+            add_replica(rse_id=mock_rse.id, account=root_account, bytes_=10, **file)
+        attach_dids(dids=dataset_files, account=root_account, **dataset)
+        datasets.append(dataset)
+        files.append(dataset_files)
+
+    # The one by one fallback must not be needed to evaluate the batch
+    with mock.patch('rucio.daemons.judge.evaluator.re_evaluate_dids', wraps=re_evaluate_dids) as batch_evaluation, \
+            mock.patch('rucio.daemons.judge.evaluator.re_evaluate_did') as single_evaluation:
+        re_evaluator(once=True, did_limit=None, batch=True)
+    batch_evaluation.assert_called()
+    single_evaluation.assert_not_called()
+
+    for dataset_files in files:
+        for file in dataset_files:
+            assert len(get_replica_locks(**file)) == 1
+    assert get_rule(rule_id)['locks_ok_cnt'] == 6
+
+    # Detach from one dataset and attach to another one in the same batch
+    detach_dids(dids=[files[0][0]], **datasets[0])
+    new_file = did_factory.random_file_did()
+    add_replica(rse_id=mock_rse.id, account=root_account, bytes_=10, **new_file)
+    attach_dids(dids=[new_file], account=root_account, **datasets[1])
+
+    with mock.patch('rucio.daemons.judge.evaluator.re_evaluate_dids', wraps=re_evaluate_dids) as batch_evaluation, \
+            mock.patch('rucio.daemons.judge.evaluator.re_evaluate_did') as single_evaluation:
+        re_evaluator(once=True, did_limit=None, batch=True)
+    batch_evaluation.assert_called()
+    single_evaluation.assert_not_called()
+
+    assert not get_replica_locks(**files[0][0])
+    assert len(get_replica_locks(**new_file)) == 1
+    assert get_rule(rule_id)['locks_ok_cnt'] == 6
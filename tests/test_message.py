@@ -22,7 +22,7 @@ from sqlalchemy import select
 from rucio.common.constants import MAX_MESSAGE_LENGTH
 from rucio.common.exception import InvalidObject, RucioException
 from rucio.common.utils import generate_uuid
-from rucio.core.message import add_message, add_messages, delete_messages, retrieve_messages, truncate_messages
+from rucio.core.message import add_message, add_messages, delete_messages, retrieve_messages, stream_messages, truncate_messages
 from rucio.db.sqla.models import Message
 from rucio.db.sqla.session import get_session
 
@@ -130,6 +130,30 @@ def test_large_payload(core_config_mock, caches_mock):
     assert messages[0]['payload'] == dict_long_payload
 
 
+@pytest.mark.noparallel(reason='fails when run in parallel')
+@pytest.mark.parametrize("core_config_mock", [{"table_content": [
+    ('hermes', 'services_list', 'influx'),
+]}], indirect=True)
+@pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
+    'rucio.core.config.REGION',
+]}], indirect=True)
+def test_retrieve_and_stream_mixed_payloads(core_config_mock, caches_mock):
+    """ MESSAGE (CORE): Test retrieving and streaming a mix of small and large payloads """
+    truncate_messages()
+
+    long_payload = ''.join(random.choice(string.ascii_letters) for i in range(MAX_MESSAGE_LENGTH + 20))
+    payloads = [{"number": cnt, "mylong_message": long_payload} if cnt % 3 == 0 else {"number": cnt} for cnt in range(10)]
+    add_messages([{"event_type": "NEW_DID", "payload": payload} for payload in payloads])
+
+    messages = retrieve_messages(40)
+    assert sorted((msg['payload'] for msg in messages), key=lambda payload: payload['number']) == payloads
+
+    streamed = list(stream_messages(40, chunk_size=3))
+    assert sorted(streamed, key=lambda msg: msg['id']) == sorted(messages, key=lambda msg: msg['id'])
+
+    assert len(list(stream_messages(4, chunk_size=3))) == 4
+
+
 @pytest.mark.noparallel(reason='fails when run in parallel')
 @pytest.mark.parametrize("core_config_mock", [{"table_content": [
     ('hermes', 'services_list', 'nonexistingservice'),
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import time
 import traceback
 import uuid
@@ -20,6 +21,9 @@ from unittest.mock import MagicMock, patch
 from urllib.parse import parse_qs, urlparse
 
 import pytest
+from Cryptodome.PublicKey import RSA
+from jwkest.jwk import RSAKey
+from jwkest.jws import JWS
 from jwkest.jwt import JWT
 from oic import rndstr
 from sqlalchemy import select
@@ -30,7 +34,17 @@ from rucio.common.types import InternalAccount
 from rucio.core.account import add_account
 from rucio.core.authentication import redirect_auth_oidc, validate_auth_token
 from rucio.core.identity import add_account_identity
-from rucio.core.oidc import EXPECTED_OIDC_AUDIENCE, EXPECTED_OIDC_SCOPE, _token_cache_get, _token_cache_set, get_auth_oidc, get_token_for_account_operation, get_token_oidc, oidc_identity_string
+from rucio.core.oidc import (
+    EXPECTED_OIDC_AUDIENCE,
+    EXPECTED_OIDC_SCOPE,
+    _token_cache_get,
+    _token_cache_set,
+    get_auth_oidc,
+    get_token_for_account_operation,
+    get_token_oidc,
+    oidc_identity_string,
+    verify_jwt_signature,
+)
 from rucio.db.sqla import models
 from rucio.db.sqla.constants import AccountType, IdentityType
 from rucio.db.sqla.session import get_session
@@ -1989,3 +2003,24 @@ def test_token_cache() -> None:
     }])
     _token_cache_set(key, expired_token)
     assert _token_cache_get(key) is None
+
+
+def test_verify_jwt_signature() -> None:
+    issuer_key, other_key = RSAKey(key=RSA.generate(2048), kid='issuer'), RSAKey(key=RSA.generate(2048), kid='issuer')
+    rotated_key = RSAKey(key=RSA.generate(2048), kid='rotated')
+    oidc_client = MagicMock()
+    oidc_client.keyjar.get_issuer_keys.return_value = [issuer_key]
+
+    def sign(claims, key):
+        return JWS(json.dumps(claims), alg='RS256').sign_compact([key])
+
+    claims = {'iss': 'https://test_issuer/', 'sub': 'knownsub', 'exp': int(time.time()) + 60}
+    with patch('rucio.core.oidc.OIDC_CLIENTS', {'https://test_issuer/': oidc_client}):
+        assert verify_jwt_signature(sign(claims, issuer_key)) is True
+        assert verify_jwt_signature(sign(claims, other_key)) is False
+        assert verify_jwt_signature(sign({**claims, 'exp': int(time.time()) - 60}, issuer_key)) is False
+        # Tokens of unknown issuers, and tokens which are not JWTs, are left to the database
+        assert verify_jwt_signature(sign({**claims, 'iss': 'https://unknown_issuer/'}, other_key)) is None
+        assert verify_jwt_signature('a.b.c') is None
+        # A key which is not cached yet, e.g. after a key rotation, doesn't make the token invalid
+        assert verify_jwt_signature(sign(claims, rotated_key)) is None
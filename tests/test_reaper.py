@@ -26,7 +26,7 @@ from rucio.core import replica as replica_core
 from rucio.core import rse as rse_core
 from rucio.core import rule as rule_core
 from rucio.daemons.reaper.dark_reaper import reaper as dark_reaper
-from rucio.daemons.reaper.reaper import reaper
+from rucio.daemons.reaper.reaper import AdaptiveConcurrency, HostDeletionPool, reaper
 from rucio.daemons.reaper.reaper import run as run_reaper
 from rucio.db.sqla import models
 from rucio.db.sqla.constants import OBSOLETE
@@ -137,6 +137,114 @@ def test_reaper_bulk_delete(vo, caches_mock):
     assert len(list(replica_core.list_replicas(dids, rse_expression=rse_name))) == 200
 
 
+@pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
+    'rucio.daemons.reaper.reaper.REGION'
+]}], indirect=True)
+def test_reaper_pipelined(vo, caches_mock, message_mock):
+    """ REAPER (DAEMON): Test the pipelined deletion of the reaper daemon."""
+    [cache_region] = caches_mock
+    scope = InternalScope('data13_hip', vo=vo)
+
+    nb_files = 250
+    file_size = 200  # 2G
+    rse_name, rse_id, dids = __add_test_rse_and_replicas(vo=vo, scope=scope, rse_name=rse_name_generator(),
+                                                         names=['lfn' + generate_uuid() for _ in range(nb_files)], file_size=file_size)
+
+    rse_core.set_rse_limits(rse_id=rse_id, name='MinFreeSpace', value=50 * file_size)
+
+    cache_region.invalidate()
+    rse_core.set_rse_usage(rse_id=rse_id, source='storage', used=nb_files * file_size, free=323000000000)
+    reaper(once=True, rses=[], include_rses=rse_name, exclude_rses=None, pipelined=True)
+    assert len(list(replica_core.list_replicas(dids=dids, rse_expression=rse_name))) == nb_files
+
+    cache_region.invalidate()
+    rse_core.set_rse_usage(rse_id=rse_id, source='storage', used=nb_files * file_size, free=1)
+    reaper(once=True, rses=[], include_rses=rse_name, exclude_rses=None, pipelined=True)
+    reaper(once=True, rses=[], include_rses=rse_name, exclude_rses=None, pipelined=True)
+    assert len(list(replica_core.list_replicas(dids, rse_expression=rse_name))) == 200
+
+    msgs = message_core.retrieve_messages()
+    assert len(msgs) == 50
+
+
+@pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
+    'rucio.daemons.reaper.reaper.REGION'
+]}], indirect=True)
+def test_reaper_pipelined_posix(vo, caches_mock, tmp_path):
+    """ REAPER (DAEMON): Test that the pipelined reaper removes the files from a local posix storage."""
+    [cache_region] = caches_mock
+    scope = InternalScope('data13_hip', vo=vo)
+    rse_name = rse_name_generator()
+    rse_id = rse_core.add_rse(rse_name, vo=vo)
+    rse_core.add_protocol(rse_id=rse_id, parameter={'scheme': 'file',
+                                                    'hostname': 'localhost',
+                                                    'port': 0,
+                                                    'prefix': str(tmp_path) + '/',
+                                                    'impl': 'rucio.rse.protocols.posix.Default',
+                                                    'domains': {
+                                                        'lan': {'read': 1, 'write': 1, 'delete': 1},
+                                                        'wan': {'read': 1, 'write': 1, 'delete': 1}}})
+
+    nb_files = 20
+    tombstone = datetime.utcnow() - timedelta(days=1)
+    dids = [{'scope': scope, 'name': 'lfn' + generate_uuid()} for _ in range(nb_files)]
+    paths = []
+    for did in dids:
+        replica_core.add_replica(rse_id=rse_id, scope=scope, name=did['name'], bytes_=1, tombstone=tombstone,
+                                 account=InternalAccount('root', vo=vo), adler32=None, md5=None)
+        [replica] = replica_core.list_replicas(dids=[did], rse_expression=rse_name)
+        path = tmp_path / replica['pfns'].popitem()[0].split(str(tmp_path), 1)[1].lstrip('/')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x')
+        paths.append(path)
+
+    cache_region.invalidate()
+    rse_core.set_rse_usage(rse_id=rse_id, source='storage', used=nb_files, free=1)
+    rse_core.set_rse_limits(rse_id=rse_id, name='MinFreeSpace', value=nb_files + 1)
+    reaper(once=True, rses=[], include_rses=rse_name, exclude_rses=None, greedy=True, pipelined=True)
+
+    assert not list(replica_core.list_replicas(dids=dids, rse_expression=rse_name))
+    assert not any(path.exists() for path in paths)
+
+
+def test_adaptive_concurrency():
+    """ REAPER (DAEMON): Test the adaptation of the deletion concurrency to the storage latency."""
+    concurrency = AdaptiveConcurrency(max_limit=8, min_limit=1)
+    for _ in range(5):
+        concurrency.acquire()
+        concurrency.release(latency=1.0)
+    assert concurrency.limit == 8
+
+    # The storage gets much slower: the concurrency is reduced
+    for _ in range(3):
+        concurrency.acquire()
+        concurrency.release(latency=10.0)
+    assert concurrency.limit < 8
+    assert concurrency.limit >= 1
+
+    # The storage recovers: the concurrency increases again up to the maximum
+    reduced = concurrency.limit
+    for _ in range(50):
+        concurrency.acquire()
+        concurrency.release(latency=1.0)
+    assert reduced < concurrency.limit == 8
+
+
+def test_host_deletion_pool_submit_does_not_block():
+    """ REAPER (DAEMON): Test that queuing deletion jobs never blocks the reaper thread, even with a full queue."""
+    done = []
+    pool = HostDeletionPool(hostname='localhost', delete=lambda rse, replicas: replicas, done=lambda rse, replicas, deleted: done.append(deleted),
+                            max_workers=1, queue_size=2)
+    # The workers are not started yet, so the jobs stay in the queue
+    for i in range(5):
+        pool.submit(None, [{'name': 'file%d' % i}])
+    assert pool.free_slots() == 0
+
+    pool.start()
+    assert pool.stop(drain=True) == []
+    assert len(done) == 5
+
+
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
     'rucio.daemons.reaper.reaper.REGION'
 ]}], indirect=True)
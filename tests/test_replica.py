@@ -32,7 +32,23 @@ from rucio.common.schema import get_schema_value
 from rucio.common.utils import clean_pfns, generate_uuid, parse_response
 from rucio.core.config import set as cconfig_set
 from rucio.core.did import add_did, attach_dids, get_did, get_did_atime, list_files, set_status
-from rucio.core.replica import add_bad_dids, add_replica, add_replicas, delete_replicas, get_bad_pfns, get_replica, get_replica_atime, get_replicas_state, get_rse_coverage_of_dataset, list_replicas, set_tombstone, touch_replica, update_replica_state
+from rucio.core.replica import (
+    _get_cached_list_replicas_protocols,
+    add_bad_dids,
+    add_replica,
+    add_replicas,
+    delete_replicas,
+    get_bad_pfns,
+    get_replica,
+    get_replica_atime,
+    get_replicas_state,
+    get_rse_coverage_of_dataset,
+    list_replicas,
+    set_tombstone,
+    touch_replica,
+    touch_replicas,
+    update_replica_state,
+)
 from rucio.core.rse import add_protocol, add_rse_attribute, del_rse_attribute
 from rucio.daemons.badreplicas.minos import minos
 from rucio.daemons.badreplicas.minos_temporary_expiration import minos_tu_expiration
@@ -195,6 +211,46 @@ class TestReplicaCore:
 
         assert nbfiles == replica_cpt
 
+    def test_list_replicas_protocols_cache(self, rse_factory, mock_scope, root_account, db_session):
+        """ REPLICA (CORE): Protocol objects are re-used between list_replicas calls, until the RSE protocols change """
+        _, rse_id = rse_factory.make_mock_rse()
+        files = [{'scope': mock_scope, 'name': did_name_generator('file'), 'bytes': 1, 'adler32': '0cc737eb'} for _ in range(3)]
+        add_replicas(rse_id=rse_id, files=files, account=root_account, ignore_availability=True, session=db_session)
+        dids = [{'scope': f['scope'], 'name': f['name'], 'type': DIDType.FILE} for f in files]
+
+        first_pfns = [list(replica['pfns']) for replica in list_replicas(dids=dids, session=db_session)]
+        protocols = _get_cached_list_replicas_protocols(rse_id=rse_id, domain='wan', schemes=None, additional_schemes=[], session=db_session)
+        assert protocols
+        assert [list(replica['pfns']) for replica in list_replicas(dids=dids, session=db_session)] == first_pfns
+        assert _get_cached_list_replicas_protocols(rse_id=rse_id, domain='wan', schemes=None, additional_schemes=[], session=db_session) is protocols
+
+        # A change of the RSE settings results in new protocol objects
+        rse_info = dict(rsemgr.get_rse_info(rse_id=rse_id, session=db_session))
+        rse_info['deterministic'] = not rse_info['deterministic']
+        with mock.patch('rucio.core.replica.rsemgr.get_rse_info', return_value=rse_info):
+            assert _get_cached_list_replicas_protocols(rse_id=rse_id, domain='wan', schemes=None, additional_schemes=[], session=db_session) is not protocols
+
+    def test_list_replicas_pfns_batch_failure(self, rse_factory, mock_scope, root_account, db_session):
+        """ REPLICA (CORE): A failing lfn doesn't prevent the pfns of the other files of the batch to be built """
+        _, rse_id = rse_factory.make_mock_rse()
+        files = [{'scope': mock_scope, 'name': did_name_generator('file'), 'bytes': 1, 'adler32': '0cc737eb'} for _ in range(3)]
+        add_replicas(rse_id=rse_id, files=files, account=root_account, ignore_availability=True, session=db_session)
+        dids = [{'scope': f['scope'], 'name': f['name'], 'type': DIDType.FILE} for f in files]
+
+        [(_, protocol, _)] = _get_cached_list_replicas_protocols(rse_id=rse_id, domain='wan', schemes=None, additional_schemes=[], session=db_session)
+        lfns2pfns = type(protocol).lfns2pfns
+        failing_name = files[0]['name']
+
+        def _lfns2pfns(self, lfns):
+            if any(lfn['name'] == failing_name for lfn in ([lfns] if isinstance(lfns, dict) else lfns)):
+                raise ValueError('Cannot build the pfn of %s' % failing_name)
+            return lfns2pfns(self, lfns)
+
+        with mock.patch.object(type(protocol), 'lfns2pfns', autospec=True, side_effect=_lfns2pfns):
+            replicas = {replica['name']: replica for replica in list_replicas(dids=dids, domain='wan', session=db_session)}
+        assert not replicas[failing_name]['pfns']
+        assert all(replicas[f['name']]['pfns'] for f in files[1:])
+
     @pytest.mark.parametrize(
         "params",
         [
@@ -320,6 +376,29 @@ class TestReplicaCore:
         for i in range(0, nbfiles - 1):
             assert get_replica_atime({'scope': files2[i]['scope'], 'name': files2[i]['name'], 'rse_id': rse_id}) is None
 
+    def test_touch_replicas_bulk(self, rse_factory, mock_scope, root_account):
+        """ REPLICA (CORE): Touch replicas in bulk, coalescing repeated accesses"""
+        _, rse_id = rse_factory.make_mock_rse()
+
+        files = [{'scope': mock_scope, 'name': did_name_generator('file'), 'bytes': 1, 'adler32': '0cc737eb'} for _ in range(3)]
+        add_replicas(rse_id=rse_id, files=files, account=root_account, ignore_availability=True)
+
+        now = datetime.utcnow()
+        now -= timedelta(microseconds=now.microsecond)
+        earlier = now - timedelta(hours=1)
+
+        accesses = [{'scope': f['scope'], 'name': f['name'], 'rse_id': rse_id, 'accessed_at': now} for f in files[:2]]
+        accesses.append({'scope': files[0]['scope'], 'name': files[0]['name'], 'rse_id': rse_id, 'accessed_at': earlier})
+        # A replica which doesn't exist is ignored
+        accesses.append({'scope': mock_scope, 'name': did_name_generator('file'), 'rse_id': rse_id, 'accessed_at': now})
+
+        assert touch_replicas(accesses) == []
+
+        for f in files[:2]:
+            assert now == get_replica_atime({'scope': f['scope'], 'name': f['name'], 'rse_id': rse_id})
+            assert now == get_did_atime(scope=mock_scope, name=f['name'])
+        assert get_replica_atime({'scope': files[2]['scope'], 'name': files[2]['name'], 'rse_id': rse_id}) is None
+
     def test_list_replicas_all_states(self, rse_factory, mock_scope, root_account):
         """ REPLICA (CORE): list file replicas with all_states"""
         _, rse1_id = rse_factory.make_mock_rse()
@@ -645,7 +724,7 @@ class TestReplicaCore:
         assert cov[rse3_id] == 500
 
     @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-        'rucio.core.rse_expression_parser.REGION',
+        'rucio.core.rse_attribute_index.REGION',
     ]}], indirect=True)
     def test_list_replicas_rse_filter(self, rse_factory, mock_scope, root_account, caches_mock):
         """ REPLICA (CORE): test rse filter for list replicas """
@@ -20,10 +20,10 @@ from time import sleep
 
 import pytest
 
-from rucio.core import rse_expression_parser
 from rucio.core.did import set_metadata
 from rucio.core.replica import list_bad_replicas_status, list_replicas, update_replica_state
 from rucio.core.rse import add_rse_attribute
+from rucio.core.rse_attribute_index import RSE_ATTRIBUTE_INDEX
 from rucio.daemons.replicarecoverer.suspicious_replica_recoverer import run, stop
 from rucio.db.sqla.constants import BadFilesStatus, DIDType, ReplicaState
 from rucio.tests.common import execute
@@ -133,7 +133,7 @@ class TestReplicaRecoverer:
         remove(self.tmp_file13)
 
         # Reset the cache to include the new RSEs
-        rse_expression_parser.REGION.invalidate()
+        RSE_ATTRIBUTE_INDEX.invalidate()
 
         # Gather replica info
         replicalist_scope_mock = list(list_replicas(dids=self.listdids_mock))
@@ -553,7 +553,7 @@ def test_vo_agnostic_rules(file_config_mock, replica_client, rse_factory, scope_
         assert exitcode == 0
 
     remove(tmp_file_delare_bad)
-    rse_expression_parser.REGION.invalidate()
+    RSE_ATTRIBUTE_INDEX.invalidate()
 
     update_replica_state(rse4recovery_id, scope_declarebad, tmp_file_delare_bad.name, ReplicaState.UNAVAILABLE)
     replical_declare_bad = list(list_replicas(dids=replicas_without_types))
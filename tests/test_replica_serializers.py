@@ -0,0 +1,81 @@
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+from rucio.common.exception import InvalidObject
+from rucio.web.rest.flaskapi.v1.replica_serializers import CHUNKED_SERIALIZER, SIMPLE_SERIALIZER, generate_json_response, generate_metalink_response, get_replica_serializer
+
+
+def _rfiles(nb_files):
+    for i in range(nb_files):
+        yield {
+            'scope': 'mock',
+            'name': f'file_{i}',
+            'bytes': i,
+            'adler32': '0cc737eb',
+            'md5': None if i % 2 else 'd41d8cd98f00b204e9800998ecf8427e',
+            'parents': ['mock:dataset_1'] if i % 3 else [],
+            'pfns': {
+                f'root://host{rse}.example.com:1094/prefix/mock/file_{i}?a=1&b=2': {
+                    'rse': f'RSE{rse}',
+                    'domain': 'wan',
+                    'priority': rse + 1,
+                    'client_extract': False,
+                }
+                for rse in range(3)
+            },
+        }
+
+
+@pytest.mark.parametrize('detailed_url', [True, False])
+@pytest.mark.parametrize('nb_files', [0, 1, 500])
+def test_metalink_serializers(nb_files, detailed_url):
+    """ REPLICA (REST): the chunked and simple metalink serializers produce the same output """
+    simple = list(generate_metalink_response(_rfiles(nb_files), 'generic', detailed_url=detailed_url, serializer=SIMPLE_SERIALIZER))
+    chunked = list(generate_metalink_response(_rfiles(nb_files), 'generic', detailed_url=detailed_url, serializer=CHUNKED_SERIALIZER, chunk_size=4096))
+    assert ''.join(chunked) == ''.join(simple)
+    assert len(chunked) <= len(simple)
+    assert all(len(chunk) < 2 * 4096 for chunk in chunked)
+
+    root = ElementTree.fromstring(''.join(chunked))
+    assert len(root) == nb_files
+
+
+def test_json_serializers():
+    """ REPLICA (REST): the chunked and simple json serializers produce the same output """
+    simple = ''.join(generate_json_response(_rfiles(500), serializer=SIMPLE_SERIALIZER))
+    chunked = ''.join(generate_json_response(_rfiles(500), serializer=CHUNKED_SERIALIZER, chunk_size=4096))
+    assert chunked == simple
+    assert [json.loads(line)['name'] for line in chunked.splitlines()] == [f'file_{i}' for i in range(500)]
+    assert list(generate_json_response([], serializer=CHUNKED_SERIALIZER)) == []
+
+
+def test_metalink_serializer_escapes_names():
+    """ REPLICA (REST): the chunked metalink serializer generates valid XML for any file name """
+    rfile = next(_rfiles(1))
+    rfile['name'] = 'a&b<c>"d'
+    root = ElementTree.fromstring(''.join(generate_metalink_response([rfile], 'generic', serializer=CHUNKED_SERIALIZER)))
+    [file_element] = root
+    assert file_element.attrib['name'] == 'a&b<c>"d'
+
+
+def test_get_replica_serializer():
+    """ REPLICA (REST): unknown serializers are refused """
+    assert get_replica_serializer(SIMPLE_SERIALIZER) == SIMPLE_SERIALIZER
+    with pytest.raises(InvalidObject):
+        get_replica_serializer('unknown')
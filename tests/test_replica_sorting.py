@@ -29,6 +29,7 @@ from rucio.common.utils import parse_replicas_from_string
 from rucio.core import replica_sorter, rse_expression_parser
 from rucio.core.replica import add_replicas, delete_replicas
 from rucio.core.rse import add_protocol, add_rse, add_rse_attribute, del_rse, del_rse_attribute
+from rucio.core.rse_attribute_index import RSE_ATTRIBUTE_INDEX
 from rucio.tests.common import Mime, accept, auth, headers, rse_name_generator, vohdr
 
 from .inputs import GEOIP_LITE2_CITY_TEST_DB
@@ -114,7 +115,7 @@ def protocols_setup(vo, root_account, mock_scope):
         add_replicas(rse_id=rse_info[idx]['id'], files=files, account=root_account)
 
     # invalidate cache for parse_expression('site=…')
-    rse_expression_parser.REGION.invalidate()
+    RSE_ATTRIBUTE_INDEX.invalidate()
 
     # check sites
     for idx in range(len(rse_info)):
@@ -255,13 +256,16 @@ def test_sort_geoip_wan(vo, rest_client, auth_token, protocols_setup, content_ty
     n = 10
     nmap = {}
 
-    def fake_get_distance(se1, se2, *args, **kwargs):
+    def fake_get_distances(hostnames, client_location, *args, **kwargs):
         nonlocal n, nmap
-        n = n - 1
-        print("fake_get_distance", {'se1': se1, 'se2': se2, 'n': n})
-        assert se1, 'pfn host must be se1 for this test'
-        nmap[se1] = n
-        return n
+        distances = {}
+        for se1 in hostnames:
+            n = n - 1
+            print("fake_get_distances", {'se1': se1, 'client_location': client_location, 'n': n})
+            assert se1, 'pfn host must be se1 for this test'
+            nmap[se1] = n
+            distances[se1] = n
+        return distances
 
     data = {
         'dids': [{'scope': f['scope'].external, 'name': f['name'], 'type': 'FILE'} for f in protocols_setup['files']],
@@ -269,7 +273,7 @@ def test_sort_geoip_wan(vo, rest_client, auth_token, protocols_setup, content_ty
         'sort': 'geoip',
     }
 
-    with mock.patch('rucio.core.replica_sorter.__get_distance', side_effect=fake_get_distance):
+    with mock.patch('rucio.core.replica_sorter.__get_distances', side_effect=fake_get_distances):
         response = rest_client.post(
             '/replicas/list',
             headers=headers(auth(auth_token), vohdr(vo), accept(content_type)),
@@ -326,13 +330,16 @@ def test_sort_geoip_lan_before_wan(vo, rest_client, auth_token, protocols_setup,
     n = 2
     nmap = {}
 
-    def fake_get_distance(se1, se2, *args, **kwargs):
+    def fake_get_distances(hostnames, client_location, *args, **kwargs):
         nonlocal n, nmap
-        n = n - 1
-        print("fake_get_distance", {'se1': se1, 'se2': se2, 'n': n})
-        assert se1, 'pfn host must be se1 for this test'
-        nmap[se1] = n
-        return n
+        distances = {}
+        for se1 in hostnames:
+            n = n - 1
+            print("fake_get_distances", {'se1': se1, 'client_location': client_location, 'n': n})
+            assert se1, 'pfn host must be se1 for this test'
+            nmap[se1] = n
+            distances[se1] = n
+        return distances
 
     data = {
         'dids': [{'scope': f['scope'].external, 'name': f['name'], 'type': 'FILE'} for f in protocols_setup['files']],
@@ -342,9 +349,9 @@ def test_sort_geoip_lan_before_wan(vo, rest_client, auth_token, protocols_setup,
     }
 
     # invalidate cache for parse_expression('site=…')
-    rse_expression_parser.REGION.invalidate()
+    RSE_ATTRIBUTE_INDEX.invalidate()
 
-    with mock.patch('rucio.core.replica_sorter.__get_distance', side_effect=fake_get_distance):
+    with mock.patch('rucio.core.replica_sorter.__get_distances', side_effect=fake_get_distances):
         response = rest_client.post(
             '/replicas/list',
             headers=headers(auth(auth_token), vohdr(vo), accept(content_type)),
@@ -415,7 +422,7 @@ def test_not_sorting_lan_replicas(vo, rest_client, auth_token, protocols_setup,
         return []
 
     # invalidate cache for parse_expression('site=…')
-    rse_expression_parser.REGION.invalidate()
+    RSE_ATTRIBUTE_INDEX.invalidate()
 
     with mock.patch('rucio.web.rest.flaskapi.v1.replicas.sort_replicas', side_effect=fake_sort_replicas):
         response = rest_client.post(
@@ -464,7 +471,7 @@ def test_sort_geoip_address_not_found_error(vo, rest_client, auth_token, protoco
         'sort': 'geoip',
     }
 
-    # invalidate cache for __get_distance so that __get_geoip_db is called
+    # invalidate cache for __get_distances so that __get_geoip_db is called
     replica_sorter.REGION.invalidate()
 
     with mock.patch('rucio.core.replica_sorter.__geoip_db', side_effect=fake_get_geoip_db) as get_geoip_db_mock:
@@ -483,7 +490,7 @@ def test_sort_geoip_address_not_found_error(vo, rest_client, auth_token, protoco
     # now set config to not ignore errors
     core_config.set("core", "geoip_ignore_error", False)
     
-    # invalidate cache for __get_distance so that __get_geoip_db is called
+    # invalidate cache for __get_distances so that __get_geoip_db is called
     replica_sorter.REGION.invalidate()
 
     with mock.patch('rucio.core.replica_sorter.__geoip_db', side_effect=fake_get_geoip_db) as get_geoip_db_mock:
@@ -508,7 +515,7 @@ def test_get_sorted_list_replicas_no_metalink(vo, rest_client, auth_token, proto
     global replica_singleton
     replica_singleton = None
 
-    def _reverse_geoip(dictreplica, client_location, ignore_error=False):
+    def _reverse_geoip(dictreplica, client_location, ignore_error=False, distance_cache=None):
         global replica_singleton
         if replica_singleton is None:
             replica_singleton = list(dictreplica.keys())
@@ -529,3 +536,48 @@ def test_get_sorted_list_replicas_no_metalink(vo, rest_client, auth_token, proto
         initial_priorities = _extract_priorities(get_replicas())
         updated_priorities = _extract_priorities(get_replicas())
         assert initial_priorities != updated_priorities, "The replica list is not sorted according to the priorities."
+
+
+def test_sort_geoip_distance_cache(mock_geoip_db, mock_get_lat_long):
+    """Replica sorter: the host coordinates and the distances are computed once per client location"""
+    replica_sorter.REGION.invalidate()
+    client_location = {'ip': LOCATION_TO_IP['Switzerland'], 'fqdn': None, 'site': None}
+    files = [
+        {f'root://{rse_info["address"]}:1094//file_{i}': None for rse_info in base_rse_info}
+        for i in range(3)
+    ]
+    distance_cache = {}
+    with mock.patch('rucio.core.replica_sorter.__get_lat_long', wraps=replica_sorter.__dict__['__get_lat_long']) as get_lat_long:
+        sorted_files = [replica_sorter.sort_geoip(dictreplica, client_location, distance_cache=distance_cache) for dictreplica in files]
+        # one lookup for the client of each sort, one lookup for each host over all the sorts
+        assert get_lat_long.call_count == 1 + len(base_rse_info)
+    assert set(distance_cache) == {rse_info['address'] for rse_info in base_rse_info}
+    assert distance_cache['aperture.com'] < distance_cache['blackmesa.com']
+    for replicas in sorted_files:
+        assert [urlparse(pfn).hostname for pfn in replicas] == ['aperture.com', 'blackmesa.com']
+
+    # a second request starts with an empty distance cache but reuses the coordinates of the hosts
+    with mock.patch('rucio.core.replica_sorter.__get_lat_long', wraps=replica_sorter.__dict__['__get_lat_long']) as get_lat_long:
+        assert replica_sorter.sort_geoip(files[0], client_location) == sorted_files[0]
+        assert get_lat_long.call_count == 1
+
+
+def test_sort_custom_distance_cache():
+    """Replica sorter: the custom distance table is downloaded once and looked up once per RSE"""
+    replica_sorter.REGION.invalidate()
+    client_location = {'ip': LOCATION_TO_IP['Switzerland'], 'fqdn': None, 'site': 'APERTURE'}
+    table = {('RSE_NEAR', 'APERTURE'): 0.1, ('RSE_FAR', 'APERTURE'): 0.9}
+    dictreplica = {
+        'root://unknown.com//file': ('file', 'root', 'RSE_UNKNOWN', 0),
+        'root://far.com//file': ('file', 'root', 'RSE_FAR', 0),
+        'root://near.com//file': ('file', 'root', 'RSE_NEAR', 0),
+    }
+    distance_cache = {}
+    with mock.patch('rucio.core.replica_sorter.__download_custom_distance_table', return_value=table) as download:
+        for _ in range(2):
+            assert replica_sorter.sort_custom(dictreplica, client_location, distance_cache=distance_cache) == [
+                'root://near.com//file', 'root://far.com//file', 'root://unknown.com//file']
+        assert replica_sorter.sort_custom(dictreplica, client_location)[0] == 'root://near.com//file'
+        assert download.call_count == 1
+    assert distance_cache == {'RSE_NEAR': 0.1, 'RSE_FAR': 0.9, 'RSE_UNKNOWN': 1.0}
+    replica_sorter.REGION.invalidate()
@@ -13,8 +13,9 @@
 # limitations under the License.
 
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Union
+from unittest import mock
 
 import pytest
 
@@ -23,7 +24,7 @@ from rucio.common.constants import RseAttr
 from rucio.common.utils import generate_uuid, parse_response
 from rucio.core.distance import add_distance
 from rucio.core.replica import add_replica
-from rucio.core.request import TransferStatsManager, get_request_by_did, list_requests, list_requests_history, queue_requests, set_transfer_limit
+from rucio.core.request import TransferStatsCache, TransferStatsManager, get_request_by_did, get_request_metrics, list_requests, list_requests_history, queue_requests, set_transfer_limit
 from rucio.core.rse import add_rse_attribute
 from rucio.db.sqla import constants, models
 from rucio.db.sqla.constants import RequestState, RequestType
@@ -371,3 +372,60 @@ def test_api_metrics(vo, rest_client, auth_token, rse_factory, did_factory, root
     response = json.loads(response.get_data(as_text=True))
     metric = response.get(f'{src_rse}:{dst_rse}')
     assert metric is not None
+
+
+def test_transfer_stats_cache(rse_factory, db_session):
+    """ The in-memory rollups load the new samples incrementally and sum the same totals as the database """
+    _, src_rse_id = rse_factory.make_mock_rse()
+    _, dst_rse_id = rse_factory.make_mock_rse()
+    stats_cache = TransferStatsCache()
+    now = datetime.utcnow()
+    raw_t = datetime.fromtimestamp(int((now - timedelta(minutes=30)).timestamp()) // 300 * 300)
+    hour_t = datetime.fromtimestamp(int((now - timedelta(hours=3)).timestamp()) // 3600 * 3600)
+
+    def _add_sample(resolution, timestamp, activity, files_done, files_failed):
+        models.TransferStats(resolution=resolution.total_seconds(), timestamp=timestamp, dest_rse_id=dst_rse_id, src_rse_id=src_rse_id,
+                             activity=activity, files_done=files_done, bytes_done=10 * files_done, files_failed=files_failed).save(session=db_session)
+        db_session.commit()
+
+    def _totals(older_t, by_activity=True):
+        return sorted(tuple(stat.values()) for stat in stats_cache.totals(older_t=older_t, src_rse_id=src_rse_id, by_activity=by_activity, session=db_session))
+
+    # the raw samples of two daemons are summed, a down-sample created twice is only counted once
+    _add_sample(timedelta(minutes=5), raw_t, 'act1', files_done=1, files_failed=1)
+    _add_sample(timedelta(minutes=5), raw_t, 'act1', files_done=2, files_failed=0)
+    _add_sample(timedelta(hours=1), hour_t, 'act2', files_done=4, files_failed=1)
+    _add_sample(timedelta(hours=1), hour_t, 'act2', files_done=4, files_failed=1)
+    assert _totals(now - timedelta(hours=1)) == [(src_rse_id, dst_rse_id, 'act1', 1, 3, 30)]
+    assert _totals(now - timedelta(hours=6)) == [(src_rse_id, dst_rse_id, 'act1', 1, 3, 30), (src_rse_id, dst_rse_id, 'act2', 1, 4, 40)]
+    assert _totals(now - timedelta(hours=6), by_activity=False) == [(src_rse_id, dst_rse_id, 2, 7, 70)]
+
+    # a sample saved late, for an interval already in the buffers, is loaded by the next refresh
+    _add_sample(timedelta(minutes=5), raw_t - timedelta(minutes=5), 'act1', files_done=0, files_failed=2)
+    assert _totals(now - timedelta(hours=1)) == [(src_rse_id, dst_rse_id, 'act1', 3, 3, 30)]
+
+    # the totals match the ones aggregated by the database
+    db_totals = {}
+    for stat in TransferStatsManager().load_totals(older_t=now - timedelta(hours=6), src_rse_id=src_rse_id, session=db_session):
+        total = db_totals.setdefault((stat['src_rse_id'], stat['dest_rse_id'], stat['activity']), [0, 0, 0])
+        for i, field in enumerate(('files_failed', 'files_done', 'bytes_done')):
+            total[i] += stat[field]
+    assert sorted(key + tuple(total) for key, total in db_totals.items()) == _totals(now - timedelta(hours=6))
+
+
+def test_request_metrics_use_stats_cache(rse_factory, db_session):
+    """ The request metrics of the last hours are summed from the in-memory rollups, without loading the totals from the database """
+    src_rse, src_rse_id = rse_factory.make_mock_rse()
+    dst_rse, dst_rse_id = rse_factory.make_mock_rse()
+    raw_t = datetime.fromtimestamp(int((datetime.utcnow() - timedelta(minutes=30)).timestamp()) // 300 * 300)
+    models.TransferStats(resolution=timedelta(minutes=5).total_seconds(), timestamp=raw_t, dest_rse_id=dst_rse_id, src_rse_id=src_rse_id,
+                         activity='act1', files_done=2, bytes_done=20, files_failed=1).save(session=db_session)
+    db_session.commit()
+
+    with mock.patch.object(TransferStatsManager, 'load_totals', autospec=True) as load_totals:
+        metrics = get_request_metrics(src_rse_id=src_rse_id, dest_rse_id=dst_rse_id, session=db_session)
+    load_totals.assert_not_called()
+    metric = metrics[f'{src_rse}:{dst_rse}']
+    assert metric['files']['done']['act1'] == {'1h': 2, '6h': 2}
+    assert metric['files']['failed']['act1'] == {'1h': 1, '6h': 1}
+    assert metric['bytes']['done-total-6h'] == 20
@@ -19,6 +19,8 @@ import pytest
 
 from rucio.common.exception import InvalidRSEExpression, RSEWriteBlocked
 from rucio.core import rse, rse_expression_parser
+from rucio.core.rse_attribute_index import RSE_ATTRIBUTE_INDEX, RSEAttributeSnapshot
+from rucio.db.sqla.constants import RSEType
 
 
 def attribute_name_generator(size=10):
@@ -105,7 +107,7 @@ class TestRSEExpressionParserCore:
     def test_all_rse(self):
         """ RSE_EXPRESSION_PARSER (CORE) Test reference on all RSE """
         all_rses = rse.list_rses(filters=self.filter['filter_'])
-        rse_expression_parser.REGION.invalidate()
+        RSE_ATTRIBUTE_INDEX.invalidate()
         value = rse_expression_parser.parse_expression("*", **self.filter)
         for rse_ in self.already_existing_rses:
             if rse_ in all_rses:
@@ -199,6 +201,30 @@ class TestRSEExpressionParserCore:
         filters['availability_write'] = False
         pytest.raises(RSEWriteBlocked, rse_expression_parser.parse_expression, "%s=de" % attribute, filters)
 
+    def test_rse_column_reference(self, rse_factory):
+        """ RSE_EXPRESSION_PARSER (CORE) Test references on the columns of the RSE table """
+        tape_name, tape_id = rse_factory.make_mock_rse(rse_type=RSEType.TAPE, deterministic=False)
+        disk_name, disk_id = rse_factory.make_mock_rse()
+
+        attribute = attribute_name_generator()
+
+        rse.add_rse_attribute(tape_id, attribute, "de")
+        rse.add_rse_attribute(disk_id, attribute, "de")
+
+        value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression("%s=de&rse_type=TAPE" % attribute, **self.filter)]
+        assert value == [tape_id]
+        value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression("%s=de&rse_type=DISK" % attribute, **self.filter)]
+        assert value == [disk_id]
+        value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression("%s=de&deterministic=false" % attribute, **self.filter)]
+        assert value == [tape_id]
+        value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression("%s=de\\deterministic=False" % attribute, **self.filter)]
+        assert value == [disk_id]
+
+        # Changes of the RSE columns are visible without waiting for the index to expire
+        rse.update_rse(disk_id, {'availability_write': False})
+        value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression("%s=de&availability_write=false" % attribute, **self.filter)]
+        assert value == [disk_id]
+
     def test_numeric_operators(self):
         """ RSE_EXPRESSION_PARSER (CORE) Test RSE attributes with numeric operations """
         value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression("%s<11" % self.attribute_numeric, **self.filter)]
@@ -214,6 +240,51 @@ class TestRSEExpressionParserCore:
         expected = sorted([self.rse4_id, self.rse5_id])
         assert value == expected
 
+    def test_attribute_index_incremental_update(self):
+        """ RSE_EXPRESSION_PARSER (CORE) Test attribute changes are visible without rebuilding the index """
+        tag = attribute_name_generator()
+        rse.add_rse_attribute(self.rse1_id, tag, True)
+        value = [t_rse['id'] for t_rse in rse_expression_parser.parse_expression(tag, **self.filter)]
+        assert value == [self.rse1_id]
+        rse.del_rse_attribute(self.rse1_id, tag)
+        with pytest.raises(InvalidRSEExpression):
+            rse_expression_parser.parse_expression(tag, **self.filter)
+
+    def test_attribute_index_rollback(self, db_session):
+        """ RSE_EXPRESSION_PARSER (CORE) Test attribute changes of a rolled back transaction never reach the index """
+        tag = attribute_name_generator()
+        rse_expression_parser.parse_expression(self.tag1, **self.filter)
+        rse.add_rse_attribute(self.rse1_id, tag, True, session=db_session)
+        db_session.rollback()
+        with pytest.raises(InvalidRSEExpression):
+            rse_expression_parser.parse_expression(tag, **self.filter)
+
+
+def test_compiled_expression_evaluation():
+    """ RSE_EXPRESSION_PARSER (CORE) Test evaluation of compiled expressions on an attribute snapshot """
+    rses = [{'id': 'id%d' % i, 'rse': 'RSE%d' % i} for i in range(4)]
+    attributes = [('id0', 'RSE0', True), ('id1', 'RSE1', True), ('id2', 'RSE2', True), ('id3', 'RSE3', True),
+                  ('id0', 'tier', '1'), ('id1', 'tier', '2'), ('id2', 'tier', '2'), ('id3', 'tier', 'x'),
+                  ('id0', 'cloud', 'DE'), ('id1', 'cloud', 'DE'), ('id2', 'cloud', 'FR')]
+    snapshot = RSEAttributeSnapshot(rses, attributes)
+
+    def evaluate(expression):
+        return [rse_['id'] for rse_ in snapshot.iter_rses(rse_expression_parser.compile_expression(expression).evaluate(snapshot))]
+
+    assert evaluate('*') == ['id0', 'id1', 'id2', 'id3']
+    assert evaluate('RSE2') == ['id2']
+    assert evaluate('tier=2&cloud=DE') == ['id1']
+    assert evaluate('cloud=DE|cloud=FR') == ['id0', 'id1', 'id2']
+    assert evaluate('*\\(cloud=DE|RSE3)') == ['id2']
+    assert evaluate('tier<2') == ['id0']
+    assert evaluate('tier>1') == ['id1', 'id2']
+
+    snapshot.set_attribute(snapshot.positions['id3'], 'cloud', 'DE')
+    snapshot.del_attribute(snapshot.positions['id0'], 'cloud')
+    assert evaluate('cloud=DE') == ['id1', 'id3']
+    with pytest.raises(InvalidRSEExpression):
+        rse_expression_parser.compile_expression('RSE1|')
+
 
 @pytest.mark.noparallel(reason='uses pre-defined RSE')
 class TestRSEExpressionParserClient:
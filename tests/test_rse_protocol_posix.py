@@ -17,7 +17,9 @@ import shutil
 
 import pytest
 
+from rucio.common.exception import SourceNotFound
 from rucio.rse import rsemanager as mgr
+from rucio.rse.protocols.posix import Default
 from rucio.tests.common import load_test_conf_file, skip_rse_tests_with_accounts
 
 from .rsemgr_api_test import MgrTestCases
@@ -84,3 +86,25 @@ class TestRsePOSIXSymlink(MgrTestCases):
     def setup_obj(self, setup_rse_and_files, vo):
         rse_settings, tmpdir, user = setup_rse_and_files
         self.init(tmpdir=tmpdir, rse_settings=rse_settings, user=user, vo=vo)
+
+
+def test_posix_delete_and_stat_many(tmp_path):
+    """POSIX (RSE/PROTOCOLS): Stat and delete multiple files with a single protocol call"""
+    protocol = Default({'scheme': 'file', 'hostname': 'localhost', 'port': 0, 'prefix': str(tmp_path) + '/', 'auth_token': None,
+                        'impl': 'rucio.rse.protocols.posix.Default', 'extended_attributes': None, 'domains': {}},
+                       {'rse': 'MOCK-POSIX', 'deterministic': True, 'lfn2pfn_algorithm': 'hash'})
+    pfns = list(protocol.lfns2pfns([{'scope': 'user.jdoe', 'name': 'file_%d' % i} for i in range(3)]).values())
+    for pfn in pfns[:2]:
+        path = protocol.pfn2path(pfn)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x' * 10)
+
+    stats = protocol.stat_many(pfns)
+    assert stats[pfns[0]]['filesize'] == stats[pfns[1]]['filesize'] == 10
+    assert isinstance(stats[pfns[2]], Exception)
+
+    deleted = protocol.delete_many(pfns)
+    assert deleted[pfns[0]] is True and deleted[pfns[1]] is True
+    assert isinstance(deleted[pfns[2]], SourceNotFound)
+    assert not any(os.path.exists(protocol.pfn2path(pfn)) for pfn in pfns)
@@ -17,8 +17,9 @@ import os
 import pytest
 import requests
 
-from rucio.common.exception import FileReplicaAlreadyExists
+from rucio.common.exception import FileReplicaAlreadyExists, SourceNotFound
 from rucio.rse import rsemanager
+from rucio.rse.protocols.webdav import Default
 from rucio.tests.common import load_test_conf_file, skip_rse_tests_with_accounts
 
 from .rsemgr_api_test import MgrTestCases
@@ -70,3 +71,41 @@ class TestRseWebDAV(MgrTestCases):
     def setup_obj(self, setup_rse_and_files, vo):
         rse_settings, tmpdir, user = setup_rse_and_files
         self.init(tmpdir=tmpdir, rse_settings=rse_settings, user=user, vo=vo)
+
+
+def test_webdav_stat_many_one_propfind_per_directory():
+    """WebDAV (RSE/PROTOCOLS): Stat multiple files with one PROPFIND request per directory"""
+    propfind = ('<?xml version="1.0" encoding="utf-8"?><d:multistatus xmlns:d="DAV:">'
+                '<d:response><d:href>/webdav/user/jdoe/aa/bb/</d:href></d:response>'
+                '<d:response><d:href>/webdav/user/jdoe/aa/bb/file_1</d:href>'
+                '<d:propstat><d:prop><d:getcontentlength>42</d:getcontentlength></d:prop></d:propstat></d:response>'
+                '<d:response><d:href>/webdav/user/jdoe/aa/bb/file_2</d:href>'
+                '<d:propstat><d:prop><d:getcontentlength>43</d:getcontentlength></d:prop></d:propstat></d:response>'
+                '</d:multistatus>')
+    requested = []
+
+    class _Session:
+        def request(self, method, url, **kwargs):
+            requested.append((method, url))
+            response = requests.Response()
+            if url.endswith('/aa/bb/'):
+                response.status_code = 207
+                response._content = propfind.encode()
+            else:
+                response.status_code = 404
+            return response
+
+    protocol = Default({'scheme': 'https', 'hostname': 'webdav.example.com', 'port': 443, 'prefix': '/webdav/', 'auth_token': None,
+                        'impl': 'rucio.rse.protocols.webdav.Default', 'extended_attributes': None, 'domains': {}},
+                       {'rse': 'MOCK-WEBDAV', 'deterministic': True, 'lfn2pfn_algorithm': 'hash'})
+    protocol.session, protocol.timeout, protocol.cert = _Session(), 10, None
+
+    base = 'https://webdav.example.com:443/webdav/user/jdoe/'
+    pfns = [base + 'aa/bb/file_1', base + 'aa/bb/file_2', base + 'aa/bb/file_3', base + 'cc/dd/file_4']
+    stats = protocol.stat_many(pfns)
+
+    assert sorted(requested) == [('PROPFIND', base + 'aa/bb/'), ('PROPFIND', base + 'cc/dd/')]
+    assert stats[pfns[0]] == {'filesize': 42}
+    assert stats[pfns[1]] == {'filesize': 43}
+    assert isinstance(stats[pfns[2]], SourceNotFound)
+    assert isinstance(stats[pfns[3]], SourceNotFound)
@@ -154,3 +154,47 @@ class TestRSESelectorDynamic:
         rse_selector.select_rse(10, [rse2_id], copies=1)
         rses = rse_selector.select_rse(5, [], copies=2)
         assert len(rses) == 2
+
+
+class TestRSESelectorBatch:
+
+    def test_1(self, random_account, test_rses):
+        # the quota is decreased between the groups of a batch -> each RSE takes 2 groups, then error
+        rse1_name, rse1_id, rse1, rse2_name, rse2_id, rse2 = test_rses
+        set_local_account_limit(account=random_account, rse_id=rse1_id, bytes_=20)
+        set_local_account_limit(account=random_account, rse_id=rse2_id, bytes_=20)
+        rse_selector = RSESelector(random_account, [rse1, rse2], None, 1)
+        results = rse_selector.select_rses([{'size': 9, 'preferred_rse_ids': []} for _ in range(4)])
+        selected = [rse_id for result in results for rse_id, _, _ in result]
+        assert sorted(selected) == sorted([rse1_id, rse1_id, rse2_id, rse2_id])
+        with pytest.raises(InsufficientAccountLimit):
+            rse_selector.select_rses([{'size': 9, 'preferred_rse_ids': []}])
+
+    def test_2(self, random_account, test_rses):
+        # blocklist and preferred RSEs are applied per group, with enough quota for the whole batch
+        rse1_name, rse1_id, rse1, rse2_name, rse2_id, rse2 = test_rses
+        set_local_account_limit(account=random_account, rse_id=rse1_id, bytes_=-1)
+        set_local_account_limit(account=random_account, rse_id=rse2_id, bytes_=-1)
+        rse_selector = RSESelector(random_account, [rse1, rse2], None, 1)
+        results = rse_selector.select_rses([{'size': 10, 'preferred_rse_ids': [], 'blocklist': [rse1_id]},
+                                            {'size': 10, 'preferred_rse_ids': [rse1_id]},
+                                            {'size': 10, 'preferred_rse_ids': [], 'copies': 2}])
+        assert results[0] == [(rse2_id, False, True)]
+        assert results[1] == [(rse1_id, False, True)]
+        assert sorted(rse_id for rse_id, _, _ in results[2]) == sorted([rse1_id, rse2_id])
+        with pytest.raises(InsufficientTargetRSEs):
+            rse_selector.select_rses([{'size': 10, 'preferred_rse_ids': [], 'blocklist': [rse1_id, rse2_id]}])
+
+    def test_3(self, random_account, rse_factory):
+        # same seed -> same selection
+        rses = []
+        for _ in range(5):
+            _, rse_id = rse_factory.make_mock_rse()
+            set_local_account_limit(account=random_account, rse_id=rse_id, bytes_=-1)
+            rses.append({'id': rse_id, 'staging_area': False})
+        selections = []
+        for _ in range(2):
+            rse_selector = RSESelector(random_account, rses, None, 2, seed=42)
+            selections.append(rse_selector.select_rses([{'size': 1, 'preferred_rse_ids': []} for _ in range(20)]))
+        assert selections[0] == selections[1]
+        assert len({rse_id for result in selections[0] for rse_id, _, _ in result}) > 1
@@ -59,7 +59,7 @@ from rucio.daemons.abacus.account import account_update
 from rucio.daemons.abacus.rse import rse_update
 from rucio.daemons.judge.evaluator import re_evaluator
 from rucio.db.sqla import models
-from rucio.db.sqla.constants import OBSOLETE, DIDType, LockState, RuleState
+from rucio.db.sqla.constants import OBSOLETE, DIDType, LockState, ReplicaState, RuleState
 from rucio.db.sqla.session import transactional_session
 from rucio.gateway.account import add_account
 from rucio.tests.common import account_name_generator, did_name_generator, rse_name_generator
@@ -175,7 +175,7 @@ def setup_class(request, vo, root_account, jdoe_account, rse_factory):
 class TestCore:
 
     @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-        'rucio.core.rse_expression_parser.REGION'
+        'rucio.core.rse_attribute_index.REGION'
     ]}], indirect=True)
     @pytest.mark.parametrize(
         "delete_rse", [True, False]
@@ -708,6 +708,42 @@ class TestCore:
         assert (rse_counter_before['bytes'] + 3 * 100 == rse_counter_after['bytes'])
         assert (rse_counter_before['files'] + 3 == rse_counter_after['files'])
 
+    @pytest.mark.noparallel(reason='runs abacus account and rse update')
+    def test_add_rule_dataset_none_bulk(self, mock_scope, did_factory, jdoe_account):
+        """ REPLICATION RULE (CORE): Test the replicas, locks, requests and counters created in bulk by a rule on a dataset, NONE Grouping"""
+
+        account_update(once=True)
+        rse_update(once=True)
+        account_counter_before = get_usage(self.rse2_id, jdoe_account)
+        rse_counter_before = get_rse_counter(self.rse2_id)
+
+        files = create_files(3, mock_scope, self.rse1_id, bytes_=100)
+        dataset = did_factory.random_dataset_did()
+        add_did(did_type=DIDType.DATASET, account=jdoe_account, **dataset)
+        attach_dids(dids=files, account=jdoe_account, **dataset)
+
+        rule_id = add_rule(dids=[dataset], account=jdoe_account, copies=1, rse_expression=self.rse2, grouping='NONE', weight=None, lifetime=None, locked=False, subscription_id=None)[0]
+
+        for file in files:
+            replica = get_replica(rse_id=self.rse2_id, scope=file['scope'], name=file['name'])
+            assert replica['state'] == ReplicaState.COPYING
+            assert replica['lock_cnt'] == 1
+            assert replica['tombstone'] is None
+            assert [(lock['rse_id'], lock['state']) for lock in get_replica_locks(scope=file['scope'], name=file['name']) if lock['rule_id'] == rule_id] == [(self.rse2_id, LockState.REPLICATING)]
+            request = get_request_by_did(scope=file['scope'], name=file['name'], rse_id=self.rse2_id)
+            assert request['rule_id'] == rule_id
+            assert request['requested_at'] is None
+        rule = get_rule(rule_id)
+        assert (rule['locks_replicating_cnt'], rule['locks_ok_cnt'], rule['locks_stuck_cnt']) == (3, 0, 0)
+        assert rule['state'] == RuleState.REPLICATING
+
+        account_update(once=True)
+        rse_update(once=True)
+        account_counter_after = get_usage(self.rse2_id, jdoe_account)
+        rse_counter_after = get_rse_counter(self.rse2_id)
+        assert (account_counter_before['bytes'] + 3 * 100, account_counter_before['files'] + 3) == (account_counter_after['bytes'], account_counter_after['files'])
+        assert (rse_counter_before['bytes'] + 3 * 100, rse_counter_before['files'] + 3) == (rse_counter_after['bytes'], rse_counter_after['files'])
+
     def test_rule_add_fails_account_local_limit(self, mock_scope, did_factory, jdoe_account):
         """ REPLICATION RULE (CORE): Test if a rule fails correctly when local account limit conflict"""
 
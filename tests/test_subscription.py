@@ -14,7 +14,7 @@
 
 import time
 from datetime import datetime
-from json import loads
+from json import dumps, loads
 from json.decoder import JSONDecodeError
 
 import pytest
@@ -31,7 +31,7 @@ from rucio.core.did import add_did, attach_dids, list_new_dids, set_new_dids, se
 from rucio.core.rse import add_rse_attribute
 from rucio.core.rule import add_rule
 from rucio.core.scope import add_scope
-from rucio.daemons.transmogrifier.transmogrifier import get_subscriptions, run
+from rucio.daemons.transmogrifier.transmogrifier import SubscriptionMatcher, get_subscriptions, run
 from rucio.db.sqla import models
 from rucio.db.sqla.constants import AccountType, DIDType, RuleState
 from rucio.db.sqla.session import read_session
@@ -841,3 +841,34 @@ class TestDaemon:
             chained_rse_type = dict_rse[chained_rse]['rse_type']
             assert chained_rse_type == 'tape'
             assert chained_site != chosen_site
+
+
+def test_subscription_matcher():
+    """ SUBSCRIPTION (DAEMON): Test the filters of the transmogrifier subscription matcher """
+    subscriptions = [
+        {'id': 'scope', 'filter': dumps({'scope': ['data1[78]'], 'pattern': r'.*\.AOD\..*', 'excluded_pattern': r'.*_sub.*'})},
+        {'id': 'meta', 'filter': dumps({'datatype': ['AOD', 'EVNT'], 'project': 'data18.*', 'did_type': 'DATASET', 'split_rule': True})},
+        {'id': 'account', 'filter': dumps({'account': ['root'], 'min_avg_file_size': 100, 'max_avg_file_size': 1000})},
+        {'id': 'missing_meta', 'filter': dumps({'unknown_key': 'value'})},
+        {'id': 'invalid', 'filter': '{"scope": ['},
+    ]
+    matcher = SubscriptionMatcher(subscriptions)
+    assert [subscription['id'] for subscription in matcher.subscriptions] == ['scope', 'meta', 'account', 'missing_meta']
+
+    def _match(scope, name, **kwargs):
+        metadata = {'hidden': False, 'account': InternalAccount('root'), 'did_type': DIDType.DATASET, 'length': None, 'bytes': None,
+                    'datatype': 'AOD', 'project': 'data18_13TeV'}
+        metadata.update(kwargs)
+        return [subscription['id'] for subscription, _ in matcher.match({'scope': InternalScope(scope), 'name': name}, metadata)]
+
+    assert _match('data18_13TeV', 'data18_13TeV.00001.AOD.r1') == ['scope', 'meta', 'account']
+    assert _match('data18_13TeV', 'data18_13TeV.00001.AOD_sub.r1') == ['meta', 'account']
+    assert _match('mc16_13TeV', 'mc16_13TeV.00001.AOD.r1', project='mc16_13TeV', datatype='HITS') == ['account']
+    assert _match('data18_13TeV', 'data18_13TeV.00001.AOD.r1', did_type=DIDType.CONTAINER, account=InternalAccount('jdoe')) == ['scope']
+    # The average file size is only checked once length and bytes are known
+    assert 'account' not in _match('data18_13TeV', 'data18_13TeV.00001.AOD.r1', length=10, bytes=100)
+    assert 'account' in _match('data18_13TeV', 'data18_13TeV.00001.AOD.r1', length=10, bytes=5000)
+    assert _match('data18_13TeV', 'data18_13TeV.00001.AOD.r1', hidden=True) == []
+    # The filters of the matching subscriptions are returned parsed
+    metadata = {'hidden': False, 'account': InternalAccount('jdoe'), 'did_type': DIDType.DATASET, 'length': None, 'bytes': None, 'datatype': 'AOD', 'project': 'data18'}
+    assert matcher.match({'scope': InternalScope('data18_13TeV'), 'name': 'x'}, metadata)[0][1]['split_rule'] is True
@@ -23,6 +23,7 @@ from rucio.core.distance import add_distance
 from rucio.core.replica import add_replica
 from rucio.core.request import (
     delete_transfer_limit,
+    get_request,
     get_request_by_did,
     queue_requests,
     release_all_waiting_requests,
@@ -32,7 +33,7 @@ from rucio.core.request import (
     release_waiting_requests_per_free_volume,
 )
 from rucio.daemons.conveyor.preparer import preparer
-from rucio.daemons.conveyor.throttler import throttler
+from rucio.daemons.conveyor.throttler import WaitingRequests, throttler
 from rucio.db.sqla import models
 from rucio.db.sqla.constants import DIDType, RequestState, RequestType, TransferLimitDirection
 from rucio.db.sqla.session import get_session, transactional_session
@@ -76,6 +77,13 @@ def _create_request(dest_rse_id, _bytes, activity, state, account, *, session):
     return request.to_dict()
 
 
+@transactional_session
+def _create_waiting_request(dest_rse_id, source_rse_id, activity, account, requested_at, *, session):
+    request = models.Request(dest_rse_id=dest_rse_id, source_rse_id=source_rse_id, activity=activity, state=RequestState.WAITING, account=account, requested_at=requested_at)
+    request.save(session=session)
+    return request.id
+
+
 @transactional_session
 def _delete_requests(scope, names, ids=None, *, session):
     session.execute(
@@ -141,6 +149,9 @@ def _add_test_replicas_and_request(request_configs, scope, account):
 @pytest.mark.usefixtures("core_config_mock", "file_config_mock")
 @pytest.mark.parametrize("file_config_mock", [{"overrides": [
     ('conveyor', 'use_preparer', 'true')
+]}, {"overrides": [
+    ('conveyor', 'use_preparer', 'true'),
+    ('conveyor', 'throttler_incremental', 'true'),
 ]}], indirect=True)
 class TestSimpleLimits:
     """
@@ -543,6 +554,9 @@ class TestSimpleLimits:
 @pytest.mark.usefixtures("core_config_mock", "file_config_mock")
 @pytest.mark.parametrize("file_config_mock", [{"overrides": [
     ('conveyor', 'use_preparer', 'true')
+]}, {"overrides": [
+    ('conveyor', 'use_preparer', 'true'),
+    ('conveyor', 'throttler_incremental', 'true'),
 ]}], indirect=True)
 class TestOverlappingLimits:
     user_activity = 'User Subscription'
@@ -1015,3 +1029,38 @@ class TestRequestCoreRelease:
         assert request['state'] == RequestState.QUEUED
         request = get_request_by_did(mock_scope, name3, dest_rse_id)
         assert request['state'] == RequestState.WAITING
+
+
+@pytest.mark.noparallel(reason='counts the waiting requests of the whole database')
+def test_waiting_requests_incremental(rse_factory, mock_scope, root_account, jdoe_account):
+    """ THROTTLER (CORE): the in-memory waiting requests follow the new waiting requests and release the oldest ones first """
+    _, source_rse_id = rse_factory.make_mock_rse()
+    _, dest_rse_id = rse_factory.make_mock_rse()
+    waiting_requests = WaitingRequests()
+
+    def _waiting_stats():
+        return sorted((str(stat.account), stat.activity, stat.counter) for stat in waiting_requests.stats() if stat.dest_rse_id == dest_rse_id)
+
+    request1 = _create_waiting_request(dest_rse_id, source_rse_id, 'act1', root_account, datetime.utcnow().replace(year=2018))
+    request2 = _create_waiting_request(dest_rse_id, source_rse_id, 'act1', jdoe_account, datetime.utcnow().replace(year=2019))
+    waiting_requests.refresh()
+    assert _waiting_stats() == [('jdoe', 'act1', 1), ('root', 'act1', 1)]
+
+    # only the new waiting requests are loaded, the known ones are not counted twice
+    request3 = _create_waiting_request(dest_rse_id, source_rse_id, 'act2', root_account, datetime.utcnow().replace(year=2017))
+    request4 = _create_waiting_request(dest_rse_id, source_rse_id, 'act1', root_account, datetime.utcnow().replace(year=2020))
+    waiting_requests.refresh()
+    assert _waiting_stats() == [('jdoe', 'act1', 1), ('root', 'act1', 2), ('root', 'act2', 1)]
+
+    # the oldest requests of all the groups are released first
+    assert waiting_requests.release(dest_rse_id=dest_rse_id, count=2) == 2
+    assert [get_request(request_id)['state'] for request_id in (request1, request2, request3, request4)] == [RequestState.QUEUED, RequestState.WAITING, RequestState.QUEUED, RequestState.WAITING]
+    assert _waiting_stats() == [('jdoe', 'act1', 1), ('root', 'act1', 1)]
+
+    # a request which stopped waiting outside of the throttler is dropped when it is popped
+    _delete_requests(mock_scope, [], ids=[request2])
+    assert waiting_requests.release(dest_rse_id=dest_rse_id, account=jdoe_account, count=1) == 0
+    assert _waiting_stats() == [('root', 'act1', 1)]
+    assert get_request(request4)['state'] == RequestState.WAITING
+
+    _delete_requests(mock_scope, [], ids=[request1, request3, request4])
@@ -22,10 +22,10 @@ from rucio.common.utils import generate_uuid
 from rucio.core import request as request_core
 from rucio.core import rse as rse_core
 from rucio.core import rule as rule_core
-from rucio.core.distance import add_distance
+from rucio.core.distance import add_distance, delete_distances, update_distances
 from rucio.core.replica import add_replicas
 from rucio.core.request import list_and_mark_transfer_requests_and_source_replicas
-from rucio.core.topology import Topology, get_hops
+from rucio.core.topology import Topology, TopologyCache, get_hops
 from rucio.core.transfer import ProtocolFactory, build_transfer_paths
 from rucio.daemons.conveyor.common import assign_paths_to_transfertool_and_create_hops, pick_and_prepare_submission_path
 from rucio.db.sqla import models
@@ -150,6 +150,100 @@ def test_get_hops(rse_factory):
     assert hop4['dest_rse'].id == rse6_id
 
 
+def test_topology_apply_deltas(rse_factory):
+    _, rse1_id = rse_factory.make_mock_rse()
+    _, rse2_id = rse_factory.make_mock_rse()
+    _, rse3_id = rse_factory.make_mock_rse()
+    all_rses = {rse1_id, rse2_id, rse3_id}
+    add_distance(rse1_id, rse2_id, distance=10)
+    add_distance(rse1_id, rse3_id, distance=10)
+    add_distance(rse3_id, rse2_id, distance=10)
+
+    cache = TopologyCache(new_obj_fnc=lambda: Topology(rse_ids=all_rses).configure_multihop(multihop_rse_ids=all_rses), refresh_interval=0)
+    topology = cache.get()
+
+    def _shortest_path(src_rse_id, dst_rse_id):
+        paths = topology.search_shortest_paths(src_nodes=[topology[src_rse_id]], dst_node=topology[dst_rse_id],
+                                               operation_src='third_party_copy_read', operation_dest='third_party_copy_write',
+                                               domain='wan', limit_dest_schemes=[])
+        return [hop['dest_rse'].id for hop in paths[topology[src_rse_id]]]
+
+    assert _shortest_path(rse1_id, rse2_id) == [rse2_id]
+
+    # A distance update is applied in place, without rebuilding the topology
+    update_distances(src_rse_id=rse1_id, dest_rse_id=rse2_id, distance=100)
+    assert cache.get() is topology
+    assert _shortest_path(rse1_id, rse2_id) == [rse3_id, rse2_id]
+
+    # A deleted distance is detected
+    delete_distances(src_rse_id=rse3_id, dest_rse_id=rse2_id)
+    assert cache.get() is topology
+    assert _shortest_path(rse1_id, rse2_id) == [rse2_id]
+
+
+def test_search_shortest_paths_bulk(rse_factory):
+    rse_ids = [rse_factory.make_mock_rse()[1] for _ in range(5)]
+    rse0_id, rse1_id, rse2_id, rse3_id, rse4_id = rse_ids
+    add_distance(rse0_id, rse1_id, distance=10)
+    add_distance(rse1_id, rse2_id, distance=10)
+    add_distance(rse0_id, rse2_id, distance=50)
+    add_distance(rse0_id, rse3_id, distance=1)
+    add_distance(rse3_id, rse2_id, distance=5)
+    add_distance(rse3_id, rse4_id, distance=5)
+    add_distance(rse2_id, rse4_id, distance=10)
+
+    def _new_topology():
+        return Topology(rse_ids=set(rse_ids)).configure_multihop(multihop_rse_ids={rse1_id, rse2_id})
+
+    def _search(topology, queries):
+        return topology.search_shortest_paths_bulk(queries=[([topology[s] for s in src_ids], topology[dst_id]) for src_ids, dst_id in queries],
+                                                   operation_src='third_party_copy_read', operation_dest='third_party_copy_write',
+                                                   domain='wan', limit_dest_schemes=[])
+
+    def _as_ids(paths):
+        return {src.id: [(hop['source_rse'].id, hop['dest_rse'].id, hop['cumulated_distance']) for hop in path] for src, path in paths.items()}
+
+    queries = [
+        ([rse0_id], rse2_id),
+        ([rse0_id, rse3_id], rse2_id),
+        ([rse3_id], rse4_id),
+        ([rse0_id, rse1_id], rse4_id),
+    ]
+    bulk_results = _search(_new_topology(), queries)
+    # Each query gives the same result as if it was searched alone
+    for query, bulk_result in zip(queries, bulk_results):
+        [single_result] = _search(_new_topology(), [query])
+        assert _as_ids(bulk_result) == _as_ids(single_result)
+
+    # Multihop is cheaper than the direct link, even with the hop penalty
+    assert _as_ids(bulk_results[0]) == {rse0_id: [(rse0_id, rse1_id, 30), (rse1_id, rse2_id, 10)]}
+    # rse3 is not a multihop rse: it's never used as intermediate hop
+    assert _as_ids(bulk_results[3])[rse0_id] == [(rse0_id, rse1_id, 50), (rse1_id, rse2_id, 30), (rse2_id, rse4_id, 10)]
+
+
+def test_search_shortest_paths_not_cached_after_concurrent_change(rse_factory):
+    _, rse1_id = rse_factory.make_mock_rse()
+    _, rse2_id = rse_factory.make_mock_rse()
+    add_distance(rse1_id, rse2_id, distance=10)
+
+    topology = Topology(rse_ids={rse1_id, rse2_id}).configure_multihop()
+    search_shortest_path_tree = topology._search_shortest_path_tree
+
+    def _search_with_concurrent_change(**kwargs):
+        tree = search_shortest_path_tree(**kwargs)
+        # Simulates an update of the topology by another thread while this search was running
+        topology._invalidate_paths()
+        return tree
+
+    topology._search_shortest_path_tree = _search_with_concurrent_change
+    paths = topology.search_shortest_paths(src_nodes=[topology[rse1_id]], dst_node=topology[rse2_id],
+                                           operation_src='third_party_copy_read', operation_dest='third_party_copy_write',
+                                           domain='wan', limit_dest_schemes=[])
+    assert [hop['dest_rse'].id for hop in paths[topology[rse1_id]]] == [rse2_id]
+    # The result computed on the outdated topology must not be cached
+    assert not topology._path_cache
+
+
 def test_disk_vs_tape_priority(rse_factory, root_account, mock_scope, file_config_mock):
     tape1_rse_name, tape1_rse_id = rse_factory.make_posix_rse(rse_type=RSEType.TAPE)
     tape2_rse_name, tape2_rse_id = rse_factory.make_posix_rse(rse_type=RSEType.TAPE)
@@ -328,7 +422,7 @@ def test_failure_rate_with_custom_strategy(rse_factory, root_account, mock_scope
 
 
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
 ]}], indirect=True)
 def test_multihop_requests_created(rse_factory, did_factory, root_account, caches_mock):
     """
@@ -351,7 +445,7 @@ def test_multihop_requests_created(rse_factory, did_factory, root_account, cache
 
 
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
 ]}], indirect=True)
 def test_multihop_concurrent_submitters(rse_factory, did_factory, root_account, caches_mock):
     """
@@ -386,7 +480,7 @@ def test_multihop_concurrent_submitters(rse_factory, did_factory, root_account,
 
 
 @pytest.mark.parametrize("caches_mock", [{"caches_to_mock": [
-    'rucio.core.rse_expression_parser.REGION',  # The list of multihop RSEs is retrieved by an expression
+    'rucio.core.rse_attribute_index.REGION',  # The list of multihop RSEs is retrieved by an expression
 ]}], indirect=True)
 def test_singlehop_vs_multihop_priority(rse_factory, root_account, mock_scope, caches_mock):
     """
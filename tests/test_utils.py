@@ -13,12 +13,15 @@
 # limitations under the License.
 
 import datetime
+import hashlib
 import logging
 import os
+import zlib
 
 import pytest
 
 from rucio.common.bittorrent import bittorrent_v2_merkle_sha256
+from rucio.common.checksum import adler32, calculate_checksums, calculate_checksums_parallel, crc32, md5, sha256
 from rucio.common.exception import InvalidType
 from rucio.common.logging import formatted_logger
 from rucio.common.utils import Availability, parse_did_filter_from_string, retrying
@@ -183,3 +186,22 @@ def test_bittorrent_sa256_merkle(file_factory):
         file = file_factory.file_generator(size=size)
         root, layers, piece_size = bittorrent_v2_merkle_sha256(file)
         assert (root, layers, piece_size) == _sha256_merkle_via_libtorrent(file, piece_size=piece_size)
+
+
+def test_calculate_checksums(file_factory):
+    """ CHECKSUM: Test single-pass computation of several checksums """
+    for size in (0, 1, 4096, 2**20 + 3):
+        file = file_factory.file_generator(size=size)
+        with open(file, 'rb') as f:
+            content = f.read()
+        expected = {
+            'adler32': '%08x' % zlib.adler32(content),
+            'md5': hashlib.md5(content).hexdigest(),
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'crc32': '%X' % (zlib.crc32(content) & 0xFFFFFFFF),
+        }
+        assert calculate_checksums(file, expected.keys(), buffer_size=1000) == expected
+        assert (adler32(file), md5(file), sha256(file), crc32(file)) == tuple(expected.values())
+
+    files = [file_factory.file_generator(size=size) for size in (10, 20, 30)]
+    assert calculate_checksums_parallel(files, ['adler32'], max_workers=3) == [{'adler32': adler32(file)} for file in files]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Folding throughput of the updated RSE counters.
+
+Adds RSEs and many updated RSE counters, as a mass deletion does, to the database
+configured in rucio.cfg, in one transaction which is rolled back at the end. Then it
+folds them into the RSE counters with the historical one RSE at a time ORM loop, and
+with update_rse_counters folding many RSEs per pass with set-based statements.
+Run it once against sqlite and once against postgres to compare the backends.
+
+    python tools/benchmarks/abacus_folding.py --rses 100 --updates 1000000 --rses-per-pass 100
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from sqlalchemy import and_, insert, select
+
+from rucio.common.utils import chunks, generate_uuid
+from rucio.core.rse import add_rse
+from rucio.core.rse_counter import update_rse_counters
+from rucio.db.sqla import models
+from rucio.db.sqla.session import get_session
+
+
+def add_updates(rse_ids: list[str], nb_updates: int, rng: random.Random, *, session) -> None:
+    for i in range(0, nb_updates, 10000):
+        session.execute(insert(models.UpdatedRSECounter), [{'id': generate_uuid(), 'rse_id': rng.choice(rse_ids), 'files': -1, 'bytes': -rng.randint(10 ** 6, 10 ** 10)}
+                                                           for _ in range(min(10000, nb_updates - i))])
+    session.flush()
+
+
+def update_rse_counter_orm(rse_id: str, *, session) -> None:
+    """ The folding of one RSE as it was done before it became set-based. """
+    stmt = select(models.UpdatedRSECounter).where(models.UpdatedRSECounter.rse_id == rse_id)
+    updated_rse_counters = session.execute(stmt).scalars().all()
+    stmt = select(models.RSEUsage).where(and_(models.RSEUsage.rse_id == rse_id, models.RSEUsage.source == 'rucio'))
+    rse_counter = session.execute(stmt).scalar_one()
+    rse_counter.used = (rse_counter.used or 0) + sum([updated_rse_counter.bytes for updated_rse_counter in updated_rse_counters])
+    rse_counter.files = (rse_counter.files or 0) + sum([updated_rse_counter.files for updated_rse_counter in updated_rse_counters])
+    for update in updated_rse_counters:
+        update.delete(flush=False, session=session)
+    session.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rses', type=int, default=100)
+    parser.add_argument('--updates', type=int, default=1000000, help='Updated RSE counters to fold')
+    parser.add_argument('--rses-per-pass', type=int, default=100, help='RSEs folded by each update_rse_counters call')
+    parser.add_argument('--vo', default='def')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    session = get_session()
+    try:
+        prefix = 'BENCH_%s' % uuid.uuid4().hex[:8].upper()
+        rse_ids = [add_rse(f'{prefix}_{i:05d}', vo=args.vo, session=session) for i in range(args.rses)]
+        session.flush()
+
+        folders = {
+            'orm': lambda: [update_rse_counter_orm(rse_id, session=session) for rse_id in rse_ids],
+            'set-based': lambda: [update_rse_counters(rse_ids=chunk, session=session) for chunk in chunks(rse_ids, args.rses_per_pass)],
+        }
+        print(f'backend: {session.bind.dialect.name}')
+        for name, fold in folders.items():
+            start = time.perf_counter()
+            add_updates(rse_ids, args.updates, rng, session=session)
+            print(f'added       {args.updates:8d} updates in {time.perf_counter() - start:8.2f} s')
+            start = time.perf_counter()
+            fold()
+            session.flush()
+            duration = time.perf_counter() - start
+            print(f'{name:12}  {args.updates / duration:10.0f} updates/s {duration:8.2f} s')
+    finally:
+        session.rollback()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
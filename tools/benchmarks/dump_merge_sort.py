@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sort and merge-join throughput of the consistency checks on synthetic dumps.
+
+Generates a storage dump and two rucio replica dumps (already parsed, as
+`path,status` lines) with a few percent of dark and lost files, sorts them with
+GNU sort and with the in-process external merge sort, then runs the three-way
+merge-join over the sorted dumps.
+
+    python tools/benchmarks/dump_merge_sort.py --lines 100000000 --workdir /scratch/bench
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from rucio.common.dumper.consistency import compare3, gnu_sort
+from rucio.common.dumper.merge_sort import external_sort
+
+
+def make_dumps(workdir: str, nb_lines: int, dark_ratio: float, lost_ratio: float, seed: int) -> tuple[str, str, str]:
+    rng = random.Random(seed)
+    paths = [os.path.join(workdir, name) for name in ('replicas_prev', 'storage', 'replicas_next')]
+    with open(paths[0], 'w') as prev, open(paths[1], 'w') as storage, open(paths[2], 'w') as nxt:
+        for i in range(nb_lines):
+            path = 'data18_13TeV/{0:02x}/{1:02x}/DAOD_PHYS.{2:08d}._{3:06d}.pool.root.1'.format(
+                rng.getrandbits(8), rng.getrandbits(8), rng.getrandbits(26), i % 1000000)
+            draw = rng.random()
+            if draw >= dark_ratio:
+                prev.write(path + ',A\n')
+                nxt.write(path + ',A\n')
+            if draw < dark_ratio or draw >= dark_ratio + lost_ratio:
+                storage.write(path + '\n')
+    return paths[0], paths[1], paths[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=1000000, help='Lines of the storage dump')
+    parser.add_argument('--dark-ratio', type=float, default=0.01)
+    parser.add_argument('--lost-ratio', type=float, default=0.01)
+    parser.add_argument('--run-size', type=int, default=64 * 1024 * 1024, help='Bytes per sorted run')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--workdir', default=None, help='Directory for the dumps and the runs (default: a temporary directory)')
+    parser.add_argument('--skip-gnu-sort', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(dir=args.workdir, prefix='dump_merge_sort_')
+    try:
+        start = time.perf_counter()
+        dumps = make_dumps(workdir, args.lines, args.dark_ratio, args.lost_ratio, args.seed)
+        size = sum(os.path.getsize(dump) for dump in dumps)
+        print(f'generated   {size / 2 ** 20:10.1f} MiB in {time.perf_counter() - start:8.1f} s')
+
+        sorters = {
+            'external': lambda dump, prefix: external_sort(dump, prefix=prefix, delimiter=',', fieldspec='1', cache_dir=workdir,
+                                                           run_size=args.run_size, processes=args.processes),
+        }
+        if not args.skip_gnu_sort:
+            sorters['gnu'] = lambda dump, prefix: gnu_sort(dump, prefix=prefix, delimiter=',', fieldspec='1', cache_dir=workdir)
+
+        sorted_dumps = None
+        for name, sort in sorters.items():
+            start = time.perf_counter()
+            sorted_dumps = [sort(dump, f'{os.path.basename(dump)}_{name}') for dump in dumps]
+            duration = time.perf_counter() - start
+            print(f'{name:10}  {size / 2 ** 20 / duration:10.1f} MiB/s {duration:8.1f} s')
+
+        if len(sorters) > 1:
+            for dump in dumps:
+                with open(f'{dump}_external_sorted', 'rb') as external, open(f'{dump}_gnu_sorted', 'rb') as gnu:
+                    assert all(a == b for a, b in zip(external, gnu)), f'Different sort orders for {dump}'
+
+        start = time.perf_counter()
+        nb_paths = nb_dark = nb_lost = 0
+        with open(sorted_dumps[0]) as prevf, open(sorted_dumps[1]) as sdump, open(sorted_dumps[2]) as nextf:
+            for _, where, _ in compare3(prevf, sdump, nextf):
+                nb_paths += 1
+                if where[0] and not where[1] and where[2]:
+                    nb_lost += 1
+                elif not where[0] and where[1] and not where[2]:
+                    nb_dark += 1
+        duration = time.perf_counter() - start
+        print(f'merge-join  {nb_paths / duration:10.0f} paths/s {duration:8.1f} s  {nb_lost} lost, {nb_dark} dark')
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
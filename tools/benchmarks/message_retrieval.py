@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Message retrieval throughput on a sqlite database, and number of queries per retrieval.
+
+Fills a temporary sqlite messages table with small payloads and a fraction of large
+'nolimit' payloads, then retrieves all of them with the historical one query per
+nolimit payload implementation, with retrieve_messages and with stream_messages.
+
+    python tools/benchmarks/message_retrieval.py --messages 100000 --nolimit-ratio 0.2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from rucio.common.constants import MAX_MESSAGE_LENGTH
+from rucio.common.utils import generate_uuid
+from rucio.core.message import retrieve_messages, stream_messages
+from rucio.db.sqla.models import Message
+from rucio.db.sqla.session import DEFAULT_SCHEMA_NAME
+
+
+def fill_messages(session, nb_messages: int, nolimit_ratio: float) -> None:
+    large = 'x' * (MAX_MESSAGE_LENGTH + 1)
+    nolimit_every = int(1 / nolimit_ratio) if nolimit_ratio > 0 else 0
+    rows = []
+    for i in range(nb_messages):
+        payload = {'scope': 'user.jdoe', 'name': f'file_{i:08d}', 'rse': 'MOCK', 'bytes': i}
+        if nolimit_every and i % nolimit_every == 0:
+            payload['rule_notification'] = large
+        payload = json.dumps(payload)
+        row = {'id': generate_uuid(), 'event_type': 'transfer-done', 'services': 'activemq', 'payload': payload}
+        if len(payload) > MAX_MESSAGE_LENGTH:
+            row['payload'] = 'nolimit'
+            row['payload_nolimit'] = payload
+        rows.append(row)
+        if len(rows) == 10000:
+            session.execute(insert(Message), rows)
+            rows = []
+    if rows:
+        session.execute(insert(Message), rows)
+    session.commit()
+
+
+def retrieve_messages_one_query_per_nolimit(bulk: int, *, session) -> list[dict]:
+    """ The retrieval as it was done before the nolimit payloads were fetched in bulk. """
+    stmt = select(
+        Message.id,
+        Message.created_at,
+        Message.event_type,
+        Message.payload,
+        Message.services
+    ).where(
+        Message.id.in_(select(Message.id).where(Message.event_type != 'email').order_by(Message.created_at).limit(bulk))
+    )
+    messages = []
+    for id_, created_at, event_type, payload, services in session.execute(stmt).all():
+        message = {'id': id_, 'created_at': created_at, 'event_type': event_type, 'services': services}
+        if payload == 'nolimit':
+            nolimit_stmt = select(Message.payload_nolimit).where(Message.id == id_)
+            message['payload'] = json.loads(str(session.execute(nolimit_stmt).scalar_one()))
+        else:
+            message['payload'] = json.loads(str(payload))
+        messages.append(message)
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=100000, help='Messages in the table')
+    parser.add_argument('--nolimit-ratio', type=float, default=0.2, help='Fraction of messages with a payload above MAX_MESSAGE_LENGTH')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Chunk size of stream_messages')
+    parser.add_argument('--workdir', default=None, help='Directory of the sqlite database (default: a temporary directory)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(dir=args.workdir, prefix='message_retrieval_')
+    try:
+        engine = create_engine('sqlite:///' + os.path.join(workdir, 'messages.db'))
+        if DEFAULT_SCHEMA_NAME:
+            engine = engine.execution_options(schema_translate_map={DEFAULT_SCHEMA_NAME: None})
+        Message.__table__.create(engine)
+
+        queries = [0]
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count_queries(*_args):
+            queries[0] += 1
+
+        session = sessionmaker(bind=engine)()
+        start = time.perf_counter()
+        fill_messages(session, args.messages, args.nolimit_ratio)
+        print(f'inserted     {args.messages:8d} messages in {time.perf_counter() - start:8.2f} s')
+
+        retrievers = {
+            'n+1': lambda: retrieve_messages_one_query_per_nolimit(args.messages, session=session),
+            'retrieve': lambda: retrieve_messages(args.messages, session=session),
+            'stream': lambda: stream_messages(args.messages, chunk_size=args.chunk_size, session=session),
+        }
+        for name, retrieve in retrievers.items():
+            queries[0] = 0
+            start = time.perf_counter()
+            first = None
+            nb_messages = 0
+            for _ in retrieve():
+                if first is None:
+                    first = time.perf_counter() - start
+                nb_messages += 1
+            duration = time.perf_counter() - start
+            session.rollback()
+            print(f'{name:10}  {nb_messages / duration:10.0f} messages/s {duration:8.2f} s  '
+                  f'first message after {first or 0:6.3f} s  {queries[0]:6d} queries')
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
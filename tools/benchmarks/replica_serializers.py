@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Throughput, in rows per second, of the list_replicas response serializers.
+
+    python tools/benchmarks/replica_serializers.py --files 200000 --replicas 3
+"""
+
+import argparse
+import time
+
+from rucio.web.rest.flaskapi.v1.replica_serializers import SERIALIZERS, generate_json_response, generate_metalink_response
+
+
+def make_rfiles(nb_files: int, nb_replicas: int) -> list[dict]:
+    return [
+        {
+            'scope': 'data18_13TeV',
+            'name': f'DAOD_PHYS.12345678._{i:06d}.pool.root.1',
+            'bytes': 1234567890 + i,
+            'adler32': '0cc737eb',
+            'md5': None,
+            'parents': ['data18_13TeV:DAOD_PHYS.12345678_tid01'],
+            'pfns': {
+                f'davs://storage{rse}.example.org:443/atlasdatadisk/rucio/data18_13TeV/ab/cd/DAOD_PHYS.12345678._{i:06d}.pool.root.1': {
+                    'rse': f'SITE{rse}_DATADISK',
+                    'domain': 'wan',
+                    'priority': rse + 1,
+                    'client_extract': False,
+                }
+                for rse in range(nb_replicas)
+            },
+        }
+        for i in range(nb_files)
+    ]
+
+
+def consume(generator) -> tuple[int, int]:
+    nb_chunks, nb_chars = 0, 0
+    for chunk in generator:
+        nb_chunks += 1
+        nb_chars += len(chunk)
+    return nb_chunks, nb_chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=200000)
+    parser.add_argument('--replicas', type=int, default=3, help='Replicas per file')
+    args = parser.parse_args()
+
+    rfiles = make_rfiles(args.files, args.replicas)
+    benchmarks = {
+        'metalink': lambda serializer: generate_metalink_response(rfiles, 'atlas', serializer=serializer),
+        'json': lambda serializer: generate_json_response(rfiles, serializer=serializer),
+    }
+    for fmt, generate in benchmarks.items():
+        for serializer in SERIALIZERS:
+            start = time.perf_counter()
+            nb_chunks, nb_chars = consume(generate(serializer))
+            duration = time.perf_counter() - start
+            print(f'{fmt:8} {serializer:8} {args.files / duration:12.0f} rows/s  {nb_chunks:10d} chunks  {nb_chars / 2 ** 20:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Replica sorting throughput of a list_replicas request.
+
+Generates the replicas of many files on a set of storage hosts spread over the globe,
+seeds the in-process cache of the replica sorter with the coordinates of the hosts and
+with a custom distance table, then sorts the replicas of every file for one client with
+the historical one distance per replica implementation, and with sort_replicas sharing
+one distance cache over the request for the geoip, custom_table and random algorithms.
+
+    python tools/benchmarks/replica_sorting.py --files 100000 --replicas 5 --hosts 200
+"""
+
+import argparse
+import random
+import time
+from math import asin, cos, radians, sin, sqrt
+from urllib.parse import urlparse
+
+from rucio.core import replica_sorter
+
+
+def make_files(nb_files: int, nb_replicas: int, nb_hosts: int, seed: int) -> tuple[list[dict], dict[str, tuple[float, float]]]:
+    rng = random.Random(seed)
+    hosts = {f'se{i:04d}.example.org': (rng.uniform(-60, 70), rng.uniform(-180, 180)) for i in range(nb_hosts)}
+    hostnames = list(hosts)
+    files = []
+    for i in range(nb_files):
+        dictreplica = {}
+        for priority, hostname in enumerate(rng.sample(hostnames, min(nb_replicas, nb_hosts)), start=1):
+            rse = hostname.split('.')[0].upper()
+            dictreplica[f'root://{hostname}:1094//data/file_{i:08d}'] = ('file', priority, rse, 'DISK')
+        files.append(dictreplica)
+    return files, hosts
+
+
+def sort_geoip_one_distance_per_replica(dictreplica: dict, client_location: dict) -> list[str]:
+    """ The geoip sort as it was done before the distances were shared over a request. """
+    dictreplica = dict(sorted(dictreplica.items(), key=lambda item: item[1][1]))
+
+    def distance(pfn: str) -> float:
+        hostname = urlparse(pfn).hostname
+        lat1, long1 = replica_sorter.REGION.get(f'lat_long|{hostname}')
+        lat2, long2 = client_location['latitude'], client_location['longitude']
+        long1, lat1, long2, lat2 = map(radians, [long1, lat1, long2, lat2])
+        dlon = long2 - long1
+        dlat = lat2 - lat1
+        return 6378 * 2 * asin(sqrt(sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2))
+
+    return list(sorted(dictreplica, key=distance))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=100000, help='Files in the request')
+    parser.add_argument('--replicas', type=int, default=5, help='Replicas per file')
+    parser.add_argument('--hosts', type=int, default=200, help='Storage hosts')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    files, hosts = make_files(args.files, args.replicas, args.hosts, args.seed)
+    client_location = {'ip': None, 'fqdn': None, 'site': 'SE0000', 'latitude': 46.2, 'longitude': 6.1}
+
+    replica_sorter.REGION.invalidate()
+    for hostname, lat_long in hosts.items():
+        replica_sorter.REGION.set(f'lat_long|{hostname}', lat_long)
+    rng = random.Random(args.seed)
+    replica_sorter.REGION.set(replica_sorter.CUSTOM_DISTANCE_TABLE_KEY,
+                              {(hostname.split('.')[0].upper(), client_location['site']): rng.random() for hostname in hosts})
+
+    sorters = {
+        'per-replica': lambda dictreplica, _cache: sort_geoip_one_distance_per_replica(dictreplica, client_location),
+        'geoip': lambda dictreplica, cache: replica_sorter.sort_replicas(dictreplica, client_location, selection='geoip', distance_cache=cache),
+        'custom': lambda dictreplica, cache: replica_sorter.sort_replicas(dictreplica, client_location, selection='custom_table', distance_cache=cache),
+        'random': lambda dictreplica, cache: replica_sorter.sort_replicas(dictreplica, client_location, selection='random', distance_cache=cache),
+    }
+    nb_replicas = sum(len(dictreplica) for dictreplica in files)
+    print(f'numpy: {"yes" if replica_sorter.EXTRA_MODULES["numpy"] else "no"}')
+    for name, sort in sorters.items():
+        distance_cache = {}
+        start = time.perf_counter()
+        for dictreplica in files:
+            sort(dictreplica, distance_cache)
+        duration = time.perf_counter() - start
+        print(f'{name:12}  {nb_replicas / duration:10.0f} replicas/s {duration:8.2f} s  {len(distance_cache):6d} distances')
+
+    replica_sorter.REGION.invalidate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+RSE selection throughput of a rule on many RSEs and many files.
+
+Adds RSEs with a weight attribute, account limits and space limits to the database
+configured in rucio.cfg, in one transaction which is rolled back at the end. Then it
+creates an RSESelector with a fixed seed and selects the RSEs of every file, with one
+select_rse call per file and with one select_rses call per batch of files.
+
+    python tools/benchmarks/rse_selection.py --rses 500 --files 1000000 --copies 2
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from sqlalchemy import event
+
+from rucio.common.types import InternalAccount
+from rucio.core.account_limit import set_local_account_limit
+from rucio.core.rse import add_rse, add_rse_attribute, set_rse_limits, set_rse_usage
+from rucio.core.rse_selector import RSESelector
+from rucio.db.sqla.session import get_engine, get_session
+
+
+def add_rses(nb_rses: int, seed: int, account: InternalAccount, *, session) -> list[dict]:
+    rng = random.Random(seed)
+    prefix = 'BENCH_%s' % uuid.uuid4().hex[:8].upper()
+    rses = []
+    for i in range(nb_rses):
+        rse_id = add_rse(f'{prefix}_{i:05d}', vo=account.vo, session=session)
+        add_rse_attribute(rse_id, 'bench_weight', rng.randint(1, 100), session=session)
+        set_local_account_limit(account, rse_id, 10 ** 15, session=session)
+        set_rse_limits(rse_id, 'MaxSpaceAvailable', 10 ** 16, session=session)
+        set_rse_usage(rse_id, 'rucio', used=rng.randint(0, 10 ** 15), free=None, session=session)
+        rses.append({'id': rse_id, 'rse': f'{prefix}_{i:05d}', 'staging_area': False})
+    session.flush()
+    return rses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rses', type=int, default=500, help='RSEs in the RSE expression')
+    parser.add_argument('--files', type=int, default=100000, help='Files of the rule')
+    parser.add_argument('--copies', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=10000, help='Files per select_rses call')
+    parser.add_argument('--account', default='jdoe', help='Account owning the rule, quotas are ignored if it is admin')
+    parser.add_argument('--vo', default='def')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    queries = [0]
+
+    @event.listens_for(get_engine(), 'before_cursor_execute')
+    def count_queries(*_args):
+        queries[0] += 1
+
+    account = InternalAccount(args.account, vo=args.vo)
+    session = get_session()
+    try:
+        start = time.perf_counter()
+        rses = add_rses(args.rses, args.seed, account, session=session)
+        print(f'added       {len(rses):8d} RSEs in {time.perf_counter() - start:8.2f} s')
+
+        rng = random.Random(args.seed)
+        sizes = [rng.randint(10 ** 6, 10 ** 10) for _ in range(args.files)]
+
+        queries[0] = 0
+        start = time.perf_counter()
+        selector = RSESelector(account, rses, 'bench_weight', args.copies, seed=args.seed, session=session)
+        print(f'selector    {time.perf_counter() - start:8.2f} s  {queries[0]:6d} queries  {len(selector.rses)} RSEs with quota')
+
+        selectors = {
+            'select_rse': lambda selector: [selector.select_rse(size, []) for size in sizes],
+            'select_rses': lambda selector: [result for i in range(0, len(sizes), args.batch_size)
+                                             for result in selector.select_rses([{'size': size, 'preferred_rse_ids': []}
+                                                                                 for size in sizes[i:i + args.batch_size]])],
+        }
+        for name, select in selectors.items():
+            selector = RSESelector(account, rses, 'bench_weight', args.copies, seed=args.seed, session=session)
+            start = time.perf_counter()
+            results = select(selector)
+            duration = time.perf_counter() - start
+            print(f'{name:12}  {len(results) / duration:10.0f} files/s {duration:8.2f} s')
+    finally:
+        session.rollback()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
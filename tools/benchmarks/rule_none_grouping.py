@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Rule creation throughput on a large dataset.
+
+Adds a source RSE, target RSEs with account limits, and one dataset per grouping with
+its files replicated on the source RSE, to the database configured in rucio.cfg, in one
+transaction which is rolled back at the end. Then it injects a rule on each dataset and
+reports the replicas, locks and requests created per second and the peak of the memory
+allocated while the rule is applied. Rules with NONE grouping insert the new replicas and
+locks in bulk, rules with DATASET grouping create them through SQLAlchemy objects.
+
+    python tools/benchmarks/rule_none_grouping.py --files 100000 --rses 20 --copies 2
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+import uuid
+
+from rucio.common.types import InternalAccount, InternalScope
+from rucio.core.account_limit import set_local_account_limit
+from rucio.core.did import add_did, attach_dids
+from rucio.core.rse import add_rse, add_rse_attribute
+from rucio.core.rule import add_rule, inject_rule
+from rucio.db.sqla.constants import DIDType
+from rucio.db.sqla.session import get_session
+
+
+def add_dataset(scope: InternalScope, nb_files: int, rse_id: str, account: InternalAccount, rng: random.Random, *, session) -> dict:
+    prefix = 'bench_%s' % uuid.uuid4().hex[:8]
+    dataset = {'scope': scope, 'name': f'{prefix}.dataset'}
+    add_did(did_type=DIDType.DATASET, account=account, session=session, **dataset)
+    files = [{'scope': scope, 'name': f'{prefix}.file_{i:08d}', 'bytes': rng.randint(10 ** 6, 10 ** 10), 'adler32': '0cc737eb'}
+             for i in range(nb_files)]
+    for i in range(0, nb_files, 200):
+        attach_dids(dids=files[i:i + 200], account=account, rse_id=rse_id, session=session, **dataset)
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=100000, help='Files of each dataset')
+    parser.add_argument('--rses', type=int, default=20, help='RSEs in the RSE expression')
+    parser.add_argument('--copies', type=int, default=2)
+    parser.add_argument('--groupings', default='NONE,DATASET', help='Comma separated groupings of the rules')
+    parser.add_argument('--account', default='jdoe', help='Account owning the rules')
+    parser.add_argument('--scope', default='mock')
+    parser.add_argument('--vo', default='def')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    account = InternalAccount(args.account, vo=args.vo)
+    scope = InternalScope(args.scope, vo=args.vo)
+    session = get_session()
+    try:
+        start = time.perf_counter()
+        prefix = 'BENCH_%s' % uuid.uuid4().hex[:8].upper()
+        source_rse_id = add_rse(f'{prefix}_SOURCE', vo=args.vo, session=session)
+        for i in range(args.rses):
+            rse_id = add_rse(f'{prefix}_{i:05d}', vo=args.vo, session=session)
+            add_rse_attribute(rse_id, 'bench_target', prefix, session=session)
+            set_local_account_limit(account, rse_id, 10 ** 18, session=session)
+        datasets = {grouping: add_dataset(scope, args.files, source_rse_id, account, rng, session=session) for grouping in args.groupings.split(',')}
+        session.flush()
+        print(f'added       {len(datasets)} datasets of {args.files} files in {time.perf_counter() - start:8.2f} s')
+
+        for grouping, dataset in datasets.items():
+            rule_id = add_rule(dids=[dataset], account=account, copies=args.copies, rse_expression=f'bench_target={prefix}', grouping=grouping,
+                               weight=None, lifetime=None, locked=False, subscription_id=None, asynchronous=True, session=session)[0]
+            tracemalloc.start()
+            start = time.perf_counter()
+            inject_rule(rule_id, session=session)
+            session.flush()
+            duration = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            # one replica, one lock and one request per file and copy
+            rows = 3 * args.files * args.copies
+            print(f'{grouping:12}  {rows / duration:10.0f} rows/s {duration:8.2f} s  peak {peak / 2 ** 20:8.1f} MiB')
+    finally:
+        session.rollback()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
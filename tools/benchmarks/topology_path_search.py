@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Copyright European Organization for Nuclear Research (CERN) since 2012
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compare the dict/PriorityQueue based Topology.dijkstra_spf with the array based PathSearchGraph
+on a synthetic mesh. No database is needed: the topology is built in memory.
+
+    python tools/benchmarks/topology_path_search.py --nodes 2000 --degree 20 --destinations 200
+"""
+
+import argparse
+import random
+import time
+
+from rucio.core.topology import PathSearchGraph, Topology
+
+
+def build_topology(nb_nodes: int, degree: int, multihop_ratio: float, seed: int) -> Topology:
+    rng = random.Random(seed)
+    topology = Topology(rse_ids=[f'rse{i}' for i in range(nb_nodes)])
+    nodes = list(topology.rse_id_to_data_map.values())
+    for node in nodes:
+        node._attributes = {}
+        for dst_node in rng.sample(nodes, degree):
+            if dst_node is not node:
+                topology._set_edge_cost(node, dst_node, rng.randint(1, 100))
+    for node in rng.sample(nodes, int(nb_nodes * multihop_ratio)):
+        node.used_for_multihop = True
+        topology._multihop_nodes.add(node)
+    return topology
+
+
+def _node_state(topology, dst_node):
+    class _NodeState:
+        enabled = True
+
+        def __init__(self, node):
+            self.cost = 0 if node == dst_node else topology._hop_penalty
+    return _NodeState
+
+
+def bench_dijkstra_spf(topology, queries):
+    start = time.perf_counter()
+    for src_nodes, dst_node in queries:
+        nodes_to_find = set(src_nodes)
+        for node, *_ in topology.dijkstra_spf(dst_node=dst_node, nodes_to_find=nodes_to_find, node_state_provider=_node_state(topology, dst_node)):
+            nodes_to_find.discard(node)
+            if not nodes_to_find:
+                break
+    return time.perf_counter() - start
+
+
+def bench_path_search_graph(topology, queries, batched):
+    start = time.perf_counter()
+    graph = PathSearchGraph(nodes=topology.rse_id_to_data_map.values(), edges=topology._edges.values(), multihop_nodes=topology._multihop_nodes)
+    build_time = time.perf_counter() - start
+    node_costs = graph.node_costs(topology._hop_penalty)
+    if batched:
+        sources_by_destination = {}
+        for src_nodes, dst_node in queries:
+            sources_by_destination.setdefault(dst_node, set()).update(src_nodes)
+        queries = list(sources_by_destination.items())
+    for src_nodes, dst_node in queries:
+        for _ in graph.search(dst_id=graph.node_ids[dst_node], target_ids={graph.node_ids[n] for n in src_nodes}, node_costs=node_costs):
+            pass
+    return time.perf_counter() - start, build_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=2000)
+    parser.add_argument('--degree', type=int, default=20, help='Outbound edges per node')
+    parser.add_argument('--multihop-ratio', type=float, default=0.2, help='Fraction of nodes usable as intermediate hops')
+    parser.add_argument('--destinations', type=int, default=200)
+    parser.add_argument('--queries-per-destination', type=int, default=5)
+    parser.add_argument('--sources', type=int, default=4, help='Sources per query')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    topology = build_topology(args.nodes, args.degree, args.multihop_ratio, args.seed)
+    rng = random.Random(args.seed)
+    nodes = list(topology.rse_id_to_data_map.values())
+    queries = [(rng.sample(nodes, args.sources), dst_node)
+               for dst_node in rng.sample(nodes, args.destinations)
+               for _ in range(args.queries_per_destination)]
+
+    print(f'{args.nodes} nodes, {len(topology._edges)} edges, {len(topology._multihop_nodes)} multihop nodes, {len(queries)} queries')
+    spf_time = bench_dijkstra_spf(topology, queries)
+    print(f'dijkstra_spf:                 {spf_time:8.3f}s')
+    graph_time, build_time = bench_path_search_graph(topology, queries, batched=False)
+    print(f'PathSearchGraph:              {graph_time:8.3f}s (graph build {build_time:.3f}s)  x{spf_time / graph_time:.1f}')
+    batched_time, _ = bench_path_search_graph(topology, queries, batched=True)
+    print(f'PathSearchGraph, batched:     {batched_time:8.3f}s  x{spf_time / batched_time:.1f}')
+
+
+if __name__ == '__main__':
+    main()